@@ -10,6 +10,8 @@ Behavior:
     Title: <title>
 - Clicks reCAPTCHA checkbox (does NOT solve challenges)
 - Submits immediately (no console ENTER), then continues to the next row
+- Runs WORKERS browsers at once; rows already submitted (STATE_FILE) are
+  skipped on a rerun
 - Logs per-row status to an output Excel
 
 Tested with: Selenium 4.x, Firefox + geckodriver
@@ -19,8 +21,9 @@ import os
 import time
 import sys
 import traceback
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, List
 
 import pandas as pd
@@ -36,6 +39,11 @@ from selenium.common.exceptions import (
     InvalidSessionIdException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.form_runner import FormRunner  # noqa: E402
+from common.store import ResultsStore  # noqa: E402
+
 # =========================
 # ====== CONSTANTS ========
 # =========================
@@ -44,6 +52,7 @@ FORM_URL = "https://www.sos.alabama.gov/public-records-request-form"
 # Input / Output paths (edit as needed)
 INPUT_XLSX = r"C:\Users\MANIRAJ\Downloads\alabama_vss_opportunities.xlsx"  # expects columns: notice_id, title
 OUTPUT_XLSX = r"C:\Users\MANIRAJ\Downloads\alabama_requests_output.xlsx"
+STATE_FILE = "alabama_requests_state.jsonl"  # per-row progress; a rerun resumes from it
 
 # Geckodriver path (if not on PATH)
 GECKODRIVER_PATH = r"C:\Users\MANIRAJ\Downloads\Firefox Driver\geckodriver.exe"
@@ -75,6 +84,9 @@ CLICK_TIMEOUT = 12
 # Retry policy
 MAX_ROW_RETRIES = 1  # retry a row once if the browser session dies
 
+# Browsers submitting at once
+WORKERS = 2
+
 # =========================
 # ====== UTILITIES ========
 # =========================
@@ -308,9 +320,12 @@ def set_state_required(driver: webdriver.Firefox, wanted_text: str = "Texas") ->
 
     raise RuntimeError("State (required) could not be set to Texas.")
 
+def specific_records_text(notice_id: Optional[str], title: Optional[str]) -> str:
+    return f"Notice ID: {notice_id or ''}\nTitle: {title or ''}"
+
 def fill_specific_records(driver: webdriver.Firefox, notice_id: Optional[str], title: Optional[str]) -> bool:
     """Fill 'Specific Records Requested' with row values."""
-    value = f"Notice ID: {notice_id or ''}\nTitle: {title or ''}"
+    value = specific_records_text(notice_id, title)
     spec_id = by_label_text(driver, "Specific Records Requested")
     target = None
     if spec_id:
@@ -368,12 +383,15 @@ def safe_accept_alert(driver: webdriver.Firefox):
 # =========================
 # ========= MAIN ==========
 # =========================
-def process_single_row(notice_id: Optional[str], title: Optional[str]) -> RowResult:
+def process_single_row(notice_id: Optional[str], title: Optional[str], driver=None) -> RowResult:
+    """Fill and send one request; uses ``driver`` if given, else a browser of its own."""
     confirmation_text = None
     status = "STARTED"
     message = ""
 
-    driver = launch_driver()
+    own_driver = driver is None
+    if own_driver:
+        driver = launch_driver()
     wait = WebDriverWait(driver, PAGE_TIMEOUT)
 
     try:
@@ -537,10 +555,11 @@ def process_single_row(notice_id: Optional[str], title: Optional[str]) -> RowRes
         message = f"Error: {e}"
         traceback.print_exc()
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        if own_driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
 
     return RowResult(
         notice_id=notice_id,
@@ -561,25 +580,45 @@ def main():
         print("Expected columns missing: 'notice_id', 'title'")
         sys.exit(1)
 
-    results: List[RowResult] = []
+    rows = [
+        (str(row.get("notice_id") or "").strip() or None, str(row.get("title") or "").strip() or None)
+        for _, row in df.iterrows()
+    ]
 
-    for _, row in df.iterrows():
-        notice_id = str(row.get("notice_id") or "").strip() or None
-        title = str(row.get("title") or "").strip() or None
+    def submit_one_row(driver, row, row_num) -> RowResult:
+        return process_single_row(row[0], row[1], driver)
 
-        res = process_single_row(notice_id, title)
+    def session_died(res: RowResult) -> bool:
         if res.status == "FAILED" and (
             "InvalidSessionIdException" in (res.message or "")
             or "Failed to decode response from marionette" in (res.message or "")
             or "WebDriver error" in (res.message or "")
         ):
-            print(">>> Retrying this row once due to browser session issue...")
-            res = process_single_row(notice_id, title)
+            print(f">>> Browser session issue on {res.notice_id}; the row is retried on a fresh browser")
+            return True
+        return False
 
-        results.append(res)
+    # Results come back as dicts (RowResult fields), also for rows resumed from STATE_FILE or
+    # the shared submission ledger; a FAILED row is logged there as failed and tried next run
+    ledger = ResultsStore()
+    runner = FormRunner(
+        "Alabama", submit_one_row, portal=FORM_URL, key=lambda row: row[0], state_path=STATE_FILE,
+        workers=WORKERS, retries=MAX_ROW_RETRIES, retry=session_died,
+        accepted=lambda res: res.status != "FAILED", ledger=ledger,
+        template=lambda row: specific_records_text(*row), confirmation=lambda res: res.confirmation_text,
+        launcher=lambda profile_dir, download_dir: launch_driver(),
+    )
+    try:
+        outcomes = runner.run(rows)
+    finally:
+        ledger.close()
+    results: List[dict] = [
+        res or asdict(RowResult(notice_id, title, "FAILED", "Error: see log", None, None))
+        for (notice_id, title), res in zip(rows, outcomes)
+    ]
 
     # Write output
-    out_df = pd.DataFrame([r.__dict__ for r in results])
+    out_df = pd.DataFrame(results)
     out_df.to_excel(OUTPUT_XLSX, index=False)
     print(f"\nOutput written: {OUTPUT_XLSX}\n")
 
@@ -41,26 +41,18 @@ SENDER_EMAIL=pathamaniraj97@gmail.com
 """
 
 import os
-import ssl
-import time
-import socket
-import smtplib
+import sys
 import argparse
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+from pathlib import Path
+from typing import Any, Dict, List, Set
 
 import pandas as pd
-from email.message import EmailMessage
-from email.utils import formatdate
-from dotenv import load_dotenv
-from smtplib import (
-    SMTP,
-    SMTP_SSL,
-    SMTPServerDisconnected,
-    SMTPAuthenticationError,
-    SMTPResponseException,
-    SMTPDataError,
-)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.foia_mail import load_sent_row_indices, read_table, send_request  # noqa: E402
+from common.mailer import DEFAULT_PER_MINUTE, SmtpTransport, build_message, load_smtp  # noqa: E402
+from common.store import RequestKey, ResultsStore, notice_id_of  # noqa: E402
 
 # ===================== YOUR FIXED REQUESTER DETAILS ===================== #
 REQUESTER = {
@@ -72,9 +64,6 @@ REQUESTER = {
 }
 DEFAULT_RECIPIENT = "law.recordsrequest@alaska.gov"
 
-# Known transient SMTP response codes
-TRANSIENT_SMTP_CODES = {421, 450, 451, 452, 454}
-
 # ============================ CSV FIELD SET ============================= #
 # These are the exact columns found in your alaska_vss_results.csv.
 EXPECTED_COLS = [
@@ -85,17 +74,6 @@ EXPECTED_COLS = [
 ]
 
 # ============================== HELPERS ================================= #
-def read_table(path: str) -> pd.DataFrame:
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".csv":
-        return pd.read_csv(path)
-    if ext in {".xlsx", ".xlsm"}:
-        return pd.read_excel(path, engine="openpyxl")
-    if ext == ".xls":
-        # xlrd only supports .xls with a specific version; prefer saving to .xlsx
-        raise RuntimeError("Please save the .xls as .xlsx or .csv and re-run.")
-    raise ValueError(f"Unsupported file type: {ext}. Use .csv/.xlsx/.xlsm")
-
 def nz(val: Any) -> str:
     """Normalize to a clean string ('' if NaN/None/blank)."""
     if val is None:
@@ -197,104 +175,6 @@ Sincerely,
 {REQUESTER['phone']}
 """
 
-def load_smtp(args=None) -> Dict[str, str]:
-    load_dotenv()
-    host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    port = int(os.getenv("SMTP_PORT", "587"))
-    if args and args.smtp_host:
-        host = args.smtp_host
-    if args and args.smtp_port:
-        port = args.smtp_port
-    username = os.getenv("SMTP_USERNAME")
-    password = os.getenv("SMTP_PASSWORD")
-    sender_name = os.getenv("SENDER_NAME", REQUESTER["name"])
-    sender_email = os.getenv("SENDER_EMAIL", REQUESTER["email"])
-
-    missing = [k for k, v in {
-        "SMTP_USERNAME": username,
-        "SMTP_PASSWORD": password,
-        "SENDER_NAME": sender_name,
-        "SENDER_EMAIL": sender_email,
-    }.items() if not v]
-    if missing:
-        raise RuntimeError(f"Missing in .env: {', '.join(missing)}")
-    return {"host": host, "port": port, "username": username, "password": password,
-            "sender_name": sender_name, "sender_email": sender_email}
-
-def _open_smtp(smtp_conf: Dict[str, str], use_ssl: bool) -> smtplib.SMTP:
-    if use_ssl:
-        ctx = ssl.create_default_context()
-        srv = SMTP_SSL(smtp_conf["host"], smtp_conf["port"], timeout=60, context=ctx)
-        srv.login(smtp_conf["username"], smtp_conf["password"])
-    else:
-        srv = SMTP(smtp_conf["host"], smtp_conf["port"], timeout=60)
-        srv.ehlo()
-        srv.starttls(context=ssl.create_default_context())
-        srv.ehlo()
-        srv.login(smtp_conf["username"], smtp_conf["password"])
-    return srv
-
-def send_with_retries(
-    smtp_conf: Dict[str, str],
-    to_addr: str,
-    subject: str,
-    body: str,
-    max_retries: int = 5,
-    prefer_ssl: bool = False,
-) -> None:
-    attempt = 0
-    delay_seq = [5, 15, 45, 90, 180]
-    last_exc: Optional[Exception] = None
-    modes = [prefer_ssl, not prefer_ssl]  # try preferred first, then alternate
-    mode_index = 0
-
-    while attempt <= max_retries:
-        use_ssl = modes[min(mode_index, len(modes)-1)]
-        try:
-            with _open_smtp(smtp_conf, use_ssl=use_ssl) as server:
-                msg = EmailMessage()
-                msg["From"] = f"{smtp_conf['sender_name']} <{smtp_conf['sender_email']}>"
-                msg["To"] = to_addr
-                msg["Date"] = formatdate(localtime=True)
-                msg["Subject"] = subject
-                msg.set_content(body)
-                server.send_message(msg)
-            return
-        except (SMTPServerDisconnected, socket.timeout, socket.gaierror) as e:
-            last_exc = e
-            if attempt in (1, 2) and mode_index == 0:
-                mode_index = 1  # flip STARTTLS<->SSL after a couple attempts
-        except SMTPDataError as e:
-            if e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-        except SMTPAuthenticationError as e:
-            raise RuntimeError(
-                "SMTP authentication failed. If using Gmail, enable 2-Step Verification "
-                "and use a 16-character App Password in SMTP_PASSWORD."
-            ) from e
-        except SMTPResponseException as e:
-            if 400 <= e.smtp_code < 500 or e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-
-        if attempt == max_retries:
-            break
-        time.sleep(delay_seq[min(attempt, len(delay_seq)-1)])
-        attempt += 1
-
-    raise RuntimeError(f"SMTP send failed after {max_retries+1} attempts: {last_exc}")
-
-def load_sent_row_indices(resume_log_path: str) -> Set[int]:
-    try:
-        log = pd.read_excel(resume_log_path)
-        sent = log.loc[log["status"].str.upper() == "SENT", "row_index"]
-        return set(int(i) for i in sent.dropna().tolist())
-    except Exception:
-        return set()
-
 # ================================ MAIN =================================== #
 def main():
     ap = argparse.ArgumentParser(description="Alaska Public Records (FOIA) emailer – one email per row.")
@@ -305,7 +185,9 @@ def main():
     ap.add_argument("--skip-blank-rows", action="store_true", help="Drop rows that are entirely blank.")
     ap.add_argument("--log-out", help="Optional path for send log (.xlsx). Default: alongside input.")
     ap.add_argument("--resume-log", help="Existing log to skip rows already SENT.")
+    ap.add_argument("--ledger", help="Submission ledger database (default: $FOIA_RESULTS_DB or results.db); requests it has as sent are skipped.")
     ap.add_argument("--ssl", action="store_true", help="Use SMTPS (SSL, usually port 465) instead of STARTTLS (587).")
+    ap.add_argument("--per-minute", type=float, default=DEFAULT_PER_MINUTE, help="Send at most this many emails per minute.")
     ap.add_argument("--smtp-host", help="Override SMTP host (else use .env).")
     ap.add_argument("--smtp-port", type=int, help="Override SMTP port (465 for SSL, 587 for STARTTLS).")
     args = ap.parse_args()
@@ -340,13 +222,17 @@ def main():
     print(f"[INFO] Loaded {total} rows from: {args.input}")
 
     smtp_conf = None
+    transport = None
     if args.send:
-        smtp_conf = load_smtp(args)
+        smtp_conf = load_smtp(args.smtp_host, args.smtp_port, REQUESTER["name"], REQUESTER["email"])
+        transport = SmtpTransport(smtp_conf, prefer_ssl=args.ssl, per_minute=args.per_minute)
         print("[INFO] SMTP ready. SENDING mode is ON.")
 
     to_addr = (args.to_override or DEFAULT_RECIPIENT).strip()
     print(f"[INFO] Recipient: {to_addr}")
 
+    ledger = ResultsStore(args.ledger) if args.send else None
+
     results: List[Dict[str, Any]] = []
 
     for i, row in df.reset_index(drop=True).iterrows():
@@ -373,13 +259,13 @@ def main():
         status = "DRY-RUN"
         err = ""
         if args.send:
-            try:
-                send_with_retries(smtp_conf, to_addr, subject, body, max_retries=5, prefer_ssl=args.ssl)
-                status = "SENT"
-                time.sleep(1.0)
-            except Exception as e:
-                status = "ERROR"
-                err = str(e)
+            key = RequestKey.of("Alaska", to_addr, notice_id_of(row, subject), body, row)
+            status, err = send_request(
+                transport, lambda: build_message(smtp_conf, to_addr, subject, body), ledger, key,
+            )
+            if status == "SKIPPED":
+                print(f"[SKIP] Row {i}: {err}.")
+            elif status == "ERROR":
                 print(f"[ERROR] Row {i}: {err}")
 
         results.append({
@@ -403,6 +289,12 @@ def main():
     except Exception as e:
         print(f"[WARN] Could not save updated table with Purpose: {e}")
 
+    if transport is not None:
+        transport.close()
+
+    if ledger is not None:
+        ledger.close()
+
     # Save send log
     log_df = pd.DataFrame(results)
     out_log = args.log_out or f"{base}_send_log_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
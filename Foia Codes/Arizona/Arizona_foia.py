@@ -1,6 +1,7 @@
 # Requirements:
 # pip install selenium webdriver-manager pandas openpyxl
 
+import sys
 import time
 import pandas as pd
 from pathlib import Path
@@ -10,9 +11,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import (
     ElementClickInterceptedException,
     TimeoutException,
@@ -21,9 +20,16 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.browser_pool import chrome_service  # noqa: E402
+from common.form_runner import FormRunner, prompt  # noqa: E402
+from common.store import ResultsStore  # noqa: E402
+
 
 INPUT_XLSX = "az_app_awarded_achieved1.xlsx"   
 OUTPUT_XLSX = "az_app_awarded_results.xlsx"    
+STATE_FILE = "az_app_awarded_state.jsonl"      # per-row progress; a rerun resumes from it
 FORM_URL = "https://doa.az.gov/public-information-and-records-request-form"
 
 
@@ -37,6 +43,7 @@ REQUEST_TYPE_VALUE = "416"
 
 
 MAX_CAPTCHA_TRIES = 5
+WORKERS = 2                                    # browsers filling forms at once
 
 
 def build_summary(label, agency, code):
@@ -54,8 +61,7 @@ def start_driver():
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
     driver.set_page_load_timeout(60)
     return driver
 
@@ -171,8 +177,7 @@ def submit_one_row(driver, row, row_num):
     while tries < MAX_CAPTCHA_TRIES:
         tries += 1
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        print(f"Row {row_num} - Attempt {tries}: Solve the CAPTCHA in the browser window, then press Enter here...")
-        input("Press Enter to click Submit...")
+        prompt(f"Row {row_num} - Attempt {tries}: Solve the CAPTCHA in the browser window, then press Enter to click Submit...", driver)
 
         
         try:
@@ -209,24 +214,34 @@ def main():
         if col not in df.columns:
             df[col] = ""
 
-    driver = start_driver()
-    results = []
+    def request_text(row):
+        return build_summary(str(row.get("Label", "") or ""), str(row.get("Agency", "") or ""),
+                             str(row.get("Code", "") or ""))
+
+    # every attempt goes to the shared submission ledger; awards it has as sent are not requested again
+    ledger = ResultsStore()
+    runner = FormRunner(
+        "Arizona", submit_one_row, portal=FORM_URL, key=lambda row: row.get("Code"),
+        state_path=STATE_FILE, workers=WORKERS, accepted=lambda result: result == "success",
+        ledger=ledger, template=request_text, launcher=lambda profile_dir, download_dir: start_driver(),
+    )
+    rows = [row for _, row in df.iterrows()]
     try:
-        for idx, row in df.iterrows():
-            result_flag = submit_one_row(driver, row, idx + 1)
-            results.append({
-                "Label": row.get("Label", ""),
-                "Commodity": row.get("Commodity", ""),
-                "Agency": row.get("Agency", ""),
-                "Status": row.get("Status", ""),
-                "RFx Awarded": row.get("RFx Awarded", ""),
-                "Begin (UTC-7)": row.get("Begin (UTC-7)", ""),
-                "End (UTC-7)": row.get("End (UTC-7)", ""),
-                "success": result_flag
-            })
-            time.sleep(1)
+        flags = runner.run(rows)
     finally:
-        driver.quit()
+        ledger.close()
+    results = []
+    for row, result_flag in zip(rows, flags):
+        results.append({
+            "Label": row.get("Label", ""),
+            "Commodity": row.get("Commodity", ""),
+            "Agency": row.get("Agency", ""),
+            "Status": row.get("Status", ""),
+            "RFx Awarded": row.get("RFx Awarded", ""),
+            "Begin (UTC-7)": row.get("Begin (UTC-7)", ""),
+            "End (UTC-7)": row.get("End (UTC-7)", ""),
+            "success": result_flag or "fail"
+        })
 
     out_df = pd.DataFrame(results)[
         ["Label", "Commodity", "Agency", "Status", "RFx Awarded", "Begin (UTC-7)", "End (UTC-7)", "success"]
@@ -13,7 +13,7 @@ Usage:
   python nevada.py --input "C:/path/nevada_closed_results.xlsx" --send --limit 10
 
   # Use SMTPS/SSL on 465 (often fixes 'Connection unexpectedly closed')
-  python nevada.py --input "C:/path/bidSearchResults.xls" --send --ssl --pause 2
+  python nevada.py --input "C:/path/bidSearchResults.xls" --send --ssl --per-minute 30
 
   # Test to yourself (no sending)
   python nevada.py --input "C:/path/nevada_closed_results.xlsx" --to-override "pathamaniraj97@gmail.com"
@@ -36,26 +36,18 @@ Requirements:
 """
 
 import os
-import ssl
-import time
-import socket
-import smtplib
+import sys
 import argparse
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+from pathlib import Path
+from typing import Any, Dict, List, Set
 
 import pandas as pd
-from email.message import EmailMessage
-from email.utils import formatdate
-from dotenv import load_dotenv
-from smtplib import (
-    SMTP,
-    SMTP_SSL,
-    SMTPServerDisconnected,
-    SMTPAuthenticationError,
-    SMTPResponseException,
-    SMTPDataError,
-)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.foia_mail import load_sent_row_indices, read_table, send_request  # noqa: E402
+from common.mailer import DEFAULT_PER_MINUTE, SmtpTransport, build_message, load_smtp  # noqa: E402
+from common.store import RequestKey, ResultsStore, notice_id_of  # noqa: E402
 
 # -------------------------- FIXED REQUESTER FIELDS --------------------------
 REQUESTER = {
@@ -70,27 +62,8 @@ REQUESTER = {
 }
 
 DEFAULT_RECIPIENT = "DeptAdmin@admin.nv.gov"
-TRANSIENT_SMTP_CODES = {421, 450, 451, 452, 454}
 
 # ------------------------------- Helpers -----------------------------------
-def read_table(path: str) -> pd.DataFrame:
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".csv":
-        return pd.read_csv(path)
-    if ext in {".xlsx", ".xlsm"}:
-        return pd.read_excel(path, engine="openpyxl")
-    if ext == ".xls":
-        try:
-            return pd.read_excel(path, engine="xlrd")
-        except ImportError as e:
-            raise RuntimeError(
-                "This .xls file requires xlrd>=2.0.1.\n"
-                "Install and retry:\n"
-                "  pip uninstall -y xlrd && pip install xlrd==2.0.1\n"
-                "Or Save As .xlsx and rerun."
-            ) from e
-    raise ValueError(f"Unsupported file type: {ext}. Use .csv, .xlsx, .xlsm, or .xls")
-
 def s(val: Any) -> str:
     return "" if pd.isna(val) else str(val).strip()
 
@@ -153,109 +126,6 @@ Sincerely,
 {REQUESTER['phone']}
 """
 
-def load_smtp(args=None) -> Dict[str, str]:
-    load_dotenv()
-    host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    port = int(os.getenv("SMTP_PORT", "587"))
-    if args and args.smtp_host:
-        host = args.smtp_host
-    if args and args.smtp_port:
-        port = args.smtp_port
-    username = os.getenv("SMTP_USERNAME")
-    password = os.getenv("SMTP_PASSWORD")
-    sender_name = os.getenv("SENDER_NAME", REQUESTER["name"])
-    sender_email = os.getenv("SENDER_EMAIL", REQUESTER["email"])
-
-    missing = [k for k, v in {
-        "SMTP_USERNAME": username,
-        "SMTP_PASSWORD": password,
-        "SENDER_NAME": sender_name,
-        "SENDER_EMAIL": sender_email,
-    }.items() if not v]
-    if missing:
-        raise RuntimeError(f"Missing in .env: {', '.join(missing)}")
-
-    return {"host": host, "port": port, "username": username, "password": password,
-            "sender_name": sender_name, "sender_email": sender_email}
-
-def _open_smtp(smtp_conf: Dict[str, str], use_ssl: bool) -> smtplib.SMTP:
-    try:
-        if use_ssl:
-            ctx = ssl.create_default_context()
-            srv = SMTP_SSL(smtp_conf["host"], smtp_conf["port"], timeout=60, context=ctx)
-            srv.login(smtp_conf["username"], smtp_conf["password"])
-        else:
-            srv = SMTP(smtp_conf["host"], smtp_conf["port"], timeout=60)
-            srv.ehlo()
-            srv.starttls(context=ssl.create_default_context())
-            srv.ehlo()
-            srv.login(smtp_conf["username"], smtp_conf["password"])
-        return srv
-    except SMTPAuthenticationError as e:
-        msg = (e.smtp_error or b"").decode("utf-8", errors="ignore")
-        if e.smtp_code == 534 or "5.7.9 Application-specific password required" in msg:
-            raise RuntimeError(
-                "Gmail rejected your login: an App Password is required.\n"
-                "Enable 2-Step Verification and create an App Password, then put it in SMTP_PASSWORD."
-            )
-        raise
-
-def send_with_retries(
-    smtp_conf: Dict[str, str],
-    to_addr: str,
-    subject: str,
-    body: str,
-    max_retries: int = 5,
-    prefer_ssl: bool = False,
-) -> None:
-    attempt = 0
-    delay_seq = [5, 15, 45, 90, 180]
-    last_exc: Optional[Exception] = None
-    modes = [prefer_ssl, not prefer_ssl]   # try preferred, then alternate once
-    mode_index = 0
-
-    while attempt <= max_retries:
-        use_ssl = modes[min(mode_index, len(modes)-1)]
-        try:
-            with _open_smtp(smtp_conf, use_ssl=use_ssl) as server:
-                msg = EmailMessage()
-                msg["From"] = f"{smtp_conf['sender_name']} <{smtp_conf['sender_email']}>"
-                msg["To"] = to_addr
-                msg["Date"] = formatdate(localtime=True)
-                msg["Subject"] = subject
-                msg.set_content(body)
-                server.send_message(msg)
-            return
-        except (SMTPServerDisconnected, socket.timeout, socket.gaierror) as e:
-            last_exc = e
-            if attempt in (1, 2) and mode_index == 0:
-                mode_index = 1  # flip STARTTLS<->SSL after a couple attempts
-        except SMTPDataError as e:
-            if e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-        except SMTPResponseException as e:
-            if 400 <= e.smtp_code < 500 or e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-
-        if attempt == max_retries:
-            break
-        time.sleep(delay_seq[min(attempt, len(delay_seq)-1)])
-        attempt += 1
-
-    raise RuntimeError(f"SMTP send failed after {max_retries+1} attempts: {last_exc}")
-
-def load_sent_row_indices(resume_log_path: str) -> Set[int]:
-    try:
-        log = pd.read_excel(resume_log_path)
-        sent = log.loc[log["status"].str.upper() == "SENT", "row_index"]
-        return set(int(i) for i in sent.dropna().tolist())
-    except Exception:
-        return set()
-
 # --------------------------------- Main ------------------------------------
 def main():
     ap = argparse.ArgumentParser(description="Nevada PRR emailer (robust).")
@@ -265,8 +135,10 @@ def main():
     ap.add_argument("--limit", type=int, default=0, help="If >0, only process this many rows.")
     ap.add_argument("--skip-blank-rows", action="store_true", help="Skip rows that are entirely blank.")
     ap.add_argument("--log-out", help="Optional path for results log (.xlsx). Default: alongside input.")
-    ap.add_argument("--pause", type=float, default=1.0, help="Seconds to sleep between emails (helps throttles).")
+    ap.add_argument("--per-minute", type=float, default=DEFAULT_PER_MINUTE, help="Send at most this many emails per minute.")
+    ap.add_argument("--pause", type=float, default=0.0, help=argparse.SUPPRESS)
     ap.add_argument("--resume-log", help="Existing log to skip rows already SENT.")
+    ap.add_argument("--ledger", help="Submission ledger database (default: $FOIA_RESULTS_DB or results.db); requests it has as sent are skipped.")
     ap.add_argument("--ssl", action="store_true", help="Use SMTPS (SSL) on port 465 instead of STARTTLS on 587.")
     ap.add_argument("--smtp-host", help="Override SMTP host (default from .env or smtp.gmail.com).")
     ap.add_argument("--smtp-port", type=int, help="Override SMTP port (465 for SSL, 587 for STARTTLS).")
@@ -288,13 +160,17 @@ def main():
     print(f"[INFO] Loaded {total} rows from: {args.input}")
 
     smtp_conf = None
+    transport = None
     if args.send:
-        smtp_conf = load_smtp(args)
+        smtp_conf = load_smtp(args.smtp_host, args.smtp_port, REQUESTER["name"], REQUESTER["email"])
+        transport = SmtpTransport(smtp_conf, prefer_ssl=args.ssl, per_minute=60.0 / args.pause if args.pause else args.per_minute)
         print("[INFO] SMTP loaded. SENDING mode is ON.")
 
     to_addr = (args.to_override or DEFAULT_RECIPIENT).strip()
     print(f"[INFO] Recipient: {to_addr}")
 
+    ledger = ResultsStore(args.ledger) if args.send else None
+
     results: List[Dict[str, Any]] = []
     for i, row in df.reset_index(drop=True).iterrows():
         if i in skip_indices:
@@ -319,14 +195,13 @@ def main():
         status = "DRY-RUN"
         err = ""
         if args.send:
-            try:
-                # prefer_ssl ties to --ssl flag
-                send_with_retries(smtp_conf, to_addr, subject, body, max_retries=5, prefer_ssl=args.ssl)
-                status = "SENT"
-                time.sleep(max(args.pause, 0.0))
-            except Exception as e:
-                status = "ERROR"
-                err = str(e)
+            key = RequestKey.of("Nevada", to_addr, notice_id_of(row, subject), body, row)
+            status, err = send_request(
+                transport, lambda: build_message(smtp_conf, to_addr, subject, body), ledger, key,
+            )
+            if status == "SKIPPED":
+                print(f"[SKIP] Row {i}: {err}.")
+            elif status == "ERROR":
                 print(f"[ERROR] Row {i}: {err}")
 
         results.append({
@@ -338,6 +213,12 @@ def main():
             "timestamp": datetime.now().isoformat(timespec="seconds"),
         })
 
+    if transport is not None:
+        transport.close()
+
+    if ledger is not None:
+        ledger.close()
+
     # Log to Excel
     log_df = pd.DataFrame(results)
     if args.log_out:
@@ -30,12 +30,10 @@ except Exception:
     uc = None
     USE_UNDETECTED = False
 
-# webdriver_manager if available
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    HAVE_WDM = True
-except Exception:
-    HAVE_WDM = False
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.browser_pool import BrowserPool, chrome_service  # noqa: E402
+from common.store import RequestKey, ResultsStore  # noqa: E402
 
 # ---------------------------
 # Config
@@ -62,6 +60,8 @@ DEPT_TEXT_TREASURY = "Treasury"
 DIVISION_TEXT_TARGET = "Purchase and Property"
 DIVISION_VALUE_SEGMENT = ":PUR:"
 
+STORE_STATE = "New Jersey"   # bids come from the results store when the NJSTART scraper has filled it
+CHANNEL = "opra_web_form"    # requests are logged to the store's submission ledger; a rerun skips sent ones
 INPUT_XLSX = "/home/developer/Desktop/US-State-Foia-Scrapers/Scrapper Codes/Newjersy/njstart_bid_to_po_all.xlsx"
 OUTPUT_XLSX = "opra_submit_results4.xlsx"
 
@@ -78,6 +78,8 @@ OUTPUT_COLUMNS = [
 MAX_IFRAME_DEPTH = 6
 WINDOW_SIZE = "1366,900"
 PAGE_LOAD_TIMEOUT = 95
+# One active browser plus warm spares, so a WAF rotation does not wait for a cold start
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
 DRIVER_CREATE_RETRIES = 2
 
 # Row cap (first N rows)
@@ -192,29 +194,25 @@ def make_chrome_options(user_data_dir, for_uc=False, proxy_url=None):
 
     return opts
 
-def create_driver(use_headless=False):
-    tmp_dir = tempfile.mkdtemp(prefix="chrome_sess_")
+def create_driver(user_data_dir, use_headless=False):
     proxy = random_proxy()
+    print("[info] launching browser, proxy:", proxy or "none")
 
     if USE_UNDETECTED and uc is not None:
-        opts = make_chrome_options(tmp_dir, for_uc=True, proxy_url=proxy)
+        opts = make_chrome_options(user_data_dir, for_uc=True, proxy_url=proxy)
         if use_headless:
             opts.add_argument("--headless=new")
         driver = uc.Chrome(options=opts)
         driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
-        return driver, tmp_dir, proxy
+        return driver
 
     # vanilla fallback
-    opts = make_chrome_options(tmp_dir, for_uc=False, proxy_url=proxy)
+    opts = make_chrome_options(user_data_dir, for_uc=False, proxy_url=proxy)
     if use_headless:
         opts.add_argument("--headless=new")
-    service = None
-    if HAVE_WDM:
-        try:
-            service = Service(ChromeDriverManager().install())
-        except Exception:
-            service = Service()
-    else:
+    try:
+        service = chrome_service()
+    except Exception:
         service = Service()
     driver = se_webdriver.Chrome(service=service, options=opts)
     driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
@@ -225,20 +223,20 @@ def create_driver(use_headless=False):
         })
     except Exception:
         pass
-    return driver, tmp_dir, proxy
+    return driver
 
-def rebuild_session(old_driver, old_tmp):
-    try:
-        if old_driver:
-            old_driver.quit()
-    except Exception:
-        pass
-    try:
-        if old_tmp and os.path.isdir(old_tmp):
-            shutil.rmtree(old_tmp, ignore_errors=True)
-    except Exception:
-        pass
-    return create_driver(use_headless=False)
+def create_pool():
+    return BrowserPool(
+        size=BROWSER_POOL_SIZE,
+        launcher=lambda profile_dir, download_dir: create_driver(profile_dir, use_headless=False),
+    )
+
+def rebuild_session(pool, old):
+    """Retire the current browser (profile and all) and switch to a warm one."""
+    if old is not None:
+        old.discard()
+        pool.release(old)
+    return pool.acquire()
 
 # ---------------------------
 # Frame helpers
@@ -505,6 +503,9 @@ def wait_for_state_request_form(driver, timeout=55):
 # Form & submission
 # ---------------------------
 
+def request_text(bid_solicitation_value):
+    return ("I am requesting a copy of the winning and shortlisted proposals. " f"The solicitation/contract number is {bid_solicitation_value}.")
+
 def fill_request_form(driver, bid_solicitation_value, timeout=35):
     wait = WebDriverWait(driver, timeout)
     f = wait.until(EC.element_to_be_clickable((By.ID, "first"))); f.clear(); human_pause(); f.send_keys(FIRST_NAME); human_pause()
@@ -542,7 +543,7 @@ def fill_request_form(driver, bid_solicitation_value, timeout=35):
                 continue
 
     m = driver.find_element(By.ID, "maxCost"); m.clear(); human_pause(); m.send_keys(MAX_AUTH_COST); human_pause(); m.send_keys(Keys.TAB); human_pause()
-    message = ("I am requesting a copy of the winning and shortlisted proposals. " f"The solicitation/contract number is {bid_solicitation_value}.")
+    message = request_text(bid_solicitation_value)
     msg = driver.find_element(By.ID, "message"); msg.clear(); human_pause(); msg.send_keys(message); human_pause()
 
 def click_accept_if_present(driver, timeout=15):
@@ -625,28 +626,38 @@ def get_bid_solicitation_value(row):
 # Main
 # ---------------------------
 
-def main():
+def load_bids(store):
+    """First MAX_ROWS bids: from the results store, else from INPUT_XLSX."""
+    if store.has_opportunities(STORE_STATE):
+        print(f"[info] reading {STORE_STATE} bids from {store.path}")
+        return store.opportunities_frame(STORE_STATE, limit=MAX_ROWS)
     if not Path(INPUT_XLSX).exists():
         print(f"Input file not found: {INPUT_XLSX}", file=sys.stderr)
         sys.exit(1)
-
     # Limit to first MAX_ROWS rows using DataFrame.head(n) [web:125]
-    df = pd.read_excel(INPUT_XLSX).head(MAX_ROWS)
+    return pd.read_excel(INPUT_XLSX).head(MAX_ROWS)
+
+
+def main():
+    store = ResultsStore()
+    df = load_bids(store)
     out_df = ensure_output_columns(df)
 
+    pool = create_pool()
+    session = None
     driver = None
-    tmp_profile_dir = None
 
     try:
-        driver, tmp_profile_dir, proxy = create_driver(use_headless=False)
-        print("[info] session proxy:", proxy or "none")
+        session = pool.acquire()
+        driver = session.driver
 
         open_portal_try_urls(driver)
         if is_waf_block(driver):
             print("[warn] WAF on initial load; cool-down and rotate session...")
             human_pause(WAF_BACKOFF_MIN, WAF_BACKOFF_MAX)
-            driver, tmp_profile_dir, proxy = rebuild_session(driver, tmp_profile_dir)
-            print("[info] new session proxy:", proxy or "none")
+            session = rebuild_session(pool, session)
+            driver = session.driver
+            print("[info] switched to a new session")
             open_portal_try_urls(driver)
 
         select_department_treasury(driver)
@@ -661,8 +672,9 @@ def main():
                 if attempt >= 3:
                     raise
                 human_pause(WAF_BACKOFF_MIN, WAF_BACKOFF_MAX)
-                driver, tmp_profile_dir, proxy = rebuild_session(driver, tmp_profile_dir)
-                print("[info] rotated session proxy:", proxy or "none")
+                session = rebuild_session(pool, session)
+                driver = session.driver
+                print("[info] rotated session")
                 open_portal_try_urls(driver)
                 select_department_treasury(driver)
 
@@ -670,6 +682,12 @@ def main():
 
         statuses = []
         for idx, row in df.iterrows():
+            bid_value = get_bid_solicitation_value(row)
+            key = RequestKey.of(STORE_STATE, DIVISION_TEXT_TARGET, bid_value, request_text(bid_value), row) if bid_value else None
+            submitted = False
+            if key is not None and store.request_status(key) in ("sent", "pending"):
+                statuses.append(f"Skipped: {store.request_status(key)} in the submission ledger")
+                continue
             human_pause(PER_ROW_MIN, PER_ROW_MAX)
             if (idx + 1) % LONG_REST_EVERY == 0:
                 print("[info] periodic long rest...")
@@ -679,8 +697,9 @@ def main():
                 if is_waf_block(driver):
                     statuses.append("Fail: WAF blocked (Error 15)")
                     human_pause(WAF_BACKOFF_MIN, WAF_BACKOFF_MAX)
-                    driver, tmp_profile_dir, proxy = rebuild_session(driver, tmp_profile_dir)
-                    print("[info] rotated after WAF, proxy:", proxy or "none")
+                    session = rebuild_session(pool, session)
+                    driver = session.driver
+                    print("[info] rotated after WAF")
                     open_portal_try_urls(driver)
                     select_department_treasury(driver)
                     select_division_purchase_and_property(driver)
@@ -696,18 +715,24 @@ def main():
                 except Exception:
                     pass
 
-                bid_value = get_bid_solicitation_value(row)
                 if not bid_value:
                     statuses.append("Fail: Missing Bid Solicitation #")
                     continue
+                if not store.begin_request(key, channel=CHANNEL):
+                    statuses.append(f"Skipped: {store.request_status(key)} in the submission ledger")
+                    continue
 
                 fill_request_form(driver, bid_value)
+                submitted = True
                 ok = submit_request(driver)
                 if not ok and is_waf_block(driver):
                     statuses.append("Fail: WAF blocked (Error 15)")
+                    store.finish_request(key, "failed", detail=statuses[-1], channel=CHANNEL)
                 else:
                     outcome, msg = detect_submission_outcome(driver, timeout=40)
                     statuses.append(f"{outcome}: {msg}")
+                    store.finish_request(key, "sent" if outcome == "Success" else "failed",
+                                         confirmation=msg if outcome == "Success" else "", detail=msg, channel=CHANNEL)
 
                 human_pause(1.2, 2.2)
                 try:
@@ -721,10 +746,14 @@ def main():
 
             except Exception as e:
                 statuses.append(f"Fail: {type(e).__name__} - {str(e)[:180]}")
+                # an error after the click may still have reached OPRA: leave that request pending
+                if key is not None and not submitted and store.request_status(key) == "pending":
+                    store.finish_request(key, "failed", detail=statuses[-1], channel=CHANNEL)
                 human_pause(WAF_BACKOFF_MIN, WAF_BACKOFF_MAX)
                 try:
-                    driver, tmp_profile_dir, proxy = rebuild_session(driver, tmp_profile_dir)
-                    print("[info] rotated after exception, proxy:", proxy or "none")
+                    session = rebuild_session(pool, session)
+                    driver = session.driver
+                    print("[info] rotated after exception")
                     open_portal_try_urls(driver)
                     select_department_treasury(driver)
                     select_division_purchase_and_property(driver)
@@ -744,18 +773,16 @@ def main():
             debug_save_page(driver, "debug_initial_page.html")
     finally:
         try:
-            if driver is not None:
-                driver.quit()
-        except Exception:
-            pass
-        try:
-            if tmp_profile_dir and os.path.isdir(tmp_profile_dir):
-                if os.getenv("KEEP_TMP_PROFILE"):
-                    print("[info] keeping tmp profile dir:", tmp_profile_dir)
-                else:
-                    shutil.rmtree(tmp_profile_dir, ignore_errors=True)
+            if session is not None and os.getenv("KEEP_TMP_PROFILE"):
+                kept = shutil.copytree(session.profile_dir, tempfile.mkdtemp(prefix="chrome_sess_") + "/profile",
+                                       ignore_dangling_symlinks=True)
+                print("[info] keeping tmp profile dir:", kept)
         except Exception:
             pass
+        pool.close()
+        if session is not None:
+            pool.release(session)
+        store.close()
 
     print("Run ended with errors.", file=sys.stderr)
     sys.exit(1)
@@ -3,12 +3,26 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from pathlib import Path
+import sys
 import time
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.browser_pool import chrome_service  # noqa: E402
+from common.form_runner import FormRunner  # noqa: E402
+from common.store import ResultsStore  # noqa: E402
+
+FORM_URL = "https://www.bismarcknd.gov/FormCenter/Administration-2/Request-for-Public-Records-246"
+STATE_FILE = "north_dakota_foia_state.jsonl"  # per-row progress; a rerun resumes from it
+WORKERS = 2             # browsers filling forms at once
+REVIEW_SECONDS = 10     # filled form stays on screen this long before Submit
+RESULT_TIMEOUT = 15     # max wait for the error/thank-you message after Submit
+PORTAL_GAP = 5          # min seconds between two submissions (was 2 s per row + 30 s every 15 rows)
+
 def setup_driver():
     """Setup Chrome driver with options"""
     chrome_options = Options()
@@ -40,9 +54,7 @@ def setup_driver():
         print(f"Using Chrome/Chromium from: {chrome_binary}")
     
     try:
-        # Use webdriver-manager to automatically handle driver setup
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
         return driver
     except Exception as e:
         print(f"Error setting up Chrome driver: {e}")
@@ -53,37 +65,35 @@ def setup_driver():
         print("  sudo apt install google-chrome-stable")
         raise
 
+def request_text(notice_id, title):
+    return f"I am requesting a copy of the winning and shortlisted proposals for {notice_id}. The solicitation/contract number is {title}."
+
 def fill_form(driver, notice_id, title, first_name="Raaj", last_name="Thipparthy", email="raajnrao@gmail.com"):
     """Fill and submit the public records request form with proper success/error detection"""
     try:
-        url = "https://www.bismarcknd.gov/FormCenter/Administration-2/Request-for-Public-Records-246"
-        driver.get(url)
+        driver.get(FORM_URL)
         wait = WebDriverWait(driver, 10)
 
         # Fill First Name
         first_name_field = wait.until(EC.presence_of_element_located((By.ID, "e_1")))
         first_name_field.clear()
         first_name_field.send_keys(first_name)
-        time.sleep(1)
 
         # Fill Last Name
         last_name_field = driver.find_element(By.ID, "e_2")
         last_name_field.clear()
         last_name_field.send_keys(last_name)
-        time.sleep(1)
 
         # Fill Email
         email_field = driver.find_element(By.ID, "e_9")
         email_field.clear()
         email_field.send_keys(email)
-        time.sleep(1)
 
         # Fill Records
-        records_text = f"I am requesting a copy of the winning and shortlisted proposals for {notice_id}. The solicitation/contract number is {title}."
+        records_text = request_text(notice_id, title)
         records_field = driver.find_element(By.ID, "e_11")
         records_field.clear()
         records_field.send_keys(records_text)
-        time.sleep(1)
 
         # Select 'Other' Department
         other_checkbox = driver.find_element(By.ID, "e_14_7")
@@ -94,7 +104,6 @@ def fill_form(driver, notice_id, title, first_name="Raaj", last_name="Thipparthy
                 other_checkbox.click()
             except:
                 driver.execute_script("arguments[0].click();", other_checkbox)
-        time.sleep(1)
 
         # Uncheck 'Receive an email copy'
         email_copy_checkbox = driver.find_element(By.ID, "wantCopy")
@@ -105,9 +114,8 @@ def fill_form(driver, notice_id, title, first_name="Raaj", last_name="Thipparthy
                 email_copy_checkbox.click()
             except:
                 driver.execute_script("arguments[0].click();", email_copy_checkbox)
-        time.sleep(1)
 
-        time.sleep(10)
+        time.sleep(REVIEW_SECONDS)
 
         # Click Submit
         submit_button = driver.find_element(By.ID, "btnFormSubmit")
@@ -118,17 +126,25 @@ def fill_form(driver, notice_id, title, first_name="Raaj", last_name="Thipparthy
         except:
             driver.execute_script("arguments[0].click();", submit_button)
 
-        # Wait for response
-        time.sleep(3)
+        # Wait for response: an error or a thank-you message, whichever shows first
+        error_css = ".form-error, .error, .alert-danger"
+        success_xpath = "//*[contains(text(), 'Thank you') or contains(text(), 'successfully')]"
+        try:
+            WebDriverWait(driver, RESULT_TIMEOUT, ignored_exceptions=(StaleElementReferenceException,)).until(
+                lambda d: any(e.text.strip() for e in d.find_elements(By.CSS_SELECTOR, error_css))
+                or d.find_elements(By.XPATH, success_xpath)
+            )
+        except TimeoutException:
+            pass
 
         # Check for errors
-        error_elements = driver.find_elements(By.CSS_SELECTOR, ".form-error, .error, .alert-danger")
+        error_elements = driver.find_elements(By.CSS_SELECTOR, error_css)
         if error_elements:
             errors = [e.text for e in error_elements if e.text.strip() != ""]
             return "Form Rejected: " + "; ".join(errors)
 
         # Check for success messages
-        success_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'Thank you') or contains(text(), 'successfully')]")
+        success_elements = driver.find_elements(By.XPATH, success_xpath)
         if success_elements:
             return "Form Submitted Successfully"
         else:
@@ -153,27 +169,30 @@ def process_excel_file(input_file, output_file):
     if 'Success Msg' not in df.columns:
         df['Success Msg'] = ''
     
-    driver = setup_driver()
-    
+    def submit_one_row(driver, row, row_num):
+        print(f"\nProcessing row {row_num}/{len(df)}")
+        print(f"Notice ID: {row['Notice ID']}")
+        print(f"Title: {row['Title']}")
+        success_msg = fill_form(driver, row['Notice ID'], row['Title'])
+        print(f"Row {row_num} result: {success_msg}")
+        return success_msg
+
+    # fill_form reports a crashed page as "Error: ..."; that row gets one more try on a fresh browser.
+    # Only a confirmed submission counts as sent: rejected or unverified rows are recorded as failed.
+    # Attempts also go to the shared submission ledger, which skips notices already requested.
+    ledger = ResultsStore()
+    runner = FormRunner(
+        "North Dakota", submit_one_row, portal=FORM_URL, key=lambda row: row['Notice ID'],
+        state_path=STATE_FILE, workers=WORKERS, portal_gap=PORTAL_GAP,
+        retry=lambda msg: msg.startswith("Error:"), accepted=lambda msg: msg == "Form Submitted Successfully",
+        launcher=lambda profile_dir, download_dir: setup_driver(),
+        ledger=ledger, template=lambda row: request_text(row['Notice ID'], row['Title']),
+        confirmation=lambda msg: msg,
+    )
     try:
-        for index, row in df.iterrows():
-            notice_id = row['Notice ID']
-            title = row['Title']
-            
-            print(f"\nProcessing row {index + 1}/{len(df)}")
-            print(f"Notice ID: {notice_id}")
-            print(f"Title: {title}")
-            
-            success_msg = fill_form(driver, notice_id, title)
-            
-            df.at[index, 'Success Msg'] = success_msg
-            print(f"Result: {success_msg}")
-            
-            time.sleep(2)
-
-            if (index + 1) % 15 == 0:
-                print("⏸ Taking a 30-second break...")
-                time.sleep(30)
+        messages = runner.run([row for _, row in df.iterrows()])
+        for index, success_msg in zip(df.index, messages):
+            df.at[index, 'Success Msg'] = success_msg or "Error: see log"
 
         df.to_excel(output_file, index=False)
         print(f"\n✅ Process completed! Results saved to: {output_file}")
@@ -182,9 +201,8 @@ def process_excel_file(input_file, output_file):
         print(f"Error during processing: {e}")
         df.to_excel(output_file, index=False)
         print(f"Partial results saved to: {output_file}")
-        
     finally:
-        driver.quit()
+        ledger.close()
 
 if __name__ == "__main__":
     INPUT_FILE = r"C:\Users\ADMIN\Desktop\Scraper\north_dakota_closed_rfps.xlsx"
@@ -13,7 +13,7 @@ Usage examples:
   python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --limit 10
 
   # Send via SSL (465) with pacing (recommended if .env uses 465)
-  python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --ssl --smtp-port 465 --pause 2
+  python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --ssl --smtp-port 465 --per-minute 30
 
   # Test to a specific inbox first (no mass send)
   python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --limit 1 --ssl --smtp-port 465 --to-override "someone@example.com"
@@ -21,7 +21,7 @@ Usage examples:
   # Resume without resending rows already SENT per a prior log
   python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --resume-log "./eva_awarded_opportunities_100_send_log_YYYYMMDD_HHMM.xlsx"
   #when the default recipient is used, it is sent to
-  python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --pause 2 --ssl --smtp-port 465
+  python virginia_foia.py --input "./eva_awarded_opportunities_100.xlsx" --send --per-minute 30 --ssl --smtp-port 465
 
 Requirements:
   pip install pandas openpyxl python-dotenv python-dateutil
@@ -38,27 +38,19 @@ Requirements:
 """
 
 import os
+import sys
 import re
-import ssl
-import time
-import socket
-import smtplib
 import argparse
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
 
 import pandas as pd
-from email.message import EmailMessage
-from email.utils import formatdate
-from dotenv import load_dotenv
-from smtplib import (
-    SMTP,
-    SMTP_SSL,
-    SMTPServerDisconnected,
-    SMTPAuthenticationError,
-    SMTPResponseException,
-    SMTPDataError,
-)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.foia_mail import load_sent_row_indices, read_table, send_request  # noqa: E402
+from common.mailer import DEFAULT_PER_MINUTE, SmtpTransport, build_message, load_smtp  # noqa: E402
+from common.store import RequestKey, ResultsStore, notice_id_of  # noqa: E402
 
 REQUESTER = {
     "name": "Maniraj Patha",
@@ -72,25 +64,6 @@ REQUESTER = {
 }
 
 DEFAULT_RECIPIENT = "FOIA@governor.virginia.gov"
-TRANSIENT_SMTP_CODES = {421, 450, 451, 452, 454}
-
-def read_table(path: str) -> pd.DataFrame:
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".csv":
-        return pd.read_csv(path)
-    if ext in {".xlsx", ".xlsm"}:
-        return pd.read_excel(path, engine="openpyxl")
-    if ext == ".xls":
-        try:
-            return pd.read_excel(path, engine="xlrd")
-        except ImportError as e:
-            raise RuntimeError(
-                "This .xls file requires xlrd>=2.0.1.\n"
-                "Install and retry:\n"
-                "  pip uninstall -y xlrd && pip install xlrd==2.0.1\n"
-                "Or Save As .xlsx and rerun."
-            ) from e
-    raise ValueError(f"Unsupported file type: {ext}. Use .csv, .xlsx, .xlsm, or .xls")
 
 def s(val: Any) -> str:
     return "" if pd.isna(val) else str(val).strip()
@@ -165,59 +138,6 @@ Sincerely,
 {REQUESTER['phone']}
 """
 
-def load_smtp(args=None) -> Dict[str, str]:
-    load_dotenv()
-    host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    port = int(os.getenv("SMTP_PORT", "587"))
-    if args and args.smtp_host:
-        host = args.smtp_host
-    if args and args.smtp_port:
-        port = args.smtp_port
-    username = os.getenv("SMTP_USERNAME")
-    password = os.getenv("SMTP_PASSWORD")
-    sender_name = os.getenv("SENDER_NAME", REQUESTER["name"])
-    sender_email = os.getenv("SENDER_EMAIL", REQUESTER["email"])
-
-    missing = [k for k, v in {
-        "SMTP_USERNAME": username,
-        "SMTP_PASSWORD": password,
-        "SENDER_NAME": sender_name,
-        "SENDER_EMAIL": sender_email,
-    }.items() if not v]
-    if missing:
-        raise RuntimeError(f"Missing in .env: {', '.join(missing)}")
-
-    return {
-        "host": host,
-        "port": port,
-        "username": username,
-        "password": password,
-        "sender_name": sender_name,
-        "sender_email": sender_email,
-    }
-
-def _open_smtp(smtp_conf: Dict[str, str], use_ssl: bool) -> smtplib.SMTP:
-    try:
-        if use_ssl:
-            ctx = ssl.create_default_context()
-            srv = SMTP_SSL(smtp_conf["host"], smtp_conf["port"], timeout=60, context=ctx)
-            srv.login(smtp_conf["username"], smtp_conf["password"])
-        else:
-            srv = SMTP(smtp_conf["host"], smtp_conf["port"], timeout=60)
-            srv.ehlo()
-            srv.starttls(context=ssl.create_default_context())
-            srv.ehlo()
-            srv.login(smtp_conf["username"], smtp_conf["password"])
-        return srv
-    except SMTPAuthenticationError as e:
-        msg = (e.smtp_error or b"").decode("utf-8", errors="ignore")
-        if e.smtp_code == 534 or "5.7.9 Application-specific password required" in msg:
-            raise RuntimeError(
-                "Gmail rejected your login: an App Password is required.\n"
-                "Enable 2-Step Verification and create an App Password, then put it in SMTP_PASSWORD."
-            )
-        raise
-
 def normalize_email(addr: Optional[str]) -> str:
     if not addr:
         return ""
@@ -227,64 +147,6 @@ def normalize_email(addr: Optional[str]) -> str:
     m = re.search(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", a, flags=re.IGNORECASE)
     return m.group(1) if m else a
 
-def send_with_retries(
-    smtp_conf: Dict[str, str],
-    to_addr: str,
-    subject: str,
-    body: str,
-    max_retries: int = 5,
-    prefer_ssl: bool = False,
-) -> None:
-    attempt = 0
-    delay_seq = [5, 15, 45, 90, 180]
-    last_exc: Optional[Exception] = None
-    modes = [prefer_ssl, not prefer_ssl]  
-    mode_index = 0
-
-    to_addr = normalize_email(to_addr)
-
-    while attempt <= max_retries:
-        use_ssl = modes[min(mode_index, len(modes)-1)]
-        try:
-            with _open_smtp(smtp_conf, use_ssl=use_ssl) as server:
-                msg = EmailMessage()
-                msg["From"] = f"{smtp_conf['sender_name']} <{smtp_conf['sender_email']}>"
-                msg["To"] = to_addr
-                msg["Date"] = formatdate(localtime=True)
-                msg["Subject"] = subject
-                msg.set_content(body)
-                server.send_message(msg)
-            return
-        except (SMTPServerDisconnected, socket.timeout, socket.gaierror) as e:
-            last_exc = e
-            if attempt in (1, 2) and mode_index == 0:
-                mode_index = 1  
-        except SMTPDataError as e:
-            if e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-        except SMTPResponseException as e:
-            if 400 <= e.smtp_code < 500 or e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-
-        if attempt == max_retries:
-            break
-        time.sleep(delay_seq[min(attempt, len(delay_seq)-1)])
-        attempt += 1
-
-    raise RuntimeError(f"SMTP send failed after {max_retries+1} attempts: {last_exc}")
-
-def load_sent_row_indices(resume_log_path: str) -> Set[int]:
-    try:
-        log = pd.read_excel(resume_log_path)
-        sent = log.loc[log["status"].astype(str).str.upper() == "SENT", "row_index"]
-        return set(int(i) for i in sent.dropna().tolist())
-    except Exception:
-        return set()
-
 def main():
     ap = argparse.ArgumentParser(description="Virginia FOIA emailer (robust).")
     ap.add_argument("--input", required=True, help="Path to .xlsx/.xls/.csv with opportunities.")
@@ -293,8 +155,10 @@ def main():
     ap.add_argument("--limit", type=int, default=0, help="If >0, only process this many rows.")
     ap.add_argument("--skip-blank-rows", action="store_true", help="Skip rows that are entirely blank.")
     ap.add_argument("--log-out", help="Optional path for results log (.xlsx). Default: alongside input.")
-    ap.add_argument("--pause", type=float, default=1.0, help="Seconds to sleep between emails (helps throttles).")
+    ap.add_argument("--per-minute", type=float, default=DEFAULT_PER_MINUTE, help="Send at most this many emails per minute.")
+    ap.add_argument("--pause", type=float, default=0.0, help=argparse.SUPPRESS)
     ap.add_argument("--resume-log", help="Existing log to skip rows already SENT.")
+    ap.add_argument("--ledger", help="Submission ledger database (default: $FOIA_RESULTS_DB or results.db); requests it has as sent are skipped.")
     ap.add_argument("--ssl", action="store_true", help="Use SMTPS (SSL) on port 465 instead of STARTTLS on 587.")
     ap.add_argument("--smtp-host", help="Override SMTP host (default from .env or smtp.gmail.com).")
     ap.add_argument("--smtp-port", type=int, help="Override SMTP port (465 for SSL, 587 for STARTTLS).")
@@ -316,13 +180,17 @@ def main():
     print(f"[INFO] Loaded {total} rows from: {args.input}")
 
     smtp_conf = None
+    transport = None
     if args.send:
-        smtp_conf = load_smtp(args)
+        smtp_conf = load_smtp(args.smtp_host, args.smtp_port, REQUESTER["name"], REQUESTER["email"])
+        transport = SmtpTransport(smtp_conf, prefer_ssl=args.ssl, per_minute=60.0 / args.pause if args.pause else args.per_minute)
         print("[INFO] SMTP loaded. SENDING mode is ON.")
 
     to_addr = normalize_email(args.to_override) if args.to_override else DEFAULT_RECIPIENT
     print(f"[INFO] Recipient: {to_addr}")
 
+    ledger = ResultsStore(args.ledger) if args.send else None
+
     results: List[Dict[str, Any]] = []
     for i, row in df.reset_index(drop=True).iterrows():
         if i in skip_indices:
@@ -347,13 +215,13 @@ def main():
         status = "DRY-RUN"
         err = ""
         if args.send:
-            try:
-                send_with_retries(smtp_conf, to_addr, subject, body, max_retries=5, prefer_ssl=args.ssl)
-                status = "SENT"
-                time.sleep(max(args.pause, 0.0))
-            except Exception as e:
-                status = "ERROR"
-                err = str(e)
+            key = RequestKey.of("Virginia", to_addr, notice_id_of(row, subject), body, row)
+            status, err = send_request(
+                transport, lambda: build_message(smtp_conf, normalize_email(to_addr), subject, body), ledger, key,
+            )
+            if status == "SKIPPED":
+                print(f"[SKIP] Row {i}: {err}.")
+            elif status == "ERROR":
                 print(f"[ERROR] Row {i}: {err}")
 
         results.append({
@@ -365,6 +233,12 @@ def main():
             "timestamp": datetime.now().isoformat(timespec="seconds"),
         })
 
+    if transport is not None:
+        transport.close()
+
+    if ledger is not None:
+        ledger.close()
+
     log_df = pd.DataFrame(results)
     if args.log_out:
         out_path = args.log_out
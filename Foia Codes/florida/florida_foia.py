@@ -39,22 +39,20 @@ REQUIREMENTS:
 """
 
 import os
-import ssl
-import time
-import socket
-import smtplib
+import sys
 import argparse
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
 
 import pandas as pd
-from email.message import EmailMessage
-from email.utils import formatdate
-from dotenv import load_dotenv
-from smtplib import (
-    SMTP, SMTP_SSL, SMTPServerDisconnected, SMTPAuthenticationError,
-    SMTPResponseException, SMTPDataError
-)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.records import Opportunity, normalize_table  # noqa: E402
+from common.foia_mail import load_sent_row_indices, read_table, send_request  # noqa: E402
+from common.mailer import DEFAULT_PER_MINUTE, SmtpTransport, build_message, load_smtp  # noqa: E402
+from common.store import RequestKey, ResultsStore, notice_id_of  # noqa: E402
 
 # -------------------------- Requester details (from your message) --------------------------
 REQUESTER = {
@@ -68,91 +66,54 @@ REQUESTER = {
 # Default recipient (Florida Department of State)
 DEFAULT_RECIPIENT = "PublicRecords@DOS.fl.gov"
 
-# Transient SMTP codes for retry logic
-TRANSIENT_SMTP_CODES = {421, 450, 451, 452, 454}
-
 # ------------------------------- Helpers -----------------------------------
-def read_table(path: str) -> pd.DataFrame:
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".csv":
-        # try utf-8, fallback to latin-1 for stray encodings
-        try:
-            return pd.read_csv(path)
-        except UnicodeDecodeError:
-            return pd.read_csv(path, encoding="latin-1")
-    if ext in {".xlsx", ".xlsm"}:
-        return pd.read_excel(path, engine="openpyxl")
-    if ext == ".xls":
-        try:
-            return pd.read_excel(path, engine="xlrd")
-        except Exception as e:
-            raise RuntimeError(
-                "Reading legacy .xls requires xlrd==2.0.1. Either install it or save as .xlsx.\n"
-                "  pip uninstall -y xlrd && pip install xlrd==2.0.1"
-            ) from e
-    raise ValueError(f"Unsupported input type: {ext}. Use .csv/.xlsx/.xlsm/.xls")
-
 def s(val: Any) -> str:
     return "" if pd.isna(val) else str(val).strip()
 
-# Candidate columns we’ll look for to craft a better subject/summary
-CANDIDATE_ID_COLS = ["notice_id", "solicitation_number", "bid_id", "rfp_number", "solicitation_id", "reference_no", "reference_id"]
-CANDIDATE_TITLE_COLS = ["title", "solicitation_title", "description", "project_title", "bid_title"]
-CANDIDATE_AWARD_DATE_COLS = ["award_date", "awarded_on", "finalize_date", "award_posted_date", "award_post_date", "posted_date"]
-CANDIDATE_VENDOR_COLS = ["awarded_vendor", "vendor", "contractor", "supplier", "awardee"]
-CANDIDATE_AMOUNT_COLS = ["award_amount", "contract_value", "amount", "value", "total_award"]
-CANDIDATE_URL_COLS = ["page_url", "detail_url", "url", "source_url"]
-CANDIDATE_ATTACH_COLS = ["attachments", "files", "links"]
-
-def first_nonempty(row: pd.Series, candidates: List[str]) -> str:
-    for c in candidates:
-        if c in row and s(row[c]):
-            return s(row[c])
-    return ""
+# Column names are mapped to canonical fields once per sheet (common.records);
+# dates and amounts arrive parsed.
+def fmt_date(val: Any) -> str:
+    return "" if pd.isna(val) else val.strftime("%m/%d/%Y")
+
+def fmt_amount(val: Optional[float]) -> str:
+    return "" if val is None or pd.isna(val) else f"${val:,.2f}"
 
 def pad(text: str, width: int) -> str:
     # For aligned “All Provided Fields” block
     return text + " " * max(0, width - len(text))
 
-def purpose_two_liner(row: pd.Series) -> str:
-    title = first_nonempty(row, CANDIDATE_TITLE_COLS) or "the referenced opportunity"
-    ident = first_nonempty(row, CANDIDATE_ID_COLS)
+def purpose_two_liner(opp: Opportunity) -> str:
+    title = opp.title or "the referenced opportunity"
+    ident = opp.notice_id
     id_seg = f" ({ident})" if ident else ""
     line1 = f"Requesting copies of the winning proposal(s), evaluation records, and documented strategies for “{title}”{id_seg}."
     line2 = "If fees will exceed $50, please advise in advance with an itemized estimate."
     return f"{line1}\n{line2}"
 
-def ordered_summary_block(row: pd.Series) -> str:
+def ordered_summary_block(opp: Opportunity) -> str:
     """
     Professional “Opportunity Summary”: common fields first (if present), then others.
     """
     lines = []
     mapping = [
-        ("Notice / Solicitation #", first_nonempty(row, CANDIDATE_ID_COLS)),
-        ("Title", first_nonempty(row, CANDIDATE_TITLE_COLS)),
-        ("Award Date", first_nonempty(row, CANDIDATE_AWARD_DATE_COLS)),
-        ("Awarded Vendor", first_nonempty(row, CANDIDATE_VENDOR_COLS)),
-        ("Award Amount", first_nonempty(row, CANDIDATE_AMOUNT_COLS)),
-        ("Details URL", first_nonempty(row, CANDIDATE_URL_COLS)),
-        ("Attachments", first_nonempty(row, CANDIDATE_ATTACH_COLS)),
+        ("Notice / Solicitation #", opp.notice_id),
+        ("Title", opp.title),
+        ("Agency", opp.agency),
+        ("Status", opp.status),
+        ("Posted Date", fmt_date(opp.publish_date) or opp.raw.get("publish_date")),
+        ("Closing Date", fmt_date(opp.close_date) or opp.raw.get("close_date")),
+        ("Award Date", fmt_date(opp.award_date) or opp.raw.get("award_date")),
+        ("Awarded Vendor", opp.vendor),
+        ("Award Amount", fmt_amount(opp.amount) or opp.raw.get("amount")),
+        ("Details URL", opp.url),
+        ("Attachments", opp.attachments),
     ]
     for label, val in mapping:
         if val:
             lines.append(f"- {label}: {val}")
 
     # Add remaining (non-empty) columns not already covered
-    used = {c.lower() for c in (
-        CANDIDATE_ID_COLS + CANDIDATE_TITLE_COLS + CANDIDATE_AWARD_DATE_COLS +
-        CANDIDATE_VENDOR_COLS + CANDIDATE_AMOUNT_COLS + CANDIDATE_URL_COLS +
-        CANDIDATE_ATTACH_COLS
-    )}
-    extras = []
-    for col, val in row.items():
-        if col.lower() in used:
-            continue
-        txt = s(val)
-        if txt:
-            extras.append(f"- {col}: {txt}")
+    extras = [f"- {col}: {s(val)}" for col, val in opp.extra.items() if s(val)]
 
     return "\n".join(lines + extras) if (lines or extras) else "- (No non-empty fields found)"
 
@@ -167,15 +128,15 @@ def full_fields_block(row: pd.Series) -> str:
     w = max(len(k) for k, _ in pairs)
     return "\n".join(f"{pad(k, w)} : {v}" for k, v in pairs)
 
-def infer_subject(row: pd.Series) -> str:
-    title = first_nonempty(row, CANDIDATE_TITLE_COLS) or "Public Records Request"
-    nid = first_nonempty(row, CANDIDATE_ID_COLS)
+def infer_subject(opp: Opportunity) -> str:
+    title = opp.title or "Public Records Request"
+    nid = opp.notice_id
     nid_seg = f" ({nid})" if nid else ""
     return f"Florida DOS — Public Records Request — {title}{nid_seg} — Maniraj Patha"
 
-def build_body(row: pd.Series, purpose_text: str) -> str:
+def build_body(row: pd.Series, opp: Opportunity, purpose_text: str) -> str:
     today = datetime.now().strftime("%B %d, %Y")
-    summary = ordered_summary_block(row)
+    summary = ordered_summary_block(opp)
     all_fields = full_fields_block(row)
 
     return f"""Date: {today}
@@ -224,104 +185,6 @@ Sincerely,
 {REQUESTER['email']} | {REQUESTER['phone']}
 """
 
-def load_smtp(args=None) -> Dict[str, str]:
-    load_dotenv()
-    host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    port = int(os.getenv("SMTP_PORT", "587"))
-    if args and args.smtp_host:
-        host = args.smtp_host
-    if args and args.smtp_port:
-        port = args.smtp_port
-    username = os.getenv("SMTP_USERNAME")
-    password = os.getenv("SMTP_PASSWORD")
-    sender_name = os.getenv("SENDER_NAME", REQUESTER["name"])
-    sender_email = os.getenv("SENDER_EMAIL", REQUESTER["email"])
-    missing = [k for k, v in {
-        "SMTP_USERNAME": username,
-        "SMTP_PASSWORD": password,
-        "SENDER_NAME": sender_name,
-        "SENDER_EMAIL": sender_email,
-    }.items() if not v]
-    if missing:
-        raise RuntimeError(f"Missing in .env: {', '.join(missing)}")
-    return {
-        "host": host, "port": port, "username": username, "password": password,
-        "sender_name": sender_name, "sender_email": sender_email
-    }
-
-def _open_smtp(smtp_conf: Dict[str, str], use_ssl: bool) -> smtplib.SMTP:
-    if use_ssl:
-        ctx = ssl.create_default_context()
-        srv = SMTP_SSL(smtp_conf["host"], smtp_conf["port"], timeout=60, context=ctx)
-        srv.login(smtp_conf["username"], smtp_conf["password"])
-    else:
-        srv = SMTP(smtp_conf["host"], smtp_conf["port"], timeout=60)
-        srv.ehlo()
-        srv.starttls(context=ssl.create_default_context())
-        srv.ehlo()
-        srv.login(smtp_conf["username"], smtp_conf["password"])
-    return srv
-
-def send_with_retries(
-    smtp_conf: Dict[str, str],
-    to_addr: str,
-    subject: str,
-    body: str,
-    max_retries: int = 5,
-    prefer_ssl: bool = False,
-) -> None:
-    attempt = 0
-    delay_seq = [5, 15, 45, 90, 180]
-    last_exc: Optional[Exception] = None
-    modes = [prefer_ssl, not prefer_ssl]  # try preferred, then alternate
-    mode_index = 0
-
-    while attempt <= max_retries:
-        use_ssl = modes[min(mode_index, len(modes) - 1)]
-        try:
-            with _open_smtp(smtp_conf, use_ssl=use_ssl) as server:
-                msg = EmailMessage()
-                msg["From"] = f"{smtp_conf['sender_name']} <{smtp_conf['sender_email']}>"
-                msg["To"] = to_addr
-                msg["Date"] = formatdate(localtime=True)
-                msg["Subject"] = subject
-                msg.set_content(body)
-                server.send_message(msg)
-            return
-        except (SMTPServerDisconnected, socket.timeout, socket.gaierror) as e:
-            last_exc = e
-            if attempt in (1, 2) and mode_index == 0:
-                mode_index = 1  # flip STARTTLS<->SSL early
-        except SMTPDataError as e:
-            if e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-        except SMTPAuthenticationError as e:
-            raise RuntimeError(
-                "SMTP authentication failed. For Gmail, use a 16-char App Password with 2FA."
-            ) from e
-        except SMTPResponseException as e:
-            if 400 <= e.smtp_code < 500 or e.smtp_code in TRANSIENT_SMTP_CODES:
-                last_exc = e
-            else:
-                raise
-
-        if attempt == max_retries:
-            break
-        time.sleep(delay_seq[min(attempt, len(delay_seq) - 1)])
-        attempt += 1
-
-    raise RuntimeError(f"SMTP send failed after {max_retries+1} attempts: {last_exc}")
-
-def load_sent_row_indices(resume_log_path: str) -> Set[int]:
-    try:
-        log = pd.read_excel(resume_log_path)
-        sent = log.loc[log["status"].str.upper() == "SENT", "row_index"]
-        return set(int(i) for i in sent.dropna().tolist())
-    except Exception:
-        return set()
-
 # --------------------------------- CLI / Main ------------------------------------
 def main():
     ap = argparse.ArgumentParser(description="Florida DOS public records emailer (one email per row).")
@@ -331,8 +194,10 @@ def main():
     ap.add_argument("--limit", type=int, default=0, help="If >0, process only this many rows.")
     ap.add_argument("--skip-blank-rows", action="store_true", help="Skip rows entirely blank.")
     ap.add_argument("--log-out", help="Optional path for results log (.xlsx). Default: alongside input.")
-    ap.add_argument("--pause", type=float, default=1.0, help="Seconds to sleep between sends.")
+    ap.add_argument("--per-minute", type=float, default=DEFAULT_PER_MINUTE, help="Send at most this many emails per minute.")
+    ap.add_argument("--pause", type=float, default=0.0, help=argparse.SUPPRESS)
     ap.add_argument("--resume-log", help="Skip rows already SENT per prior log (.xlsx).")
+    ap.add_argument("--ledger", help="Submission ledger database (default: $FOIA_RESULTS_DB or results.db); requests it has as sent are skipped.")
     ap.add_argument("--ssl", action="store_true", help="Use SMTPS (SSL) instead of STARTTLS.")
     ap.add_argument("--smtp-host", help="Override SMTP host.")
     ap.add_argument("--smtp-port", type=int, help="Override SMTP port.")
@@ -348,11 +213,11 @@ def main():
     if args.limit and args.limit > 0:
         df = df.head(args.limit)
 
+    df = df.reset_index(drop=True)
+    opps = normalize_table(df, "Florida")
+
     # Ensure/refresh Purpose column
-    purposes: List[str] = []
-    for _, row in df.iterrows():
-        purposes.append(purpose_two_liner(row))
-    df["Purpose"] = purposes
+    df["Purpose"] = [purpose_two_liner(opp) for opp in opps]
 
     if args.augment_out:
         ext = os.path.splitext(args.augment_out)[1].lower()
@@ -374,15 +239,19 @@ def main():
     print(f"[INFO] Loaded {total} rows from: {args.input}")
 
     smtp_conf = None
+    transport = None
     if args.send:
-        smtp_conf = load_smtp(args)
+        smtp_conf = load_smtp(args.smtp_host, args.smtp_port, REQUESTER["name"], REQUESTER["email"])
+        transport = SmtpTransport(smtp_conf, prefer_ssl=args.ssl, per_minute=60.0 / args.pause if args.pause else args.per_minute)
         print("[INFO] SMTP loaded. SENDING mode is ON.")
 
     to_addr = (args.to_override or DEFAULT_RECIPIENT).strip()
     print(f"[INFO] Recipient: {to_addr}")
 
+    ledger = ResultsStore(args.ledger) if args.send else None
+
     results: List[Dict[str, Any]] = []
-    for i, row in df.reset_index(drop=True).iterrows():
+    for (i, row), opp in zip(df.iterrows(), opps):
         if i in skip_indices:
             print(f"[SKIP] Row {i} already SENT per resume log.")
             results.append({
@@ -391,8 +260,8 @@ def main():
             })
             continue
 
-        subject = infer_subject(row)
-        body = build_body(row, df.loc[i, "Purpose"])
+        subject = infer_subject(opp)
+        body = build_body(row, opp, df.loc[i, "Purpose"])
 
         print("\n" + "=" * 84)
         print(f"[PREVIEW] Row {i+1}/{total}")
@@ -405,13 +274,13 @@ def main():
         status = "DRY-RUN"
         err = ""
         if args.send:
-            try:
-                send_with_retries(smtp_conf, to_addr, subject, body, max_retries=5, prefer_ssl=args.ssl)
-                status = "SENT"
-                time.sleep(max(args.pause, 0.0))
-            except Exception as e:
-                status = "ERROR"
-                err = str(e)
+            key = RequestKey.of("Florida", to_addr, notice_id_of(row, subject), body, row)
+            status, err = send_request(
+                transport, lambda: build_message(smtp_conf, to_addr, subject, body), ledger, key,
+            )
+            if status == "SKIPPED":
+                print(f"[SKIP] Row {i}: {err}.")
+            elif status == "ERROR":
                 print(f"[ERROR] Row {i}: {err}")
 
         results.append({
@@ -419,6 +288,12 @@ def main():
             "error": err, "timestamp": datetime.now().isoformat(timespec="seconds"),
         })
 
+    if transport is not None:
+        transport.close()
+
+    if ledger is not None:
+        ledger.close()
+
     # Log results
     log_df = pd.DataFrame(results)
     if args.log_out:
@@ -3,16 +3,24 @@
 
 """
 Georgia Open Records Request auto-filler (Firefox + geckodriver, macOS).
-Flow per row:
-  - Open fresh Firefox and load the form
+Flow per row (WORKERS rows at a time, each in its own Firefox):
+  - Load the form in a clean browser session
   - Scroll down to each field (visible typing) and fill in order
   - Fill Comments LAST and then DO NOT SCROLL (stay where you are)
   - Wait 10 seconds so you can click Submit manually
-  - Close browser and continue with next row
+  - Record whether the form was submitted and continue with next row
+Rows already submitted (see STATE_FILE) are skipped on a rerun.
+
+If the form has been recorded (python -m common.form_post record URL --out
+FORM_SPEC) and the recording says it can be posted directly, rows are posted
+over HTTP instead, without a browser or the manual Submit click.
 """
 
+import os
 import sys
 import time
+from pathlib import Path
+
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver import FirefoxOptions
@@ -21,10 +29,18 @@ from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.form_post import FormPoster, load_spec  # noqa: E402
+from common.form_runner import FormRunner  # noqa: E402
+from common.store import ResultsStore  # noqa: E402
+
 # 🔹 Set your Excel input path here
 EXCEL_PATH = "/Users/raajthipparthy/Desktop/88georgia_input_foia.xlsx"
 
 URL = "https://gov.georgia.gov/contact-us/open-records-request"
+STATE_FILE = "georgia_foia_state.jsonl"  # per-row progress; a rerun resumes from it
+FORM_SPEC = "georgia_foia_form.json"     # recorded form, for direct HTTP submission
 
 # ---- Fixed identity fields ----
 FIRST_NAME = "Akhila"
@@ -41,6 +57,7 @@ ID_COMMENTS   = "edit-comments"
 FORM_ID       = "webform-submission-webform-3656-node-15226-add-form"
 
 WAIT_SECONDS = 10  # manual-click window per row
+WORKERS = 2        # browsers filling forms at once
 
 # ---------- Helpers ----------
 def build_comment(event_title: str, event_id: str, gov_value: str) -> str:
@@ -137,17 +154,31 @@ def fill_fields_scrolling_down(driver, comment_text: str):
     # Blur to prevent any focus-induced jumps; do NOT scroll.
     driver.execute_script("if (document.activeElement) document.activeElement.blur();")
 
-def manual_window_then_close(driver, seconds: int):
-    # Stay exactly where we are; no scrolling here.
-    for s in range(seconds, 0, -1):
-        print(f"  You can click SUBMIT now… {s}s", end="\r")
-        time.sleep(1)
-    print()  # newline
-    try:
-        driver.quit()
-    except Exception:
-        pass
-    time.sleep(0.5)
+def manual_window(driver, seconds: int, row_num: int) -> str:
+    # Stay exactly where we are; no scrolling here. The browser is handed back
+    # to the pool (and reset) afterwards, so nothing is closed here.
+    print(f"  [{row_num}] You can click SUBMIT now… {seconds}s")
+    time.sleep(seconds)
+    return "not submitted" if driver.find_elements(By.ID, FORM_ID) else "submitted"
+
+def submit_one_row(driver, row, row_num) -> str:
+    comment = build_comment(row["Event Title"], row["Event ID"], row["GovVal"])
+    print(f"[{row_num}] Preparing form for Event ID {row['Event ID']} …")
+    load_form(driver)
+    fill_fields_scrolling_down(driver, comment)
+    return manual_window(driver, WAIT_SECONDS, row_num)
+
+def post_one_row(poster, row, row_num) -> str:
+    """Same fields as fill_fields_scrolling_down, posted over HTTP (raises when rejected)."""
+    print(f"[{row_num}] Posting form for Event ID {row['Event ID']} …")
+    poster.submit({
+        ID_FIRST_NAME: FIRST_NAME,
+        ID_LAST_NAME: LAST_NAME,
+        ID_EMAIL: EMAIL,
+        ID_PHONE: PHONE,
+        ID_COMMENTS: build_comment(row["Event Title"], row["Event ID"], row["GovVal"]),
+    })
+    return "submitted"
 
 def main():
     try:
@@ -157,24 +188,36 @@ def main():
         print(f"Excel read/normalize failed: {e}")
         sys.exit(1)
 
-    for i, row in df.iterrows():
-        comment = build_comment(row["Event Title"], row["Event ID"], row["GovVal"])
-        print(f"[{i+1}/{len(df)}] Preparing form for Event ID {row['Event ID']} …")
-
-        driver = open_browser()
-        try:
-            load_form(driver)
-            fill_fields_scrolling_down(driver, comment)
-            manual_window_then_close(driver, WAIT_SECONDS)
-        except Exception as e:
-            print(f"  ✗ Error on row {i+1}: {e}")
-            try:
-                driver.quit()
-            except Exception:
-                pass
-            time.sleep(0.5)
-
-    print("✅ All rows processed (manual-submit mode, no scroll after Comments).")
+    # A row left "not submitted" is filled again on the next run; one the shared
+    # submission ledger has as sent (by any run or script) is not.
+    ledger = ResultsStore()
+    tracked = dict(ledger=ledger, template=lambda row: build_comment(row["Event Title"], row["Event ID"], row["GovVal"]))
+    spec = load_spec(FORM_SPEC) if os.path.isfile(FORM_SPEC) else None
+    if spec is not None and spec.direct:
+        print(f"Posting over HTTP with the form recorded in {FORM_SPEC}.")
+        poster = FormPoster(spec, refresh=open_browser, state="Georgia")
+        runner = FormRunner(
+            "Georgia", lambda _, row, row_num: post_one_row(poster, row, row_num), portal=URL,
+            key=lambda row: row["Event ID"], state_path=STATE_FILE, workers=WORKERS, browserless=True, **tracked,
+        )
+    else:
+        if spec is not None:
+            print(f"{FORM_SPEC}: {spec.blocker}; using the browser.")
+        runner = FormRunner(
+            "Georgia", submit_one_row, portal=URL, key=lambda row: row["Event ID"],
+            state_path=STATE_FILE, workers=WORKERS, retry=lambda status: status != "submitted",
+            launcher=lambda profile_dir, download_dir: open_browser(), **tracked,
+        )
+    try:
+        statuses = runner.run([row for _, row in df.iterrows()])
+    finally:
+        ledger.close()
+    for i, status in enumerate(statuses):
+        if status != "submitted":
+            print(f"  ✗ Row {i+1} (Event ID {df.at[i, 'Event ID']}): {status or 'error'}")
+
+    print(f"✅ All rows processed (manual-submit mode, no scroll after Comments): "
+          f"{statuses.count('submitted')}/{len(df)} submitted.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,10 +5,17 @@
 #   1) `pip install selenium pandas`
 #   2) Ensure geckodriver is installed and on PATH (or set GECKO_DRIVER_PATH below)
 #   3) python lla_public_records_submitter.py
+#
+# Faster path: record the form once with
+#   python -m common.form_post record https://lla.la.gov/public-records-request --out la_public_records_form.json
+# and rows are then posted over HTTP (no browser) while the recording says the
+# form can be posted directly; otherwise the browser flow below is used.
 
 import time
 import os
 import sys
+from pathlib import Path
+
 import pandas as pd
 
 from selenium import webdriver
@@ -18,12 +25,16 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
-    TimeoutException,
     ElementClickInterceptedException,
-    StaleElementReferenceException,
     WebDriverException
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.form_post import FormPoster, load_spec  # noqa: E402
+from common.form_runner import FormRunner  # noqa: E402
+from common.store import ResultsStore  # noqa: E402
+
 # ────────────────────────────────────────────────────────────────────────────────
 # USER SETTINGS (edit these to your local paths if needed)
 # ────────────────────────────────────────────────────────────────────────────────
@@ -34,6 +45,12 @@ FORM_URL = "https://lla.la.gov/public-records-request"
 # Example: r"/Users/raajthipparthy/Desktop/Opportunity Scrapers/lla/la_awarded_bids.xlsx"
 EXCEL_PATH = r"/Users/raajthipparthy/Desktop/Opportunity Scrapers/louisiana-scraper/la_awarded_bids_150.xlsx"
 
+# Per-row progress; a rerun skips rows already submitted
+STATE_FILE = "la_public_records_state.jsonl"
+
+# Recorded form (see top); used for direct HTTP submission when present
+FORM_SPEC = "la_public_records_form.json"
+
 # Optional: If geckodriver is not on PATH, set the full path here; otherwise leave as None.
 GECKO_DRIVER_PATH = None  # e.g., r"/usr/local/bin/geckodriver"
 
@@ -50,6 +67,9 @@ POST_SUBMIT_WAIT = 2.0  # wait after submit before next row
 # Global timeout for waits (seconds)
 TIMEOUT = 20
 
+# Browsers submitting at once
+WORKERS = 2
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ────────────────────────────────────────────────────────────────────────────────
@@ -114,6 +134,13 @@ def click_submit(driver):
         driver.execute_script("arguments[0].click();", submit)
 
 
+def request_text(description: str, bid_number: str) -> str:
+    return (
+        f"I am requesting a copy of the winning proposal for {description} "
+        f"contract bearing ID {bid_number}."
+    )
+
+
 def fill_and_submit(driver, description: str, bid_number: str):
     # We’ll always reload the form fresh for each row to avoid stale state
     driver.get(FORM_URL)
@@ -137,10 +164,7 @@ def fill_and_submit(driver, description: str, bid_number: str):
     time.sleep(STEP_PAUSE)
 
     # What type of records... (id=whatTypeOfRecordsAreYouRequesting)
-    body = (
-        f"I am requesting a copy of the winning proposal for {description} "
-        f"contract bearing ID {bid_number}."
-    )
+    body = request_text(description, bid_number)
     textarea = wait_for(driver, (By.ID, "whatTypeOfRecordsAreYouRequesting"))
     scroll_into_view(driver, textarea, block="center")  # keep the page near the textarea
     safe_type(textarea, body)
@@ -151,6 +175,27 @@ def fill_and_submit(driver, description: str, bid_number: str):
 
     # Optional: wait briefly so you can see the result / confirmation
     time.sleep(POST_SUBMIT_WAIT)
+    return "submitted"
+
+
+def submit_one_row(driver, row, row_num):
+    bid = row["Bid Number"]
+    desc = row["Description"]
+    print(f"[INFO] Submitting row {row_num}: Bid Number={bid} | Description={desc}")
+    return fill_and_submit(driver, desc, bid)
+
+
+def post_one_row(poster, row, row_num):
+    """Same request as fill_and_submit, posted over HTTP; returns the confirmation text."""
+    bid = row["Bid Number"]
+    desc = row["Description"]
+    print(f"[INFO] Posting row {row_num}: Bid Number={bid} | Description={desc}")
+    return poster.submit({
+        "name1": FULL_NAME,
+        "email": EMAIL,
+        "phoneNumber": PHONE,
+        "whatTypeOfRecordsAreYouRequesting": request_text(desc, bid),
+    })
 
 
 def main():
@@ -184,31 +229,34 @@ def main():
 
     print(f"[INFO] Starting submissions for {len(df)} row(s).")
 
-    driver = create_driver()
-
+    # A row that times out or hits a stale page is tried once more on a fresh
+    # browser; if that fails too it is left for the next run. Bids the shared
+    # submission ledger has as sent (by any run or script) are skipped.
+    ledger = ResultsStore()
+    tracked = dict(ledger=ledger, template=lambda row: request_text(row["Description"], row["Bid Number"]))
+    spec = load_spec(FORM_SPEC) if os.path.isfile(FORM_SPEC) else None
+    if spec is not None and spec.direct:
+        print(f"[INFO] Posting over HTTP with the form recorded in {FORM_SPEC}.")
+        poster = FormPoster(spec, refresh=create_driver, state="Louisiana")
+        runner = FormRunner(
+            "Louisiana", lambda _, row, row_num: post_one_row(poster, row, row_num), portal=FORM_URL,
+            key=lambda row: row["Bid Number"], state_path=STATE_FILE, workers=WORKERS, browserless=True,
+            confirmation=lambda text: text, **tracked,
+        )
+    else:
+        if spec is not None:
+            print(f"[INFO] {FORM_SPEC}: {spec.blocker}; using the browser.")
+        runner = FormRunner(
+            "Louisiana", submit_one_row, portal=FORM_URL, key=lambda row: row["Bid Number"],
+            state_path=STATE_FILE, workers=WORKERS, launcher=lambda profile_dir, download_dir: create_driver(),
+            **tracked,
+        )
     try:
-        for idx, row in df.iterrows():
-            bid = row["Bid Number"]
-            desc = row["Description"]
-            print(f"[INFO] Submitting row {idx}: Bid Number={bid} | Description={desc}")
-            try:
-                fill_and_submit(driver, desc, bid)
-            except TimeoutException:
-                print(f"[WARN] Timeout while submitting row {idx}. Skipping to next.")
-            except StaleElementReferenceException:
-                print(f"[WARN] Page changed unexpectedly on row {idx}. Retrying once...")
-                # Try once more fresh
-                try:
-                    fill_and_submit(driver, desc, bid)
-                except Exception as e2:
-                    print(f"[WARN] Second attempt failed for row {idx}: {e2}")
-            except Exception as e:
-                print(f"[WARN] Unexpected error on row {idx}: {e}. Continuing.")
+        statuses = runner.run([row for _, row in df.iterrows()])
     finally:
-        print("[INFO] Done. Closing browser.")
-        # Give you a second to see final state
-        time.sleep(1.0)
-        driver.quit()
+        ledger.close()
+    failed = statuses.count(None)
+    print(f"[INFO] Done. {len(statuses) - failed} submitted, {failed} failed (see log above).")
 
 
 if __name__ == "__main__":
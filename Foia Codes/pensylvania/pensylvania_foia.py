@@ -1,7 +1,10 @@
 # Requirements:
 # pip install selenium webdriver-manager pandas openpyxl
 
+import sys
 import time
+from pathlib import Path
+
 import pandas as pd
 
 from selenium import webdriver
@@ -9,9 +12,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import (
     TimeoutException,
     StaleElementReferenceException,
@@ -21,12 +22,21 @@ from selenium.common.exceptions import (
     ElementNotInteractableException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.browser_pool import chrome_service  # noqa: E402
+from common.form_runner import FormRunner, prompt  # noqa: E402
+from common.store import ResultsStore  # noqa: E402
+
 
+STORE_STATE = "Pennsylvania"                        # read from the results store when filled
 INPUT_XLSX = "pa_archived_closed_bids.xlsx"          
 OUTPUT_XLSX = "pa_rtk_results.xlsx"                  
+STATE_FILE = "pa_rtk_state.jsonl"                    # per-row progress; a rerun resumes from it
 FORM_URL = "https://www.openrecords.pa.gov/RTKL/RequestForm.cfm"  
 
 RUN_LIMIT = None  
+WORKERS = 2                                          # browsers filling forms at once
 
 SALUTATION = "Mr."
 FIRST_NAME = "Raaj"
@@ -45,8 +55,7 @@ def start_driver():
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=opts)
+    driver = webdriver.Chrome(service=chrome_service(), options=opts)
     driver.set_page_load_timeout(60)
     return driver
 
@@ -216,8 +225,7 @@ def submit_one_row(driver, row, row_num):
     safe_set_textarea(driver, (By.ID, "records"), records_text, 30)
 
     
-    print(f"Row {row_num}: Complete CAPTCHA in the browser, then press Enter here to continue...")
-    input("Press Enter to submit...")
+    prompt(f"Row {row_num}: Complete CAPTCHA in the browser, then press Enter here to submit...", driver)
 
 
     try:
@@ -248,9 +256,13 @@ def submit_one_row(driver, row, row_num):
     }
 
 def main():
-    df = pd.read_excel(INPUT_XLSX)
-    if RUN_LIMIT:
-        df = df.head(RUN_LIMIT)
+    store = ResultsStore()
+    if store.has_opportunities(STORE_STATE):
+        df = store.opportunities_frame(STORE_STATE, limit=RUN_LIMIT)
+    else:
+        df = pd.read_excel(INPUT_XLSX)
+        if RUN_LIMIT:
+            df = df.head(RUN_LIMIT)
 
     expected = [
         "Bid No", "Bid Type", "Title", "Description", "Agency", "County",
@@ -260,16 +272,20 @@ def main():
         if col not in df.columns:
             df[col] = ""
 
-    driver = start_driver()
-    rows_out = []
+    def request_text(row):
+        return compose_request_text(str(row.get("Title", "") or ""), str(row.get("Agency", "") or ""),
+                                    str(row.get("Bid No", "") or ""))
+
+    # every attempt goes to the store's submission ledger; bids it has as sent are not requested again
+    runner = FormRunner(
+        STORE_STATE, submit_one_row, portal=FORM_URL, key=lambda row: row.get("Bid No"),
+        state_path=STATE_FILE, workers=WORKERS, accepted=lambda result: result["success"] == "success",
+        ledger=store, template=request_text, launcher=lambda profile_dir, download_dir: start_driver(),
+    )
     try:
-        for idx, row in df.iterrows():
-            print(f"=== Processing row {idx+1} ===")
-            result = submit_one_row(driver, row, idx + 1)
-            rows_out.append(result)
-            time.sleep(1)
+        rows_out = [r for r in runner.run([row for _, row in df.iterrows()]) if r is not None]
     finally:
-        driver.quit()
+        store.close()
 
     out_df = pd.DataFrame(rows_out)[
         ["Bid No", "Bid Type", "Title", "Description", "Agency", "County",
@@ -21,6 +21,7 @@ import time
 import re
 import atexit
 import signal
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
@@ -45,6 +46,10 @@ from selenium.common.exceptions import (
 
 from webdriver_manager.chrome import ChromeDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blobstore import AttachmentStore  # noqa: E402
+
 BASE_URL = "https://www.in.gov/idoa/procurement/award-recommendations/"
 
 # ==================== NEW: global state for checkpoint ====================
@@ -185,7 +190,19 @@ def collect_rows_on_page(driver) -> List[Dict]:
             continue
     return rows_out
 
-def download_zip_for_row(driver, row: Dict, out_dir: str) -> Dict:
+def award_zip_name(resp) -> str:
+    guessed = parse_filename_from_headers(resp, default=f"award_{int(time.time()*1000)}.zip")
+    if not guessed.lower().endswith(".zip"):
+        ct = resp.headers.get("Content-Type","").lower()
+        if "zip" in ct or guessed.find(".") == -1:
+            guessed = guessed.rsplit(".",1)[0] + ".zip"
+    return guessed
+
+def download_zip_for_row(driver, row: Dict, out_dir: str, store: AttachmentStore) -> Dict:
+    """
+    Award ZIPs go through the shared attachment store: a URL whose ETag/size is
+    unchanged is not downloaded again, and the copy in out_dir is a hard link.
+    """
     award_url = row.get("award_zip_url")
     result = {
         "download_ok": False,
@@ -196,23 +213,15 @@ def download_zip_for_row(driver, row: Dict, out_dir: str) -> Dict:
     if award_url:
         try:
             sess = selenium_cookies_to_requests(driver, domain=urlparse(award_url).hostname)
-            resp = sess.get(award_url, stream=True, timeout=60)
-            resp.raise_for_status()
-            guessed = parse_filename_from_headers(resp, default=f"award_{int(time.time()*1000)}.zip")
-            if not guessed.lower().endswith(".zip"):
-                ct = resp.headers.get("Content-Type","").lower()
-                if "zip" in ct or guessed.find(".") == -1:
-                    guessed = guessed.rsplit(".",1)[0] + ".zip"
-            out_path = os.path.join(out_dir, guessed)
+            stored = store.fetch(sess, award_url, filename=award_zip_name, timeout=60)
+            store.link(row.get("event_title") or award_url, stored.filename, stored.sha256)
+            out_path = os.path.join(out_dir, stored.filename)
             base, ext = os.path.splitext(out_path)
             k = 1
-            while os.path.exists(out_path):
+            while os.path.exists(out_path) and not os.path.samefile(out_path, store.blob_path(stored.sha256)):
                 out_path = f"{base} ({k}){ext}"
                 k += 1
-            with open(out_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=65536):
-                    if chunk:
-                        f.write(chunk)
+            store.export_file(stored.sha256, out_path)
             result["download_ok"] = True
             result["zip_path"] = out_path
             return result
@@ -257,6 +266,7 @@ def scrape_all(args):
 
     OUT_JSON_PATH = args.out_json  # NEW: set for checkpoint writer
 
+    store = AttachmentStore(args.store_dir)
     driver = mk_driver(str(out_dir), headless=args.headless)
     try:
         driver.get(args.base_url)
@@ -275,7 +285,7 @@ def scrape_all(args):
             for row in rows:
                 # Try/catch each row so a single failure still saves progress
                 try:
-                    dl = download_zip_for_row(driver, row, str(out_dir))
+                    dl = download_zip_for_row(driver, row, str(out_dir), store)
                 except WebDriverException as e:
                     # Browser closed or crashed mid-row
                     dl = {"download_ok": False, "zip_path": None, "zip_url": row.get("award_zip_url"), "error": f"webdriver: {e}"}
@@ -315,6 +325,7 @@ def scrape_all(args):
             driver.quit()
         except Exception:
             pass
+        store.close()
 
     # Final write (also covered by atexit, but do it explicitly)
     save_json_progress()
@@ -327,6 +338,7 @@ def main():
     ap.add_argument("--out-json", default=f"indiana_awards_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
                     help="Output JSON filename.")
     ap.add_argument("--out-dir", default="Indiana Attachments", help='Folder to store all ZIP files (default: "Indiana Attachments").')
+    ap.add_argument("--store-dir", default="indiana_store", help="Content-addressed attachment store (default: indiana_store).")
     ap.add_argument("--headless", action="store_true", help="Run Chrome in headless mode.")
     args = ap.parse_args()
 
@@ -4,9 +4,11 @@
 # Saves results to an Excel file. No DB/S3 used.
 
 import os
+import sys
 import time
 import logging
 import tempfile
+from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 
 import pandas as pd
@@ -19,6 +21,10 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 SOURCE_URL = "https://vss.ky.gov/vssprod-ext/Advantage4"
@@ -38,7 +44,10 @@ def make_driver(download_dir: str, headless: bool = False):
         "download.prompt_for_download": False,
         "plugins.always_open_pdf_externally": True,
     })
-    return webdriver.Chrome(options=opts)
+    block_assets(opts, KEEP_CSS)    # Advantage4 overlays are hidden by CSS
+    driver = webdriver.Chrome(options=opts)
+    enable_blocking(driver, KEEP_CSS)
+    return driver
 
 def parse_date_time(text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
     if not text:
@@ -2,17 +2,24 @@ import time
 import json
 import logging
 import os
+import sys
+from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.checkpoint import CheckpointSink  # noqa: E402
+
 # ---------------------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------------------
 BASE_URL = "https://wwwcfprd.doa.louisiana.gov/osp/lapac/altlist.cfm"
 OUTPUT_FILE = "louisiana_awarded_results.json"
+CHECKPOINT_FILE = "louisiana_awarded_results.jsonl"   # append-only; reruns skip bids already in it
 INCREMENTAL_SAVE_EVERY = 3
 SLEEP_BETWEEN_RECORDS = 1.0
 
@@ -37,21 +44,26 @@ chrome_options.add_argument("--start-maximized")
 driver = webdriver.Chrome(options=chrome_options)
 wait = WebDriverWait(driver, 15)
 
+# ---------------------------------------------------------------------
+# CHECKPOINT (one appended line per record; JSON is written at the end)
+# ---------------------------------------------------------------------
+sink = CheckpointSink(CHECKPOINT_FILE, key="bid_number", resume=True, fsync_every=INCREMENTAL_SAVE_EVERY)
+
 # ---------------------------------------------------------------------
 # HELPERS
 # ---------------------------------------------------------------------
-def save_json_incremental(records):
-    if not records:
+def seed_from_output():
+    """Carry records of an existing JSON output (older runs) into an empty checkpoint."""
+    if len(sink) or not os.path.exists(OUTPUT_FILE):
         return
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-    else:
-        existing = []
-    existing.extend(records)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(existing, f, indent=2, ensure_ascii=False)
-    log.info(f"Incremental save: +{len(records)} records")
+    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
+        for record in json.load(f):
+            sink.add(record)
+
+def save_json():
+    """Materialize the checkpoint as the JSON array output."""
+    count = sink.write_json(OUTPUT_FILE)
+    log.info(f"Wrote {count} records → {OUTPUT_FILE}")
 
 def safe_open_new_tab(url):
     current_tabs = set(driver.window_handles)
@@ -80,7 +92,9 @@ def main():
     rows = driver.find_elements(By.XPATH, '//*[@id="mainbg"]/div[3]/table/tbody/tr')[1:]
     log.info(f"Found {len(rows)} rows")
 
-    batch = []
+    seed_from_output()
+    if len(sink):
+        log.info(f"Resuming: {len(sink)} bids already in {CHECKPOINT_FILE}")
     processed = 0
 
     for i, row in enumerate(rows, start=1):
@@ -97,6 +111,8 @@ def main():
             bid_number = bid_link.text.strip()
             description = cols[2].text.strip()
             bid_url = bid_link.get_attribute("href")
+            if bid_number in sink:
+                continue
 
             log.info(f"[{i}] Awarded bid: {bid_number} – {description}")
 
@@ -152,16 +168,12 @@ def main():
                     "detail_url": bid_url,
                 }
 
-                batch.append(record)
+                sink.add(record)
                 processed += 1
                 log.info(f"→ Saved {bid_number}")
 
                 safe_close_and_return(main_tab)
 
-                if processed % INCREMENTAL_SAVE_EVERY == 0:
-                    save_json_incremental(batch)
-                    batch.clear()
-
                 time.sleep(SLEEP_BETWEEN_RECORDS)
 
             except Exception as e:
@@ -173,8 +185,6 @@ def main():
             log.error(f"Row {i} error: {e}")
             continue
 
-    if batch:
-        save_json_incremental(batch)
     log.info("✅ Scraping complete.")
 
 # ---------------------------------------------------------------------
@@ -182,4 +192,7 @@ if __name__ == "__main__":
     try:
         main()
     finally:
+        # Materialize whatever was collected, also after a crash
+        save_json()
+        sink.close()
         driver.quit()
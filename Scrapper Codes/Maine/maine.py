@@ -2,15 +2,14 @@
 # Now with SAFE-PROGRESS SAVE: if Chrome is closed mid-run, a partial JSON is written.
 
 import argparse
-import json
 import os
 import re
 import time
-import zipfile
-import shutil
+import sys
 import atexit
 import signal
 from datetime import datetime
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
 import requests
@@ -27,6 +26,13 @@ from selenium.common.exceptions import (
     WebDriverException
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
+from common.blobstore import AttachmentStore  # noqa: E402
+from common.checkpoint import CheckpointSink  # noqa: E402
+from common.http import create_session  # noqa: E402
+
 BASE_URL = "https://www.maine.gov/dafs/bbm/procurementservices/vendors/rfps/rfp-archives"
 
 ATTACH_EXT = {
@@ -43,35 +49,32 @@ HEADERS = {
 }
 
 # -------------------- NEW: partial save machinery --------------------
-ALL_ROWS = []          # accumulates rows across sections
+CHECKPOINT = None      # CheckpointSink next to the JSON (one line per row), set in main()
 OUT_JSON_PATH = None   # set in main()
-SAVE_EVERY = 1         # save after each row (safe for your use-case)
+SAVE_EVERY = 1         # fsync the checkpoint after every N rows
+
+# Attachments are stored once per content hash; ZIPs are exported from the store.
+STORE = None           # AttachmentStore, set in main()
+HTTP_SESSION = create_session(HEADERS, retries=2, backoff_factor=1.2)
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
-def save_json(rows, path):
-    ensure_dir(os.path.dirname(os.path.abspath(path)) or ".")
-    # Dedup by (RFP #, Title) before saving (keeps output clean on repeated saves)
-    seen = set()
-    dedup = []
-    for r in rows:
-        key = (r.get("RFP #", ""), r.get("Title", ""))
-        if key in seen:
-            continue
-        seen.add(key)
-        dedup.append(r)
+def row_key(r):
+    # Rows are deduped by (RFP #, Title)
+    return (r.get("RFP #", ""), r.get("Title", ""))
+
+def json_payload(rows):
     meta = {
         "_note": "Partial output may appear if the run was interrupted. Attachments already downloaded remain on disk.",
         "_saved_at": datetime.now().isoformat(timespec="seconds")
     }
-    payload = {"meta": meta, "rows": dedup}
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return {"meta": meta, "rows": rows}
 
 def save_partial():
-    if OUT_JSON_PATH:
-        save_json(ALL_ROWS, OUT_JSON_PATH)
+    # Materialize the JSON from the append-only checkpoint
+    if OUT_JSON_PATH and CHECKPOINT is not None:
+        CHECKPOINT.write_json(OUT_JSON_PATH, wrap=json_payload)
 
 def register_exit_handlers():
     # Save on normal interpreter exit
@@ -90,10 +93,10 @@ def register_exit_handlers():
             except Exception:
                 pass
 
-def maybe_checkpoint():
-    # Save every N rows (N=1 to capture progress ASAP)
-    if OUT_JSON_PATH and (len(ALL_ROWS) % SAVE_EVERY == 0):
-        save_partial()
+def maybe_checkpoint(record):
+    # Append the row to the checkpoint (constant time; the JSON is written on exit)
+    if CHECKPOINT is not None:
+        CHECKPOINT.add(record)
 
 # -------------------- utilities (unchanged logic) --------------------
 
@@ -125,15 +128,6 @@ def http_get(url: str, timeout: int = 90) -> requests.Response:
                 raise
             time.sleep(1.2)
 
-def zip_folder(src_dir: str, zip_path: str):
-    ensure_dir(os.path.dirname(zip_path))
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for root, _, files in os.walk(src_dir):
-            for fn in files:
-                fp = os.path.join(root, fn)
-                arc = os.path.relpath(fp, src_dir)
-                zf.write(fp, arc)
-
 def new_driver(download_dir: str) -> webdriver.Chrome:
     ensure_dir(download_dir)
     options = webdriver.ChromeOptions()
@@ -145,8 +139,10 @@ def new_driver(download_dir: str) -> webdriver.Chrome:
     }
     options.add_experimental_option("prefs", prefs)
     options.add_argument("--start-maximized")
+    block_assets(options, BLOCK_ASSETS)
     driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()),
                               options=options)
+    enable_blocking(driver, BLOCK_ASSETS)
     return driver
 
 def wait_for(driver, by, locator, timeout=20):
@@ -221,8 +217,9 @@ def parse_row_cells(tr):
 
 def collect_downloads_from_title_requests(title_text: str, title_url: str, attachments_dir: str):
     """
-    Fetch the Title page via requests, find all downloadable links, download them,
-    and ZIP into Maine attachments/<slug>.zip
+    Fetch the Title page via requests, find all downloadable links, put them in
+    the attachment store and export Maine attachments/<slug>.zip from it.
+    Files already in the store (same URL, unchanged ETag/size) are not re-downloaded.
     Returns: (zip_path or "", downloaded_files[], source_urls[])
     """
     if not title_url:
@@ -254,30 +251,18 @@ def collect_downloads_from_title_requests(title_text: str, title_url: str, attac
         return "", [], []
 
     slug = slugify(title_text)
-    tmp_dir = os.path.join(attachments_dir, f"__tmp_{slug}")
-    ensure_dir(tmp_dir)
-
     downloaded = []
     for u in srcs:
         try:
-            r = http_get(u)
-            fname = safe_filename_from_url(u)
-            outp = os.path.join(tmp_dir, fname)
-            with open(outp, "wb") as f:
-                for chunk in r.iter_content(chunk_size=128 * 1024):
-                    if chunk:
-                        f.write(chunk)
-            downloaded.append(outp)
+            stored = STORE.fetch(HTTP_SESSION, u, filename=lambda resp, u=u: safe_filename_from_url(u))
+            downloaded.append(STORE.link(slug, stored.filename, stored.sha256))
         except Exception:
             continue
 
     if not downloaded:
-        shutil.rmtree(tmp_dir, ignore_errors=True)
         return "", [], srcs
 
-    zip_path = os.path.join(attachments_dir, f"{slug}.zip")
-    zip_folder(tmp_dir, zip_path)
-    shutil.rmtree(tmp_dir, ignore_errors=True)
+    zip_path = STORE.export_zip(slug, os.path.join(attachments_dir, f"{slug}.zip"))
     return zip_path, downloaded, srcs
 
 # ----------- Section processing & pagination (minor: call checkpoint) -----------
@@ -317,8 +302,7 @@ def process_table_with_pagination(driver, section_name: str, attachments_dir: st
                 "source_urls": src_urls
             }
             out_rows.append(record)
-            ALL_ROWS.append(record)    # <-- track globally for partial saves
-            maybe_checkpoint()          # <-- NEW: checkpoint after each row
+            maybe_checkpoint(record)    # <-- checkpoint after each row
 
         # Try to click "Next" for this section
         next_btn = None
@@ -365,16 +349,20 @@ def process_table_with_pagination(driver, section_name: str, attachments_dir: st
 # -------------------- main --------------------
 
 def main():
-    global OUT_JSON_PATH
+    global OUT_JSON_PATH, STORE, CHECKPOINT
     ap = argparse.ArgumentParser(description="Maine RFP Archives (Selenium UI + requests attachments) → JSON + ZIPs with partial-save")
     ap.add_argument("--url", default=BASE_URL)
     ap.add_argument("--out-json", default=f"maine_rfp_{datetime.now().strftime('%Y%m%d_%H%M')}.json")
     ap.add_argument("--attachments-dir", default="Maine attachments")
+    ap.add_argument("--store-dir", default="maine_store", help="Content-addressed attachment store")
     args = ap.parse_args()
 
     OUT_JSON_PATH = os.path.abspath(args.out_json)
+    ensure_dir(os.path.dirname(OUT_JSON_PATH))
+    CHECKPOINT = CheckpointSink(os.path.splitext(OUT_JSON_PATH)[0] + ".jsonl", key=row_key, fsync_every=SAVE_EVERY)
     attachments_dir = os.path.abspath(args.attachments_dir)
     ensure_dir(attachments_dir)
+    STORE = AttachmentStore(os.path.abspath(args.store_dir))
 
     # Register partial-save handlers
     register_exit_handlers()
@@ -398,7 +386,7 @@ def main():
 
         # Final save (full)
         save_partial()
-        print(f"[INFO] Rows saved: {len(ALL_ROWS)}")
+        print(f"[INFO] Rows saved: {len(CHECKPOINT)}")
         print(f"[INFO] JSON  → {OUT_JSON_PATH}")
         print(f'[INFO] ZIPs  → "{attachments_dir}"')
 
@@ -414,6 +402,8 @@ def main():
                 driver.quit()
         except Exception:
             pass
+        STORE.close()
+        CHECKPOINT.close()
 
 if __name__ == "__main__":
     main()
@@ -8,13 +8,20 @@ Nevada ePro — Closed solicitations scraper (stable pages + robust attachments
 - Scrapes ALL pages; downloads each record's "File Attachments"
 - Writes Excel with all rows across pages
 - NEW: Autosave partial results after each page (and every 10 rows) and on any interruption.
+  Rows are appended to a JSONL checkpoint as they are scraped; the Excel file is
+  only written at the end (or on interruption).
+- Per-operation timings (page loads, paging, attachments, saves) → nevada_metrics.json
+
+By default the Periscope BSO engine (common.bso, tenant "nevada") scrapes the
+same grid, detail pages and attachments over HTTP; pass --selenium to run the
+browser scraper below instead.
 """
 
 import argparse, os, re, sys, time, json, signal
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -25,6 +32,14 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+from common.bso import tenant_main  # noqa: E402
+from common.checkpoint import CheckpointSink  # noqa: E402
+from common.download_tracker import DownloadTracker, enable_download_events  # noqa: E402
+from common.instrument import configure, instrument_driver, log_summary, timed  # noqa: E402
+
 ADV_URL = "https://nevadaepro.com/bso/view/search/external/advancedSearchBid.xhtml"
 
 TARGET_HEADERS = [
@@ -33,9 +48,8 @@ TARGET_HEADERS = [
 ]
 
 FILE_PAT = re.compile(r"\.(pdf|docx?|xlsx?|txt|csv|zip)\b", re.I)
-QUIET_SECONDS = 2
 DOWNLOAD_TIMEOUT = 300
-MIN_WAIT_AFTER_DOWNLOAD = 1.5
+DOWNLOAD_START_TIMEOUT = 10   # a click that starts no download within this is skipped
 RETRY_STALE = 4
 ROW_AUTOSAVE_INTERVAL = 10
 
@@ -53,35 +67,35 @@ def normalize(s: str) -> str:
 def ensure_dir(path: str) -> str:
     os.makedirs(path, exist_ok=True); return os.path.abspath(path)
 
-def wait_for_downloads(dirpath: str, quiet=QUIET_SECONDS, timeout=DOWNLOAD_TIMEOUT):
-    start=time.time(); last=start; prev=set(os.listdir(dirpath))
-    while True:
-        cur=set(os.listdir(dirpath))
-        if cur!=prev: last=time.time(); prev=cur
-        if not any(f.endswith((".crdownload",".tmp")) for f in cur) and time.time()-last>=quiet:
-            return
-        if time.time()-start>timeout: return
-        time.sleep(0.4)
-
 def timestamp() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M")
 
-def save_progress(out_folder: str, results: List[dict], page_no: int, note: str, final: bool=False) -> str:
-    cols = TARGET_HEADERS + ["Row URL","Attachment Files"]
-    name = f"nevada_closed_with_attachments_{timestamp()}"
-    name += "" if final else f"_partial_p{page_no}_r{len(results)}"
-    xlsx = os.path.join(out_folder, f"{name}.xlsx")
-    pd.DataFrame(results, columns=cols).to_excel(xlsx, index=False)
+@timed("save_progress")
+def save_progress(out_folder: str, results: CheckpointSink, page_no: int, note: str,
+                  final: bool=False, materialize: bool=True) -> str:
+    """Update progress.json; with ``materialize`` also write the rows to Excel (else return the checkpoint)."""
+    out = results.path
+    excel = None
+    if materialize:
+        cols = TARGET_HEADERS + ["Row URL","Attachment Files"]
+        name = f"nevada_closed_with_attachments_{timestamp()}"
+        name += "" if final else f"_partial_p{page_no}_r{len(results)}"
+        out = os.path.join(out_folder, f"{name}.xlsx")
+        results.write_xlsx(out, columns=cols)
+        excel = os.path.basename(out)
+    else:
+        results.flush()
     # write a tiny JSON manifest too
     with open(os.path.join(out_folder,"progress.json"), "w", encoding="utf-8") as f:
         json.dump({
             "rows_collected": len(results),
             "last_page_completed": page_no,
             "note": note,
-            "excel": os.path.basename(xlsx),
+            "checkpoint": os.path.basename(results.path),
+            "excel": excel,
             "updated_at": datetime.now().isoformat(timespec="seconds"),
         }, f, indent=2)
-    return xlsx
+    return out
 
 # ---------- driver ----------
 def build_driver(headless: bool, download_dir: str) -> webdriver.Chrome:
@@ -98,7 +112,11 @@ def build_driver(headless: bool, download_dir: str) -> webdriver.Chrome:
         "plugins.always_open_pdf_externally": True,
     }
     opts.add_experimental_option("prefs", prefs)
-    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
+    enable_download_events(opts)
+    block_assets(opts, KEEP_CSS)    # the attachment fallback relies on is_displayed()
+    drv = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
+    enable_blocking(drv, KEEP_CSS)
+    return drv
 
 # ---------- search ----------
 def wait_ready(drv, timeout=30):
@@ -290,33 +308,36 @@ def find_attachment_links(drv) -> List[object]:
             seen.add(key); uniq.append(a)
     return uniq
 
-def download_attachments_from_detail(drv, download_dir: str) -> List[str]:
-    before=set(os.listdir(download_dir))
+def download_attachments_from_detail(drv, tracker: DownloadTracker) -> List[str]:
     anchors = find_attachment_links(drv)
     if not anchors:
         return []
+    files: List[str] = []
     idx=0
     while idx < len(anchors) and not stop_flag["stop"]:
         a = anchors[idx]; idx += 1
+        mark = tracker.mark()
         try:
             drv.execute_script("arguments[0].scrollIntoView({block:'center'});", a)
             drv.execute_script("arguments[0].click();", a)
         except Exception:
             try: a.click()
             except Exception: continue
-        wait_for_downloads(download_dir); time.sleep(MIN_WAIT_AFTER_DOWNLOAD)
+        done = tracker.wait_for(1, since=mark, timeout=DOWNLOAD_TIMEOUT, start_timeout=DOWNLOAD_START_TIMEOUT)
+        files.extend(os.path.basename(p) for p in done)
         if not drv.find_elements(By.TAG_NAME, "body"):
             drv.back(); WebDriverWait(drv, 15).until(EC.presence_of_element_located((By.TAG_NAME,"body")))
         anchors = find_attachment_links(drv)
-    after=set(os.listdir(download_dir))
-    return sorted(list(after-before))
+    return sorted(files)
 
 # ---------- main scraping ----------
 def scrape_all(out_folder: str, headless: bool) -> Optional[str]:
     attachments_dir = ensure_dir(os.path.join(out_folder,"nevada_attachments"))
-    drv = build_driver(headless=headless, download_dir=attachments_dir)
+    drv = instrument_driver(build_driver(headless=headless, download_dir=attachments_dir))
+    tracker = DownloadTracker(drv, attachments_dir)
 
-    results: List[dict] = []
+    results = CheckpointSink(os.path.join(out_folder, f"nevada_closed_{timestamp()}.jsonl"),
+                             fsync_every=ROW_AUTOSAVE_INTERVAL)
     page_no = 1
     partial_path = None
 
@@ -368,9 +389,10 @@ def scrape_all(out_folder: str, headless: bool) -> Optional[str]:
                     except TimeoutException:
                         pass
                     rec["Row URL"] = drv.current_url
-                    files = download_attachments_from_detail(drv, attachments_dir)
+                    with timed("attachments"):
+                        files = download_attachments_from_detail(drv, tracker)
+                        tracker.wait_idle(DOWNLOAD_TIMEOUT)
                     rec["Attachment Files"] = "; ".join(files)
-                    wait_for_downloads(attachments_dir); time.sleep(MIN_WAIT_AFTER_DOWNLOAD)
                     drv.close(); drv.switch_to.window(results_handle)
                     ctx = find_results_table_context(drv) or ctx; table, thead, tbody, pager_root = ctx
                 except Exception:
@@ -378,19 +400,17 @@ def scrape_all(out_folder: str, headless: bool) -> Optional[str]:
                     except Exception: pass
                     ctx = find_results_table_context(drv) or ctx; table, thead, tbody, pager_root = ctx
 
-                results.append(rec)
-
-                # row-level autosave
-                if len(results) % ROW_AUTOSAVE_INTERVAL == 0:
-                    partial_path = save_progress(out_folder, results, page_no, note="autosave (rows)")
+                # row-level autosave: appended now, fsynced every ROW_AUTOSAVE_INTERVAL rows
+                results.add(rec)
 
             # page-level autosave
-            partial_path = save_progress(out_folder, results, page_no, note="autosave (page complete)")
+            partial_path = save_progress(out_folder, results, page_no, note="autosave (page complete)", materialize=False)
 
             if stop_flag["stop"]: break
 
             if pager_root and paginator_has_more(pager_root):
-                moved = paginator_click_next_and_wait(drv, table, pager_root, timeout=40)
+                with timed("paginate"):
+                    moved = paginator_click_next_and_wait(drv, table, pager_root, timeout=40)
                 if not moved: break
                 page_no += 1
                 continue
@@ -411,16 +431,25 @@ def scrape_all(out_folder: str, headless: bool) -> Optional[str]:
         print(f"[WARN] Reason: {e}")
         return partial_path
     finally:
+        results.close()
         try: drv.quit()
         except Exception: pass
+        log_summary(print)
 
 # ---------- CLI ----------
 def main():
+    if "--selenium" not in sys.argv[1:]:
+        sys.exit(tenant_main("nevada", attachments=True))
     ap = argparse.ArgumentParser(description="Nevada ePro Closed — autosave & robust attachment downloads")
+    ap.add_argument("--selenium", action="store_true", help="Use this browser scraper instead of the BSO engine")
     ap.add_argument("--out", default=".", help="Output folder")
     ap.add_argument("--headless", action="store_true", help="Run Chrome headless")
+    ap.add_argument("--metrics", default=os.environ.get("SCRAPER_METRICS") or "nevada_metrics.json",
+                    help="Per-operation timing report (JSON, relative to --out)")
+    ap.add_argument("--metrics-every", type=float, default=60, help="Rewrite the timing report every N seconds (0: only at exit)")
     args = ap.parse_args()
     out_dir = ensure_dir(args.out)
+    configure("Nevada", os.path.join(out_dir, args.metrics), args.metrics_every or None)
     path = scrape_all(out_dir, headless=args.headless)
     if not path: sys.exit(2)
 
@@ -9,10 +9,14 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import time
 import os
-import requests
+import sys
 import zipfile
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.downloader import Downloader  # noqa: E402
+
 CHROME_BINARY_PATH = "/usr/bin/google-chrome"
 
 if not os.path.exists(CHROME_BINARY_PATH):
@@ -79,6 +83,9 @@ downloads_dir = Path('downloads')
 downloads_dir.mkdir(exist_ok=True)
 
 data = []
+pending = []  # (entry, safe_name, pdf_filename, future)
+used_names = set()  # downloads run concurrently, so each needs its own .part and zip
+downloader = Downloader(workers=4, per_host=2)
 total_rows = len(rows[1:])
 successful_downloads = 0
 
@@ -146,49 +153,24 @@ for row_idx, row in enumerate(rows[1:], 1):
 
         entry['Details'] = '\n'.join(extra_details)
         
-        # Download PDF and create zip immediately for this opportunity
+        # Queue the PDF download; zips are created once all downloads finish
         if pdf_link:
-            try:
-                # Create a safe filename from the Name or use index
-                safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
-                if not safe_name or len(safe_name) < 3:
-                    safe_name = f"opportunity_{row_idx}"
-                
-                if len(safe_name) > 100:
-                    safe_name = safe_name[:100]
-                    
-                pdf_filename = f"{safe_name}.pdf"
-                pdf_filepath = downloads_dir / pdf_filename
-                
-                print(f"  Downloading PDF...", end=" ")
-                response = requests.get(pdf_link, timeout=30)
-                response.raise_for_status()
-                
-                with open(pdf_filepath, 'wb') as f:
-                    f.write(response.content)
-                print(f"Downloaded!")
-                
-                # Create individual zip file for this opportunity
-                zip_filename = f"{safe_name}.zip"
-                zip_filepath = downloads_dir / zip_filename
-                
-                print(f"  Creating zip file: {zip_filename}...", end=" ")
-                with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    zipf.write(pdf_filepath, pdf_filename)
-                
-                
-                # Remove the individual PDF file after zipping
-                pdf_filepath.unlink()
-                
-                entry['Zip_File'] = str(zip_filepath)
-                successful_downloads += 1
-                print(f"Successfully processed and zipped!")
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error: {str(e)}")
-                entry['Zip_File'] = f"Failed: {str(e)}"
+            # Create a safe filename from the Name or use index
+            safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).strip()
+            if not safe_name or len(safe_name) < 3:
+                safe_name = f"opportunity_{row_idx}"
+
+            if len(safe_name) > 100:
+                safe_name = safe_name[:100]
+
+            if safe_name.lower() in used_names:
+                safe_name = f"{safe_name}_{row_idx}"
+            used_names.add(safe_name.lower())
+
+            pdf_filename = f"{safe_name}.pdf"
+            future = downloader.submit(pdf_link, str(downloads_dir / pdf_filename), timeout=30)
+            pending.append((entry, safe_name, pdf_filename, future))
+            print(f"  Queued PDF download.")
         else:
             print(f"Skipping download (no PDF link)")
             entry['Zip_File'] = 'No PDF link available'
@@ -196,6 +178,32 @@ for row_idx, row in enumerate(rows[1:], 1):
         data.append(entry)
         print()
 
+# Collect the downloads and create one zip per opportunity
+for entry, safe_name, pdf_filename, future in pending:
+    try:
+        result = future.result()
+        pdf_filepath = Path(result.path)
+
+        zip_filename = f"{safe_name}.zip"
+        zip_filepath = downloads_dir / zip_filename
+
+        print(f"  Creating zip file: {zip_filename}...", end=" ")
+        with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.write(pdf_filepath, pdf_filename)
+
+        # Remove the individual PDF file after zipping
+        pdf_filepath.unlink()
+
+        entry['Zip_File'] = str(zip_filepath)
+        successful_downloads += 1
+        print(f"Successfully processed and zipped!")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        entry['Zip_File'] = f"Failed: {str(e)}"
+
+downloader.shutdown()
+
 # Save all data to Excel at the end
 if data:
     df = pd.DataFrame(data)
@@ -24,6 +24,7 @@ Notes:
 import argparse
 import json
 import os
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
@@ -37,6 +38,10 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+
 LIST_URL = "https://apps.das.nh.gov/bidscontracts/bids.aspx"
 
 
@@ -62,10 +67,12 @@ def make_driver(download_dir: Path) -> webdriver.Chrome:
     opts.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
     )
+    block_assets(opts, KEEP_CSS)    # the export link is waited on as clickable
 
     driver = webdriver.Chrome(
         service=ChromeService(ChromeDriverManager().install()), options=opts
     )
+    enable_blocking(driver, KEEP_CSS)
     driver.set_page_load_timeout(60)
 
     # Allow downloads in headless via CDP (best-effort)
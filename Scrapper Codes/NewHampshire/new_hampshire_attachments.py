@@ -18,7 +18,7 @@ What it does
        • javascript:__doPostBack(...)
        • Same-tab navigations (returns back)
        • New-tab popups (closes and returns)
-   - Waits for the downloads to finish (no .crdownload)
+   - Waits for exactly the downloads each click started (DevTools download events)
    - Moves only the NEW files from Chrome's download dir into:
        Bid <number>/<Description>/         (Bid # + Addendum)
        Bid <number>/Award Notice/          (Status/Award)
@@ -64,9 +64,18 @@ from selenium.common.exceptions import (
 )
 from webdriver_manager.chrome import ChromeDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
+from common.download_tracker import DownloadTracker, enable_download_events  # noqa: E402
+from common.instrument import log_summary  # noqa: E402
+from common.waits import wait_dom_quiet, wait_until  # noqa: E402
+
 BASE_URL = "https://apps.das.nh.gov/bidscontracts/bids.aspx"
 
 # Table & pagination xpaths (stable selectors by visible headers/text)
+DOWNLOAD_START_TIMEOUT = 5  # seconds a click may take to start its first download
+
 TABLE_XP = "//table[.//th[normalize-space()='Description'] and .//th[normalize-space()='Bid #']]"
 ROWS_XP  = TABLE_XP + "//tr[td]"
 PAGER_XP = "//div[.//a[normalize-space()='>>'] or .//a[normalize-space()='...'] or .//a[normalize-space()='1'] or .//input]"
@@ -104,6 +113,7 @@ def make_driver(download_dir: Path, headless: bool) -> webdriver.Chrome:
     }
     opts = Options()
     opts.add_experimental_option("prefs", prefs)
+    enable_download_events(opts)
     opts.page_load_strategy = "eager"
     if headless:
         opts.add_argument("--headless=new")
@@ -114,9 +124,10 @@ def make_driver(download_dir: Path, headless: bool) -> webdriver.Chrome:
     opts.add_argument("--disable-blink-features=AutomationControlled")
     opts.add_argument("--ignore-certificate-errors")
     # speed up list pages
-    opts.add_argument("--blink-settings=imagesEnabled=false")
+    block_assets(opts, BLOCK_ASSETS)
 
     drv = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
+    enable_blocking(drv, BLOCK_ASSETS)
     drv.set_page_load_timeout(60)
     return drv
 
@@ -158,58 +169,30 @@ def links_in_cell(drv, i: int, j: int):
         return []
 
 # ---------------- Download pipeline (Selenium) ----------------
-def list_downloaded_files(dd: Path) -> List[Path]:
-    return [p for p in dd.glob("*") if p.is_file() and not p.name.endswith(".crdownload")]
-
-def wait_downloads_idle(dd: Path, timeout: int = 30, settle: int = 2):
-    """
-    Wait until there are no .crdownload files and the file list is stable for `settle` seconds.
-    """
-    start = time.time()
-    last_count = -1
-    stable_since = time.time()
-    while True:
-        if time.time() - start > timeout:
-            return
-        cr = list(dd.glob("*.crdownload"))
-        files = list_downloaded_files(dd)
-        count = len(files)
-        if cr:
-            stable_since = time.time()
-        else:
-            if count != last_count:
-                last_count = count
-                stable_since = time.time()
-            else:
-                if time.time() - stable_since >= settle:
-                    return
-        time.sleep(0.25)
-
-def move_new_files(before: List[Path], dd: Path, dest: Path) -> List[str]:
-    before_set = {p.resolve() for p in before}
+def move_files(paths: List[str], dest: Path) -> List[str]:
     moved: List[str] = []
-    for p in list_downloaded_files(dd):
-        if p.resolve() not in before_set:
-            dest.mkdir(parents=True, exist_ok=True)
-            target = dest / p.name
-            stem, ext = target.stem, target.suffix
-            k = 1
-            while target.exists():
-                target = dest / f"{stem}_{k}{ext}"
-                k += 1
+    for src in paths:
+        p = Path(src)
+        dest.mkdir(parents=True, exist_ok=True)
+        target = dest / p.name
+        stem, ext = target.stem, target.suffix
+        k = 1
+        while target.exists():
+            target = dest / f"{stem}_{k}{ext}"
+            k += 1
+        try:
+            shutil.move(str(p), str(target))
+            moved.append(str(target))
+        except Exception:
             try:
-                shutil.move(str(p), str(target))
+                shutil.copy2(str(p), str(target))
+                p.unlink(missing_ok=True)
                 moved.append(str(target))
             except Exception:
-                try:
-                    shutil.copy2(str(p), str(target))
-                    p.unlink(missing_ok=True)
-                    moved.append(str(target))
-                except Exception:
-                    pass
+                pass
     return moved
 
-def click_link_and_download(drv, link_el, dd: Path, per_file_timeout: int) -> None:
+def click_link_and_download(drv, link_el) -> None:
     """
     Click one link robustly:
       - supports href, onclick window.open, __doPostBack
@@ -249,50 +232,48 @@ def click_link_and_download(drv, link_el, dd: Path, per_file_timeout: int) -> No
             except Exception:
                 pass
 
-    try:
-        if new_handle:
-            # New tab path
-            root = drv.current_window_handle
-            drv.switch_to.window(new_handle)
+    if new_handle:
+        # New tab path
+        root = drv.current_window_handle
+        drv.switch_to.window(new_handle)
+        time.sleep(0.2)
+        click_file_anchors_on_current_tab()
+        time.sleep(0.2)
+        try:
+            drv.close()
+        except Exception:
+            pass
+        drv.switch_to.window(root)
+    else:
+        # Same-tab OR direct download
+        if drv.current_url != url_before:
             time.sleep(0.2)
             click_file_anchors_on_current_tab()
             time.sleep(0.2)
+            # Go back to list page
             try:
-                drv.close()
+                drv.back()
+                WebDriverWait(drv, 25).until(EC.presence_of_element_located((By.XPATH, TABLE_XP)))
             except Exception:
                 pass
-            drv.switch_to.window(root)
-        else:
-            # Same-tab OR direct download
-            if drv.current_url != url_before:
-                time.sleep(0.2)
-                click_file_anchors_on_current_tab()
-                time.sleep(0.2)
-                # Go back to list page
-                try:
-                    drv.back()
-                    WebDriverWait(drv, 25).until(EC.presence_of_element_located((By.XPATH, TABLE_XP)))
-                except Exception:
-                    pass
-            # If still same URL, it was a direct download → just wait
-    finally:
-        wait_downloads_idle(dd, per_file_timeout, settle=2)
+        # If still same URL, it was a direct download → just wait
 
-def process_links_in_cell(drv, i: int, j: int, dd: Path, dest_dir: Path, per_file_timeout: int) -> List[str]:
+def process_links_in_cell(drv, i: int, j: int, tracker: DownloadTracker, dest_dir: Path, per_file_timeout: int) -> List[str]:
     links = links_in_cell(drv, i, j)
     saved_all: List[str] = []
     for a in links:
-        before = list_downloaded_files(dd)
+        mark = tracker.mark()
         try:
-            click_link_and_download(drv, a, dd, per_file_timeout)
+            click_link_and_download(drv, a)
         except Exception:
             # Ensure we’re still on a valid handle
             try:
                 drv.switch_to.window(drv.window_handles[0])
             except Exception:
                 pass
-        moved = move_new_files(before, dd, dest_dir)
-        saved_all.extend(moved)
+        # Exactly the files this click started, as soon as they finish
+        downloaded = tracker.wait_for(None, since=mark, timeout=per_file_timeout, start_timeout=DOWNLOAD_START_TIMEOUT)
+        saved_all.extend(move_files(downloaded, dest_dir))
     return saved_all
 
 # ---------------- Pagination (HARDENED) ----------------
@@ -365,19 +346,13 @@ def _click_ellipsis(drv) -> bool:
 
 def _wait_page_changed(drv, old_page: Optional[int], target_page: int, old_sig: str, timeout: float = 20.0) -> bool:
     """Wait until pager input shows target_page AND first-row signature changes (or pager signature changes)."""
-    t0 = time.time()
-    while time.time() - t0 < timeout:
-        try:
-            cur = _current_page_num(drv)
-            if cur == target_page:
-                # also ensure content changed (avoid misreads)
-                sig = _table_signature(drv)
-                if sig and sig != old_sig:
-                    return True
-        except Exception:
-            pass
-        time.sleep(0.2)
-    return False
+    def changed():
+        if _current_page_num(drv) != target_page:
+            return False
+        # also ensure content changed (avoid misreads)
+        sig = _table_signature(drv)
+        return bool(sig) and sig != old_sig
+    return wait_until(changed, timeout, name="grid_change")
 
 def paginate_next(drv) -> bool:
     """
@@ -414,19 +389,19 @@ def paginate_next(drv) -> bool:
         if not _click_ellipsis(drv):
             # No more blocks; we’re likely at the last page
             return False
-        # Small wait for pager to rerender
+        # Wait for pager to rerender
         try:
             wait_present(drv, TABLE_XP)
         except Exception:
             pass
-        time.sleep(0.3)
+        wait_dom_quiet(drv, quiet=0.2, timeout=3)
         _scroll_pager_into_view(drv)
     return False
 
 # ---------------- Main ----------------
 def main():
     ap = argparse.ArgumentParser(description="NH Awarded — Selenium click-to-download (robust)")
-    ap.add_argument("--out", required=True, help="Base output directory")
+    ap.add_argument("--out", default=".", help="Base output directory (default: current directory)")
     ap.add_argument("--headless", action="store_true", help="Run Chrome in headless mode")
     ap.add_argument("--dl-timeout", type=int, default=25, help="Per-click download wait seconds")
     args = ap.parse_args()
@@ -455,6 +430,7 @@ def main():
             pass
 
     drv = make_driver(chrome_dl, args.headless)
+    tracker = DownloadTracker(drv, str(chrome_dl))
     rows_json: List[Dict[str, Any]] = []
 
     # Always write JSON on close/Ctrl+C
@@ -509,11 +485,11 @@ def main():
 
                 # BID # + ADDENDUM → Description folder (click ALL links)
                 moved_desc: List[str] = []
-                moved_desc += process_links_in_cell(drv, i, 2, chrome_dl, desc_dir, args.dl_timeout)
-                moved_desc += process_links_in_cell(drv, i, 4, chrome_dl, desc_dir, args.dl_timeout)
+                moved_desc += process_links_in_cell(drv, i, 2, tracker, desc_dir, args.dl_timeout)
+                moved_desc += process_links_in_cell(drv, i, 4, tracker, desc_dir, args.dl_timeout)
 
                 # STATUS/AWARD → Award Notice folder (click ALL links)
-                moved_award = process_links_in_cell(drv, i, 7, chrome_dl, award_dir, args.dl_timeout)
+                moved_award = process_links_in_cell(drv, i, 7, tracker, award_dir, args.dl_timeout)
 
                 row_json = dict(meta)
                 row_json["BidNumberParsed"] = bid_num
@@ -550,6 +526,7 @@ def main():
         print(f"[OK] ZIP : {archive_path}")
 
     finally:
+        log_summary(print, prefix="wait.")
         # Leave chrome_dl if partial .crdownload present; else try cleanup if empty
         try:
             if not list(chrome_dl.glob("*.crdownload")) and not list(chrome_dl.glob("*")):
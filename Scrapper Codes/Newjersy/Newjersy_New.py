@@ -11,6 +11,12 @@ import zipfile
 import json
 from pathlib import Path
 from datetime import datetime
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.bso import tenant_main  # noqa: E402
+from common.download_tracker import DownloadTracker, enable_download_events  # noqa: E402
 
 URL = "https://www.njstart.gov/bso/view/search/external/advancedSearchBid.xhtml"
 BASE_DOWNLOAD_DIR = Path("downloads")
@@ -47,16 +53,6 @@ def safe_text(element):
     except:
         return None
 
-def wait_for_downloads(download_dir, timeout=60):
-    """Wait until all Chrome downloads are complete."""
-    end_time = time.time() + timeout
-    while time.time() < end_time:
-        if any(f.endswith(".crdownload") for f in os.listdir(download_dir)):
-            time.sleep(1)
-        else:
-            return True
-    return False
-
 def scrape_contract_details(driver, wait, contract_link, bid_number, contract_number, temp_download_dir, main_window):
     """Scrape contract details including actual cost, PO number, vendor info, and attachments."""
     contract_data = {
@@ -126,19 +122,18 @@ def scrape_contract_details(driver, wait, contract_link, bid_number, contract_nu
                 
                 ## downloading functionality
 
-                before_files = set(os.listdir(temp_download_dir))
+                mark = tracker.mark()
+                clicked = 0
                 
                 for link in attachment_links:
                     try:
                         driver.execute_script("arguments[0].click();", link)
-                        time.sleep(2)
+                        clicked += 1
                     except Exception as e:
                         print(f"Failed to download contract attachment: {e}")
                 
-                wait_for_downloads(temp_download_dir, timeout=90)
-                
-                after_files = set(os.listdir(temp_download_dir))
-                new_files = list(after_files - before_files)
+                downloaded = tracker.wait_for(clicked, since=mark, timeout=90, start_timeout=15)
+                new_files = [os.path.basename(f) for f in downloaded]
                 
                 if new_files:
                     # Add to existing zip or create new one
@@ -276,19 +271,18 @@ def scrape_detail_page(driver, wait, bid_number, temp_download_dir, main_window,
                 
                 ## downloading functionality
                 
-                before_files = set(os.listdir(temp_download_dir))
+                mark = tracker.mark()
+                clicked = 0
 
                 for link in file_links:
                     try:
                         driver.execute_script("arguments[0].click();", link)
-                        time.sleep(2)
+                        clicked += 1
                     except Exception as e:
                         print(f"Failed to download a file: {e}")
 
-                wait_for_downloads(temp_download_dir, timeout=90)
-
-                after_files = set(os.listdir(temp_download_dir))
-                new_files = list(after_files - before_files)
+                downloaded = tracker.wait_for(clicked, since=mark, timeout=90, start_timeout=15)
+                new_files = [os.path.basename(f) for f in downloaded]
 
                 if new_files:
                     # Create zip file
@@ -382,6 +376,11 @@ def scrape_detail_page(driver, wait, bid_number, temp_download_dir, main_window,
 
 # Selenium setup
 
+# The Periscope BSO engine (common.bso, tenant "newjersey") reads the same grid,
+# bid and PO pages over HTTP; --selenium runs the browser scraper below instead.
+if "--selenium" not in sys.argv[1:]:
+    sys.exit(tenant_main("newjersey", years=sorted(YEARS)))
+
 temp_download_dir = Path("/tmp/njstart_downloads")
 temp_download_dir.mkdir(parents=True, exist_ok=True)
 
@@ -395,8 +394,10 @@ prefs = {
     "profile.default_content_setting_values.automatic_downloads": 1,
 }
 options.add_experimental_option("prefs", prefs)
+enable_download_events(options)
 
 driver = webdriver.Chrome(options=options)
+tracker = DownloadTracker(driver, str(temp_download_dir))
 wait = WebDriverWait(driver, 30)
 
 try:
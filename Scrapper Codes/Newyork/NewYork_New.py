@@ -5,9 +5,15 @@ from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import sys
 import time
 import pandas as pd
 from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
 
 
 def setup_driver():
@@ -16,7 +22,9 @@ def setup_driver():
     options = webdriver.ChromeOptions()
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
+    block_assets(options, BLOCK_ASSETS)
     driver = webdriver.Chrome(service=service, options=options)
+    enable_blocking(driver, BLOCK_ASSETS)
     return driver
 
 
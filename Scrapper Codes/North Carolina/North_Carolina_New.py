@@ -8,10 +8,16 @@ from webdriver_manager.chrome import ChromeDriverManager
 import time
 import os
 import logging
+import sys
 import zipfile
 from openpyxl import Workbook, load_workbook
+from pathlib import Path
 import json
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.download_tracker import DownloadTracker, enable_download_events  # noqa: E402
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 chrome_options = webdriver.ChromeOptions()
@@ -25,9 +31,11 @@ chrome_options.add_experimental_option("prefs", {
     "download.directory_upgrade": True,
     "safebrowsing.enabled": True
 })
+enable_download_events(chrome_options)
 
 try:
     driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    tracker = DownloadTracker(driver, download_dir)
     logging.info("WebDriver initialized successfully")
 except Exception as e:
     logging.error(f"Failed to initialize WebDriver: {e}")
@@ -42,16 +50,6 @@ ws.append(headers)
 
 all_data = []
 
-def wait_for_download(directory, timeout=30):
-    """Wait for download to complete"""
-    seconds = 0
-    while seconds < timeout:
-        time.sleep(1)
-        if not any([filename.endswith(".crdownload") or filename.endswith(".tmp") for filename in os.listdir(directory)]):
-            return True
-        seconds += 1
-    return False
-
 def scrape_awards_table(driver):
     """Scrape awards table data"""
     awards_data = []
@@ -204,17 +202,14 @@ def scrape_opportunity(driver, opportunity_url, download_dir, excel_file):
                     logging.info(f"Scraping attachment name: {filename}")
                  
                     # Click to download
+                    mark = tracker.mark()
                     link.click()
-                    wait_for_download(download_dir)
-                    
+
                     # Move the downloaded file to the attachment folder
-                    downloaded_files = [f for f in os.listdir(download_dir) if os.path.isfile(os.path.join(download_dir, f)) and not f.endswith('.zip') and not f.endswith('.xlsx')]
-                    if downloaded_files:
-                        latest_file = max([os.path.join(download_dir, f) for f in downloaded_files], key=os.path.getctime)
-                        new_path = os.path.join(attachment_folder, os.path.basename(latest_file))
-                        os.rename(latest_file, new_path)
-                        logging.info(f"Moved {latest_file} to {new_path}")
-                    time.sleep(1)
+                    for path in tracker.wait_for(1, since=mark, timeout=30):
+                        new_path = os.path.join(attachment_folder, os.path.basename(path))
+                        os.replace(path, new_path)
+                        logging.info(f"Moved {path} to {new_path}")
                  
                 except Exception as e:
                     logging.error(f"Error processing attachment: {e}")
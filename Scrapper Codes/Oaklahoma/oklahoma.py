@@ -23,6 +23,8 @@ import json
 import time
 import zipfile
 import argparse
+import sys
+from pathlib import Path
 from urllib.parse import urlparse
 
 import requests
@@ -36,6 +38,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
+
 BASE_URL = "https://oklahoma.gov/ohca/about/procurement.html"
 OK_DOMAIN = "oklahoma.gov"
 
@@ -67,8 +73,11 @@ def init_driver(download_dir: str) -> webdriver.Chrome:
     opts = webdriver.ChromeOptions()
     opts.add_experimental_option("prefs", prefs)
     opts.add_argument("--start-maximized")  # visible browser
+    block_assets(opts, BLOCK_ASSETS)
     service = ChromeService(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=opts)
+    driver = webdriver.Chrome(service=service, options=opts)
+    enable_blocking(driver, BLOCK_ASSETS)
+    return driver
 
 
 def wait_for_table(driver):
@@ -3,16 +3,25 @@ import re
 import time
 import os
 import json
-import zipfile
-import tempfile
-from datetime import datetime
-from typing import Optional, Dict, List
+import argparse
+import sys
+import threading
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
 
 import requests
 from bs4 import BeautifulSoup
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blobstore import AttachmentStore  # noqa: E402
+from common.jsonl import JsonlWriter, compact_jsonl  # noqa: E402
+
 # --- Set Aside Map ---
 SET_ASIDE_MAP = {
     "8A": "8(a) Competed",
@@ -54,11 +63,29 @@ DETAIL_API_BASE_URL = "https://sam.gov/api/prod/opps/v2/opportunities/"
 RESOURCES_API_BASE_URL = "https://sam.gov/api/prod/opps/v3/opportunities/"
 
 DOWNLOAD_DIR = "sam_gov_downloads"
-os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+# Attachments are stored once per content hash; per-notice ZIPs are exported from here.
+ATTACHMENT_STORE_DIR = "sam_gov_store"
+EXPORT_ZIPS = True
 
 JSON_OUTPUT_FILE = "sam_gov_data_inactive_f1.json"
+JSONL_OUTPUT_FILE = "sam_gov_data_inactive_f1.jsonl"
+SYNC_STATE_FILE = "sam_gov_sync_state.json"
+SYNC_CHECKPOINT_SECONDS = 30   # sync state is saved at page boundaries, at most this often
+FSYNC_EVERY = 50
 REQUEST_TIMEOUT = 45
 RECORDS_PER_PAGE = 25
+MAX_RESULTS_PER_QUERY = 10000
+MAX_CONCURRENCY = 8
+MAX_PENDING_RECORDS = 400   # records queued for detail fetches before the listing waits for some to finish
+START_DATE = date(2005, 1, 1)
+TZ_OFFSET = "+05:30"
+
+TARGET_SET_ASIDES = [
+    "SBA", "SBP", "8A", "8AN", "HZC", "HZS",
+    "SDVOSBC", "SDVOSBS", "WOSB", "WOSBSS",
+    "EDWOSB", "EDWOSBSS", "IEE", "BI",
+    "ISBEE", "VSA", "VSS",
+]
 
 HEADERS = {
     "User-Agent": (
@@ -68,11 +95,6 @@ HEADERS = {
     "Content-Type": "application/json",
 }
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
-
 
 def create_session() -> requests.Session:
     """
@@ -87,36 +109,85 @@ def create_session() -> requests.Session:
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS"]),
     )
-    adapter = HTTPAdapter(max_retries=retries)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=MAX_CONCURRENCY, pool_maxsize=MAX_CONCURRENCY)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
 
-# --- Helper: Generate year chunks for SBA ---
-def generate_year_chunks(start_year: int = 2005, end_year: Optional[int] = None, tz_offset: str = "+05:30") -> List[tuple]:
+# --- Concurrency ---
+# Every HTTP call (list pages, details, resources, attachment downloads) takes a
+# slot, so fan-out at any level never exceeds MAX_CONCURRENCY requests in flight.
+_http_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+
+_store: Optional[AttachmentStore] = None
+_store_lock = threading.Lock()
+
+
+def api_get(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    with _http_slots:
+        return session.get(url, **kwargs)
+
+
+# --- Date windows ---
+def format_window(day_from: date, day_to: date, tz_offset: str = TZ_OFFSET) -> Tuple[str, str]:
     """
-    Generate (modified_date.from, modified_date.to) pairs for each year.
-    Uses a timezone offset suffix such as '+05:30' (Asia/Kolkata) by default.
-
-    Example returns:
-    [
-      ("2005-01-01+05:30", "2005-12-31+23:59:59+05:30"),
-      ("2006-01-01+05:30", "2006-12-31+23:59:59+05:30"),
-      ...
-    ]
+    (modified_date.from, modified_date.to) covering whole days, e.g.
+    ("2005-01-01+05:30", "2005-12-31T23:59:59+05:30").
     """
-    if end_year is None:
-        end_year = datetime.now().year
+    return f"{day_from.isoformat()}{tz_offset}", f"{day_to.isoformat()}T23:59:59{tz_offset}"
+
+
+def list_params(set_aside_code: str, page: int, window: Tuple[date, date], size: int = RECORDS_PER_PAGE) -> Dict:
+    date_from, date_to = format_window(*window)
+    return {
+        "random": int(time.time() * 1000),
+        "index": "opp",
+        "page": page,
+        "sort": "-modifiedDate",
+        "size": size,
+        "mode": "search",
+        "responseType": "json",
+        "is_active": "false",
+        "notice_type": "a",
+        "set_aside": set_aside_code,
+        "modified_date.from": date_from,
+        "modified_date.to": date_to,
+    }
+
+
+def fetch_list_page(session: requests.Session, set_aside_code: str, page: int, window: Tuple[date, date]) -> Dict:
+    response = api_get(
+        session, LIST_API_URL, params=list_params(set_aside_code, page, window), timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
 
-    chunks = []
-    for y in range(start_year, end_year + 1):
-        date_from = f"{y}-01-01{tz_offset}"
-        date_to = f"{y}-12-31T23:59:59{tz_offset}"
-        # Keep formats compatible with examples (API tolerates both with/without T),
-        # but include time for `to` to capture full day.
-        chunks.append((date_from, date_to))
-    return chunks
+def plan_windows(session: requests.Session, set_aside_code: str, window: Tuple[date, date]) -> List[Tuple[Tuple[date, date], int]]:
+    """
+    Split ``window`` in half until every piece reports fewer than
+    MAX_RESULTS_PER_QUERY ``totalElements`` (the API stops paging at 10k).
+    Returns [(window, total_records)] for the non-empty pieces.
+    """
+    data = fetch_list_page(session, set_aside_code, 0, window)
+    total = data.get("page", {}).get("totalElements", 0)
+    day_from, day_to = window
+    if total < MAX_RESULTS_PER_QUERY:
+        return [(window, total)] if total else []
+    if day_from >= day_to:
+        logging.warning(
+            f"[{set_aside_code}] {day_from} alone has {total} records; only the first "
+            f"{MAX_RESULTS_PER_QUERY} are reachable."
+        )
+        return [(window, total)]
+    mid = day_from + (day_to - day_from) // 2
+    logging.info(f"[{set_aside_code}] {day_from} → {day_to} has {total} records; splitting at {mid}.")
+    return (
+        plan_windows(session, set_aside_code, (day_from, mid))
+        + plan_windows(session, set_aside_code, (mid + timedelta(days=1), day_to))
+    )
 
 
 # --- Fetch attachment metadata ---
@@ -124,7 +195,7 @@ def fetch_attachment_metadata(session: requests.Session, internal_id: str) -> Li
     try:
         resources_url = f"{RESOURCES_API_BASE_URL}{internal_id}/resources"
         api_params = {"api_key": "null", "random": int(time.time() * 1000)}
-        response = session.get(resources_url, params=api_params, timeout=REQUEST_TIMEOUT)
+        response = api_get(session, resources_url, params=api_params, timeout=REQUEST_TIMEOUT)
 
         if response.status_code != 200:
             return []
@@ -149,84 +220,110 @@ def fetch_attachment_metadata(session: requests.Session, internal_id: str) -> Li
         return []
 
 
-# --- Download and ZIP attachments ---
-def download_and_zip_attachments(session: requests.Session, notice_id: str, attachment_metadata: List[Dict]) -> Optional[str]:
-    if not attachment_metadata:
-        return None
-
-    zip_filename = f"{notice_id}.zip"
-    zip_filepath = os.path.join(DOWNLOAD_DIR, zip_filename)
+# --- Store and ZIP attachments ---
+def attachment_store() -> AttachmentStore:
+    """The shared content-addressed store; opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AttachmentStore(ATTACHMENT_STORE_DIR)
+        return _store
 
-    if os.path.exists(zip_filepath):
-        logging.info(f" -> Zip already exists: {zip_filename}")
-        return zip_filepath
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        files_downloaded = False
+def store_attachment(session: requests.Session, internal_id: str, attachment: Dict) -> bool:
+    """
+    Put one attachment in the store and link it to the notice's ``internal_id``.
+    Resource ids are immutable, so a known one is linked without any request.
+    """
+    store = attachment_store()
+    source_key = f"sam:{attachment['resourceId']}"
+    safe_filename = re.sub(r'[\\/*?:"<>|]', "_", attachment["name"])
+
+    known = store.lookup(source_key)
+    if known:
+        store.link(internal_id, safe_filename, known[0])
+        return True
+
+    redirect_url = (
+        f"{RESOURCES_API_BASE_URL}resources/files/"
+        f"{attachment['resourceId']}/download"
+    )
+    try:
+        redirect_res = api_get(
+            session,
+            redirect_url,
+            params={"api_key": "null", "token": ""},
+            allow_redirects=False,
+            timeout=REQUEST_TIMEOUT,
+        )
 
-        for attachment in attachment_metadata:
-            redirect_url = (
-                f"{RESOURCES_API_BASE_URL}resources/files/"
-                f"{attachment['resourceId']}/download"
+        if redirect_res.status_code != 303 or "Location" not in redirect_res.headers:
+            logging.warning(f" -> No redirect found for {attachment['name']}")
+            return False
+
+        s3_url = redirect_res.headers["Location"]
+        logging.info(f" -> Downloading: {safe_filename}...")
+
+        with _http_slots:
+            stored = store.fetch(
+                session, s3_url,
+                source_key=source_key,
+                revalidate=False,
+                filename=lambda resp: safe_filename,
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=REQUEST_TIMEOUT,
             )
-            try:
-                redirect_res = session.get(
-                    redirect_url,
-                    params={"api_key": "null", "token": ""},
-                    allow_redirects=False,
-                    timeout=REQUEST_TIMEOUT,
-                )
+        store.link(internal_id, safe_filename, stored.sha256)
+        return True
 
-                if (
-                    redirect_res.status_code == 303
-                    and "Location" in redirect_res.headers
-                ):
-                    s3_url = redirect_res.headers["Location"]
-                    safe_filename = re.sub(
-                        r'[\\/*?:"<>|]', "_", attachment["name"]
-                    )
-                    temp_filepath = os.path.join(temp_dir, safe_filename)
-
-                    logging.info(f" -> Downloading: {safe_filename}...")
-
-                    file_resp = session.get(
-                        s3_url, stream=True,
-                        headers={"User-Agent": "Mozilla/5.0"},
-                        timeout=REQUEST_TIMEOUT,
-                    )
-
-                    if file_resp.status_code == 200:
-                        with open(temp_filepath, "wb") as f:
-                            for chunk in file_resp.iter_content(chunk_size=8192):
-                                f.write(chunk)
-                        files_downloaded = True
-                    else:
-                        logging.warning(f" -> Failed to download content for {safe_filename}")
-
-                else:
-                    logging.warning(f" -> No redirect found for {attachment['name']}")
+    except Exception as e:
+        logging.error(f" -> Error processing attachment {attachment['name']}: {e}")
+        return False
 
-            except Exception as e:
-                logging.error(f" -> Error processing attachment {attachment['name']}: {e}")
 
-        if files_downloaded:
-            logging.info(f" -> Zipping files into {zip_filename}...")
-            try:
-                with zipfile.ZipFile(zip_filepath, "w", zipfile.ZIP_DEFLATED) as zipf:
-                    for root, _, files in os.walk(temp_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            zipf.write(file_path, arcname=file)
-                return zip_filepath
-            except Exception as e:
-                logging.error(f" -> Error creating zip file: {e}")
-                return None
+def resource_signature(attachment_metadata: List[Dict]) -> str:
+    """Order-independent fingerprint of a notice's attachment list."""
+    return "|".join(sorted(f"{a['resourceId']}:{a['name']}" for a in attachment_metadata))
+
+
+def download_and_zip_attachments(
+    session: requests.Session, internal_id: str, attachment_metadata: List[Dict], force: bool = False
+) -> Optional[str]:
+    """
+    Store the notice's attachments and, unless EXPORT_ZIPS is off, export
+    DOWNLOAD_DIR/<internal_id>.zip from the store. ``force`` rebuilds the
+    notice's attachment list (resources changed since the last sync).
+
+    Links and ZIPs are keyed on the opportunity's ``_id``: solicitation
+    numbers are shared by the notices of one solicitation, which are
+    processed concurrently.
+    """
+    if not attachment_metadata:
+        return None
+
+    store = attachment_store()
+    if force:
+        store.unlink_notice(internal_id)
+
+    with ThreadPoolExecutor(max_workers=min(4, len(attachment_metadata))) as pool:
+        done = list(pool.map(lambda att: store_attachment(session, internal_id, att), attachment_metadata))
 
+    if not any(done) or not EXPORT_ZIPS:
+        return None
+    try:
+        return store.export_zip(internal_id, os.path.join(DOWNLOAD_DIR, f"{internal_id}.zip"))
+    except Exception as e:
+        logging.error(f" -> Error creating zip file for {internal_id}: {e}")
         return None
 
 
 # --- Process each opportunity ---
-def process_opportunity(session: requests.Session, list_item: Dict) -> Optional[Dict]:
+def process_opportunity(session: requests.Session, list_item: Dict, known_resources: Optional[str] = None) -> Optional[Dict]:
+    """
+    Build the output record for one search hit. ``known_resources`` is the
+    resource_signature seen on a previous sync; attachments are re-downloaded
+    only when it differs. The current signature is returned as ``_resources``.
+    """
     internal_id = list_item.get("_id")
     if not internal_id:
         return None
@@ -235,7 +332,8 @@ def process_opportunity(session: requests.Session, list_item: Dict) -> Optional[
         logging.info(f" - Processing Internal ID: {internal_id}")
 
         api_params = {"api_key": "null", "random": int(time.time() * 1000)}
-        detail_response = session.get(
+        detail_response = api_get(
+            session,
             f"{DETAIL_API_BASE_URL}{internal_id}",
             params=api_params,
             timeout=REQUEST_TIMEOUT,
@@ -254,8 +352,10 @@ def process_opportunity(session: requests.Session, list_item: Dict) -> Optional[
 
         # Attachments
         attachment_metadata = fetch_attachment_metadata(session, internal_id)
+        signature = resource_signature(attachment_metadata)
+        resources_changed = known_resources is not None and known_resources != signature
         zip_path = download_and_zip_attachments(
-            session, notice_id, attachment_metadata
+            session, internal_id, attachment_metadata, force=resources_changed
         ) if attachment_metadata else None
 
         # Text fields
@@ -338,6 +438,7 @@ def process_opportunity(session: requests.Session, list_item: Dict) -> Optional[
             "awardee_state": (awardee_location.get("state") or {}).get("name"),
             "awardee_country": (awardee_location.get("country") or {}).get("name"),
             "awardee_zip": awardee_location.get("zip"),
+            "_resources": signature,
         }
 
         logging.info(f"   Processed: {title[:50]}..." if title else "   Processed an item...")
@@ -348,175 +449,330 @@ def process_opportunity(session: requests.Session, list_item: Dict) -> Optional[
         return None
 
 
-# MAIN SCRAPER WITH CHUNKING BY SET-ASIDE CODE
-def scrape_sam_gov():
-    logging.info("--- Running SAM.gov Scraper (Chunking by Set-Aside) ---")
-
-    session = create_session()
-    all_results = []
-
-    # Chunking list
-    target_set_asides = [
-        "SBA", "SBP", "8A", "8AN", "HZC", "HZS",
-        "SDVOSBC", "SDVOSBS", "WOSB", "WOSBSS",
-        "EDWOSB", "EDWOSBSS", "IEE", "BI",
-        "ISBEE", "VSA", "VSS",
-    ]
-
-    # Process each set-aside chunk individually
-    for set_aside_code in target_set_asides:
-        logging.info(f"\n========== Processing SET-ASIDE: {set_aside_code} ==========\n")
-
-        # --- Special handling for SBA (10k+ records) ---
-        if set_aside_code == "SBA":
-            # Adjust start_year if you want to go further back or forward
-            year_chunks = generate_year_chunks(start_year=2005, end_year=datetime.now().year, tz_offset="+05:30")
-
-            for (date_from, date_to) in year_chunks:
-                logging.info(f"[SBA] Year Chunk: {date_from[:4]}  →  {date_from} to {date_to}")
-
-                page = 0
-                total_pages = 1
-
-                while True:
-                    params = {
-                        "random": int(time.time() * 1000),
-                        "index": "opp",
-                        "page": page,
-                        "sort": "-modifiedDate",
-                        "size": RECORDS_PER_PAGE,
-                        "mode": "search",
-                        "responseType": "json",
-                        "is_active": "false",
-                        "notice_type": "a",
-                        "set_aside": "SBA",
-                        "modified_date.from": date_from,
-                        "modified_date.to": date_to,
-                    }
-
-                    try:
-                        logging.info(f"[SBA] {date_from[:4]} → Fetching page {page + 1}...")
-
-                        response = session.get(
-                            LIST_API_URL, params=params, timeout=REQUEST_TIMEOUT
-                        )
-                        response.raise_for_status()
-
-                        data = response.json()
-
-                        if page == 0:
-                            total_pages = data.get("page", {}).get("totalPages", 1)
-                            total_records = data.get("page", {}).get("totalElements", 0)
-
-                            logging.info(
-                                f"[SBA] Year {date_from[:4]} → {total_records} records across {total_pages} pages."
-                            )
-
-                            if total_records >= 10000:
-                                logging.warning(
-                                    f"[SBA] WARNING: Year chunk {date_from[:4]} still exceeds 10k records!"
-                                )
-
-                        opportunities = data.get("_embedded", {}).get("results", [])
-
-                        if not opportunities:
-                            logging.info(f"[SBA] Year {date_from[:4]} → No more results for this year chunk.")
-                            break
-
-                        for item in opportunities:
-                            result = process_opportunity(session, item)
-                            if result:
-                                all_results.append(result)
-
-                        page += 1
-                        if page >= total_pages:
-                            logging.info(f"[SBA] Completed year {date_from[:4]} ({total_pages} pages).")
-                            break
-
-                        # polite pause (tune as needed)
-                        time.sleep(1)
-
-                    except Exception as e:
-                        logging.error(f"[SBA] Error while fetching year {date_from[:4]}: {e}")
-                        # break this year's loop and continue with next year
-                        break
-
-            # After finishing SBA chunks, continue to next set-aside
-            continue
-
-        # --- Normal pagination for other set-asides ---
-        page = 0
-        total_pages = 1
-
-        while True:
-            params = {
-                "random": int(time.time() * 1000),
-                "index": "opp",
-                "page": page,
-                "sort": "-modifiedDate",
-                "size": RECORDS_PER_PAGE,
-                "mode": "search",
-                "responseType": "json",
-                "is_active": "false",
-                "notice_type": "a",
-                "set_aside": set_aside_code,
-            }
-
-            try:
-                logging.info(f"[{set_aside_code}] Fetching page {page + 1}...")
+# --- Incremental sync state ---
+def load_sync_state() -> Dict:
+    """
+    {set_aside: {"watermark": modifiedDate everything up to is synced,
+                 "records": {_id: modifiedDate}, "resources": {_id: resource_signature}}}
+    """
+    if not os.path.exists(SYNC_STATE_FILE):
+        return {}
+    with open(SYNC_STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-                response = session.get(
-                    LIST_API_URL, params=params, timeout=REQUEST_TIMEOUT
-                )
-                response.raise_for_status()
 
-                data = response.json()
+def save_sync_state(state: Dict) -> None:
+    tmp = SYNC_STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, SYNC_STATE_FILE)
 
-                if page == 0:
-                    total_pages = data.get("page", {}).get("totalPages", 1)
-                    total_records = data.get("page", {}).get("totalElements", 0)
 
-                    logging.info(
-                        f"[{set_aside_code}] Found {total_records} results across {total_pages} pages."
-                    )
+class SyncProgress:
+    """
+    Per set-aside bookkeeping of a --sync run. Records and resource
+    signatures are checkpointed to SYNC_STATE_FILE at page boundaries. A
+    set-aside's watermark only moves once its listing and all of its records
+    are done, and never past the oldest record whose fetch failed, so an
+    interrupted run or a failed record is picked up by the next sync.
+    """
 
-                    if total_records >= 10000:
-                        logging.warning(
-                            f"[{set_aside_code}] WARNING: This set-aside still exceeds 10k records!"
-                        )
+    def __init__(self, state: Dict, writer: JsonlWriter):
+        self.state = state
+        self.writer = writer
+        self.open_pages: Counter = Counter()
+        self.pending: Counter = Counter()
+        self.listed: set = set()
+        self.broken: set = set()
+        self.finished: set = set()
+        self.oldest_failed: Dict[str, str] = {}
+        self._saved = time.monotonic()
+
+    def code_state(self, code: str) -> Dict:
+        return self.state.setdefault(code, {"watermark": None, "records": {}, "resources": {}})
+
+    def is_unchanged(self, code: str, item: Dict) -> bool:
+        return self.code_state(code)["records"].get(item.get("_id")) == item.get("modifiedDate")
+
+    def submitted(self, code: str) -> None:
+        self.pending[code] += 1
+
+    def record_done(self, code: str, internal_id: str, modified: Optional[str], result: Optional[Dict]) -> None:
+        self.pending[code] -= 1
+        if result:
+            code_state = self.code_state(code)
+            code_state["records"][internal_id] = modified
+            code_state["resources"][internal_id] = result.get("_resources")
+        elif modified and (code not in self.oldest_failed or modified < self.oldest_failed[code]):
+            self.oldest_failed[code] = modified
+        self._maybe_finish(code)
+
+    def page_queued(self, code: str) -> None:
+        self.open_pages[code] += 1
+
+    def page_done(self, code: str, ok: bool = True) -> None:
+        self.open_pages[code] -= 1
+        if not ok:
+            self.broken.add(code)
+        if not self.open_pages[code]:
+            self.listing_done(code)
+
+    def listing_done(self, code: str, ok: bool = True) -> None:
+        if not ok:
+            self.broken.add(code)
+        self.listed.add(code)
+        self._maybe_finish(code)
+
+    def _maybe_finish(self, code: str) -> None:
+        if code in self.finished or code not in self.listed or self.pending[code]:
+            return
+        self.finished.add(code)
+        code_state = self.code_state(code)
+        if code in self.broken:
+            logging.warning(f"[{code}] Listing incomplete; watermark stays at {code_state['watermark']}.")
+            return
+        # Every record the listing showed is now synced, including the known ones it skipped.
+        watermark = max(filter(None, code_state["records"].values()), default=code_state["watermark"])
+        failed = self.oldest_failed.get(code)
+        if failed:
+            watermark = min(watermark, failed) if watermark else failed
+            logging.warning(f"[{code}] Some records failed; watermark held at {failed} so they are retried.")
+        code_state["watermark"] = watermark
+        self.checkpoint(force=True)
+
+    def checkpoint(self, force: bool = False) -> None:
+        if not force and time.monotonic() - self._saved < SYNC_CHECKPOINT_SECONDS:
+            return
+        self.writer.flush()            # records the state calls known must be on disk first
+        save_sync_state(self.state)
+        self._saved = time.monotonic()
+
+
+def walk_changes(session: requests.Session, set_aside_code: str, code_state: Dict):
+    """
+    Yield pages of search hits modified since the watermark, newest first.
+    Results are sorted by -modifiedDate. Hits already known with the same
+    modifiedDate are skipped; the first one older than the watermark means
+    everything after it is unchanged, so the walk stops there. (Known hits
+    newer than the watermark do not stop the walk: the watermark is held back
+    for failed or interrupted records, which sit among them.)
+    """
+    watermark = code_state["watermark"]
+    since = date.fromisoformat(watermark[:10])
+    window = (since, date.today())
+    known = code_state.get("records", {})
+    page = 0
+    while True:
+        data = fetch_list_page(session, set_aside_code, page, window)
+        if page == 0:
+            total = data.get("page", {}).get("totalElements", 0)
+            logging.info(f"[{set_aside_code}] {total} records modified since {since}.")
+            if total >= MAX_RESULTS_PER_QUERY:
+                logging.warning(f"[{set_aside_code}] Delta exceeds 10k records; run a full crawl instead.")
+        opportunities = data.get("_embedded", {}).get("results", [])
+        if not opportunities:
+            return
+        changed = []
+        for item in opportunities:
+            modified = item.get("modifiedDate")
+            if known.get(item.get("_id")) == modified:
+                if modified and modified < watermark:
+                    logging.info(f"[{set_aside_code}] Reached unchanged record {item.get('_id')}; delta complete.")
+                    yield changed
+                    return
+                continue
+            changed.append(item)
+        yield changed
+        page += 1
+        if page >= data.get("page", {}).get("totalPages", 1):
+            return
+
+
+# MAIN SCRAPER: SET-ASIDE × DATE WINDOW FAN-OUT
+def scrape_sam_gov(max_workers: int = MAX_CONCURRENCY, compact: bool = False, sync: bool = False):
+    """
+    Stream every processed opportunity to JSONL_OUTPUT_FILE as it completes,
+    while list pages are still arriving; a record's future is dropped once it
+    is written, and at most MAX_PENDING_RECORDS are in flight. Internal ids
+    already in the file are skipped, so a restarted run resumes.
+
+    With ``sync``, set-asides that have a modifiedDate watermark in
+    SYNC_STATE_FILE only fetch what changed since; the others get a full crawl
+    that establishes their watermark.
+    """
+    logging.info("--- Running SAM.gov Scraper (Set-Aside × Date Window, concurrent) ---")
 
-                opportunities = data.get("_embedded", {}).get("results", [])
+    session = create_session()
+    full_range = (START_DATE, date.today())
+    writer = JsonlWriter(JSONL_OUTPUT_FILE, key="_id", fsync_every=FSYNC_EVERY)
+    seen_ids = set(writer.seen)
+    if seen_ids and not sync:
+        logging.info(f"Resuming: {len(seen_ids)} records already in {JSONL_OUTPUT_FILE}.")
 
-                if not opportunities:
-                    logging.info(f"[{set_aside_code}] No more results.")
-                    break
+    state = load_sync_state() if sync else {}
+    incremental = [c for c in TARGET_SET_ASIDES if state.get(c, {}).get("watermark")]
+    full = [c for c in TARGET_SET_ASIDES if c not in incremental]
+    progress = SyncProgress(state, writer) if sync else None
 
-                for item in opportunities:
-                    result = process_opportunity(session, item)
-                    if result:
-                        all_results.append(result)
+    try:
+        _crawl(session, writer, state, progress, full, incremental, seen_ids, full_range, max_workers)
+    finally:
+        if progress:
+            progress.checkpoint(force=True)
+    logging.info(f"\nWrote {writer.written} new/updated records to {JSONL_OUTPUT_FILE}.")
+    if compact:
+        compact_output()
 
-                page += 1
-                if page >= total_pages:
-                    logging.info(
-                        f"[{set_aside_code}] Completed all {total_pages} pages."
-                    )
-                    break
+    logging.info("\n--- Scraper Finished Successfully ---")
 
-                time.sleep(1)
 
+def _crawl(session, writer, state, progress, full, incremental, seen_ids, full_range, max_workers):
+    """The listing and record fan-out behind scrape_sam_gov; ``progress`` is set for --sync runs."""
+    sync = progress is not None
+    with writer, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        opp_futures = {}
+
+        # Append each record the moment it is ready, then forget its future.
+        def handle(fut):
+            internal_id, code, modified, update = opp_futures.pop(fut)
+            result = fut.result()
+            if result:
+                result["_id"] = internal_id
+                writer.write(result, update=update)
+            if progress:
+                progress.record_done(code, internal_id, modified, result)
+
+        def drain(block: bool = False):
+            done = [f for f in opp_futures if f.done()]
+            if block and not done:
+                done, _ = wait(list(opp_futures), return_when=FIRST_COMPLETED)
+            for fut in done:
+                handle(fut)
+
+        def submit(item: Dict, code: str, update: bool = False):
+            while len(opp_futures) >= MAX_PENDING_RECORDS:
+                drain(block=True)
+            internal_id = item.get("_id")
+            known = state.get(code, {}).get("resources", {}).get(internal_id)
+            fut = pool.submit(process_opportunity, session, item, known)
+            opp_futures[fut] = (internal_id, code, item.get("modifiedDate"), update)
+            if progress:
+                progress.submitted(code)
+
+        # 1) Split every set-aside into windows that fit under the 10k ceiling.
+        plan_futures = {
+            pool.submit(plan_windows, session, code, full_range): code for code in full
+        }
+        page_tasks = deque()
+        for fut in as_completed(plan_futures):
+            code = plan_futures[fut]
+            try:
+                windows = fut.result()
             except Exception as e:
-                logging.error(f"[{set_aside_code}] Error: {e}")
-                break
-
-    # --- Final JSON Output ---
-    logging.info(f"\nWriting {len(all_results)} total records to {JSON_OUTPUT_FILE}...")
+                logging.error(f"[{code}] Error while planning date windows: {e}")
+                if progress:
+                    progress.listing_done(code, ok=False)
+                continue
+            total = sum(t for _, t in windows)
+            logging.info(f"[{code}] {total} records in {len(windows)} window(s).")
+
+            # 2) Every list page of every window.
+            for window, window_total in windows:
+                pages = -(-min(window_total, MAX_RESULTS_PER_QUERY) // RECORDS_PER_PAGE)
+                for page in range(pages):
+                    page_tasks.append((code, window, page))
+                    if progress:
+                        progress.page_queued(code)
+            if progress and not progress.open_pages[code]:
+                progress.listing_done(code)
+
+        # 3) Fan out detail/resources/attachments as list pages arrive. Only
+        #    max_workers list pages are queued at a time, so detail fetches
+        #    interleave with the listing instead of waiting behind all of it.
+        list_futures = {}
+        while page_tasks or list_futures:
+            while page_tasks and len(list_futures) < max_workers:
+                code, window, page = page_tasks.popleft()
+                list_futures[pool.submit(fetch_list_page, session, code, page, window)] = (code, window, page)
+            done, _ = wait(list(list_futures), return_when=FIRST_COMPLETED)
+            for fut in done:
+                code, window, page = list_futures.pop(fut)
+                try:
+                    data = fut.result()
+                except Exception as e:
+                    logging.error(f"[{code}] Error fetching {window[0]}→{window[1]} page {page + 1}: {e}")
+                    if progress:
+                        progress.page_done(code, ok=False)
+                    continue
+                for item in data.get("_embedded", {}).get("results", []):
+                    internal_id = item.get("_id")
+                    if (internal_id in seen_ids and not sync) or (sync and progress.is_unchanged(code, item)):
+                        continue
+                    seen_ids.add(internal_id)
+                    submit(item, code, update=sync)
+                if progress:
+                    progress.page_done(code)
+            drain()
+            if progress:
+                progress.checkpoint()
+
+        # 3b) Delta pages for set-asides that already have a watermark.
+        for code in incremental:
+            ok = True
+            try:
+                for items in walk_changes(session, code, state[code]):
+                    for item in items:
+                        submit(item, code, update=True)
+                    drain()
+                    progress.checkpoint()
+            except Exception as e:
+                logging.error(f"[{code}] Error while syncing changes: {e}")
+                ok = False
+            progress.listing_done(code, ok)
+
+        # 4) Records still in flight once every list page is handled.
+        while opp_futures:
+            drain(block=True)
+
+
+def compact_output() -> int:
+    """Rewrite JSONL_OUTPUT_FILE as the legacy JSON array in JSON_OUTPUT_FILE (latest version per _id)."""
+    def legacy(rec: Dict) -> Dict:
+        rec.pop("_id", None)
+        rec.pop("_resources", None)
+        return rec
+
+    count = compact_jsonl(JSONL_OUTPUT_FILE, JSON_OUTPUT_FILE, transform=legacy, key="_id")
+    logging.info(f"Compacted {count} records into {JSON_OUTPUT_FILE}.")
+    return count
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SAM.gov inactive set-aside award notices")
+    ap.add_argument("--workers", type=int, default=MAX_CONCURRENCY, help="Concurrent requests (global cap)")
+    ap.add_argument("--sync", action="store_true", help=f"Only fetch changes since the watermarks in {SYNC_STATE_FILE}")
+    ap.add_argument("--compact", action="store_true", help=f"Also write the legacy JSON array to {JSON_OUTPUT_FILE}")
+    ap.add_argument("--compact-only", action="store_true", help="Only convert the existing JSONL to the JSON array")
+    ap.add_argument(
+        "--no-zips", action="store_true",
+        help=f"Keep attachments only in {ATTACHMENT_STORE_DIR}; export ZIPs later with common.blobstore",
+    )
+    args = ap.parse_args()
 
-    with open(JSON_OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, indent=4, default=str)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    if args.compact_only:
+        compact_output()
+        return
 
-    logging.info("\n--- Scraper Finished Successfully ---")
+    global _http_slots, EXPORT_ZIPS
+    _http_slots = threading.BoundedSemaphore(args.workers)
+    EXPORT_ZIPS = not args.no_zips
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    scrape_sam_gov(max_workers=args.workers, compact=args.compact, sync=args.sync)
 
 
 if __name__ == "__main__":
-    scrape_sam_gov()
+    main()
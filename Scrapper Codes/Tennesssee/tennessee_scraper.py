@@ -6,17 +6,16 @@ Tennessee RFP Opportunities scraper (robust, per-row unique dirs; Selenium + req
 
 - Scrapes the table once.
 - For each row: downloads ALL file attachments discoverable from each link.
-- Per-row temp dir is ALWAYS UNIQUE (row-index prefixed) to prevent collisions when
+- Files go into a content-addressed store (one copy per unique file); each row's
+  ZIP is exported from it, named with a row-index prefix to prevent collisions when
   different rows have the same first-link text.
-- ZIP filename is also made unique if a duplicate exists.
 """
 
 import os
 import re
 import json
 import time
-import shutil
-import zipfile
+import sys
 import argparse
 import mimetypes
 from urllib.parse import urlparse, urljoin
@@ -34,6 +33,11 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
+from common.blobstore import AttachmentStore  # noqa: E402
+
 TN_URL = "https://www.tn.gov/generalservices/procurement/central-procurement-office--cpo-/supplier-information/request-for-proposals--rfp--opportunities1.html"
 
 ATTACH_EXTS = (".pdf", ".doc", ".docx", ".xls", ".xlsx", ".zip", ".ppt", ".pptx")
@@ -62,31 +66,6 @@ def looks_like_file(url: str) -> bool:
     base = u.split("?", 1)[0]
     return any(base.endswith(ext) for ext in ATTACH_EXTS)
 
-def unique_path(base_dir: Path, name: str) -> Path:
-    """Ensure filename uniqueness: name, name (1), name (2), ..."""
-    p = base_dir / name
-    if not p.exists():
-        return p
-    stem, ext = os.path.splitext(name)
-    i = 1
-    while True:
-        cand = base_dir / f"{stem} ({i}){ext}"
-        if not cand.exists():
-            return cand
-        i += 1
-
-def unique_zip_path(base_dir: Path, base_name_no_ext: str) -> Path:
-    """Return a unique .zip path in base_dir using base_name_no_ext."""
-    p = base_dir / f"{base_name_no_ext}.zip"
-    if not p.exists():
-        return p
-    i = 1
-    while True:
-        cand = base_dir / f"{base_name_no_ext} ({i}).zip"
-        if not cand.exists():
-            return cand
-        i += 1
-
 def filename_from_headers(url: str, headers: Dict[str, str]) -> str:
     cd = headers.get("content-disposition") or headers.get("Content-Disposition")
     if cd:
@@ -128,8 +107,10 @@ def build_requests_session_from_driver(driver: webdriver.Chrome) -> requests.Ses
 def build_driver() -> webdriver.Chrome:
     options = webdriver.ChromeOptions()
     options.page_load_strategy = "eager"  # faster; we still wait for table
+    block_assets(options, BLOCK_ASSETS)
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=options)
+    enable_blocking(driver, BLOCK_ASSETS)
     driver.set_page_load_timeout(25)
     return driver
 
@@ -244,29 +225,26 @@ def scrape_table_blueprint(driver: webdriver.Chrome) -> List[Dict]:
         })
     return blueprint
 
-def download_file(session: requests.Session, base_url: str, file_url: str, out_dir: Path, timeout: int = 90) -> Optional[Path]:
+def download_file(session: requests.Session, store: AttachmentStore, notice: str, base_url: str, file_url: str, timeout: int = 90) -> Optional[str]:
+    """Store one file and attach it to ``notice``; returns its name within the notice."""
     try:
         url = urljoin(base_url, file_url)
-        with session.get(url, stream=True, allow_redirects=True, timeout=timeout) as resp:
-            resp.raise_for_status()
-            name = filename_from_headers(url, resp.headers)
-            out_path = unique_path(out_dir, name)
-            with open(out_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=1024 * 512):
-                    if chunk:
-                        f.write(chunk)
-        return out_path
+        stored = store.fetch(
+            session, url,
+            filename=lambda resp: filename_from_headers(url, resp.headers),
+            allow_redirects=True, timeout=timeout,
+        )
+        return store.link(notice, stored.filename, stored.sha256)
     except Exception:
         return None
 
-def download_for_row(driver: webdriver.Chrome, row_idx: int, row_info: Dict, zip_parent: Path) -> Tuple[str, List[str]]:
-    # ZIP/dir base name from first link text; prefix with row index to avoid collisions
+def download_for_row(driver: webdriver.Chrome, store: AttachmentStore, row_idx: int, row_info: Dict, zip_parent: Path) -> Tuple[Optional[str], List[str]]:
+    # ZIP/notice name from first link text; prefix with row index to avoid collisions
     first_text = row_info["doc_links"][0]["text"] if row_info["doc_links"] else f"row_{row_idx+1}"
     zip_base = f"{row_idx+1:03d}_{sanitize_name(first_text)}"
 
-    # UNIQUE per-row temp dir (prefix ensures no reuse even if same first-link text appears)
-    row_tmp = zip_parent / f"__tmp_{zip_base}"
-    ensure_dir(row_tmp)
+    # The row's attachment list is rebuilt each run; blobs already in the store are reused
+    store.unlink_notice(zip_base)
 
     files_saved: List[str] = []
     session = build_requests_session_from_driver(driver)
@@ -277,9 +255,9 @@ def download_for_row(driver: webdriver.Chrome, row_idx: int, row_info: Dict, zip
 
         # If direct file, pull via requests immediately
         if looks_like_file(href):
-            saved = download_file(session, href, href, row_tmp)
+            saved = download_file(session, store, zip_base, href, href)
             if saved:
-                files_saved.append(Path(saved).name)
+                files_saved.append(saved)
 
         # Open link page and harvest any file URLs there
         tab_handle = None
@@ -290,9 +268,9 @@ def download_for_row(driver: webdriver.Chrome, row_idx: int, row_info: Dict, zip
 
             # If the final URL itself is a file, download it
             if looks_like_file(base_for_rel):
-                saved = download_file(session, base_for_rel, base_for_rel, row_tmp)
+                saved = download_file(session, store, zip_base, base_for_rel, base_for_rel)
                 if saved:
-                    files_saved.append(Path(saved).name)
+                    files_saved.append(saved)
             else:
                 urls = gather_file_urls_on_page(driver)
 
@@ -314,9 +292,9 @@ def download_for_row(driver: webdriver.Chrome, row_idx: int, row_info: Dict, zip
                         unique_urls.append(u)
 
                 for u in unique_urls:
-                    saved = download_file(session, base_for_rel, u, row_tmp)
+                    saved = download_file(session, store, zip_base, base_for_rel, u)
                     if saved:
-                        files_saved.append(Path(saved).name)
+                        files_saved.append(saved)
 
         except Exception as e:
             print(f"  [WARN] Tab error: {e}")
@@ -325,34 +303,23 @@ def download_for_row(driver: webdriver.Chrome, row_idx: int, row_info: Dict, zip
                 close_current_tab(driver)
         session = build_requests_session_from_driver(driver)
 
-    # Make ZIP name unique too (if same base reappears later)
-    zip_path = unique_zip_path(zip_parent, zip_base)
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for f in row_tmp.glob("*"):
-            if f.is_file():
-                zf.write(f, arcname=f.name)
-
-    # Return list of files actually included
-    files_in_zip = sorted([f.name for f in row_tmp.glob("*") if f.is_file()])
-
-    # Cleanup temp
-    try:
-        shutil.rmtree(row_tmp, ignore_errors=True)
-    except Exception:
-        pass
-
-    return str(zip_path), files_in_zip
+    # Export the ZIP from the store; an unchanged row is not rewritten
+    zip_path = store.export_zip(zip_base, str(zip_parent / f"{zip_base}.zip"))
+    files_in_zip = sorted(name for name, _ in store.files(zip_base))
+    return zip_path, files_in_zip
 
 def main():
     parser = argparse.ArgumentParser(description="Scrape Tennessee RFP table and download attachments per row.")
     parser.add_argument("--out-json", default="tn_opportunities.json", help="Output JSON path.")
     parser.add_argument("--attachments-dir", default="Tennessee attachments", help="Parent folder for all ZIPs.")
+    parser.add_argument("--store-dir", default="tennessee_store", help="Content-addressed attachment store.")
     args = parser.parse_args()
 
     out_json = Path(args.out_json).resolve()
     zip_parent = Path(args.attachments_dir).resolve()
     ensure_dir(zip_parent)
 
+    store = AttachmentStore(str(Path(args.store_dir).resolve()))
     driver = build_driver()
     results = []
     try:
@@ -374,7 +341,7 @@ def main():
                 continue
 
             try:
-                zip_path, files_in_zip = download_for_row(driver, idx, row, zip_parent)
+                zip_path, files_in_zip = download_for_row(driver, store, idx, row, zip_parent)
             except Exception as e:
                 print(f"[ERROR] Row {idx+1} failed: {e}")
                 zip_path, files_in_zip = (None, [])
@@ -393,6 +360,7 @@ def main():
             driver.quit()
         except Exception:
             pass
+        store.close()
 
     with open(out_json, "w", encoding="utf-8") as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
@@ -1,5 +1,4 @@
 import os
-import time
 import zipfile
 import pandas as pd
 from pathlib import Path
@@ -7,45 +6,33 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from multiprocessing import Process, Queue, Manager
-from queue import Empty
+from queue import Empty, Queue
+import threading
 import traceback
+import sys
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-def wait_for_download(download_dir, timeout=60):
-    """Wait for download to complete by checking for .crdownload files"""
-    seconds = 0
-    while seconds < timeout:
-        time.sleep(1)
-        downloading = False
-        for file in os.listdir(download_dir):
-            if file.endswith('.crdownload') or file.endswith('.tmp'):
-                downloading = True
-                break
-        if not downloading:
-            time.sleep(2)
-            return True
-        seconds += 1
-    return False
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+from common.browser_pool import BrowserPool, chrome_service  # noqa: E402
+from common.instrument import log_summary  # noqa: E402
+from common.waits import install_network_hooks, row_signature, settle, wait_for_change  # noqa: E402
+from common.extract import Field, RowSpec, extract_rows  # noqa: E402
 
+MAX_PAGES_PER_BROWSER = 150   # recycle worker browsers to cap their memory
 
-def get_latest_file(download_dir, exclude_files=None):
-    """Get the most recently downloaded file"""
-    if exclude_files is None:
-        exclude_files = set()
-    
-    files = [os.path.join(download_dir, f) for f in os.listdir(download_dir) 
-             if os.path.isfile(os.path.join(download_dir, f)) 
-             and not f.endswith('.crdownload') 
-             and not f.endswith('.tmp')
-             and os.path.join(download_dir, f) not in exclude_files]
-    
-    if not files:
-        return None
-    return max(files, key=os.path.getctime)
+RESULT_ROWS_CSS = "div.esbd-result-row"
+
+# Page layouts, each read in a single execute_script round-trip
+RESULT_ROWS_SPEC = RowSpec(
+    rows=RESULT_ROWS_CSS,
+    fields={
+        'title': Field("div.esbd-result-title a"),
+        'href': Field("div.esbd-result-title a", "href"),
+        'paragraphs': Field("p", many=True),
+    },
+)
 
 
 def create_zip(files, zip_path):
@@ -75,46 +62,21 @@ def extract_text_safely(element, selector, attr=None):
         return ""
 
 
-def extract_field_value(row, field_label):
-    """Extract field value after the label from paragraph text"""
-    try:
-        paragraphs = row.find_elements(By.CSS_SELECTOR, "p")
-        for p in paragraphs:
-            text = p.text.strip()
-            if field_label in text:
-                value = text.split(field_label, 1)[1].strip()
-                return value
-        return ""
-    except:
-        return ""
+def extract_field_value(paragraphs, field_label):
+    """Extract field value after the label from a row's paragraph texts"""
+    for text in paragraphs:
+        if field_label in text:
+            # Split by the label and get the part after it
+            return text.split(field_label, 1)[1].strip()
+    return ""
 
 
-def worker_process(worker_id, task_queue, result_queue, download_dir):
-    """Worker process that handles downloading attachments for opportunities"""
-    
-    worker_download_dir = os.path.join(download_dir, f"temp_worker_{worker_id}")
-    os.makedirs(worker_download_dir, exist_ok=True)
+def worker_process(worker_id, task_queue, result_queue, download_dir, pool):
+    """Worker thread that downloads attachments for opportunities using a pooled browser"""
     
-    chrome_options = webdriver.ChromeOptions()
-    prefs = {
-        "download.default_directory": os.path.abspath(worker_download_dir),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "plugins.always_open_pdf_externally": True,
-        "profile.default_content_setting_values.automatic_downloads": 1
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    
-    driver = None
+    print(f"[Worker {worker_id}] Started and ready")
     
     try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        print(f"[Worker {worker_id}] Started and ready")
-        
         while True:
             try:
                 task = task_queue.get(timeout=10)
@@ -126,12 +88,12 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                 opp = task
                 print(f"[Worker {worker_id}] Processing: {opp['title'][:50]}...")
                 
+                b = pool.acquire()
+                driver, tracker = b.driver, b.tracker
                 try:
                     driver.get(opp['href'])
-                    time.sleep(3)
+                    settle(driver, timeout=15)
                     
-                    existing_files = set(os.path.join(worker_download_dir, f) 
-                                       for f in os.listdir(worker_download_dir))
                     
                     download_links = driver.find_elements(
                         By.CSS_SELECTOR, "a[data-action='downloadURL']"
@@ -154,21 +116,16 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                             att_name = link.text.strip()
                             print(f"[Worker {worker_id}] Downloading {att_idx}/{len(download_links)}: {att_name[:30]}...")
                             
+                            mark = tracker.mark()
                             driver.execute_script("arguments[0].click();", link)
-                            
-                            if wait_for_download(worker_download_dir, timeout=60):
-                                latest_file = get_latest_file(worker_download_dir, existing_files)
-                                if latest_file:
-                                    downloaded_files.append(latest_file)
-                                    existing_files.add(latest_file)
-                                    print(f"[Worker {worker_id}] ✓ Downloaded")
-                                else:
-                                    print(f"[Worker {worker_id}] ✗ Could not find downloaded file")
+
+                            files = tracker.wait_for(1, since=mark, timeout=60)
+                            if files:
+                                downloaded_files.extend(files)
+                                print(f"[Worker {worker_id}] ✓ Downloaded")
                             else:
                                 print(f"[Worker {worker_id}] ✗ Download timeout")
-                            
-                            time.sleep(2)
-                            
+
                         except Exception as e:
                             print(f"[Worker {worker_id}] ✗ Attachment error: {str(e)[:50]}")
                     
@@ -206,6 +163,8 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                     opp['zip_file'] = ""
                     opp['error'] = str(e)[:200]
                     result_queue.put(opp)
+                finally:
+                    pool.release(b)
                     
             except Empty:
                 continue
@@ -218,36 +177,26 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
         traceback.print_exc()
         
     finally:
-        if driver:
-            driver.quit()
-        
-        # Clean up worker directory
-        try:
-            for file in os.listdir(worker_download_dir):
-                os.remove(os.path.join(worker_download_dir, file))
-            os.rmdir(worker_download_dir)
-        except:
-            pass
-        
         print(f"[Worker {worker_id}] Stopped")
 
 
 def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2):
-    """Main function with multiprocessing support"""
+    """Main function; worker threads share a pool of warm browsers"""
     os.makedirs(download_dir, exist_ok=True)
     
     # Create queues for task distribution
     task_queue = Queue(maxsize=20)
     result_queue = Queue()
     
-    # Start worker processes
+    # Start worker threads; the pool launches their browsers in the background
+    pool = BrowserPool(size=num_workers, max_pages=MAX_PAGES_PER_BROWSER, block=KEEP_CSS)
     workers = []
     for i in range(num_workers):
-        worker = Process(target=worker_process, args=(i, task_queue, result_queue, download_dir))
+        worker = threading.Thread(target=worker_process, args=(i, task_queue, result_queue, download_dir, pool), daemon=True)
         worker.start()
         workers.append(worker)
     
-    print(f"Started {num_workers} worker processes")
+    print(f"Started {num_workers} worker threads")
     
     # Setup main driver for page navigation
     chrome_options = webdriver.ChromeOptions()
@@ -255,7 +204,10 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
     
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    block_assets(chrome_options, KEEP_CSS)
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
+    install_network_hooks(driver)
+    enable_blocking(driver, KEEP_CSS)
     wait = WebDriverWait(driver, 20)
     
     all_opportunities_data = []
@@ -278,8 +230,9 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
         date_range_dropdown.select_by_value("lastFiscalYear")
 
         search_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
+        old_sig = row_signature(driver, RESULT_ROWS_CSS)
         search_btn.click()
-        time.sleep(5)
+        wait_for_change(driver, RESULT_ROWS_CSS, old_sig, timeout=30)
 
         page_num = 1
         
@@ -291,26 +244,27 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
             print(f"Processing Page {page_num}")
             print(f"{'='*60}")
             
-            time.sleep(3)
+            opportunity_rows = extract_rows(driver, RESULT_ROWS_SPEC)
             
-            opportunity_rows = driver.find_elements(By.CSS_SELECTOR, "div.esbd-result-row")
             print(f"Found {len(opportunity_rows)} opportunities on page {page_num}")
             
             # Extract data from each opportunity row
             for row in opportunity_rows:
                 try:
-                    title_elem = row.find_element(By.CSS_SELECTOR, "div.esbd-result-title a")
-                    title = title_elem.text.strip()
-                    href = title_elem.get_attribute('href')
+                    title = row['title']
+                    href = row['href']
+                    if not href:
+                        raise NoSuchElementException("opportunity link not found")
                     
-                    solicitation_id = extract_field_value(row, "Solicitation ID:")
-                    due_date = extract_field_value(row, "Due Date:")
-                    due_time = extract_field_value(row, "Due Time:")
-                    agency = extract_field_value(row, "Agency/Texas SmartBuy Member Number:")
-                    status = extract_field_value(row, "Status:")
-                    posting_date = extract_field_value(row, "Posting Date:")
-                    created_date = extract_field_value(row, "Created Date:")
-                    last_updated = extract_field_value(row, "Last Updated:")
+                    paragraphs = row['paragraphs']
+                    solicitation_id = extract_field_value(paragraphs, "Solicitation ID:")
+                    due_date = extract_field_value(paragraphs, "Due Date:")
+                    due_time = extract_field_value(paragraphs, "Due Time:")
+                    agency = extract_field_value(paragraphs, "Agency/Texas SmartBuy Member Number:")
+                    status = extract_field_value(paragraphs, "Status:")
+                    posting_date = extract_field_value(paragraphs, "Posting Date:")
+                    created_date = extract_field_value(paragraphs, "Created Date:")
+                    last_updated = extract_field_value(paragraphs, "Last Updated:")
                     
                     opp_data = {
                         'title': title,
@@ -355,8 +309,10 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
                 print(f"Moving to page {page_num}")
                 print(f"{'='*60}")
                 
+                old_sig = row_signature(driver, RESULT_ROWS_CSS)
                 driver.execute_script("arguments[0].click();", next_button)
-                time.sleep(5)
+                if not wait_for_change(driver, RESULT_ROWS_CSS, old_sig, timeout=30):
+                    print("[Main] Results did not change after clicking Next")
                 
             except NoSuchElementException:
                 print(f"\n{'='*60}")
@@ -387,8 +343,9 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
         for worker in workers:
             worker.join(timeout=30)
             if worker.is_alive():
-                print(f"[Main] Warning: Worker still alive, terminating...")
-                worker.terminate()
+                print(f"[Main] Warning: Worker still busy, leaving it behind...")
+
+        log_summary(print, prefix="wait.")
 
         # Save all scraped data to Excel
         if all_opportunities_data:
@@ -410,11 +367,8 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
     finally:
         driver.quit()
         
-        # Ensure all workers are terminated
-        for worker in workers:
-            if worker.is_alive():
-                worker.terminate()
-                worker.join()
+        # Quit the pooled worker browsers
+        pool.close()
         
         print(f"\n{'='*60}")
         print("SCRAPING COMPLETED!")
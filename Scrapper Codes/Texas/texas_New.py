@@ -1,5 +1,4 @@
 import os
-import time
 import zipfile
 import pandas as pd
 from pathlib import Path
@@ -7,45 +6,51 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from multiprocessing import Process, Queue, Manager
-from queue import Empty
+from queue import Empty, Queue
+import threading
 import traceback
-
-
-def wait_for_download(download_dir, timeout=60):
-    """Wait for download to complete by checking for .crdownload files"""
-    seconds = 0
-    while seconds < timeout:
-        time.sleep(1)
-        downloading = False
-        for file in os.listdir(download_dir):
-            if file.endswith('.crdownload') or file.endswith('.tmp'):
-                downloading = True
-                break
-        if not downloading:
-            time.sleep(2)
-            return True
-        seconds += 1
-    return False
-
-
-def get_latest_file(download_dir, exclude_files=None):
-    """Get the most recently downloaded file"""
-    if exclude_files is None:
-        exclude_files = set()
-    
-    files = [os.path.join(download_dir, f) for f in os.listdir(download_dir) 
-             if os.path.isfile(os.path.join(download_dir, f)) 
-             and not f.endswith('.crdownload') 
-             and not f.endswith('.tmp')
-             and os.path.join(download_dir, f) not in exclude_files]
-    
-    if not files:
-        return None
-    return max(files, key=os.path.getctime)
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+from common.browser_pool import BrowserPool, chrome_service  # noqa: E402
+from common.instrument import log_summary  # noqa: E402
+from common.waits import install_network_hooks, row_signature, settle, wait_for_change  # noqa: E402
+from common.extract import Field, PanelSpec, RowSpec, extract, extract_rows  # noqa: E402
+
+MAX_PAGES_PER_BROWSER = 150   # recycle worker browsers to cap their memory
+
+RESULT_ROWS_CSS = "div.esbd-result-row"
+
+# Page layouts, each read in a single execute_script round-trip
+RESULT_ROWS_SPEC = RowSpec(
+    rows=RESULT_ROWS_CSS,
+    fields={
+        'title': Field("div.esbd-result-title a"),
+        'href': Field("div.esbd-result-title a", "href"),
+        'paragraphs': Field("p", many=True),
+    },
+)
+CONTACT_SPEC = PanelSpec(
+    items="div.esbd-result-cell",
+    labels={
+        'contact_name': "Contact Name:",
+        'contact_number': "Contact Number:",
+        'contact_email': "Contact Email:",
+        'response_due_date': "Response Due Date:",
+    },
+    value=Field("p"),
+)
+AWARD_COLUMNS = ('contractor', 'mailing_address', 'value_per_contractor', 'hub_status', 'award_date', 'award_status')
+AWARDS_SPEC = RowSpec(
+    rows="div.esbd-awards-row",
+    cells="div.esbd-award-result-column",
+    min_cells=len(AWARD_COLUMNS),
+    fields={name: Field("p", cell=i) for i, name in enumerate(AWARD_COLUMNS)},
+)
+ATTACHMENTS_SPEC = RowSpec(rows="a[data-action='downloadURL']", fields={'name': Field()})
 
 
 def create_zip(files, zip_path):
@@ -75,188 +80,40 @@ def extract_text_safely(element, selector, attr=None):
         return ""
 
 
-def extract_field_value(row, field_label):
-    """Extract field value after the label from paragraph text"""
-    try:
-        # Find all p tags in the row
-        paragraphs = row.find_elements(By.CSS_SELECTOR, "p")
-        for p in paragraphs:
-            text = p.text.strip()
-            if field_label in text:
-                # Split by the label and get the part after it
-                value = text.split(field_label, 1)[1].strip()
-                return value
-        return ""
-    except:
-        return ""
+def extract_field_value(paragraphs, field_label):
+    """Extract field value after the label from a row's paragraph texts"""
+    for text in paragraphs:
+        if field_label in text:
+            # Split by the label and get the part after it
+            return text.split(field_label, 1)[1].strip()
+    return ""
 
 
-def extract_contact_info(driver):
-    """Extract contact information from the opportunity page"""
-    contact_info = {
-        'contact_name': '',
-        'contact_number': '',
-        'contact_email': '',
-        'response_due_date': ''
-    }
-    
+def extract_opportunity_details(driver):
+    """Extract contact info, awards and attachment names from the opportunity page"""
     try:
-        # Look for contact information cells
-        cells = driver.find_elements(By.CSS_SELECTOR, "div.esbd-result-cell")
-        
-        for cell in cells:
-            try:
-                cell_text = cell.text.strip()
-                
-                if "Contact Name:" in cell_text:
-                    p_elem = cell.find_element(By.CSS_SELECTOR, "p")
-                    contact_info['contact_name'] = p_elem.text.strip()
-                
-                elif "Contact Number:" in cell_text:
-                    p_elem = cell.find_element(By.CSS_SELECTOR, "p")
-                    contact_info['contact_number'] = p_elem.text.strip()
-                
-                elif "Contact Email:" in cell_text:
-                    p_elem = cell.find_element(By.CSS_SELECTOR, "p")
-                    contact_info['contact_email'] = p_elem.text.strip()
-                
-                elif "Response Due Date:" in cell_text:
-                    p_elem = cell.find_element(By.CSS_SELECTOR, "p")
-                    contact_info['response_due_date'] = p_elem.text.strip()
-                    
-            except:
-                continue
-                
+        data = extract(driver, {
+            'contact': CONTACT_SPEC,
+            'awards': AWARDS_SPEC,
+            'attachments': ATTACHMENTS_SPEC,
+        })
     except Exception as e:
-        print(f"Error extracting contact info: {str(e)[:50]}")
+        print(f"Error extracting opportunity details: {str(e)[:100]}")
+        data = {}
     
-    return contact_info
+    contact_info = data.get('contact') or {field: '' for field in CONTACT_SPEC.labels}
+    # Only keep awards where we got at least the contractor name
+    awards_data = [a for a in data.get('awards') or [] if a['contractor']]
+    attachment_names = [a['name'] for a in data.get('attachments') or [] if a['name']]
+    return contact_info, awards_data, attachment_names
 
 
-def extract_awards_info(driver):
-    """Extract awards information from the opportunity page"""
-    awards_data = []
+def worker_process(worker_id, task_queue, result_queue, download_dir, pool):
+    """Worker thread that scrapes attachment names for opportunities using a pooled browser"""
     
-    try:
-        # Look for award rows - make sure we're getting the data rows, not the header
-        award_rows = driver.find_elements(By.CSS_SELECTOR, "div.esbd-awards-row")
-        
-        print(f"Found {len(award_rows)} award row elements")
-        
-        for idx, row in enumerate(award_rows):
-            try:
-                award = {
-                    'contractor': '',
-                    'mailing_address': '',
-                    'value_per_contractor': '',
-                    'hub_status': '',
-                    'award_date': '',
-                    'award_status': ''
-                }
-                
-                # Extract each column from the award row
-                columns = row.find_elements(By.CSS_SELECTOR, "div.esbd-award-result-column")
-                
-                print(f"Award row {idx}: found {len(columns)} columns")
-                
-                if len(columns) >= 6:
-                    try:
-                        award['contractor'] = columns[0].find_element(By.CSS_SELECTOR, "p").text.strip()
-                    except:
-                        award['contractor'] = ''
-                    
-                    try:
-                        award['mailing_address'] = columns[1].find_element(By.CSS_SELECTOR, "p").text.strip()
-                    except:
-                        award['mailing_address'] = ''
-                    
-                    try:
-                        award['value_per_contractor'] = columns[2].find_element(By.CSS_SELECTOR, "p").text.strip()
-                    except:
-                        award['value_per_contractor'] = ''
-                    
-                    try:
-                        award['hub_status'] = columns[3].find_element(By.CSS_SELECTOR, "p").text.strip()
-                    except:
-                        award['hub_status'] = ''
-                    
-                    try:
-                        award['award_date'] = columns[4].find_element(By.CSS_SELECTOR, "p").text.strip()
-                    except:
-                        award['award_date'] = ''
-                    
-                    try:
-                        award['award_status'] = columns[5].find_element(By.CSS_SELECTOR, "p").text.strip()
-                    except:
-                        award['award_status'] = ''
-                    
-                    # Only add if we got at least the contractor name
-                    if award['contractor']:
-                        awards_data.append(award)
-                        print(f"Extracted award: {award['contractor']}")
-                
-            except Exception as e:
-                print(f"Error extracting award row {idx}: {str(e)[:100]}")
-                continue
-                
-    except Exception as e:
-        print(f"Error extracting awards: {str(e)[:100]}")
-    
-    return awards_data
-
-
-def extract_attachment_names(driver):
-    """Extract attachment names without downloading"""
-    attachment_names = []
-    
-    try:
-        # Look for attachment links
-        download_links = driver.find_elements(
-            By.CSS_SELECTOR, "a[data-action='downloadURL']"
-        )
-        
-        for link in download_links:
-            try:
-                att_name = link.text.strip()
-                if att_name:
-                    attachment_names.append(att_name)
-            except:
-                continue
-                
-    except Exception as e:
-        print(f"Error extracting attachment names: {str(e)[:50]}")
-    
-    return attachment_names
-
-
-def worker_process(worker_id, task_queue, result_queue, download_dir):
-    """Worker process that handles scraping attachment names for opportunities"""
-    
-    # Create worker-specific download directory (not used but kept for future)
-    worker_download_dir = os.path.join(download_dir, f"temp_worker_{worker_id}")
-    os.makedirs(worker_download_dir, exist_ok=True)
-    
-    # Setup Chrome driver for this worker
-    chrome_options = webdriver.ChromeOptions()
-    prefs = {
-        "download.default_directory": os.path.abspath(worker_download_dir),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "plugins.always_open_pdf_externally": True,
-        "profile.default_content_setting_values.automatic_downloads": 1
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    
-    driver = None
+    print(f"[Worker {worker_id}] Started and ready")
     
     try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        print(f"[Worker {worker_id}] Started and ready")
-        
         while True:
             try:
                 # Get task from queue with timeout
@@ -269,19 +126,18 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                 opp = task
                 print(f"[Worker {worker_id}] Processing: {opp['title'][:50]}...")
                 
+                b = pool.acquire()
+                driver, tracker = b.driver, b.tracker
                 try:
                     # Navigate to opportunity page
                     driver.get(opp['href'])
-                    time.sleep(3)
+                    settle(driver, timeout=15)
                     
-                    # Extract contact information
-                    contact_info = extract_contact_info(driver)
+                    # Contact info, awards and attachment names in one round-trip
+                    contact_info, awards_data, attachment_names = extract_opportunity_details(driver)
                     opp.update(contact_info)
                     print(f"[Worker {worker_id}] ✓ Extracted contact info")
                     
-                    # Extract awards information
-                    awards_data = extract_awards_info(driver)
-                    
                     # If multiple awards, we'll store them as pipe-separated values
                     if awards_data:
                         opp['awards_count'] = len(awards_data)
@@ -303,9 +159,6 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                         opp['award_status'] = ''
                         print(f"[Worker {worker_id}] No awards found")
                     
-                    # Extract attachment names (NEW - replaces download functionality)
-                    attachment_names = extract_attachment_names(driver)
-                    
                     if attachment_names:
                         opp['attachment_count'] = len(attachment_names)
                         opp['attachments'] = ' | '.join(attachment_names)
@@ -316,9 +169,6 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                         print(f"[Worker {worker_id}] No attachments found")
                     
                     # COMMENTED OUT: Download functionality
-                    # # Track existing files before downloading
-                    existing_files = set(os.path.join(worker_download_dir, f) 
-                                       for f in os.listdir(worker_download_dir))
                     
                     # Look for attachment links
                     download_links = driver.find_elements(
@@ -342,21 +192,16 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                             att_name = link.text.strip()
                             print(f"[Worker {worker_id}] Downloading {att_idx}/{len(download_links)}: {att_name[:30]}...")
                             
+                            mark = tracker.mark()
                             driver.execute_script("arguments[0].click();", link)
-                            
-                            if wait_for_download(worker_download_dir, timeout=60):
-                                latest_file = get_latest_file(worker_download_dir, existing_files)
-                                if latest_file:
-                                    downloaded_files.append(latest_file)
-                                    existing_files.add(latest_file)
-                                    print(f"[Worker {worker_id}] ✓ Downloaded")
-                                else:
-                                    print(f"[Worker {worker_id}] ✗ Could not find downloaded file")
+
+                            files = tracker.wait_for(1, since=mark, timeout=60)
+                            if files:
+                                downloaded_files.extend(files)
+                                print(f"[Worker {worker_id}] ✓ Downloaded")
                             else:
                                 print(f"[Worker {worker_id}] ✗ Download timeout")
-                            
-                            time.sleep(2)
-                            
+
                         except Exception as e:
                             print(f"[Worker {worker_id}] ✗ Attachment error: {str(e)[:50]}")
                     
@@ -394,6 +239,8 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
                     opp['attachments'] = ''
                     opp['error'] = str(e)[:200]
                     result_queue.put(opp)
+                finally:
+                    pool.release(b)
                     
             except Empty:
                 continue
@@ -406,36 +253,26 @@ def worker_process(worker_id, task_queue, result_queue, download_dir):
         traceback.print_exc()
         
     finally:
-        if driver:
-            driver.quit()
-        
-        # Clean up worker directory
-        try:
-            for file in os.listdir(worker_download_dir):
-                os.remove(os.path.join(worker_download_dir, file))
-            os.rmdir(worker_download_dir)
-        except:
-            pass
-        
         print(f"[Worker {worker_id}] Stopped")
 
 
 def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2):
-    """Main function with multiprocessing support"""
+    """Main function; worker threads share a pool of warm browsers"""
     os.makedirs(download_dir, exist_ok=True)
     
     # Create queues for task distribution
     task_queue = Queue(maxsize=20)  # Limit queue size to prevent memory issues
     result_queue = Queue()
     
-    # Start worker processes
+    # Start worker threads; the pool launches their browsers in the background
+    pool = BrowserPool(size=num_workers, max_pages=MAX_PAGES_PER_BROWSER, block=KEEP_CSS)
     workers = []
     for i in range(num_workers):
-        worker = Process(target=worker_process, args=(i, task_queue, result_queue, download_dir))
+        worker = threading.Thread(target=worker_process, args=(i, task_queue, result_queue, download_dir, pool), daemon=True)
         worker.start()
         workers.append(worker)
     
-    print(f"Started {num_workers} worker processes")
+    print(f"Started {num_workers} worker threads")
     
     # Setup main driver for page navigation
     chrome_options = webdriver.ChromeOptions()
@@ -443,7 +280,10 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
     
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    block_assets(chrome_options, KEEP_CSS)
+    driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
+    install_network_hooks(driver)
+    enable_blocking(driver, KEEP_CSS)
     wait = WebDriverWait(driver, 20)
     
     all_opportunities_data = []
@@ -466,8 +306,9 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
         date_range_dropdown.select_by_value("lastFiscalYear")
 
         search_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
+        old_sig = row_signature(driver, RESULT_ROWS_CSS)
         search_btn.click()
-        time.sleep(5)
+        wait_for_change(driver, RESULT_ROWS_CSS, old_sig, timeout=30)
 
         page_num = 1
         
@@ -479,30 +320,28 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
             print(f"Processing Page {page_num}")
             print(f"{'='*60}")
             
-            time.sleep(3)
-            
             # Get all opportunity rows on current page
-            opportunity_rows = driver.find_elements(By.CSS_SELECTOR, "div.esbd-result-row")
+            opportunity_rows = extract_rows(driver, RESULT_ROWS_SPEC)
             
             print(f"Found {len(opportunity_rows)} opportunities on page {page_num}")
             
             # Extract data from each opportunity row
             for row in opportunity_rows:
                 try:
-                    # Extract title and link
-                    title_elem = row.find_element(By.CSS_SELECTOR, "div.esbd-result-title a")
-                    title = title_elem.text.strip()
-                    href = title_elem.get_attribute('href')
+                    title = row['title']
+                    href = row['href']
+                    if not href:
+                        raise NoSuchElementException("opportunity link not found")
                     
-                    # Extract other details using the new function
-                    solicitation_id = extract_field_value(row, "Solicitation ID:")
-                    due_date = extract_field_value(row, "Due Date:")
-                    due_time = extract_field_value(row, "Due Time:")
-                    agency = extract_field_value(row, "Agency/Texas SmartBuy Member Number:")
-                    status = extract_field_value(row, "Status:")
-                    posting_date = extract_field_value(row, "Posting Date:")
-                    created_date = extract_field_value(row, "Created Date:")
-                    last_updated = extract_field_value(row, "Last Updated:")
+                    paragraphs = row['paragraphs']
+                    solicitation_id = extract_field_value(paragraphs, "Solicitation ID:")
+                    due_date = extract_field_value(paragraphs, "Due Date:")
+                    due_time = extract_field_value(paragraphs, "Due Time:")
+                    agency = extract_field_value(paragraphs, "Agency/Texas SmartBuy Member Number:")
+                    status = extract_field_value(paragraphs, "Status:")
+                    posting_date = extract_field_value(paragraphs, "Posting Date:")
+                    created_date = extract_field_value(paragraphs, "Created Date:")
+                    last_updated = extract_field_value(paragraphs, "Last Updated:")
                     
                     opp_data = {
                         'title': title,
@@ -550,8 +389,10 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
                 print(f"Moving to page {page_num}")
                 print(f"{'='*60}")
                 
+                old_sig = row_signature(driver, RESULT_ROWS_CSS)
                 driver.execute_script("arguments[0].click();", next_button)
-                time.sleep(5)
+                if not wait_for_change(driver, RESULT_ROWS_CSS, old_sig, timeout=30):
+                    print("[Main] Results did not change after clicking Next")
                 
             except NoSuchElementException:
                 print(f"\n{'='*60}")
@@ -582,8 +423,9 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
         for worker in workers:
             worker.join(timeout=30)
             if worker.is_alive():
-                print(f"[Main] Warning: Worker still alive, terminating...")
-                worker.terminate()
+                print(f"[Main] Warning: Worker still busy, leaving it behind...")
+
+        log_summary(print, prefix="wait.")
 
         # Save all scraped data to Excel
         if all_opportunities_data:
@@ -625,11 +467,8 @@ def scrape_and_download(download_dir="downloads", max_pages=None, num_workers=2)
     finally:
         driver.quit()
         
-        # Ensure all workers are terminated
-        for worker in workers:
-            if worker.is_alive():
-                worker.terminate()
-                worker.join()
+        # Quit the pooled worker browsers
+        pool.close()
         
         print(f"\n{'='*60}")
         print("SCRAPING COMPLETED!")
@@ -12,18 +12,45 @@ from selenium.common.exceptions import (
 from dateutil import parser as dateparser
 from datetime import datetime
 import json
+import sys
 import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+from common.extract import Field, RowSpec, extract_rows  # noqa: E402
 
 START_URL = "https://vendornet.wi.gov/Contracts.aspx"
 OUTPUT_JSON = "wisconsin_bids_awarded.json"   # <-- JSON output
 
+# Result grid rows, read in a single execute_script round-trip
+GRID_ROWS_SPEC = RowSpec(
+    root="table.rgMasterTable",
+    rows=":scope > tbody > tr.rgRow, :scope > tbody > tr.rgAltRow",
+    cells="td",
+    min_cells=6,
+    fields={
+        "reference": Field(cell=0),
+        "ref_link": Field("a", cell=0),
+        "ref_url": Field("a", "href", cell=0),
+        "title": Field(cell=1),
+        "agency": Field(cell=2),
+        "available": Field(cell=3),
+        "due": Field(cell=4),
+        "esupplier_class": Field("label", "class", cell=5),
+    },
+)
+
 def new_driver():
     opts = webdriver.ChromeOptions()
     opts.add_argument("--start-maximized")
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
+    block_assets(opts, KEEP_CSS)    # RadGrid clicks wait for element_to_be_clickable
     drv = webdriver.Chrome(options=opts)
+    enable_blocking(drv, KEEP_CSS)
     drv.set_page_load_timeout(60)
     return drv
 
@@ -112,61 +139,30 @@ def parse_dt(txt):
     except Exception:
         return txt  # leave as-is if parsing fails
 
-def parse_row(tr):
+def parse_row(cells):
     """
-    Return table row dict or None.
+    Return table row dict built from the extracted grid cells.
     Add a flag whether this is canceled/cancelled so we can skip it.
     """
-    tds = tr.find_elements(By.TAG_NAME, "td")
-    if len(tds) < 6:
-        return None
-
     # Column 1: Solicitation Reference # (with URL)
-    reference_text = tds[0].text.strip()
-    ref_url = ""
-    try:
-        a = tds[0].find_element(By.TAG_NAME, "a")
-        reference_text = a.text.strip() or reference_text
-        ref_url = a.get_attribute("href") or ""
-    except Exception:
-        pass
+    reference_text = cells["ref_link"] or cells["reference"]
 
     # Skip markers
     is_canceled = "canceled" in reference_text.lower() or "cancelled" in reference_text.lower()
 
-    title = tds[1].text.strip()
-    agency = tds[2].text.strip()
-    available = parse_dt(tds[3].text)
-    due = parse_dt(tds[4].text)
-
-    e_supplier = False
-    try:
-        label = tds[5].find_element(By.XPATH, ".//label")
-        e_supplier = "rfdCheckboxChecked" in ((label.get_attribute("class") or ""))
-    except Exception:
-        pass
-
     return {
         "Solicitation Reference #": reference_text,
-        "Title": title,
-        "Agency": agency,
-        "Available Date": available,
-        "Due Date": due,
-        "Available in eSupplier": e_supplier,
-        "Bid URL": ref_url,
+        "Title": cells["title"],
+        "Agency": cells["agency"],
+        "Available Date": parse_dt(cells["available"]),
+        "Due Date": parse_dt(cells["due"]),
+        "Available in eSupplier": "rfdCheckboxChecked" in cells["esupplier_class"],
+        "Bid URL": cells["ref_url"],
         "_is_canceled": is_canceled,
     }
 
 def collect_page_rows(drv):
-    data = []
-    table = drv.find_element(By.CSS_SELECTOR, "table.rgMasterTable")
-    tbody = table.find_element(By.TAG_NAME, "tbody")
-    rows = tbody.find_elements(By.XPATH, "./tr[contains(@class,'rgRow') or contains(@class,'rgAltRow')]")
-    for tr in rows:
-        item = parse_row(tr)
-        if item:
-            data.append(item)
-    return data
+    return [parse_row(cells) for cells in extract_rows(drv, GRID_ROWS_SPEC)]
 
 def _get_first_ref_text(drv):
     try:
@@ -14,13 +14,38 @@ from selenium.common.exceptions import (
 from dateutil import parser as dateparser
 from datetime import datetime
 import pandas as pd
+import sys
 import time
 import re
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking  # noqa: E402
+from common.extract import Field, RowSpec, extract_rows  # noqa: E402
 
 START_URL = "https://vendornet.wi.gov/Contracts.aspx"
 OUTPUT_XLSX = "vendornet_bids_first_100_2.xlsx"
 MAX_ROWS = 100  
 
+# Result grid rows, read in a single execute_script round-trip
+GRID_ROWS_SPEC = RowSpec(
+    root="table.rgMasterTable",
+    rows=":scope > tbody > tr.rgRow, :scope > tbody > tr.rgAltRow",
+    cells="td",
+    min_cells=6,
+    fields={
+        "reference": Field(cell=0),
+        "ref_link": Field("a", cell=0),
+        "ref_url": Field("a", "href", cell=0),
+        "title": Field(cell=1),
+        "agency": Field(cell=2),
+        "available": Field(cell=3),
+        "due": Field(cell=4),
+        "esupplier_class": Field("label", "class", cell=5),
+    },
+)
+
 def new_driver():
     options = webdriver.ChromeOptions()
     
@@ -28,7 +53,9 @@ def new_driver():
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
+    block_assets(options, KEEP_CSS)    # RadGrid clicks wait for element_to_be_clickable
     driver = webdriver.Chrome(options=options)
+    enable_blocking(driver, KEEP_CSS)
     driver.set_page_load_timeout(60)
     return driver
 
@@ -109,60 +136,25 @@ def sort_by_available_date_desc(driver):
     if not click_with_staleness_wait(driver, header_locator):
         raise TimeoutException("Failed to click Available Date header (2)")
 
-def parse_row(tr):
-    tds = tr.find_elements(By.TAG_NAME, "td")
-    if len(tds) < 6:
-        return None
-    try:
-        ref_anchor = tds[0].find_element(By.TAG_NAME, "a")
-        reference = ref_anchor.text.strip()
-        bid_url = ref_anchor.get_attribute("href") or ""
-    except Exception:
-        reference = tds[0].text.strip()
-        bid_url = ""
-    title = tds[1].text.strip()
-    agency = tds[2].text.strip()
-    available_date_raw = tds[3].text.strip()
-    due_date_raw = tds[4].text.strip()
-    e_supplier = False
-    try:
-        label = tds[5].find_element(By.XPATH, ".//label")
-        cls = label.get_attribute("class") or ""
-        e_supplier = "rfdCheckboxChecked" in cls
-    except Exception:
-        pass
-    available_dt = None
-    due_dt = None
-    try:
-        if available_date_raw:
-            available_dt = dateparser.parse(available_date_raw, dayfirst=False)
-    except Exception:
-        pass
+def parse_dt(txt):
     try:
-        if due_date_raw:
-            due_dt = dateparser.parse(due_date_raw, dayfirst=False)
+        return dateparser.parse(txt, dayfirst=False) if txt else None
     except Exception:
-        pass
+        return None
+
+def parse_row(cells):
     return {
-        "Solicitation Reference #": reference,
-        "Title": title,
-        "Agency": agency,
-        "Available Date": available_dt,
-        "Due Date": due_dt,
-        "Available in eSupplier": e_supplier,
-        "Bid URL": bid_url,
+        "Solicitation Reference #": cells["ref_link"] or cells["reference"],
+        "Title": cells["title"],
+        "Agency": cells["agency"],
+        "Available Date": parse_dt(cells["available"]),
+        "Due Date": parse_dt(cells["due"]),
+        "Available in eSupplier": "rfdCheckboxChecked" in cells["esupplier_class"],
+        "Bid URL": cells["ref_url"],
     }
 
 def collect_page_rows(driver):
-    rows_data = []
-    table = driver.find_element(By.CSS_SELECTOR, "table.rgMasterTable")
-    tbody = table.find_element(By.TAG_NAME, "tbody")
-    rows = tbody.find_elements(By.XPATH, "./tr[contains(@class,'rgRow') or contains(@class,'rgAltRow')]")
-    for tr in rows:
-        item = parse_row(tr)
-        if item:
-            rows_data.append(item)
-    return rows_data
+    return [parse_row(cells) for cells in extract_rows(driver, GRID_ROWS_SPEC)]
 
 
 def _get_first_ref_text(driver):
@@ -1,6 +1,8 @@
 # alaska_vss_step2.py
+import sys
 import time
 import logging
+from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
@@ -15,6 +17,10 @@ from selenium.common.exceptions import (
     NoSuchElementException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets  # noqa: E402
+
 START_URL = "https://iris-vss.alaska.gov/"
 
 logging.basicConfig(
@@ -27,6 +33,7 @@ def build_driver() -> webdriver.Firefox:
     # service = Service(executable_path="/opt/homebrew/bin/geckodriver")
     service = Service()
     opts = Options()
+    block_assets(opts, KEEP_CSS)
     driver = webdriver.Firefox(service=service, options=opts)
     driver.maximize_window()            # Expand the browser
     driver.set_page_load_timeout(60)
@@ -1,4 +1,6 @@
+import sys
 import time
+from pathlib import Path
 from typing import Optional, Tuple, List
 
 from selenium import webdriver
@@ -14,6 +16,10 @@ from selenium.common.exceptions import (
     ElementNotInteractableException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets  # noqa: E402
+
 URL = "https://vendor.myfloridamarketplace.com/search/bids"
 
 AD_TYPES_TO_SELECT = [
@@ -29,6 +35,7 @@ AD_STATUS_TO_SELECT = "CLOSED"
 def open_firefox():
     opts = Options()
     opts.headless = False
+    block_assets(opts, KEEP_CSS)    # clicks check element visibility
     driver = webdriver.Firefox(options=opts)  # Selenium Manager resolves geckodriver
     try:
         driver.maximize_window()
@@ -1,5 +1,6 @@
 import time
 import os
+import sys
 import zipfile
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -10,6 +11,16 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.instrument import log_summary  # noqa: E402
+from common.waits import (  # noqa: E402
+    install_network_hooks, row_signature, settle, wait_dom_quiet, wait_for_change, wait_until,
+)
+
+ROWS_CSS = "table.table-opportunity tbody tr"
 
 class HawaiiProcurementScraper:
     def __init__(self, download_path=None):
@@ -31,6 +42,7 @@ class HawaiiProcurementScraper:
         chrome_options.add_experimental_option("prefs", prefs)
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        install_network_hooks(self.driver)
         self.driver.maximize_window()
         self.wait = WebDriverWait(self.driver, 15)
         self.scraped_data = []
@@ -68,7 +80,7 @@ class HawaiiProcurementScraper:
             # Open the website
             print("Opening website...")
             self.driver.get("https://hands.ehawaii.gov/hands/opportunities")
-            time.sleep(5)
+            settle(self.driver, timeout=20)
             
             # Close any initial modals
             self.close_any_modal()
@@ -76,12 +88,12 @@ class HawaiiProcurementScraper:
             # Click on "Show More Search Criteria"
             print("Clicking 'Show More Search Criteria'...")
             self.click_show_more_criteria()
-            time.sleep(2)
+            wait_dom_quiet(self.driver, timeout=5)
             
             # Change status filter from Posted/Released to Closed
             print("Changing status filter to 'Closed'...")
             self.change_status_filter()
-            time.sleep(5)
+            settle(self.driver, timeout=20)
             
             # Start scraping pages
             page_num = 1
@@ -100,7 +112,6 @@ class HawaiiProcurementScraper:
                     break
                 
                 page_num += 1
-                time.sleep(3)
             
             # Save data to Excel
             self.save_to_excel()
@@ -110,8 +121,8 @@ class HawaiiProcurementScraper:
             import traceback
             traceback.print_exc()
         finally:
+            log_summary(print, prefix="wait.")
             print("\nClosing browser...")
-            time.sleep(2)
             self.driver.quit()
     
     def click_show_more_criteria(self):
@@ -214,7 +225,7 @@ class HawaiiProcurementScraper:
             self.wait.until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "table.table-opportunity tbody"))
             )
-            time.sleep(2)
+            wait_dom_quiet(self.driver, "table.table-opportunity", timeout=5)
             
             # Get all opportunity rows (refresh the list each time)
             while True:
@@ -258,7 +269,7 @@ class HawaiiProcurementScraper:
                             except:
                                 row.click()
                             
-                            time.sleep(2)
+                            wait_dom_quiet(self.driver, timeout=3)
                             
                             # Handle the popup - check for closed notice or OK button
                             try:
@@ -287,12 +298,11 @@ class HawaiiProcurementScraper:
                                     EC.element_to_be_clickable((By.XPATH, "//button[@class='btn btn-primary' and text()='OK']"))
                                 )
                                 ok_button.click()
-                                time.sleep(2)
+                                wait_until(lambda: len(self.driver.window_handles) > 1, timeout=5, name="new_tab")
                                 
                                 # Switch to the new tab
                                 original_window = self.driver.current_window_handle
                                 self.driver.switch_to.window(self.driver.window_handles[-1])
-                                time.sleep(3)
                                 
                                 # Scrape opportunity details
                                 self.scrape_opportunity_details()
@@ -310,7 +320,6 @@ class HawaiiProcurementScraper:
                                 if len(self.driver.window_handles) > 1:
                                     original_window = self.driver.current_window_handle
                                     self.driver.switch_to.window(self.driver.window_handles[-1])
-                                    time.sleep(3)
                                     
                                     self.scrape_opportunity_details()
                                     
@@ -441,7 +450,7 @@ class HawaiiProcurementScraper:
         """Scrape details from the opportunity detail page"""
         try:
             # Wait for page to load
-            time.sleep(3)
+            settle(self.driver, timeout=15)
             
             # Extract all details
             data = {}
@@ -579,6 +588,7 @@ class HawaiiProcurementScraper:
             time.sleep(1)
             
             print("Clicking Next button...")
+            old_sig = row_signature(self.driver, ROWS_CSS)
             
             # Try clicking with JavaScript
             try:
@@ -586,7 +596,8 @@ class HawaiiProcurementScraper:
             except:
                 next_button.click()
             
-            time.sleep(3)
+            if not wait_for_change(self.driver, ROWS_CSS, old_sig, timeout=20):
+                print("Rows did not change after clicking Next")
             print("Successfully navigated to next page")
             return True
             
@@ -11,6 +11,11 @@ import os
 import zipfile
 from pathlib import Path
 from datetime import datetime
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.download_tracker import DownloadTracker, enable_download_events  # noqa: E402
 
 URL = "https://www.bidbuy.illinois.gov/bso/view/search/external/advancedSearchBid.xhtml?openBids=true"
 BASE_DOWNLOAD_DIR = Path("downloads")
@@ -47,16 +52,6 @@ def safe_text(element):
     except:
         return None
 
-def wait_for_downloads(download_dir, timeout=60):
-    """Wait until all Chrome downloads are complete."""
-    end_time = time.time() + timeout
-    while time.time() < end_time:
-        if any(f.endswith(".crdownload") for f in os.listdir(download_dir)):
-            time.sleep(1)
-        else:
-            return True
-    return False
-
 def scrape_blanket_page(driver, wait, blanket_number):
     """Scrape details from the blanket/PO page."""
     blanket_data = {
@@ -290,19 +285,18 @@ def scrape_detail_page(driver, wait, bid_number, temp_download_dir, row_element)
                     record["attachments"] = "; ".join(attachment_names)
                     print(f"  📎 Attachments: {record['attachments']}")
                 
-                before_files = set(os.listdir(temp_download_dir))
+                mark = tracker.mark()
+                clicked = 0
 
                 for link in file_links:
                     try:
                         driver.execute_script("arguments[0].click();", link)
-                        time.sleep(2)
+                        clicked += 1
                     except Exception as e:
                         print(f"  ⚠️ Failed to download a file: {e}")
 
-                wait_for_downloads(temp_download_dir, timeout=90)
-
-                after_files = set(os.listdir(temp_download_dir))
-                new_files = list(after_files - before_files)
+                downloaded = tracker.wait_for(clicked, since=mark, timeout=90, start_timeout=15)
+                new_files = [os.path.basename(f) for f in downloaded]
 
                 if new_files:
                     # Create zip file
@@ -347,8 +341,10 @@ prefs = {
     "profile.default_content_setting_values.automatic_downloads": 1,
 }
 options.add_experimental_option("prefs", prefs)
+enable_download_events(options)
 
 driver = webdriver.Chrome(options=options)
+tracker = DownloadTracker(driver, str(temp_download_dir))
 wait = WebDriverWait(driver, 30)
 
 try:
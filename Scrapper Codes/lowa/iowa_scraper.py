@@ -1,15 +1,59 @@
-import time
-import json
+import sys
 import argparse
 from datetime import datetime
+from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
+from common.checkpoint import CheckpointSink  # noqa: E402
+from common.extract import Field, PanelSpec, RowSpec, extract  # noqa: E402
+from common.instrument import log_summary  # noqa: E402
+from common.waits import row_signature, wait_for_change  # noqa: E402
+
 BASE = "https://bidopportunities.iowa.gov"
 AWARDED_URL = f"{BASE}/Home/AwardedContracts"
+ROWS_CSS = "#awardedContractsTbl tbody tr"
+
+# Detail page layout: <label for='...'> paired with its value column, plus the
+# attachment rows; all are read in a single execute_script round-trip. Values
+# that are links (mailto etc.) are read from the anchor, the rest from the
+# column itself.
+DETAIL_LABELS = {
+    "contract_number": "Number",
+    "product_service": "ProductService",
+    "contact_name": "ContactName",
+    "contact_email": "ContactEmail",
+    "contact_phone": "ContactPhoneNumber",
+    "vendor_name": "VendorName",
+    "vendor_address1": "VendorAddress1",
+    "address_line1": "AddressLine1",
+    "vendor_cityzip": "VendorCityStateZip",
+    "vendor_contact_name": "VendorContactName",
+    "vendor_contact_email": "VendorContactEmail",
+    "vendor_contact_phone": "VendorContactPhoneNumber",
+}
+DETAIL_SPEC = PanelSpec(
+    items="div.row", label="label", label_attr="for",
+    value=Field("div.col-md-8, div.col-md-9"), labels=DETAIL_LABELS,
+)
+DETAIL_LINK_SPEC = PanelSpec(
+    items="div.row", label="label", label_attr="for",
+    value=Field("div.col-md-8 a, div.col-md-9 a"), labels=DETAIL_LABELS,
+)
+ATTACHMENTS_SPEC = RowSpec(
+    rows="div.panel-body > div.row",
+    fields={
+        "name": Field("div.col-md-8 > a"),
+        "href": Field("div.col-md-8 > a", "href"),
+        "download_href": Field("div.col-md-1 > a.glyphicon-download", "href"),
+    },
+)
 
 # ---------------------------------------------------------------------
 # SETUP
@@ -21,7 +65,9 @@ def setup_driver(headless=False):
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--start-maximized")
+    block_assets(opts, BLOCK_ASSETS)
     driver = webdriver.Chrome(options=opts)
+    enable_blocking(driver, BLOCK_ASSETS)
     driver.maximize_window()
     return driver
 
@@ -50,67 +96,42 @@ def scrape_contract_detail(driver, url):
         EC.presence_of_element_located((By.CSS_SELECTOR, "div.panel"))
     )
 
-    def get_value_by_label(label_for):
-        """Find <label for='...'> and return its paired value text (handles mailto links)."""
-        try:
-            label = driver.find_element(By.XPATH, f"//label[contains(@for,'{label_for}')]")
-            parent_row = label.find_element(By.XPATH, "./ancestor::div[contains(@class,'row')]")
-            val_div = parent_row.find_element(By.CSS_SELECTOR, "div.col-md-8, div.col-md-9")
-            try:
-                link = val_div.find_element(By.TAG_NAME, "a")
-                return link.text.strip() or None
-            except:
-                return val_div.text.strip() or None
-        except:
-            return None
+    data = extract(driver, {"detail": DETAIL_SPEC, "links": DETAIL_LINK_SPEC, "attachments": ATTACHMENTS_SPEC})
+    fields = data.get("detail") or {}
+    links = data.get("links") or {}
+
+    def get_value_by_label(key):
+        """Anchor text paired with the label, else the value column; None when missing/empty."""
+        return links.get(key) or fields.get(key) or None
 
     # Contract Information
-    contract_number = get_value_by_label("Number")
-    product_service = get_value_by_label("ProductService")
-    contact_name = get_value_by_label("ContactName")
-    contact_email = get_value_by_label("ContactEmail")
-    contact_phone = get_value_by_label("ContactPhoneNumber")
+    contract_number = get_value_by_label("contract_number")
+    product_service = get_value_by_label("product_service")
+    contact_name = get_value_by_label("contact_name")
+    contact_email = get_value_by_label("contact_email")
+    contact_phone = get_value_by_label("contact_phone")
 
     # Vendor Information
-    vendor_name = get_value_by_label("VendorName")
-    vendor_addr = get_value_by_label("VendorAddress1") or get_value_by_label("AddressLine1")
-    vendor_cityzip = get_value_by_label("VendorCityStateZip")
-    vendor_contact_name = get_value_by_label("VendorContactName")
-    vendor_contact_email = get_value_by_label("VendorContactEmail")
-    vendor_contact_phone = get_value_by_label("VendorContactPhoneNumber")
+    vendor_name = get_value_by_label("vendor_name")
+    vendor_addr = get_value_by_label("vendor_address1") or get_value_by_label("address_line1")
+    vendor_cityzip = get_value_by_label("vendor_cityzip")
+    vendor_contact_name = get_value_by_label("vendor_contact_name")
+    vendor_contact_email = get_value_by_label("vendor_contact_email")
+    vendor_contact_phone = get_value_by_label("vendor_contact_phone")
 
     vendor_city, vendor_state, vendor_zip = split_city_state_zip(vendor_cityzip)
 
-   
     # -----------------------------
     # Attachments
     # -----------------------------
     attachments = []
-    try:
-        # Target all attachment rows under the sixth panel (Documents/Attachments)
-        attach_rows = driver.find_elements(
-            By.XPATH,
-            "//div[contains(@class,'panel-body')]/div[contains(@class,'row')]"
-        )
-        for r in attach_rows:
-            try:
-                name_el = r.find_element(By.XPATH, ".//div[contains(@class,'col-md-8')]/a")
-                name = name_el.text.strip()
-                # Try to find the download icon link in the same row
-                try:
-                    dl_el = r.find_element(By.XPATH, ".//div[contains(@class,'col-md-1')]/a[contains(@class,'glyphicon-download')]")
-                    href = dl_el.get_attribute("href")
-                except:
-                    href = name_el.get_attribute("href")
-                if href and href.startswith("/"):
-                    href = BASE + href
-                if name:
-                    attachments.append({"name": name, "url": href})
-            except Exception as e:
-                continue
-    except Exception as e:
-        print(f"[WARN] Attachment extraction issue: {e}")
-
+    for r in data.get("attachments") or []:
+        # Prefer the download icon link in the same row
+        href = r["download_href"] or r["href"]
+        if href and href.startswith("/"):
+            href = BASE + href
+        if r["name"]:
+            attachments.append({"name": r["name"], "url": href})
 
     detail = {
         "contract_number": contract_number,
@@ -146,6 +167,7 @@ def scrape_awarded_contracts(headless=False, max_pages=None, save_every=10):
 
     ts = datetime.now().strftime("%Y%m%d_%H%M")
     out_file = f"iowa_awarded_contracts_{ts}.json"
+    sink = CheckpointSink(f"iowa_awarded_contracts_{ts}.jsonl", fsync_every=save_every)
     all_rows = []
     print(f"[INFO] Started scraping → {out_file}")
 
@@ -163,12 +185,7 @@ def scrape_awarded_contracts(headless=False, max_pages=None, save_every=10):
                 print(f"    → Scraping: {link}")
                 detail = scrape_contract_detail(driver, link)
                 all_rows.append(detail)
-
-                # Incremental save
-                if len(all_rows) % save_every == 0:
-                    with open(out_file, "w", encoding="utf-8") as f:
-                        json.dump(all_rows, f, indent=2, ensure_ascii=False)
-                    print(f"[INFO] Saved progress ({len(all_rows)} contracts)")
+                sink.add(detail)  # incremental save: one appended line per contract
             except Exception as e:
                 print(f"[WARN] Row {i+1} failed: {e}")
                 continue
@@ -193,23 +210,22 @@ def scrape_awarded_contracts(headless=False, max_pages=None, save_every=10):
             break
 
         # Go to next page
+        old_sig = row_signature(driver, ROWS_CSS)
         driver.execute_script("arguments[0].scrollIntoView(true);", next_page_link)
-        time.sleep(0.4)
         driver.execute_script("arguments[0].click();", next_page_link)
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "#awardedContractsTbl tbody tr"))
-        )
-        time.sleep(1.5)
+        if not wait_for_change(driver, ROWS_CSS, old_sig, timeout=15):
+            print("[WARN] Table did not change after clicking the next page")
 
         if max_pages and int(current_page) >= max_pages:
             print(f"[INFO] Stopped at page {max_pages}.")
             break
 
     driver.quit()
+    log_summary(print, prefix="wait.")
 
     # Final save
-    with open(out_file, "w", encoding="utf-8") as f:
-        json.dump(all_rows, f, indent=2, ensure_ascii=False)
+    sink.write_json(out_file)
+    sink.close()
     print(f"\n[DONE] Saved {len(all_rows)} contracts → {out_file}")
 
     return all_rows
@@ -224,7 +240,7 @@ def main():
     )
     parser.add_argument("--headless", action="store_true", help="Run Chrome in headless mode")
     parser.add_argument("--max-pages", type=int, default=None, help="Limit number of pages (for testing)")
-    parser.add_argument("--save-every", type=int, default=10, help="Save progress every N contracts")
+    parser.add_argument("--save-every", type=int, default=10, help="Flush the progress checkpoint to disk every N contracts")
     args = parser.parse_args()
 
     scrape_awarded_contracts(
@@ -1,8 +1,10 @@
 # michigan_vss_step3_clean.py
+import sys
 import time
 import csv
 import re
 import logging
+from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
@@ -18,6 +20,11 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets  # noqa: E402
+from common.extract import Field, RowSpec, extract_rows  # noqa: E402
+
 # === Michigan START URL ===
 START_URL = "https://sigma.michigan.gov/PRDVSS1X1/Advantage4"
 
@@ -35,6 +42,18 @@ ROW_LOCATOR = (By.CSS_SELECTOR, "tbody > tr")
 # Michigan pager's Next button (button wrapping the <i> icon)
 NEXT_BUTTON_LOCATOR = (By.CSS_SELECTOR, 'button.css-1yn6b58[aria-label="Next"]')
 
+# Result row fields (Advantage4 data-qa), read in a single execute_script round-trip
+ROWS_SPEC = RowSpec(
+    root=TABLE_LOCATOR[1],
+    rows="tbody > tr",
+    fields={
+        "Description": Field('[data-qa*=".DOC_DSCR"]', "aria-label|text"),
+        "Department": Field('[data-qa*=".DeptBuyr.DEPT_NM"]', "aria-label|text"),
+        "Solicitation Number": Field('a.css-xv6zqn[data-qa*=".DOC_REF"]', "aria-label|text"),
+        "Type": Field('[data-qa*=".DOC_CD_CONCAT"]', "aria-label|text"),
+    },
+)
+
 # Search button (unchanged)
 SEARCH_BUTTON_LOCATOR = (By.CSS_SELECTOR, 'button[name="vss.page.VVSSX10019.gridView1.Search"][aria-label="Search"]')
 
@@ -45,6 +64,7 @@ def build_driver() -> webdriver.Firefox:
     service = Service()  # set executable_path if geckodriver isn't on PATH
     opts = Options()
     # opts.add_argument("-headless")  # uncomment to run headless
+    block_assets(opts, KEEP_CSS)
     driver = webdriver.Firefox(service=service, options=opts)
     driver.maximize_window()
     driver.set_page_load_timeout(60)
@@ -262,59 +282,24 @@ def sanitize_type(value: str) -> str:
     return cleaned
 
 
-def scrape_rows_from_current_page(driver):
-    results = []
-    table = driver.find_element(*TABLE_LOCATOR)
-    tbody = table.find_element(*TBODY_LOCATOR)
-    rows = tbody.find_elements(*ROW_LOCATOR)
-
-    logging.info(f"Found {len(rows)} rows on this page.")
-    for i, row in enumerate(rows, start=1):
+def scrape_rows_from_current_page(driver, attempts=3):
+    # The grid can re-render while it is read; re-extract the page when it does.
+    for attempt in range(1, attempts + 1):
         try:
-            js_scroll_center(driver, row)
-            time.sleep(0.05)
-
-            # Description
-            try:
-                desc_el = row.find_element(By.CSS_SELECTOR, '[data-qa*=".DOC_DSCR"]')
-                description = extract_text_safe(desc_el)
-            except NoSuchElementException:
-                description = ""
-
-            # Department
-            try:
-                dept_el = row.find_element(By.CSS_SELECTOR, '[data-qa*=".DeptBuyr.DEPT_NM"]')
-                department = extract_text_safe(dept_el)
-            except NoSuchElementException:
-                department = ""
-
-            # Solicitation Number
-            try:
-                sol_el = row.find_element(By.CSS_SELECTOR, 'a.css-xv6zqn[data-qa*=".DOC_REF"]')
-                solicitation_number = extract_text_safe(sol_el)
-            except NoSuchElementException:
-                solicitation_number = ""
-
-            # Type (sanitize)
-            try:
-                type_el = row.find_element(By.CSS_SELECTOR, '[data-qa*=".DOC_CD_CONCAT"]')
-                bid_type = sanitize_type(extract_text_safe(type_el))
-            except NoSuchElementException:
-                bid_type = ""
-
-            if any([description, department, solicitation_number, bid_type]):
-                results.append({
-                    "Description": description,
-                    "Department": department,
-                    "Solicitation Number": solicitation_number,
-                    "Type": bid_type,
-                })
-
+            rows = extract_rows(driver, ROWS_SPEC)
+            break
         except StaleElementReferenceException:
-            logging.warning(f"Row {i} went stale; skipping.")
-        except Exception as e:
-            logging.warning(f"Unexpected error scraping row {i}: {e}")
+            if attempt == attempts:
+                raise
+            logging.warning(f"Rows went stale; re-reading the page ({attempt}/{attempts}).")
+            time.sleep(0.5)
+    logging.info(f"Found {len(rows)} rows on this page.")
 
+    results = []
+    for row in rows:
+        row["Type"] = sanitize_type(row["Type"])
+        if any(row.values()):
+            results.append(row)
     return results
 
 
@@ -8,13 +8,24 @@ from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import pandas as pd
 import time
-import requests
-import zipfile
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blobstore import AttachmentStore  # noqa: E402
+from common.downloader import Downloader  # noqa: E402
+from common.http import create_session  # noqa: E402
+
 CHROME_BINARY_PATH = "/usr/bin/google-chrome"
 DOWNLOAD_DIR = Path("downloads_test1")
 DOWNLOAD_DIR.mkdir(exist_ok=True)
+STORE_DIR = "montana_store"
+
+store = AttachmentStore(STORE_DIR)
+http = create_session({"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) Chrome/120.0"})
+downloader = Downloader(workers=4, per_host=2, session=http)
+pending = []  # (entry, safe_name, pdf_filename, future)
 
 
 chrome_options = Options()
@@ -133,36 +144,18 @@ while True:
 
             
             if pdf_link:
-                try:
-                    safe_name = "".join(c for c in name if c.isalnum() or c in (" ", "-", "_")).strip()
-                    if not safe_name:
-                        safe_name = f"page{page}_row{idx}"
-                    if len(safe_name) > 80:
-                        safe_name = safe_name[:80]
-
-                    pdf_filename = f"{safe_name}.pdf"
-                    pdf_path = DOWNLOAD_DIR / pdf_filename
-
-                    print("  Downloading PDF...", end=" ")
-                    headers = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) Chrome/120.0"}
-                    response = requests.get(pdf_link, headers=headers, timeout=30)
-                    response.raise_for_status()
-                    with open(pdf_path, "wb") as f:
-                        f.write(response.content)
-                    print("✓")
-
-                    zip_filename = f"{safe_name}.zip"
-                    zip_path = DOWNLOAD_DIR / zip_filename
-                    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                        zipf.write(pdf_path, pdf_filename)
-                    pdf_path.unlink()
-                    print(f"   Created zip: {zip_filename}")
-
-                    entry["Zip_File"] = str(zip_path)
-                    successful_downloads += 1
-                except Exception as e:
-                    entry["Zip_File"] = f"Failed: {str(e)}"
-                    print(f"   Download failed: {e}")
+                safe_name = "".join(c for c in name if c.isalnum() or c in (" ", "-", "_")).strip()
+                if not safe_name:
+                    safe_name = f"page{page}_row{idx}"
+                if len(safe_name) > 80:
+                    safe_name = safe_name[:80]
+
+                pdf_filename = f"{safe_name}.pdf"
+                print("  Queued PDF download.")
+                future = downloader.submit_to_store(
+                    store, pdf_link, filename=lambda result, n=pdf_filename: n, timeout=30
+                )
+                pending.append((entry, safe_name, pdf_filename, future))
             else:
                 entry["Zip_File"] = "No PDF link found"
 
@@ -194,6 +187,24 @@ while True:
 
 driver.quit()
 
+# Downloads ran in the background while the pages were scraped; zip each bid now.
+for entry, safe_name, pdf_filename, future in pending:
+    try:
+        stored = future.result()
+        # Each bid's ZIP is exported from the store; unchanged bids are not rewritten.
+        store.unlink_notice(safe_name)
+        store.link(safe_name, pdf_filename, stored.sha256)
+        zip_path = store.export_zip(safe_name, str(DOWNLOAD_DIR / f"{safe_name}.zip"))
+        print(f"   {'Cached' if stored.reused else 'Downloaded'} {pdf_filename} -> {Path(zip_path).name}")
+        entry["Zip_File"] = str(zip_path)
+        successful_downloads += 1
+    except Exception as e:
+        entry["Zip_File"] = f"Failed: {str(e)}"
+        print(f"   Download failed for {pdf_filename}: {e}")
+
+downloader.shutdown()
+store.close()
+
 
 if data:
     df = pd.DataFrame(data)
@@ -3,6 +3,8 @@
 # We still open the Description link to capture the master "Project Documents" page URL.
 
 import json
+import sys
+from pathlib import Path
 from urllib.parse import urljoin
 from requests.utils import requote_uri
 
@@ -18,6 +20,10 @@ try:
 except ImportError:
     USE_WDM = False
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import BLOCK_ASSETS, block_assets, enable_blocking  # noqa: E402
+
 BASE_URL = "https://das.nebraska.gov"
 TARGET_URL = "https://das.nebraska.gov/materiel/bid-opportunities.html#awarded-bids"
 
@@ -44,10 +50,14 @@ def build_driver(headless=True):
     opts.add_argument("--disable-gpu")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--window-size=1366,768")
+    block_assets(opts, BLOCK_ASSETS)    # the red-row check reads inline styles only
     if USE_WDM:
         from selenium.webdriver.chrome.service import Service as ChromeService
-        return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
-    return webdriver.Chrome(options=opts)
+        driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
+    else:
+        driver = webdriver.Chrome(options=opts)
+    enable_blocking(driver, BLOCK_ASSETS)
+    return driver
 
 def _absolute_url(href: str) -> str:
     if not href:
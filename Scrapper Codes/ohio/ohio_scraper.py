@@ -1,7 +1,9 @@
 import os
+import sys
 import time
 import zipfile
 from datetime import datetime
+from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,6 +11,15 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.instrument import log_summary  # noqa: E402
+from common.waits import (  # noqa: E402
+    install_network_hooks, row_signature, settle, wait_dom_quiet, wait_for_change,
+)
+
+GRID_ROWS_CSS = "#body_x_grid_grd tbody tr"
+
 class OhioBuysScraper:
     def __init__(self, download_path="downloads"):
         self.download_path = os.path.abspath(download_path)
@@ -24,6 +35,7 @@ class OhioBuysScraper:
         chrome_options.add_experimental_option("prefs", prefs)
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        install_network_hooks(self.driver)
         self.driver.maximize_window()
         self.wait = WebDriverWait(self.driver, 20)
         
@@ -31,14 +43,8 @@ class OhioBuysScraper:
         self.current_page = 0
         
     def wait_for_page_load(self, timeout=10):
-        """Wait for page to finish loading"""
-        time.sleep(2)
-        try:
-            self.wait.until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-        except:
-            pass
+        """Wait for page to finish loading (network idle, no loading overlay)"""
+        settle(self.driver, timeout=timeout)
     
     def apply_awarded_filter(self):
         """Apply the 'Awarded: Yes' filter"""
@@ -76,9 +82,10 @@ class OhioBuysScraper:
             print(f"Navigating to page {page_index + 1}...")
             
             script = f"__ivCtrl['body_x_grid_grd'].GoToPageOfGrid(0, {page_index});"
+            old_sig = row_signature(self.driver, GRID_ROWS_CSS)
             self.driver.execute_script(script)
+            wait_for_change(self.driver, GRID_ROWS_CSS, old_sig)
             self.wait_for_page_load()
-            time.sleep(2)
             
             print(f"Now on page {page_index + 1}")
             return True
@@ -121,9 +128,10 @@ class OhioBuysScraper:
             next_page_index = int(next_button.get_attribute('data-page-index'))
             
             # Click next page button
+            old_sig = row_signature(self.driver, GRID_ROWS_CSS)
             next_button.click()
+            wait_for_change(self.driver, GRID_ROWS_CSS, old_sig)
             self.wait_for_page_load()
-            time.sleep(2)
             
             self.current_page = next_page_index
             print(f"Moved to page {self.current_page + 1}")
@@ -139,7 +147,7 @@ class OhioBuysScraper:
             self.wait.until(
                 EC.presence_of_element_located((By.ID, "body_x_grid_grd"))
             )
-            time.sleep(2)
+            wait_dom_quiet(self.driver, "#body_x_grid_grd", timeout=5)
             
             # Find all edit buttons (opportunity links)
             links = self.driver.find_elements(
@@ -405,6 +413,7 @@ class OhioBuysScraper:
     def close(self):
         """Close the browser"""
         if self.driver:
+            log_summary(print, prefix="wait.")
             self.driver.quit()
             print("\nBrowser closed")
 
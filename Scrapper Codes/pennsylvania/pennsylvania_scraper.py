@@ -1,11 +1,18 @@
 import os
+import sys
 import time
+from pathlib import Path
+
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.store import ResultsStore  # noqa: E402
+
 download_dir = os.path.join(os.path.expanduser("~"), "Downloads")
 
 options = webdriver.ChromeOptions()
@@ -80,4 +87,13 @@ excel_path = os.path.join(download_dir, "pa_archived_closed_bids_first100.xlsx")
 df_first100.to_excel(excel_path, index=False)
 print(f"First 100 archived closed bids saved to {excel_path}")
 
+# The RTK request script reads the closed bids from here instead of the Excel.
+with ResultsStore() as store:
+    stored = store.upsert_opportunities(
+        "Pennsylvania", df_cleaned.to_dict("records"), "Bid No",
+        fields={"title": "Title", "agency": "Agency", "status": "Status", "close_date": "Bid End Date"},
+        source=url,
+    )
+print(f"{stored} archived closed bids stored in {store.path}")
+
 driver.quit()
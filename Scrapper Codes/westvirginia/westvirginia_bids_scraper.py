@@ -1,8 +1,10 @@
 # wv_vss_step3_clean.py
+import sys
 import time
 import csv
 import re
 import logging
+from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
@@ -18,6 +20,11 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets  # noqa: E402
+from common.extract import Field, RowSpec, extract_rows  # noqa: E402
+
 # --- CONFIG ---
 START_URL = "https://prd311.wvoasis.gov/PRDVSS1X1ERP/Advantage4"
 
@@ -36,6 +43,19 @@ TBODY_LOCATOR = (By.CSS_SELECTOR, "tbody")
 ROW_LOCATOR = (By.CSS_SELECTOR, "tbody > tr")
 NEXT_BUTTON_LOCATOR = (By.CSS_SELECTOR, 'button[aria-label="Next"]')
 
+# Result row fields (Advantage4 data-qa, cell texts as fallback), read in a
+# single execute_script round-trip
+ROWS_SPEC = RowSpec(
+    rows=ROW_LOCATOR[1],
+    fields={
+        "description": Field('[data-qa*=".DOC_DSCR"]', "aria-label|text"),
+        "department": Field('[data-qa*=".DeptBuyr.DEPT_NM"]', "aria-label|text"),
+        "solnum": Field('a[data-qa*=".DOC_REF"], a.css-xv6zqn[data-qa*=".DOC_REF"]', "aria-label|text"),
+        "bid_type": Field('[data-qa*=".DOC_CD_CONCAT"]', "aria-label|text"),
+        "cells": Field("td", "aria-label|text", many=True),
+    },
+)
+
 # Search button: try name/aria, then generic "Search" aria-label
 SEARCH_BUTTON_LOCATORS = [
     (By.CSS_SELECTOR, 'button[name*="gridView1.Search"][aria-label="Search"]'),
@@ -50,6 +70,7 @@ def build_driver() -> webdriver.Firefox:
     service = Service()  # relies on geckodriver on PATH
     opts = Options()
     # opts.add_argument("-headless")  # uncomment to run headless
+    block_assets(opts, KEEP_CSS)
     driver = webdriver.Firefox(service=service, options=opts)
     driver.maximize_window()
     driver.set_page_load_timeout(60)
@@ -236,53 +257,44 @@ def sanitize_type(value: str) -> str:
     return re.sub(r"^\s*null[\s:,-]*", "", str(value), flags=re.IGNORECASE).strip()
 
 
-def scrape_rows_from_current_page(driver, table):
+def scrape_rows_from_current_page(driver, table, attempts=3):
     results = []
-    tbody = table.find_element(*TBODY_LOCATOR)
-    rows = tbody.find_elements(*ROW_LOCATOR)
-    logging.info(f"Found {len(rows)} row elements on this page.")
-
-    for i, row in enumerate(rows, start=1):
+    # The grid can re-render while it is read; find the table again and re-extract.
+    for attempt in range(1, attempts + 1):
         try:
-            js_scroll_center(driver, row)
-            time.sleep(0.03)
-
-            # Preferred selectors (Advantage4 data-qa)
-            def q(sel):
-                try:
-                    return extract_text_safe(row.find_element(By.CSS_SELECTOR, sel))
-                except NoSuchElementException:
-                    return ""
-
-            description = q('[data-qa*=".DOC_DSCR"]')
-            department  = q('[data-qa*=".DeptBuyr.DEPT_NM"]')
-            solnum      = q('a[data-qa*=".DOC_REF"], a.css-xv6zqn[data-qa*=".DOC_REF"]')
-            bid_type    = sanitize_type(q('[data-qa*=".DOC_CD_CONCAT"]'))
-
-            # If those aren't present, fallback to column order
-            if not any([description, department, solnum, bid_type]):
-                tds = row.find_elements(By.CSS_SELECTOR, "td")
-                if tds:
-                    # best guess: common order -> [sol#, description, dept, type] or similar
-                    cand = [extract_text_safe(td) for td in tds]
-                    # try to pick plausible fields
-                    solnum = solnum or (cand[0] if cand else "")
-                    description = description or (cand[1] if len(cand) > 1 else "")
-                    department  = department or (cand[2] if len(cand) > 2 else "")
-                    bid_type    = bid_type or sanitize_type(cand[3] if len(cand) > 3 else "")
-
-            if any([description, department, solnum, bid_type]):
-                results.append({
-                    "Description": description,
-                    "Department": department,
-                    "Solicitation Number": solnum,
-                    "Type": bid_type,
-                })
-
+            rows = extract_rows(driver, ROWS_SPEC, scope=table)
+            break
         except StaleElementReferenceException:
-            logging.warning(f"Row {i} went stale; skipping.")
-        except Exception as e:
-            logging.warning(f"Unexpected error scraping row {i}: {e}")
+            if attempt == attempts:
+                raise
+            logging.warning(f"Rows went stale; re-reading the page ({attempt}/{attempts}).")
+            time.sleep(0.5)
+            table = find_results_table(driver, timeout=10)
+    logging.info(f"Found {len(rows)} row elements on this page.")
+
+    for row in rows:
+        description = row["description"]
+        department = row["department"]
+        solnum = row["solnum"]
+        bid_type = sanitize_type(row["bid_type"])
+
+        # If those aren't present, fallback to column order
+        if not any([description, department, solnum, bid_type]):
+            cand = row["cells"]
+            if cand:
+                # best guess: common order -> [sol#, description, dept, type] or similar
+                solnum = cand[0]
+                description = cand[1] if len(cand) > 1 else ""
+                department = cand[2] if len(cand) > 2 else ""
+                bid_type = sanitize_type(cand[3] if len(cand) > 3 else "")
+
+        if any([description, department, solnum, bid_type]):
+            results.append({
+                "Description": description,
+                "Department": department,
+                "Solicitation Number": solnum,
+                "Type": bid_type,
+            })
 
     return results
 
@@ -1,8 +1,10 @@
 # filename: wy_closed_bids_scraper.py
 import csv
 import logging
+import sys
 import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import List, Dict, Optional
 
 from selenium import webdriver
@@ -17,6 +19,10 @@ from selenium.common.exceptions import (
     TimeoutException,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from common.blocking import KEEP_CSS, block_assets  # noqa: E402
+
 START_URL = "https://www.publicpurchase.com/gems/wyominggsd,wy/buyer/public/publicClosedBidsInfo"
 CSV_PATH = "wy_closed_bids.csv"       # final, filtered output
 XLSX_PATH = "wy_closed_bids.xlsx"     # final, filtered output
@@ -37,6 +43,7 @@ def build_driver() -> webdriver.Firefox:
     opts = Options()
     # Keep it visible so you can watch the activity:
     # opts.add_argument("-headless")
+    block_assets(opts, KEEP_CSS)
     driver = webdriver.Firefox(options=opts)
     driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
     return driver
@@ -0,0 +1,13 @@
+"""
+Shared building blocks for the state scrapers ("Scrapper Codes") and the
+FOIA submitters ("Foia Codes").
+
+The per-state scripts live two folders below the repository root, so they
+make this package importable with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from common.http import create_session
+
+Engines that have their own CLI are run from the repository root, e.g.
+``python -m common.bso --tenant nevada``.
+"""
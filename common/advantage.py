@@ -0,0 +1,504 @@
+"""
+CGI Advantage4 VSS engine ("View Published Solicitations" grid).
+
+Michigan SIGMA, Colorado, Kentucky, West Virginia wvOASIS and Alaska IRIS all
+serve the same Angular Advantage4 self-service app. The grid is filled by a
+JSON search call; instead of clicking the pager and reading cells one at a
+time, this engine:
+
+1. Opens the portal once in Chrome, applies the tenant filters and clicks Search.
+2. Captures the grid's search XHR (URL, headers, JSON body) from the Chrome
+   performance log, together with the session cookies.
+3. Replays that call over a requests session with a large page size, walking
+   the offset/page key it found in the captured body.
+4. Normalizes each returned row by its Advantage field codes (DOC_REF, DOC_DSCR,
+   DEPT_NM, ...), the same codes the old scrapers read from ``data-qa``.
+
+Alabama STAARS still runs the frame-based AltSelfService (Advantage 3) VSS,
+which renders its grid server-side with no JSON API, so it is not a tenant here.
+
+Usage (from the repository root):
+    python -m common.advantage --tenant michigan --tenant colorado
+    python -m common.advantage --all --page-size 500
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking
+from common.http import create_session
+from common.store import DEFAULT_PATH as DEFAULT_DB, ResultsStore
+
+REQUEST_TIMEOUT = 60
+DEFAULT_PAGE_SIZE = 200
+FIELD_PREFIX = "vss.page.VVSSX10019.gridView1.group1.cardSearch.search1."
+SEARCH_BUTTON = "button[name='vss.page.VVSSX10019.gridView1.Search']"
+OVERLAY = "div.css-o3hj44"
+
+# Advantage field code -> output column
+FIELD_MAP: Dict[str, str] = {
+    "DOC_REF": "Solicitation Number",
+    "DOC_DSCR": "Description",
+    "DEPT_NM": "Department",
+    "BUYR_NM": "Buyer",
+    "DOC_CD_CONCAT": "Type",
+    "SO_CAT_CD": "Solicitation Category",
+    "CLSE_DT": "Closing Date/Time",
+    "SO_STA": "Status",
+    "DOC_CD": "Document Code",
+    "DOC_DEPT_CD": "Document Department",
+    "DOC_ID": "Document Id",
+}
+
+# results-store column -> record field
+STORE_FIELDS: Dict[str, str] = {
+    "title": "Description", "agency": "Department", "status": "Status", "close_date": "Closing Date/Time",
+}
+
+START_KEYS = ("startRow", "startIndex", "start", "offset", "first", "firstResult", "skip",
+              "pageIndex", "pageNumber", "pageNo", "currentPage", "page")
+SIZE_KEYS = ("pageSize", "rows", "limit", "maxRows", "fetchSize", "numRows", "maxResults", "size", "take")
+TOTAL_KEYS = ("totalCount", "totalRows", "totalRecords", "totalResults", "total", "rowCount", "count")
+PAGER_NAMES = ("paging", "pagination", "pager", "pageinfo", "pagingInfo", "page", "meta")
+
+
+# --- Tenant configuration ---
+@dataclass(frozen=True)
+class VSSTenant:
+    name: str
+    start_url: str
+    output_prefix: str
+    status: Optional[str] = "A"          # option value or visible text; None leaves the default
+    show_me: Optional[str] = "1"
+    doc_type: Optional[str] = None       # e.g. "RFP" / "Request for Proposals"
+    landing_next: bool = False           # Michigan hides the tiles behind a carousel "Next"
+
+
+TENANTS: Dict[str, VSSTenant] = {
+    "michigan": VSSTenant(
+        "Michigan", "https://sigma.michigan.gov/PRDVSS1X1/Advantage4", "michigan_vss_results",
+        doc_type="RFP", landing_next=True,
+    ),
+    "colorado": VSSTenant(
+        "Colorado", "https://prd.co.cgiadvantage.com/PRDVSS1X1/Advantage4", "colorado_vss_recent_awards",
+        status=None, show_me="Recent Awards",
+    ),
+    "kentucky": VSSTenant(
+        "Kentucky", "https://vss.ky.gov/vssprod-ext/Advantage4", "kentucky_awarded_rfps",
+        status="Awarded", show_me="All", doc_type="Request for Proposals",
+    ),
+    "westvirginia": VSSTenant(
+        "West Virginia", "https://prd311.wvoasis.gov/PRDVSS1X1ERP/Advantage4", "wv_vss_results",
+    ),
+    "alaska": VSSTenant("Alaska", "https://iris-vss.alaska.gov/", "alaska_vss_results"),
+}
+
+
+# --- small helpers ---
+def timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d_%H%M")
+
+
+def sanitize_type(value: Any) -> str:
+    """Remove leading 'null' (any case) and punctuation following it."""
+    if value is None:
+        return ""
+    return re.sub(r"^\s*null[\s:,-]*", "", str(value), flags=re.IGNORECASE).strip()
+
+
+def _walk(obj: Any, path: Tuple = ()) -> Iterator[Tuple[Tuple, Any]]:
+    yield path, obj
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from _walk(v, path + (k,))
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            yield from _walk(v, path + (i,))
+
+
+def _get(obj: Any, path: Tuple) -> Any:
+    for p in path:
+        obj = obj[p]
+    return obj
+
+
+def _set(obj: Any, path: Tuple, value: Any) -> None:
+    for p in path[:-1]:
+        obj = obj[p]
+    obj[path[-1]] = value
+
+
+def _find_key(obj: Any, names: Tuple[str, ...], scope: Tuple = ()) -> Optional[Tuple]:
+    """Path of the first int-valued key (by priority of ``names``) directly in the dict at ``scope``."""
+    try:
+        d = _get(obj, scope)
+    except (KeyError, IndexError, TypeError):
+        return None
+    if not isinstance(d, dict):
+        return None
+    found = {k.lower(): k for k, v in d.items()
+             if isinstance(k, str) and isinstance(v, int) and not isinstance(v, bool)}
+    for n in names:
+        if n.lower() in found:
+            return scope + (found[n.lower()],)
+    return None
+
+
+def _is_pager(path: Tuple) -> bool:
+    return bool(path) and str(path[-1]).lower() in {n.lower() for n in PAGER_NAMES}
+
+
+def paging_scope(body: Any) -> Optional[Tuple]:
+    """
+    Path of the request body's paging object: a dict holding both a start and
+    a size key (one named like a pager first), else a start key in a dict
+    named like a pager or at the top. Other int fields (filters, ids) are
+    never taken for the offset.
+    """
+    dicts = [path for path, val in _walk(body) if isinstance(val, dict)]
+    pagers = [p for p in dicts if _is_pager(p)]
+    for path in pagers + dicts:
+        if _find_key(body, START_KEYS, path) and _find_key(body, SIZE_KEYS, path):
+            return path
+    for path in pagers + [()]:
+        if _find_key(body, START_KEYS, path):
+            return path
+    return None
+
+
+def find_total(payload: Any, rows_path: Optional[Tuple]) -> Optional[int]:
+    """
+    The reported row total: looked up next to the rows list, then in a pager
+    object, then in the rows' enclosing objects up to the top.
+    """
+    scopes: List[Tuple] = []
+    if rows_path is not None:
+        scopes.append(rows_path[:-1])
+    scopes += [p for p, v in _walk(payload) if isinstance(v, dict) and _is_pager(p)]
+    if rows_path is not None:
+        scopes += [rows_path[:i] for i in range(len(rows_path) - 2, -1, -1)]
+    scopes.append(())
+    for scope in scopes:
+        path = _find_key(payload, TOTAL_KEYS, scope)
+        if path is not None:
+            return _get(payload, path)
+    return None
+
+
+def _flatten(d: Any, prefix: str = "") -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    if isinstance(d, dict):
+        for k, v in d.items():
+            out.update(_flatten(v, f"{prefix}{k}."))
+    else:
+        out[prefix.rstrip(".")] = d
+    return out
+
+
+def _field_code(key: str) -> str:
+    return key.rsplit(".", 1)[-1].upper()
+
+
+def rows_path(payload: Any) -> Optional[Tuple]:
+    """Path of the list of row dicts in a grid response that carries the most Advantage field codes."""
+    best: Optional[Tuple] = None
+    best_len = best_score = 0
+    for path, val in _walk(payload):
+        if not isinstance(val, list) or not val or not isinstance(val[0], dict):
+            continue
+        codes = {_field_code(k) for k in _flatten(val[0])}
+        score = len(codes & set(FIELD_MAP))
+        if score > best_score or (score == best_score and score and len(val) > best_len):
+            best, best_len, best_score = path, len(val), score
+    return best
+
+
+def find_rows(payload: Any) -> List[Dict[str, Any]]:
+    path = rows_path(payload)
+    return _get(payload, path) if path is not None else []
+
+
+def normalize_row(row: Dict[str, Any], tenant: VSSTenant) -> Dict[str, Any]:
+    rec: Dict[str, Any] = {"Source": tenant.name}
+    for key, val in _flatten(row).items():
+        col = FIELD_MAP.get(_field_code(key))
+        if col and rec.get(col) in (None, ""):
+            rec[col] = val
+    if "Type" in rec:
+        rec["Type"] = sanitize_type(rec["Type"])
+    return rec
+
+
+# --- captured grid call ---
+@dataclass
+class GridCall:
+    url: str
+    method: str
+    headers: Dict[str, str]
+    body: Any                      # parsed JSON body, or None for GET
+    cookies: List[Dict[str, Any]]
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.__dict__, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "GridCall":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def _select(driver, suffix: str, wanted: str, any_select: bool = False) -> bool:
+    """Pick ``wanted`` (value or visible text) in the search-card select named ``...suffix``."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import Select
+
+    els = driver.find_elements(By.CSS_SELECTOR, f"select[name='{FIELD_PREFIX}{suffix}'], select[name$='.{suffix}']")
+    if not els and any_select:
+        els = driver.find_elements(By.TAG_NAME, "select")
+    for el in els:
+        sel = Select(el)
+        for opt in sel.options:
+            if (opt.get_attribute("value") or "") == wanted or (opt.text or "").strip().lower() == wanted.lower():
+                sel.select_by_visible_text(opt.text)
+                return True
+    return False
+
+
+def capture_grid_call(tenant: VSSTenant, headless: bool = True, timeout: int = 60) -> GridCall:
+    """Drive the portal once in Chrome and capture the grid search XHR."""
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    opts = webdriver.ChromeOptions()
+    if headless:
+        opts.add_argument("--headless=new")
+    opts.add_argument("--disable-gpu"); opts.add_argument("--no-sandbox"); opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--window-size=1600,1100")
+    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    block_assets(opts, KEEP_CSS)            # the overlay waits need the stylesheets
+    driver = webdriver.Chrome(options=opts)
+    enable_blocking(driver, KEEP_CSS)
+    wait = WebDriverWait(driver, timeout)
+
+    def overlay_gone():
+        try:
+            WebDriverWait(driver, timeout).until(EC.invisibility_of_element_located((By.CSS_SELECTOR, OVERLAY)))
+        except Exception:
+            pass
+
+    def click(css: str):
+        el = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, css)))
+        overlay_gone()
+        driver.execute_script("arguments[0].click();", el)
+
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        logging.info(f"[{tenant.name}] Bootstrapping browser session at {tenant.start_url}")
+        driver.get(tenant.start_url)
+        if tenant.landing_next:
+            try:
+                click("a[title='Next'][role='button']")
+            except Exception:
+                logging.info(f"[{tenant.name}] Landing 'Next' not found; continuing.")
+        click("div[title='View Published Solicitations']")
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, SEARCH_BUTTON)))
+        if not driver.find_elements(By.CSS_SELECTOR, "select[name$='.SHOW_TXT']"):
+            for xp in ("//button[contains(., 'Show More')]", "//a[@role='button' and contains(., 'Show More')]"):
+                for el in driver.find_elements(By.XPATH, xp)[:1]:
+                    driver.execute_script("arguments[0].click();", el)
+        for suffix, wanted in (("SHOW_TXT", tenant.show_me), ("SO_STA", tenant.status), ("DOC_CD", tenant.doc_type)):
+            if wanted and not _select(driver, suffix, wanted, any_select=suffix == "DOC_CD"):
+                logging.warning(f"[{tenant.name}] Could not set {suffix} = {wanted!r}; continuing.")
+        driver.get_log("performance")  # drop bootstrap traffic
+        click(SEARCH_BUTTON)
+        overlay_gone()
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "tr[id^='tableDataRow'], [data-qa*='.DOC_REF']")))
+
+        requests_seen: Dict[str, Dict[str, Any]] = {}
+        for entry in driver.get_log("performance"):
+            msg = json.loads(entry["message"])["message"]
+            params = msg.get("params", {})
+            if msg.get("method") == "Network.requestWillBeSent":
+                requests_seen[params["requestId"]] = params["request"]
+        for rid, req in requests_seen.items():
+            try:
+                body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": rid}).get("body", "")
+            except Exception:
+                continue
+            if "DOC_REF" not in body:
+                continue
+            post = req.get("postData")
+            if post is None and req.get("hasPostData"):
+                post = driver.execute_cdp_cmd("Network.getRequestPostData", {"requestId": rid}).get("postData")
+            headers = {k: v for k, v in req.get("headers", {}).items()
+                       if not k.startswith(":") and k.lower() not in ("content-length", "cookie", "host")}
+            logging.info(f"[{tenant.name}] Captured grid call {req['method']} {req['url']}")
+            return GridCall(
+                url=req["url"],
+                method=req["method"],
+                headers=headers,
+                body=json.loads(post) if post else None,
+                cookies=driver.get_cookies(),
+            )
+        raise RuntimeError(f"{tenant.name}: no grid search XHR carrying DOC_REF was captured")
+    finally:
+        driver.quit()
+
+
+# --- replay ---
+class VSSClient:
+    def __init__(self, tenant: VSSTenant, call: GridCall, session: Optional[requests.Session] = None):
+        self.tenant = tenant
+        self.call = call
+        self.session = session or create_session()
+        self.session.headers.update(call.headers)
+        for c in call.cookies:
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+
+    def _send(self, body: Any) -> Any:
+        if self.call.method.upper() == "GET":
+            resp = self.session.get(self.call.url, timeout=REQUEST_TIMEOUT)
+        else:
+            resp = self.session.request(self.call.method, self.call.url, json=body, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+    def pages(self, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield raw grid rows page by page using the captured paging keys, until
+        the reported total is reached or a page comes back empty. A short page
+        is not the end: servers cap page sizes below what was asked for.
+        """
+        body = copy.deepcopy(self.call.body)
+        scope = paging_scope(body) if body is not None else None
+        start_path = _find_key(body, START_KEYS, scope) if scope is not None else None
+        size_path = _find_key(body, SIZE_KEYS, scope) if scope is not None else None
+        if start_path is None:
+            logging.warning(f"[{self.tenant.name}] No paging key in captured call; fetching a single page.")
+            payload = self._send(body)
+            yield find_rows(payload)
+            return
+
+        by_page = "page" in str(start_path[-1]).lower()
+        base = _get(body, start_path)
+        if size_path is not None:
+            _set(body, size_path, page_size)
+        previous: Optional[set] = None
+        fetched = 0
+        page_no = 0
+        while True:
+            _set(body, start_path, base + page_no if by_page else base + fetched)
+            payload = self._send(body)
+            path = rows_path(payload)
+            rows = _get(payload, path) if path is not None else []
+            if not rows:
+                break
+            keys = {json.dumps(r, sort_keys=True, default=str) for r in rows}
+            if keys == previous:
+                logging.warning(f"[{self.tenant.name}] Page {page_no + 1} repeats the previous page; stopping")
+                break  # the server ignored the offset
+            previous = keys
+            yield rows
+            fetched += len(rows)
+            page_no += 1
+            total = find_total(payload, path)
+            logging.info(f"[{self.tenant.name}] {fetched}" + (f" / {total}" if total else "") + " rows")
+            if total and fetched >= total:
+                break
+
+    def crawl(self, page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+        records = [normalize_row(r, self.tenant) for rows in self.pages(page_size) for r in rows]
+        logging.info(f"[{self.tenant.name}] Collected {len(records)} records.")
+        return records
+
+
+# --- output ---
+def store_results(tenant: VSSTenant, records: List[dict], store: ResultsStore) -> int:
+    n = store.upsert_opportunities(tenant.name, records, "Solicitation Number", STORE_FIELDS, source=tenant.start_url)
+    logging.info(f"[{tenant.name}] Stored {n} solicitations in {store.path}")
+    return n
+
+
+def save_results(
+    tenant: VSSTenant, records: List[dict], out_dir: str, store: Optional[ResultsStore] = None
+) -> Optional[str]:
+    if not records:
+        logging.warning(f"[{tenant.name}] No rows; nothing written.")
+        return None
+    if store is not None:
+        store_results(tenant, records, store)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{tenant.output_prefix}_{timestamp()}.xlsx")
+    pd.DataFrame(records).to_excel(path, index=False)
+    logging.info(f"[{tenant.name}] Wrote {len(records)} rows → {path}")
+    return path
+
+
+def run_tenant(key: str, args) -> Optional[str]:
+    tenant = TENANTS[key]
+    capture_path = os.path.join(args.out, f"{key}_grid_call.json")
+    call = None
+    if args.reuse_capture and os.path.exists(capture_path):
+        call = GridCall.load(capture_path)
+    if call is None:
+        call = capture_grid_call(tenant, headless=not args.show_browser)
+        os.makedirs(args.out, exist_ok=True)
+        call.save(capture_path)
+    try:
+        records = VSSClient(tenant, call).crawl(page_size=args.page_size)
+    except requests.HTTPError as e:
+        if not args.reuse_capture:
+            raise
+        logging.info(f"[{tenant.name}] Saved session rejected ({e}); capturing a fresh one.")
+        call = capture_grid_call(tenant, headless=not args.show_browser)
+        call.save(capture_path)
+        records = VSSClient(tenant, call).crawl(page_size=args.page_size)
+    if not args.db:
+        return save_results(tenant, records, args.out)
+    with ResultsStore(args.db) as store:
+        return save_results(tenant, records, args.out, store)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="CGI Advantage4 VSS engine (Michigan, Colorado, Kentucky, WV, Alaska)")
+    ap.add_argument("--tenant", action="append", choices=sorted(TENANTS), help="Tenant to crawl (repeatable)")
+    ap.add_argument("--all", action="store_true", help="Crawl every configured tenant")
+    ap.add_argument("--workers", type=int, default=3, help="Tenants crawled in parallel")
+    ap.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Rows requested per grid call")
+    ap.add_argument("--out", default=".", help="Output folder")
+    ap.add_argument("--db", default=DEFAULT_DB, help="Results database to upsert into ('' to skip)")
+    ap.add_argument("--reuse-capture", action="store_true", help="Reuse a saved grid call/cookies if still valid")
+    ap.add_argument("--show-browser", action="store_true", help="Show Chrome during the bootstrap")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    keys = sorted(TENANTS) if args.all else (args.tenant or [])
+    if not keys:
+        ap.error("pass --tenant NAME or --all")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(run_tenant, k, args): k for k in keys}
+        for fut in as_completed(futures):
+            key = futures[fut]
+            try:
+                fut.result()
+            except Exception as e:
+                logging.error(f"[{TENANTS[key].name}] crawl failed: {e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    main()
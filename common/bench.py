@@ -0,0 +1,151 @@
+"""
+Offline scraper benchmarks on recorded portal traffic.
+
+Each benchmark is a scraper script (as discovered by ``common.runner``) plus
+its cassette ``<cassettes>/<State>__<script>.jsonl``. ``record`` runs the
+script live once and captures its HTTP traffic; ``run`` replays it through
+``common.replay`` in a scratch folder and reports, per scraper:
+
+    records/sec          rows of the largest json/jsonl/csv/xlsx output / wall time
+    webdriver/record     WebDriver commands per output row (0 for HTTP-only scrapers)
+    bytes, requests      HTTP traffic served from the cassette
+    misses               requests that were never recorded (the run drifted)
+
+Browser page loads are not replayed (Chrome fetches pages itself); scrapers
+that drive a browser are measured on their WebDriver call count and their
+requests-based traffic only.
+
+Usage (from the repository root):
+    python -m common.bench record --state "Rhode Island" --state Texas
+    python -m common.bench run --latency 0.05 --repeat 3
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from common.runner import REPO_ROOT, Job, count_records, discover
+
+DEFAULT_CASSETTES = REPO_ROOT / "cassettes"
+
+
+def cassette_path(job: Job, folder: Path) -> Path:
+    return folder / f"{job.state}__{job.script.stem}.jsonl"
+
+
+def _replay_cmd(job: Job, mode: str, cassette: Path, metrics: Path, latency: float, jitter: float) -> List[str]:
+    return [
+        sys.executable, "-m", "common.replay", "run", f"--{mode}", str(cassette),
+        "--latency", str(latency), "--jitter", str(jitter), "--metrics-out", str(metrics), str(job.script),
+    ]
+
+
+def run_once(job: Job, mode: str, cassette: Path, latency: float = 0.0, jitter: float = 0.0,
+             timeout: Optional[float] = None) -> Dict:
+    """Run ``job`` once in a scratch folder; returns timing, traffic and record counts."""
+    work = Path(tempfile.mkdtemp(prefix="bench_"))
+    metrics = work / "_metrics.json"
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        # Replayed runs must not write their rows into the real results store.
+        FOIA_RESULTS_DB=str(work / "results.db"),
+    )
+    start = time.monotonic()
+    try:
+        proc = subprocess.run(
+            _replay_cmd(job, mode, cassette, metrics, latency, jitter), cwd=work, env=env,
+            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=timeout,
+        )
+        seconds = time.monotonic() - start
+        data = json.loads(metrics.read_text()) if metrics.exists() else {}
+        # The largest output is the dataset; JSONL checkpoints and JSON/XLSX copies repeat it.
+        records = max((count_records(p) for p in work.rglob("*") if p.is_file() and p != metrics), default=0)
+        return dict(
+            data, exit_code=proc.returncode, wall_seconds=round(seconds, 3), records=records,
+            stderr_tail=proc.stderr[-2000:] if proc.returncode else "",
+        )
+    except subprocess.TimeoutExpired:
+        return {"exit_code": None, "wall_seconds": timeout, "records": 0, "error": "timeout"}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    ok = [r for r in runs if r.get("exit_code") == 0] or runs
+    secs = statistics.median(r["wall_seconds"] or 0 for r in ok)
+    records = max(r["records"] for r in ok)
+    calls = statistics.median(r.get("webdriver_calls", 0) for r in ok)
+    return {
+        "runs": len(runs), "ok": sum(r.get("exit_code") == 0 for r in runs),
+        "seconds": round(secs, 3), "records": records,
+        "records_per_sec": round(records / secs, 2) if secs else 0.0,
+        "webdriver_per_record": round(calls / records, 2) if records else calls,
+        "http_requests": ok[0].get("http_requests", 0), "http_bytes": ok[0].get("http_bytes", 0),
+        "misses": ok[0].get("replay_misses", 0),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Record scraper traffic and benchmark scrapers offline")
+    ap.add_argument("cmd", choices=["record", "run"])
+    ap.add_argument("--state", action="append", help="State directory (repeatable; default: every cassette)")
+    ap.add_argument("--cassettes", default=str(DEFAULT_CASSETTES), help="Cassette folder")
+    ap.add_argument("--latency", type=float, default=0.0, help="Replay latency per response (seconds)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="+/- replay latency jitter (seconds)")
+    ap.add_argument("--repeat", type=int, default=1, help="Replays per scraper (median is reported)")
+    ap.add_argument("--timeout", type=float, default=None, help="Kill a run after this many seconds")
+    ap.add_argument("--out", help="Write the JSON report here (default: <cassettes>/bench_<ts>.json)")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    folder = Path(args.cassettes).resolve()
+    folder.mkdir(parents=True, exist_ok=True)
+    wanted = {s.lower() for s in args.state or []}
+    jobs = [j for j in discover() if not wanted or j.state.lower() in wanted]
+
+    if args.cmd == "record":
+        if not wanted:
+            ap.error("record needs --state (recording hits the live portals)")
+        for job in jobs:
+            path = cassette_path(job, folder)
+            if path.exists():
+                path.unlink()
+            r = run_once(job, "record", path, timeout=args.timeout)
+            logging.info(f"[{job.name}] recorded {r.get('http_requests', 0)} responses "
+                         f"({r.get('http_bytes', 0) / 1e6:.1f} MB) → {path} (exit {r['exit_code']})")
+        return
+
+    report: Dict[str, Dict] = {}
+    for job in jobs:
+        path = cassette_path(job, folder)
+        if not path.exists():
+            continue
+        runs = [run_once(job, "replay", path, args.latency, args.jitter, args.timeout) for _ in range(max(1, args.repeat))]
+        report[job.name] = dict(summarize(runs), attempts=runs)
+        s = report[job.name]
+        logging.info(
+            f"{job.name:45} {s['records_per_sec']:9.1f} rec/s {s['webdriver_per_record']:7.2f} wd/rec "
+            f"{s['http_requests']:6} req {s['http_bytes'] / 1e6:8.2f} MB {s['misses']:4} misses"
+        )
+    if not report:
+        logging.warning(f"No cassettes in {folder}; record some first.")
+        return
+    out = Path(args.out) if args.out else folder / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"latency": args.latency, "jitter": args.jitter, "results": report}, f, indent=2)
+    logging.info(f"Report → {out}")
+
+
+if __name__ == "__main__":
+    main()
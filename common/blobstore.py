@@ -0,0 +1,342 @@
+"""
+Content-addressed attachment store.
+
+Every downloaded file is stored once under ``<root>/blobs/<aa>/<sha256>`` no
+matter how many notices reference it. A small SQLite index maps
+
+  * sources  - resourceId / URL -> blob, with the size and ETag seen, so a
+               known source is not downloaded again;
+  * notices  - notice -> (filename, blob), the attachment list of a notice;
+  * exports  - ZIP path -> manifest it was built from, so per-notice ZIPs are
+               only (re)built when the notice's attachments changed.
+
+Usage (from the repository root):
+    python -m common.blobstore --root sam_gov_store stats
+    python -m common.blobstore --root sam_gov_store export --out-dir zips [--notice ID ...]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import uuid
+import zipfile
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import requests
+
+from common.downloader import DownloadResult, download
+
+DEFAULT_ROOT = "attachment_store"
+CHUNK_SIZE = 256 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    source_key TEXT PRIMARY KEY,
+    sha256     TEXT NOT NULL,
+    size       INTEGER,
+    etag       TEXT,
+    filename   TEXT
+);
+CREATE TABLE IF NOT EXISTS notices (
+    notice   TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    sha256   TEXT NOT NULL,
+    PRIMARY KEY (notice, filename)
+);
+CREATE TABLE IF NOT EXISTS exports (
+    path     TEXT PRIMARY KEY,
+    manifest TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class StoredFile:
+    sha256: str
+    size: int
+    filename: str
+    reused: bool    # True when no body was downloaded
+
+
+def url_filename(url: str, default: str = "file") -> str:
+    return unquote(os.path.basename(urlparse(url).path)) or default
+
+
+class AttachmentStore:
+    """Thread-safe; one instance can be shared by a download pool."""
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "AttachmentStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- Blobs ---
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def put_stream(self, chunks: Iterable[bytes]) -> Tuple[str, int]:
+        """Hash while writing to a temp file; keep it only if the content is new."""
+        tmp = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            sha = digest.hexdigest()
+            dest = self.blob_path(sha)
+            if os.path.exists(dest):
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO blobs (sha256, size) VALUES (?, ?)", (sha, size))
+        return sha, size
+
+    def put_file(self, path: str) -> Tuple[str, int]:
+        with open(path, "rb") as f:
+            return self.put_stream(iter(lambda: f.read(CHUNK_SIZE), b""))
+
+    # --- Sources ---
+    def lookup(self, source_key: str) -> Optional[Tuple[str, Optional[int], Optional[str], Optional[str]]]:
+        """(sha256, size, etag, filename) recorded for a source, if its blob is still on disk."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, size, etag, filename FROM sources WHERE source_key = ?", (source_key,)
+            ).fetchone()
+        if row and os.path.exists(self.blob_path(row[0])):
+            return row
+        return None
+
+    def remember(self, source_key: str, sha256: str, size: Optional[int], etag: Optional[str], filename: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sources (source_key, sha256, size, etag, filename) VALUES (?, ?, ?, ?, ?)",
+                (source_key, sha256, size, etag, filename),
+            )
+
+    def _unchanged(self, session: requests.Session, url: str, size: Optional[int], etag: Optional[str], **kwargs) -> bool:
+        """HEAD the URL and compare ETag / Content-Length with what was stored."""
+        if not size and not etag:
+            return False
+        try:
+            resp = session.head(url, allow_redirects=True, headers=kwargs.get("headers"), timeout=kwargs.get("timeout", 30))
+        except requests.RequestException:
+            return False
+        if resp.status_code != 200:
+            return False
+        head_etag = resp.headers.get("ETag")
+        head_size = resp.headers.get("Content-Length")
+        if etag and head_etag:
+            return etag == head_etag
+        if size and head_size and head_size.isdigit():
+            return int(head_size) == size
+        return False
+
+    def adopt(self, path: str, sha256: str, size: int) -> None:
+        """Move an already-hashed file into the store (or drop it if the blob exists)."""
+        dest = self.blob_path(sha256)
+        if os.path.exists(dest):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(path, dest)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO blobs (sha256, size) VALUES (?, ?)", (sha256, size))
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def fetch(
+        self,
+        session: requests.Session,
+        url: str,
+        source_key: Optional[str] = None,
+        revalidate: bool = True,
+        filename: Optional[Callable[[DownloadResult], str]] = None,
+        **kwargs,
+    ) -> StoredFile:
+        """
+        Store the body of ``url``. A known ``source_key`` (default: the URL) is
+        not downloaded again; with ``revalidate`` a HEAD request must first
+        confirm the stored ETag or size. Bodies are fetched with
+        ``common.downloader.download``, so an interrupted transfer resumes from
+        its part file. ``filename(result)`` names the file from the final
+        response (``.url`` / ``.headers``), otherwise the URL's basename is
+        used. Raises on HTTP errors.
+        """
+        key = source_key or url
+        with self._key_lock(key):
+            known = self.lookup(key)
+            if known:
+                sha, size, etag, name = known
+                if not revalidate or self._unchanged(session, url, size, etag, **kwargs):
+                    return StoredFile(sha, size or os.path.getsize(self.blob_path(sha)), name or url_filename(url), True)
+
+            # A stable temp name per source lets a later run resume the same part file.
+            tmp = os.path.join(self.root, "tmp", hashlib.sha1(key.encode("utf-8")).hexdigest())
+            result = download(session, url, tmp, **kwargs)
+            name = filename(result) if filename else url_filename(url)
+            self.adopt(result.path, result.sha256, result.size)
+            self.remember(key, result.sha256, result.size, result.headers.get("ETag"), name)
+        return StoredFile(result.sha256, result.size, name, False)
+
+    # --- Notices ---
+    def link(self, notice: str, filename: str, sha256: str) -> str:
+        """Attach a blob to a notice; a different file under the same name gets a ' (n)' suffix."""
+        base, ext = os.path.splitext(filename)
+        name, k = filename, 1
+        with self._lock, self._db:
+            while True:
+                row = self._db.execute(
+                    "SELECT sha256 FROM notices WHERE notice = ? AND filename = ?", (notice, name)
+                ).fetchone()
+                if row is None:
+                    self._db.execute(
+                        "INSERT INTO notices (notice, filename, sha256) VALUES (?, ?, ?)", (notice, name, sha256)
+                    )
+                    return name
+                if row[0] == sha256:
+                    return name
+                name = f"{base} ({k}){ext}"
+                k += 1
+
+    def unlink_notice(self, notice: str) -> None:
+        """Forget a notice's attachment list (the blobs stay)."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM notices WHERE notice = ?", (notice,))
+
+    def files(self, notice: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT filename, sha256 FROM notices WHERE notice = ? ORDER BY filename", (notice,)
+            ).fetchall()
+
+    def notices(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT DISTINCT notice FROM notices ORDER BY notice")]
+
+    # --- Export ---
+    def export_zip(self, notice: str, zip_path: str) -> Optional[str]:
+        """
+        Build ``zip_path`` from the notice's blobs. Nothing is written if the
+        ZIP already exists and was built from the same attachment list.
+        """
+        entries = self.files(notice)
+        if not entries:
+            return None
+        manifest = "|".join(f"{name}:{sha}" for name, sha in entries)
+        with self._lock:
+            row = self._db.execute("SELECT manifest FROM exports WHERE path = ?", (zip_path,)).fetchone()
+        if row and row[0] == manifest and os.path.exists(zip_path):
+            return zip_path
+
+        zip_dir = os.path.dirname(os.path.abspath(zip_path))
+        os.makedirs(zip_dir, exist_ok=True)
+        # A private temp name: two exports of the same path never write one file.
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(zip_path) + ".", suffix=".tmp", dir=zip_dir)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+                for name, sha in entries:
+                    zf.write(self.blob_path(sha), arcname=name)
+            os.replace(tmp, zip_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO exports (path, manifest) VALUES (?, ?)", (zip_path, manifest))
+        return zip_path
+
+    def export_file(self, sha256: str, dest: str) -> str:
+        """Materialize one blob at ``dest``, as a hard link when the filesystem allows it."""
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+        if os.path.exists(dest):
+            os.remove(dest)
+        try:
+            os.link(self.blob_path(sha256), dest)
+        except OSError:
+            shutil.copyfile(self.blob_path(sha256), dest)
+        return dest
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            blobs, stored = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs, referenced = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM notices n JOIN blobs b ON b.sha256 = n.sha256"
+            ).fetchone()
+            notices = self._db.execute("SELECT COUNT(DISTINCT notice) FROM notices").fetchone()[0]
+        return {
+            "notices": notices,
+            "attachments": refs,
+            "blobs": blobs,
+            "stored_bytes": stored,
+            "referenced_bytes": referenced,
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or export a content-addressed attachment store")
+    ap.add_argument("--root", default=DEFAULT_ROOT, help="Store directory")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Print deduplication statistics")
+    exp = sub.add_parser("export", help="Build per-notice ZIPs")
+    exp.add_argument("--out-dir", required=True, help="Folder for <notice>.zip files")
+    exp.add_argument("--notice", action="append", help="Notice to export (repeatable; default: all)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    with AttachmentStore(args.root) as store:
+        if args.command == "stats":
+            s = store.stats()
+            saved = s["referenced_bytes"] - s["stored_bytes"]
+            logging.info(
+                f"{s['notices']} notices, {s['attachments']} attachments, {s['blobs']} unique blobs; "
+                f"{s['stored_bytes']:,} bytes stored, {saved:,} bytes saved by deduplication"
+            )
+            return
+        count = 0
+        for notice in args.notice or store.notices():
+            if store.export_zip(notice, os.path.join(args.out_dir, f"{notice}.zip")):
+                count += 1
+        logging.info(f"Exported {count} ZIP(s) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Keep scraper browsers from loading what scraping never looks at: images,
+web fonts, stylesheets, audio/video and third-party analytics.
+
+How each kind is blocked, so it holds for every tab a scraper opens:
+
+    image       Chrome content setting / Firefox ``permissions.default.image``
+                (page images only: a download of a .png attachment still works)
+    tracker     Chrome ``--host-resolver-rules`` (the host never resolves) /
+                Firefox tracking protection
+    font        CDP ``Network.setBlockedURLs`` / Firefox
+                ``gfx.downloadable_fonts.enabled``
+    stylesheet  CDP ``Network.setBlockedURLs`` (Chrome only)
+    media       CDP ``Network.setBlockedURLs`` / Firefox autoplay blocked
+
+The CDP list is per tab: ``enable_blocking`` applies it to the current tab and
+again whenever the driver switches to a tab it has not seen. (The first load of
+a ``window.open`` tab happens before the switch, so it is not covered.)
+
+Pages that need their CSS (visibility checks, overlays hidden by a class,
+clicks on styled buttons) keep it with an allowlist; an allowlist entry is a
+kind above or a tracker host the site needs:
+
+    profile = BlockProfile(allow=("stylesheet",))      # or KEEP_CSS
+    block_assets(opts, profile)                        # before launching
+    driver = webdriver.Chrome(options=opts)
+    enable_blocking(driver, profile)                   # after (Chrome)
+
+``SCRAPER_BLOCK=0`` turns all of it off (to look at a page as a user would);
+``SCRAPER_BLOCK_ALLOW=stylesheet,font`` adds allowlist entries to every profile.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+KINDS: Tuple[str, ...] = ("image", "font", "stylesheet", "media", "tracker")
+
+# URL patterns (CDP wildcards) per kind; a query string must not hide the extension.
+URL_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "font": ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"),
+    "stylesheet": ("*.css",),
+    "media": ("*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg", "*.wav"),
+}
+
+TRACKER_HOSTS: Tuple[str, ...] = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "googlesyndication.com", "connect.facebook.net", "hotjar.com", "clarity.ms", "nr-data.net",
+    "js-agent.newrelic.com", "siteimproveanalytics.com", "siteimproveanalytics.io", "quantserve.com",
+    "scorecardresearch.com", "assets.adobedtm.com", "demdex.net", "omtrdc.net", "segment.io",
+    "cdn.segment.com", "mouseflow.com", "fullstory.com", "crazyegg.com", "addthis.com", "sharethis.com",
+)
+
+
+@dataclass(frozen=True)
+class BlockProfile:
+    block: Tuple[str, ...] = KINDS
+    allow: Tuple[str, ...] = ()        # kinds or tracker hosts to keep
+    extra: Tuple[str, ...] = ()        # more CDP URL patterns to block (Chrome)
+
+    def _allowed(self) -> Tuple[str, ...]:
+        env = os.environ.get("SCRAPER_BLOCK_ALLOW", "")
+        return self.allow + tuple(a.strip() for a in env.split(",") if a.strip())
+
+    def blocks(self, kind: str) -> bool:
+        return kind in self.block and kind not in self._allowed()
+
+    @property
+    def url_patterns(self) -> List[str]:
+        patterns = [p for kind, pats in URL_PATTERNS.items() if self.blocks(kind) for p in pats]
+        patterns += [f"{p}?*" for p in patterns]
+        return patterns + list(self.extra)
+
+    @property
+    def tracker_hosts(self) -> List[str]:
+        if not self.blocks("tracker"):
+            return []
+        allowed = self._allowed()
+        return [h for h in TRACKER_HOSTS if not any(h == a or h.endswith("." + a) for a in allowed)]
+
+
+BLOCK_ASSETS = BlockProfile()
+KEEP_CSS = BlockProfile(allow=("stylesheet",))
+
+
+def enabled() -> bool:
+    return os.environ.get("SCRAPER_BLOCK", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# --- Before launch ---
+def block_assets(options: Any, profile: BlockProfile = BLOCK_ASSETS) -> None:
+    """Browser-wide blocking on Chrome or Firefox ``options``; call after the script's own prefs."""
+    if not enabled():
+        return
+    if hasattr(options, "set_preference"):
+        for name, value in firefox_prefs(profile).items():
+            options.set_preference(name, value)
+        return
+    prefs = dict(options.experimental_options.get("prefs") or {})
+    if profile.blocks("image"):
+        prefs["profile.managed_default_content_settings.images"] = 2
+    options.add_experimental_option("prefs", prefs)
+    hosts = profile.tracker_hosts
+    if hosts:
+        rules = ", ".join(f"MAP {h} ~NOTFOUND, MAP *.{h} ~NOTFOUND" for h in hosts)
+        options.add_argument(f"--host-resolver-rules={rules}")
+
+
+def firefox_prefs(profile: BlockProfile = BLOCK_ASSETS) -> Dict[str, Any]:
+    prefs: Dict[str, Any] = {}
+    if profile.blocks("image"):
+        prefs["permissions.default.image"] = 2
+    if profile.blocks("font"):
+        prefs["gfx.downloadable_fonts.enabled"] = False
+    if profile.blocks("media"):
+        prefs["media.autoplay.default"] = 5
+    if profile.blocks("tracker"):
+        prefs["privacy.trackingprotection.enabled"] = True
+    return prefs
+
+
+# --- After launch (Chrome) ---
+def _apply(driver, patterns: List[str]) -> bool:
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return True
+    except Exception as e:
+        logging.debug(f"Network.setBlockedURLs failed: {e}")
+        return False
+
+
+def enable_blocking(driver, profile: BlockProfile = BLOCK_ASSETS) -> bool:
+    """
+    Block ``profile``'s URL patterns in the current tab and every tab the
+    driver switches to later. False when the driver has no CDP (Firefox).
+    """
+    patterns = profile.url_patterns
+    if not enabled() or not patterns or not hasattr(driver, "execute_cdp_cmd"):
+        return False
+    if not _apply(driver, patterns):
+        return False
+    if getattr(driver, "_blocking_patterns", None) is not None:
+        driver._blocking_patterns = patterns
+        return True
+
+    seen = set()
+    try:
+        seen.add(driver.current_window_handle)
+    except Exception:
+        pass
+    original = driver.execute
+    driver._blocking_patterns = patterns
+
+    def execute(driver_command, params=None):
+        result = original(driver_command, params)
+        if driver_command == "switchToWindow":
+            handle = (params or {}).get("handle")
+            if handle not in seen:
+                seen.add(handle)
+                _apply(driver, driver._blocking_patterns)
+        return result
+
+    driver.execute = execute
+    return True
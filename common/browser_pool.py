@@ -0,0 +1,457 @@
+"""
+Warm, reusable browser pool for the Selenium scrapers.
+
+Starting a browser costs 3-8 s, and most scripts paid it once per worker or,
+worse, once per retry. ``BrowserPool`` launches ``size`` browsers up front (in
+parallel) and lends them out one task at a time. Between tasks a browser is
+reset instead of restarted: extra windows are closed, cookies and the storage
+of every visited origin are cleared and its download folder is emptied, so a
+task never sees the previous task's session. Each browser has its own
+temporary profile and download folder.
+
+A browser is retired after ``max_pages`` page loads (``driver.get`` calls), or
+when a task calls ``discard()``, or when it no longer responds. Its
+replacement is launched in the background, so the next task picks up an
+already warm browser instead of waiting for a cold start.
+
+The webdriver binary is resolved once and cached on disk (``driver_path``),
+instead of ``ChromeDriverManager().install()`` in every process.
+
+Usage:
+    with BrowserPool(size=3, max_pages=150) as pool:
+        with pool.browser() as b:
+            b.driver.get(url)
+            mark = b.tracker.mark()
+            ...
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.firefox.service import Service as FirefoxService
+
+from common.blocking import BlockProfile, block_assets, enable_blocking
+from common.download_tracker import DownloadTracker, enable_download_events
+from common.waits import install_network_hooks
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+    from webdriver_manager.firefox import GeckoDriverManager
+    HAVE_WDM = True
+except ImportError:
+    HAVE_WDM = False
+
+DEFAULT_SIZE = 2
+DEFAULT_MAX_PAGES = 200
+LAUNCH_RETRIES = 2
+DRIVER_CACHE_FILE = os.path.join(tempfile.gettempdir(), "us_state_scrapers_drivers.json")
+DRIVER_CACHE_TTL = 24 * 3600    # re-check for a newer driver once a day
+
+CHROME_ARGS = (
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+)
+
+# --- Driver binary cache ---
+_driver_paths: Dict[str, Optional[str]] = {}
+_driver_paths_lock = threading.Lock()
+
+
+def _read_driver_cache() -> Dict[str, Any]:
+    try:
+        with open(DRIVER_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_driver_cache(cache: Dict[str, Any]) -> None:
+    tmp = f"{DRIVER_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, DRIVER_CACHE_FILE)
+    except OSError as e:
+        logging.debug(f"Could not write driver cache: {e}")
+
+
+def driver_path(browser: str = "chrome") -> Optional[str]:
+    """
+    Path of the chromedriver/geckodriver binary, resolved through
+    webdriver_manager at most once a day and shared by every process through
+    a small cache file. None when webdriver_manager is not installed, in which
+    case Selenium Manager locates the driver.
+    """
+    with _driver_paths_lock:
+        if browser in _driver_paths:
+            return _driver_paths[browser]
+
+        cache = _read_driver_cache()
+        entry = cache.get(browser) or {}
+        path = entry.get("path")
+        fresh = time.time() - entry.get("resolved", 0) < DRIVER_CACHE_TTL
+        if not (path and fresh and os.path.exists(path)):
+            path = None
+            if HAVE_WDM:
+                manager = ChromeDriverManager if browser == "chrome" else GeckoDriverManager
+                path = manager().install()
+                cache[browser] = {"path": path, "resolved": time.time()}
+                _write_driver_cache(cache)
+        _driver_paths[browser] = path
+        return path
+
+
+def chrome_service() -> ChromeService:
+    """Chrome service using the cached chromedriver path."""
+    path = driver_path("chrome")
+    return ChromeService(path) if path else ChromeService()
+
+
+def firefox_service() -> FirefoxService:
+    """Firefox service using the cached geckodriver path."""
+    path = driver_path("firefox")
+    return FirefoxService(path) if path else FirefoxService()
+
+
+# --- Launchers ---
+def launch_chrome(
+    profile_dir: str,
+    download_dir: str,
+    headless: bool = True,
+    options_hook: Optional[Callable[[Any], None]] = None,
+    block: Optional[BlockProfile] = None,
+):
+    """
+    Chrome with its own profile and download folder, download events enabled;
+    with ``block``, assets are not loaded (``common.blocking``).
+    """
+    opts = webdriver.ChromeOptions()
+    if headless:
+        opts.add_argument("--headless=new")
+    for arg in CHROME_ARGS:
+        opts.add_argument(arg)
+    opts.add_argument(f"--user-data-dir={profile_dir}")
+    opts.add_experimental_option("prefs", {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "plugins.always_open_pdf_externally": True,
+        "profile.default_content_setting_values.automatic_downloads": 1,
+    })
+    enable_download_events(opts)
+    if options_hook:
+        options_hook(opts)
+    if block:
+        block_assets(opts, block)
+    driver = webdriver.Chrome(service=chrome_service(), options=opts)
+    install_network_hooks(driver)
+    if block:
+        enable_blocking(driver, block)
+    return driver
+
+
+def launch_firefox(
+    profile_dir: str,
+    download_dir: str,
+    headless: bool = True,
+    options_hook: Optional[Callable[[Any], None]] = None,
+    block: Optional[BlockProfile] = None,
+):
+    """Firefox with its own profile and download folder (``block``: see ``launch_chrome``)."""
+    opts = webdriver.FirefoxOptions()
+    if headless:
+        opts.add_argument("-headless")
+    opts.add_argument("-profile")
+    opts.add_argument(profile_dir)
+    opts.set_preference("browser.download.folderList", 2)
+    opts.set_preference("browser.download.dir", download_dir)
+    opts.set_preference("browser.download.useDownloadDir", True)
+    opts.set_preference("browser.helperApps.neverAsk.saveToDisk", "application/pdf,application/octet-stream,application/zip")
+    opts.set_preference("pdfjs.disabled", True)
+    if options_hook:
+        options_hook(opts)
+    if block:
+        block_assets(opts, block)
+    return webdriver.Firefox(service=firefox_service(), options=opts)
+
+
+LAUNCHERS = {"chrome": launch_chrome, "firefox": launch_firefox}
+
+
+def _origin(url: str) -> Optional[str]:
+    parts = urlparse(url or "")
+    if parts.scheme in ("http", "https") and parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}"
+    return None
+
+
+@dataclass
+class PooledBrowser:
+    """A leased browser. ``driver.get`` calls are counted towards recycling."""
+    driver: Any
+    profile_dir: str
+    download_dir: str
+    pages: int = 0
+    tasks: int = 0
+    broken: bool = False
+    leased: bool = False
+    origins: Set[str] = field(default_factory=set)
+    _tracker: Optional[DownloadTracker] = None
+    _raw_get: Optional[Callable[[str], None]] = None
+
+    @property
+    def tracker(self) -> DownloadTracker:
+        """Download tracker for this browser's download folder (created on first use)."""
+        if self._tracker is None:
+            self._tracker = DownloadTracker(self.driver, self.download_dir)
+        return self._tracker
+
+    def discard(self) -> None:
+        """Retire this browser on release instead of reusing it (e.g. after a WAF block)."""
+        self.broken = True
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of warm browsers, safe to share between threads.
+
+    ``launcher(profile_dir, download_dir)`` creates a driver; by default
+    Chrome (or Firefox with ``browser="firefox"``) with ``headless``, an
+    optional ``options_hook(options)`` for script-specific arguments and an
+    optional ``block`` profile (``common.blocking``) to skip images, fonts,
+    stylesheets and trackers.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_SIZE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        browser: str = "chrome",
+        headless: bool = True,
+        options_hook: Optional[Callable[[Any], None]] = None,
+        block: Optional[BlockProfile] = None,
+        launcher: Optional[Callable[[str, str], Any]] = None,
+        root: Optional[str] = None,
+    ):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.launcher = launcher or partial(
+            LAUNCHERS[browser], headless=headless, options_hook=options_hook, block=block
+        )
+        self._own_root = root is None
+        self.root = os.path.abspath(root or tempfile.mkdtemp(prefix="browser_pool_"))
+        os.makedirs(self.root, exist_ok=True)
+        self.launched = 0
+        self.retired = 0
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._workers = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="browser-pool")
+
+        if browser == "chrome" and launcher is None:
+            driver_path("chrome")       # resolve once before the parallel launches
+        for _ in range(self.size):
+            self._spawn()
+
+    # --- Lifecycle of pooled browsers ---
+    def _submit(self, fn: Callable, *args) -> None:
+        try:
+            self._workers.submit(fn, *args)
+        except RuntimeError:    # pool is shutting down
+            if fn is not self._launch:
+                fn(*args)
+
+    def _spawn(self) -> None:
+        self._submit(self._launch)
+
+    def _launch(self) -> None:
+        last_error: Optional[Exception] = None
+        for attempt in range(1, LAUNCH_RETRIES + 2):
+            if self._closed:
+                return
+            profile_dir = tempfile.mkdtemp(prefix="profile_", dir=self.root)
+            download_dir = tempfile.mkdtemp(prefix="downloads_", dir=self.root)
+            try:
+                started = time.monotonic()
+                driver = self.launcher(profile_dir, download_dir)
+            except Exception as e:
+                last_error = e
+                logging.warning(f"Browser launch failed (attempt {attempt}): {e}")
+                shutil.rmtree(profile_dir, ignore_errors=True)
+                shutil.rmtree(download_dir, ignore_errors=True)
+                continue
+
+            b = PooledBrowser(driver, profile_dir, download_dir)
+            self._count_pages(b)
+            with self._lock:
+                self.launched += 1
+                closed = self._closed
+            logging.info(f"Browser ready in {time.monotonic() - started:.1f}s")
+            if closed:
+                self._quit(b)
+            else:
+                self._idle.put(b)
+            return
+        # Surface the failure to the next acquire() rather than leaving it blocked.
+        self._idle.put(last_error)
+
+    @staticmethod
+    def _count_pages(b: PooledBrowser) -> None:
+        raw_get = b.driver.get
+
+        def counting_get(url: str):
+            b.pages += 1
+            origin = _origin(url)
+            if origin:
+                b.origins.add(origin)
+            return raw_get(url)
+
+        b._raw_get = raw_get
+        b.driver.get = counting_get
+
+    @staticmethod
+    def _quit(b: PooledBrowser) -> None:
+        try:
+            b.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(b.profile_dir, ignore_errors=True)
+        shutil.rmtree(b.download_dir, ignore_errors=True)
+
+    def _retire(self, b: PooledBrowser) -> None:
+        with self._lock:
+            self.retired += 1
+            closed = self._closed
+        self._submit(self._quit, b)
+        if not closed:
+            self._spawn()
+
+    @staticmethod
+    def _responsive(b: PooledBrowser) -> bool:
+        try:
+            b.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, b: PooledBrowser) -> bool:
+        """Clear the previous task's session; False if the browser is unusable."""
+        d = b.driver
+        try:
+            handles = d.window_handles
+            for handle in handles[1:]:
+                d.switch_to.window(handle)
+                d.close()
+            d.switch_to.window(handles[0])
+            origin = _origin(d.current_url)
+            if origin:
+                b.origins.add(origin)
+
+            if hasattr(d, "execute_cdp_cmd"):
+                d.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                for origin in b.origins:
+                    d.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+                b._raw_get("about:blank")
+            else:
+                # No DevTools (Firefox): cookies and storage are cleared per origin.
+                for origin in b.origins:
+                    b._raw_get(origin)
+                    d.delete_all_cookies()
+                    d.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+                b._raw_get("about:blank")
+            b.origins.clear()
+        except Exception as e:
+            logging.info(f"Browser reset failed, retiring it: {e}")
+            return False
+
+        for entry in os.scandir(b.download_dir):
+            try:
+                if entry.is_dir():
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+        return True
+
+    # --- Public API ---
+    def acquire(self, timeout: Optional[float] = None) -> PooledBrowser:
+        """
+        Next idle browser; blocks until one is ready. Raises ``TimeoutError``
+        after ``timeout`` seconds and re-raises a launch failure.
+        """
+        if self._closed:
+            raise RuntimeError("BrowserPool is closed")
+        while True:
+            try:
+                item = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No browser available within {timeout}s") from None
+            if isinstance(item, Exception):
+                self._spawn()
+                raise item
+            if self._responsive(item):
+                item.tasks += 1
+                item.leased = True
+                return item
+            logging.info("Idle browser stopped responding; replacing it.")
+            self._retire(item)
+
+    def release(self, b: PooledBrowser) -> None:
+        """Return a browser: reset for the next task, or retired and replaced."""
+        if not b.leased:
+            return      # already released
+        b.leased = False
+        if self._closed:
+            self._quit(b)
+        elif b.broken or b.pages >= self.max_pages or not self._reset(b):
+            self._retire(b)
+        else:
+            self._idle.put(b)
+
+    @contextmanager
+    def browser(self, timeout: Optional[float] = None) -> Iterator[PooledBrowser]:
+        """``with pool.browser() as b:`` -- acquire and always release."""
+        b = self.acquire(timeout)
+        try:
+            yield b
+        finally:
+            self.release(b)
+
+    def close(self) -> None:
+        """Quit idle browsers and wait for pending launches; leased ones quit on release."""
+        with self._lock:
+            self._closed = True
+        self._workers.shutdown(wait=True)
+        while True:
+            try:
+                item = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, PooledBrowser):
+                self._quit(item)
+        if self._own_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+        logging.info(f"Browser pool closed: {self.launched} launched, {self.retired} recycled.")
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,681 @@
+"""
+Periscope BSO engine (``bso/view/search/external/advancedSearchBid.xhtml``).
+
+Nevada ePro, OregonBuys, Illinois BidBuy, NJSTART, ARBuy and COMMBUYS all run
+the same Periscope S2G application. Instead of clicking through the PrimeFaces
+grid with Selenium, this engine speaks the JSF partial-postback protocol
+directly over a pooled requests session:
+
+1. GET the advanced search page and read the ``javax.faces.ViewState``.
+2. POST the search form as an ajax partial request (``Faces-Request: partial/ajax``).
+3. Page the results datatable with ``<table>_pagination/_first/_rows`` postbacks,
+   carrying the ViewState returned by every partial response.
+4. Fetch bid detail (and PO/blanket) pages concurrently with plain GETs.
+
+A browser is only started when a page cannot be served over HTTP (no ViewState
+in the response, e.g. behind a JS challenge) or when an attachment link is a
+``javascript:`` handler that has to be clicked.
+
+The Nevada and New Jersey scrapers (``Scrapper Codes/Nevada/nevada.py``,
+``Scrapper Codes/Newjersy/Newjersy_New.py``) run their tenant through
+``tenant_main``; ``--selenium`` still runs their browser code. The other
+tenants' Selenium scripts stay as they are until validated against the engine.
+
+Usage (from the repository root):
+    python -m common.bso --tenant nevada --tenant oregon --workers 2
+    python -m common.bso --all --no-details
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from common.blocking import KEEP_CSS, block_assets, enable_blocking
+from common.download_tracker import DownloadTracker, enable_download_events
+from common.http import create_session
+from common.store import DEFAULT_PATH as DEFAULT_DB, ResultsStore
+
+SEARCH_PATH = "/bso/view/search/external/advancedSearchBid.xhtml"
+REQUEST_TIMEOUT = 60
+VIEW_STATE = "javax.faces.ViewState"
+MAX_PAGES = 2000                 # safety cap on grid pages per search
+
+DEFAULT_HEADERS: Tuple[str, ...] = (
+    "Bid Solicitation #", "Organization Name", "Contract #", "Buyer", "Description",
+    "Bid Opening Date", "Bid Holder List", "Awarded Vendor(s)", "Status", "Alternate Id",
+)
+
+# results-store column -> record field
+STORE_FIELDS: Dict[str, str] = {
+    "title": "Description", "agency": "Organization Name", "status": "Status",
+    "close_date": "Bid Opening Date", "url": "Row URL",
+}
+
+
+# --- Tenant configuration ---
+@dataclass(frozen=True)
+class BSOTenant:
+    name: str
+    base_url: str
+    status: str                      # option value ("2BPO") or visible text ("Closed")
+    output_prefix: str
+    open_bids: bool = False          # append ?openBids=true to the search URL
+    headers: Tuple[str, ...] = DEFAULT_HEADERS
+    follow_po_links: bool = False    # also scrape the Blanket/PO summary linked from a row
+    detail_workers: int = 4
+
+    @property
+    def search_url(self) -> str:
+        url = self.base_url.rstrip("/") + SEARCH_PATH
+        return url + "?openBids=true" if self.open_bids else url
+
+
+TENANTS: Dict[str, BSOTenant] = {
+    "nevada": BSOTenant("Nevada", "https://nevadaepro.com", "Closed", "nevada_closed"),
+    "oregon": BSOTenant("Oregon", "https://oregonbuys.gov", "2BPO", "or_buys_results", open_bids=True),
+    "illinois": BSOTenant(
+        "Illinois", "https://www.bidbuy.illinois.gov", "2BPO", "illinois_bid_details",
+        open_bids=True, follow_po_links=True,
+    ),
+    "newjersey": BSOTenant(
+        "New Jersey", "https://www.njstart.gov", "2BPO", "njstart_bid_details", follow_po_links=True,
+    ),
+    "arkansas": BSOTenant("Arkansas", "https://arbuy.arkansas.gov", "2BPO", "ar_bidbuy_results", open_bids=True),
+    "massachusetts": BSOTenant("Massachusetts", "https://www.commbuys.com", "Closed", "commbuys_closed"),
+}
+
+
+# --- small helpers ---
+def normalize(s: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip())
+
+
+def _squash(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", s.lower())
+
+
+def timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d_%H%M")
+
+
+def header_index_map(labels: List[str], wanted: Tuple[str, ...]) -> Dict[str, Optional[int]]:
+    """Exact, then punctuation-insensitive, then substring match of grid headers."""
+    mp: Dict[str, Optional[int]] = {}
+    for want in wanted:
+        idx = next((i for i, l in enumerate(labels) if l.lower() == want.lower()), None)
+        if idx is None:
+            idx = next((i for i, l in enumerate(labels) if _squash(l) == _squash(want)), None)
+        if idx is None:
+            idx = next((i for i, l in enumerate(labels) if want.lower() in l.lower()), None)
+        mp[want] = idx
+    return mp
+
+
+def cell_text(td) -> str:
+    """Cell text without the responsive ``ui-column-title`` label PrimeFaces prepends."""
+    title = td.select_one("span.ui-column-title")
+    text = normalize(td.get_text(" "))
+    if title is not None:
+        label = normalize(title.get_text(" "))
+        if label and text.startswith(label):
+            text = text[len(label):].strip(" : ")
+    return text
+
+
+# --- JSF protocol ---
+def form_fields(form) -> Dict[str, str]:
+    """Successful controls of an HTML form, as the browser would submit them."""
+    data: Dict[str, str] = {}
+    for inp in form.find_all("input"):
+        name = inp.get("name")
+        itype = (inp.get("type") or "text").lower()
+        if not name or itype in ("submit", "button", "image", "reset", "file"):
+            continue
+        if itype in ("checkbox", "radio") and not inp.has_attr("checked"):
+            continue
+        data[name] = inp.get("value", "on" if itype in ("checkbox", "radio") else "")
+    for sel in form.find_all("select"):
+        name = sel.get("name")
+        if not name:
+            continue
+        opt = sel.find("option", selected=True) or sel.find("option")
+        data[name] = opt.get("value", opt.get_text(strip=True)) if opt else ""
+    for ta in form.find_all("textarea"):
+        if ta.get("name"):
+            data[ta["name"]] = ta.get_text()
+    return data
+
+
+def parse_partial_response(text: str) -> Tuple[Dict[str, str], Optional[str]]:
+    """
+    Parse a JSF ``<partial-response>`` into ({update id: html}, redirect url).
+    """
+    updates: Dict[str, str] = {}
+    root = ET.fromstring(text.encode("utf-8") if isinstance(text, str) else text)
+    redirect = root.find("redirect")
+    if redirect is not None:
+        return updates, redirect.get("url")
+    for upd in root.iter("update"):
+        updates[upd.get("id", "")] = upd.text or ""
+    err = root.find(".//error")
+    if err is not None:
+        msg = err.findtext("error-message") or err.findtext("error-name") or "unknown error"
+        raise RuntimeError(f"JSF partial response error: {msg}")
+    return updates, None
+
+
+def is_partial_response(resp: requests.Response) -> bool:
+    ctype = resp.headers.get("Content-Type", "")
+    return "xml" in ctype and "<partial-response" in resp.text[:500]
+
+
+# --- browser fallback ---
+class BrowserFallback:
+    """
+    Lazily started headless Chrome used only for pages the HTTP path cannot
+    handle. Cookies obtained by the browser are copied back into the session
+    so that subsequent requests stay on HTTP. WebDriver is not thread-safe:
+    the detail workers share this one browser, so every use of it holds
+    ``_lock``.
+    """
+
+    def __init__(self, download_dir: str, headless: bool = True):
+        self.download_dir = os.path.abspath(download_dir)
+        self.headless = headless
+        self._driver = None
+        self._tracker: Optional[DownloadTracker] = None
+        self._lock = threading.RLock()
+
+    @property
+    def driver(self):
+        with self._lock:
+            return self._start()
+
+    def _start(self):
+        if self._driver is None:
+            from selenium import webdriver
+
+            os.makedirs(self.download_dir, exist_ok=True)
+            opts = webdriver.ChromeOptions()
+            if self.headless:
+                opts.add_argument("--headless=new")
+            opts.add_argument("--disable-gpu"); opts.add_argument("--no-sandbox"); opts.add_argument("--disable-dev-shm-usage")
+            opts.add_experimental_option("prefs", {
+                "download.default_directory": self.download_dir,
+                "download.prompt_for_download": False,
+                "download.directory_upgrade": True,
+                "plugins.always_open_pdf_externally": True,
+            })
+            enable_download_events(opts)
+            block_assets(opts, KEEP_CSS)
+            self._driver = webdriver.Chrome(options=opts)
+            enable_blocking(self._driver, KEEP_CSS)
+            self._tracker = DownloadTracker(self._driver, self.download_dir)
+        return self._driver
+
+    def load(self, url: str, session: requests.Session, timeout: int = 30) -> str:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self._lock:
+            drv = self._start()
+            drv.get(url)
+            WebDriverWait(drv, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, f"input[name='{VIEW_STATE}']"))
+            )
+            for c in drv.get_cookies():
+                session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+            session.headers["User-Agent"] = drv.execute_script("return navigator.userAgent;")
+            return drv.page_source
+
+    def click_downloads(self, url: str, link_texts: List[str], dest_dir: str, timeout: int = 120) -> List[str]:
+        """Open a detail page and click ``javascript:`` attachment links; return saved file names."""
+        from selenium.webdriver.common.by import By
+
+        with self._lock:
+            drv = self._start()
+            drv.get(url)
+            mark = self._tracker.mark()
+            clicked = 0
+            for text in link_texts:
+                for a in drv.find_elements(By.LINK_TEXT, text)[:1]:
+                    drv.execute_script("arguments[0].click();", a)
+                    clicked += 1
+            paths = self._tracker.wait_for(clicked, since=mark, timeout=timeout) if clicked else []
+        os.makedirs(dest_dir, exist_ok=True)
+        new_files = []
+        for path in paths:
+            name = os.path.basename(path)
+            os.replace(path, os.path.join(dest_dir, name))
+            new_files.append(name)
+        return sorted(new_files)
+
+    def quit(self):
+        with self._lock:
+            if self._driver is not None:
+                try:
+                    self._driver.quit()
+                except Exception:
+                    pass
+                self._driver = None
+
+
+# --- client ---
+class BSOClient:
+    def __init__(
+        self,
+        tenant: BSOTenant,
+        session: Optional[requests.Session] = None,
+        browser: Optional[BrowserFallback] = None,
+    ):
+        self.tenant = tenant
+        self.session = session or create_session(pool_size=max(tenant.detail_workers, 4))
+        self.browser = browser
+        self.view_state: Optional[str] = None
+
+    # --- transport ---
+    def _get_page(self, url: str) -> BeautifulSoup:
+        resp = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        soup = BeautifulSoup(resp.text, "html.parser")
+        if soup.find("input", attrs={"name": VIEW_STATE}) is None:
+            if self.browser is None:
+                raise RuntimeError(f"{self.tenant.name}: no {VIEW_STATE} on {url} and browser fallback is disabled")
+            logging.info(f"[{self.tenant.name}] HTTP page has no ViewState; falling back to browser for {url}")
+            soup = BeautifulSoup(self.browser.load(url, self.session), "html.parser")
+        self.view_state = soup.find("input", attrs={"name": VIEW_STATE}).get("value")
+        return soup
+
+    def _postback(self, action: str, data: Dict[str, str]) -> Dict[str, str]:
+        """Send a partial postback and return its updates, tracking the ViewState."""
+        data = dict(data)
+        data[VIEW_STATE] = self.view_state or ""
+        data["javax.faces.partial.ajax"] = "true"
+        resp = self.session.post(
+            action,
+            data=data,
+            headers={
+                "Faces-Request": "partial/ajax",
+                "X-Requested-With": "XMLHttpRequest",
+                "Referer": self.tenant.search_url,
+            },
+            timeout=REQUEST_TIMEOUT,
+        )
+        resp.raise_for_status()
+        if not is_partial_response(resp):
+            # Non-ajax command buttons answer with a full page.
+            soup = BeautifulSoup(resp.text, "html.parser")
+            vs = soup.find("input", attrs={"name": VIEW_STATE})
+            if vs is not None:
+                self.view_state = vs.get("value")
+            return {"javax.faces.ViewRoot": resp.text}
+        updates, redirect = parse_partial_response(resp.text)
+        if redirect:
+            soup = self._get_page(urljoin(action, redirect))
+            return {"javax.faces.ViewRoot": str(soup)}
+        for uid, html in updates.items():
+            if VIEW_STATE in uid:
+                self.view_state = html.strip()
+        return updates
+
+    # --- search ---
+    def _search_form(self, soup: BeautifulSoup):
+        sel = soup.select_one("select[name$=':status']")
+        if sel is None:
+            raise RuntimeError(f"{self.tenant.name}: status dropdown not found")
+        form = sel.find_parent("form")
+        want = self.tenant.status.lower()
+        value = None
+        for opt in sel.find_all("option"):
+            if (opt.get("value") or "").lower() == want or normalize(opt.get_text()).lower() == want:
+                value = opt.get("value", normalize(opt.get_text()))
+                break
+        if value is None:
+            raise RuntimeError(f"{self.tenant.name}: status option {self.tenant.status!r} not found")
+        button = None
+        for cand in form.find_all(["button", "input"]):
+            if cand.name == "input" and (cand.get("type") or "").lower() not in ("submit", "button"):
+                continue
+            cid = cand.get("id") or cand.get("name") or ""
+            label = normalize(cand.get_text() or cand.get("value"))
+            if cid and (cid.lower().endswith(("search", "searchbtn", "searchbutton", "btnbidsearch")) or label == "Search"):
+                button = cid
+                break
+        if button is None:
+            raise RuntimeError(f"{self.tenant.name}: search button not found")
+        return form, sel["name"], value, button
+
+    def _results_table(self, soup: BeautifulSoup):
+        for tbl in soup.find_all("table"):
+            thead = tbl.find("thead")
+            if thead is None:
+                continue
+            labels = [cell_text(th) for th in thead.find_all("th")]
+            if any("bid solicitation" in l.lower() for l in labels):
+                return tbl, labels
+        return None, []
+
+    def _rows(self, container, idx: Dict[str, Optional[int]], base: str) -> List[dict]:
+        records = []
+        for tr in container.find_all("tr", recursive=False) or container.find_all("tr"):
+            tds = tr.find_all(["td", "th"], recursive=False)
+            if not tds or "ui-datatable-empty-message" in (tr.get("class") or []):
+                continue
+            rec = {}
+            for col, j in idx.items():
+                rec[col] = cell_text(tds[j]) if j is not None and j < len(tds) else ""
+            j = idx.get("Bid Solicitation #")
+            link = tds[j].find("a", href=True) if j is not None and j < len(tds) else None
+            rec["Row URL"] = urljoin(base, link["href"]) if link and not link["href"].startswith("javascript") else ""
+            po = next(
+                (a for a in tr.find_all("a", href=True) if re.search(r"purchaseorder|poSummary", a["href"], re.I)),
+                None,
+            )
+            rec["PO URL"] = urljoin(base, po["href"]) if po else ""
+            records.append(rec)
+        return records
+
+    def search_pages(self, max_pages: int = MAX_PAGES) -> Iterator[List[dict]]:
+        """
+        Yield the results grid one page at a time, at most ``max_pages`` pages.
+        Stops early when the server answers a page request with the page it
+        sent before (a paginator that ignores ``_first`` would loop forever).
+        """
+        t = self.tenant
+        soup = self._get_page(t.search_url)
+        form, status_name, status_value, button = self._search_form(soup)
+        action = urljoin(t.search_url, form.get("action") or t.search_url)
+        data = form_fields(form)
+        data[status_name] = status_value
+        data.update({
+            "javax.faces.source": button,
+            "javax.faces.partial.execute": "@all",
+            "javax.faces.partial.render": "@all",
+            button: button,
+        })
+        logging.info(f"[{t.name}] Searching status={t.status}")
+        updates = self._postback(action, data)
+        page = BeautifulSoup("".join(updates.values()), "html.parser")
+        table, labels = self._results_table(page)
+        if table is None:
+            logging.info(f"[{t.name}] No results grid returned.")
+            return
+        idx = header_index_map(labels, t.headers)
+        tbody = table.find("tbody")
+        rows = self._rows(tbody, idx, t.search_url) if tbody else []
+        yield rows
+
+        table_id = (tbody.get("id") or "").rsplit("_data", 1)[0] if tbody else ""
+        results_form = table.find_parent("form")
+        if not table_id or results_form is None or not rows:
+            return
+        total = None
+        current = page.select_one(".ui-paginator-current")
+        if current is not None:
+            nums = [int(n.replace(",", "")) for n in re.findall(r"[\d,]+", current.get_text())]
+            total = max(nums) if nums else None
+        page_size = len(rows)
+        first = page_size
+        base = form_fields(results_form)
+        last_page = [tuple(r.values()) for r in rows]
+        pages = 1
+        while total is None or first < total:
+            if pages >= max_pages:
+                logging.warning(f"[{t.name}] Stopped after {pages} pages (max_pages); {first} rows read")
+                break
+            data = dict(base)
+            data.update({
+                "javax.faces.source": table_id,
+                "javax.faces.partial.execute": table_id,
+                "javax.faces.partial.render": table_id,
+                table_id: table_id,
+                f"{table_id}_pagination": "true",
+                f"{table_id}_first": str(first),
+                f"{table_id}_rows": str(page_size),
+                f"{table_id}_skipChildren": "true",
+                f"{table_id}_encodeFeature": "true",
+            })
+            updates = self._postback(urljoin(t.search_url, results_form.get("action") or action), data)
+            html = updates.get(table_id, "")
+            frag = BeautifulSoup(f"<table><tbody>{html}</tbody></table>", "html.parser").find("tbody")
+            rows = self._rows(frag, idx, t.search_url)
+            if not rows:
+                break
+            page_rows = [tuple(r.values()) for r in rows]
+            if page_rows == last_page:
+                logging.warning(f"[{t.name}] Page at row {first + 1} repeats the previous page; stopping")
+                break
+            last_page = page_rows
+            pages += 1
+            logging.info(f"[{t.name}] Rows {first + 1}-{first + len(rows)}" + (f" of {total}" if total else ""))
+            yield rows
+            first += len(rows)
+
+    # --- detail pages ---
+    def fetch_detail(self, url: str) -> Tuple[Dict[str, str], List[Dict[str, Optional[str]]]]:
+        """Label/value pairs and attachment links of a bid or PO summary page."""
+        resp = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        soup = BeautifulSoup(resp.text, "html.parser")
+        fields: Dict[str, str] = {}
+        attachments: List[Dict[str, Optional[str]]] = []
+        for td in soup.find_all("td"):
+            label = normalize(td.get_text(" "))
+            if not label.endswith(":") or len(label) > 60:
+                continue
+            value_td = td.find_next_sibling("td")
+            if value_td is None:
+                continue
+            key = label.rstrip(":").strip()
+            if key.lower().startswith("file attachments"):
+                for a in value_td.find_all("a", href=True):
+                    name = normalize(a.get_text())
+                    if not name:
+                        continue
+                    href = a["href"]
+                    direct = not href.lower().startswith("javascript") and href != "#"
+                    attachments.append({"name": name, "url": urljoin(url, href) if direct else None})
+                continue
+            fields.setdefault(key, normalize(value_td.get_text(" ")))
+        return fields, attachments
+
+    def download_attachments(self, rec: dict, attachments: List[Dict[str, Optional[str]]], dest_dir: str) -> List[str]:
+        saved: List[str] = []
+        js_links = []
+        for att in attachments:
+            if att["url"] is None:
+                js_links.append(att["name"])
+                continue
+            safe = re.sub(r'[\\/*?:"<>|]', "_", att["name"])
+            os.makedirs(dest_dir, exist_ok=True)
+            try:
+                with self.session.get(att["url"], stream=True, timeout=REQUEST_TIMEOUT) as r:
+                    r.raise_for_status()
+                    with open(os.path.join(dest_dir, safe), "wb") as f:
+                        for chunk in r.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                saved.append(safe)
+            except (requests.RequestException, OSError) as e:
+                logging.warning(f"[{self.tenant.name}] Attachment {safe} failed: {e}")
+        if js_links and self.browser is not None and rec.get("Row URL"):
+            try:
+                saved.extend(self.browser.click_downloads(rec["Row URL"], js_links, dest_dir))
+            except Exception as e:      # WebDriver errors, download timeouts
+                logging.warning(f"[{self.tenant.name}] Browser attachments failed for {rec['Row URL']}: {e}")
+        elif js_links:
+            logging.info(f"[{self.tenant.name}] {len(js_links)} javascript attachment(s) skipped (no browser fallback)")
+        return saved
+
+    def enrich(self, rec: dict, attachments_dir: Optional[str]) -> dict:
+        if rec.get("Row URL"):
+            try:
+                fields, attachments = self.fetch_detail(rec["Row URL"])
+                for k, v in fields.items():
+                    rec.setdefault(k, v)
+                rec["Attachments"] = "; ".join(a["name"] for a in attachments)
+                if attachments_dir and attachments:
+                    bid = re.sub(r'[\\/*?:"<>|]', "_", rec.get("Bid Solicitation #") or "unknown")
+                    files = self.download_attachments(rec, attachments, os.path.join(attachments_dir, bid))
+                    rec["Attachment Files"] = "; ".join(files)
+            except Exception as e:          # one bad record must not abort crawl()
+                logging.warning(f"[{self.tenant.name}] Detail failed for {rec.get('Bid Solicitation #')}: {e}")
+        if self.tenant.follow_po_links and rec.get("PO URL"):
+            try:
+                fields, _ = self.fetch_detail(rec["PO URL"])
+                for k, v in fields.items():
+                    rec.setdefault(f"PO {k}", v)
+            except Exception as e:
+                logging.warning(f"[{self.tenant.name}] PO page failed for {rec.get('Bid Solicitation #')}: {e}")
+        return rec
+
+    def crawl(
+        self,
+        details: bool = True,
+        attachments_dir: Optional[str] = None,
+        row_filter: Optional[Callable[[dict], bool]] = None,
+    ) -> List[dict]:
+        """
+        Full crawl: grid pages in order, detail pages through a thread pool. A
+        record whose detail fetch fails is kept with what was read so far.
+        """
+        results: List[dict] = []
+        with ThreadPoolExecutor(max_workers=self.tenant.detail_workers) as pool:
+            futures = {}
+            for rows in self.search_pages():
+                for rec in rows:
+                    if row_filter and not row_filter(rec):
+                        continue
+                    if details:
+                        futures[pool.submit(self.enrich, rec, attachments_dir)] = rec
+                    else:
+                        results.append(rec)
+            for fut in as_completed(futures):
+                try:
+                    results.append(fut.result())
+                except Exception as e:
+                    rec = futures[fut]
+                    logging.error(f"[{self.tenant.name}] Detail failed for {rec.get('Bid Solicitation #')}: {e}")
+                    results.append(rec)
+        logging.info(f"[{self.tenant.name}] Collected {len(results)} records.")
+        return results
+
+
+# --- output ---
+def store_results(tenant: BSOTenant, records: List[dict], store: ResultsStore) -> int:
+    """Upsert bids (and their attachment names) into the shared results store."""
+    n = store.upsert_opportunities(tenant.name, records, "Bid Solicitation #", STORE_FIELDS, source=tenant.base_url)
+    for rec in records:
+        names = [a for a in (rec.get("Attachments") or "").split("; ") if a]
+        if names and rec.get("Bid Solicitation #"):
+            store.upsert_attachments(tenant.name, rec["Bid Solicitation #"], [{"name": a} for a in names])
+    logging.info(f"[{tenant.name}] Stored {n} bids in {store.path}")
+    return n
+
+
+def save_results(
+    tenant: BSOTenant, records: List[dict], out_dir: str, store: Optional[ResultsStore] = None
+) -> Optional[str]:
+    if not records:
+        logging.warning(f"[{tenant.name}] No data scraped; nothing written.")
+        return None
+    if store is not None:
+        store_results(tenant, records, store)
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{tenant.output_prefix}_{timestamp()}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    pd.DataFrame(records).to_excel(base + ".xlsx", index=False)
+    logging.info(f"[{tenant.name}] Wrote {len(records)} rows → {base}.xlsx")
+    return base + ".xlsx"
+
+
+def year_filter(years: List[int]) -> Callable[[dict], bool]:
+    def keep(rec: dict) -> bool:
+        dt = pd.to_datetime(rec.get("Bid Opening Date"), errors="coerce")
+        return not pd.isna(dt) and dt.year in years
+    return keep
+
+
+def run_tenant(key: str, args) -> Optional[str]:
+    tenant = TENANTS[key]
+    browser = None if args.no_browser else BrowserFallback(os.path.join(args.out, f"_{key}_browser"), headless=not args.show_browser)
+    client = BSOClient(tenant, browser=browser)
+    store = ResultsStore(args.db) if args.db else None
+    try:
+        records = client.crawl(
+            details=not args.no_details,
+            attachments_dir=os.path.join(args.out, f"{key}_attachments") if args.attachments else None,
+            row_filter=year_filter(args.years) if args.years else None,
+        )
+        return save_results(tenant, records, args.out, store)
+    finally:
+        if browser is not None:
+            browser.quit()
+        if store is not None:
+            store.close()
+
+
+def _crawl_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--out", default=".", help="Output folder")
+    ap.add_argument("--db", default=DEFAULT_DB, help="Results database to upsert into ('' to skip)")
+    ap.add_argument("--no-details", action="store_true", help="Grid only; skip bid detail pages")
+    ap.add_argument("--attachments", action="store_true", help="Download file attachments")
+    ap.add_argument("--years", type=int, nargs="*", help="Keep rows whose Bid Opening Date falls in these years")
+    ap.add_argument("--no-browser", action="store_true", help="Never start a browser (fail pages that need one)")
+    ap.add_argument("--show-browser", action="store_true", help="Run the fallback browser with a window")
+
+
+def tenant_main(key: str, argv: Optional[List[str]] = None, **defaults) -> int:
+    """
+    Command line for one tenant, used by the state scripts that delegate to the
+    engine; ``defaults`` preset options (``attachments=True``). Returns the
+    exit status: 2 when nothing was scraped.
+    """
+    tenant = TENANTS[key]
+    ap = argparse.ArgumentParser(description=f"{tenant.name} bids through the Periscope BSO engine (common.bso)")
+    _crawl_args(ap)
+    ap.set_defaults(**defaults)
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    return 0 if run_tenant(key, args) else 2
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Periscope BSO engine (Nevada, Oregon, Illinois, NJ, Arkansas, Massachusetts)")
+    ap.add_argument("--tenant", action="append", choices=sorted(TENANTS), help="Tenant to crawl (repeatable)")
+    ap.add_argument("--all", action="store_true", help="Crawl every configured tenant")
+    ap.add_argument("--workers", type=int, default=3, help="Tenants crawled in parallel")
+    _crawl_args(ap)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    keys = sorted(TENANTS) if args.all else (args.tenant or [])
+    if not keys:
+        ap.error("pass --tenant NAME or --all")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(run_tenant, k, args): k for k in keys}
+        for fut in as_completed(futures):
+            key = futures[fut]
+            try:
+                fut.result()
+            except Exception as e:
+                logging.error(f"[{TENANTS[key].name}] crawl failed: {e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Append-only checkpoint sink for scraper results.
+
+Scrapers used to checkpoint by re-serializing everything collected so far
+(re-reading and rewriting a JSON file, or writing a fresh .xlsx) every few
+rows, which is O(n^2) I/O over a run. A sink appends each record to a JSONL
+file in constant time and only materializes JSON/XLSX when asked, normally
+once at the end or when the run is interrupted:
+
+    sink = CheckpointSink("out/louisiana.jsonl", key="bid_number", resume=True)
+    if bid not in sink:
+        sink.add(record)
+    ...
+    sink.write_json("out/louisiana.json")
+    sink.close()
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from common.instrument import timed
+from common.jsonl import JsonlWriter, KeySpec, compact_jsonl, iter_jsonl, key_func
+
+
+class CheckpointSink:
+    """
+    ``key`` (a field name or a function of the record) deduplicates: a record
+    whose key is already in the sink is dropped unless added with
+    ``update=True``, and materialized output keeps the last version. With
+    ``resume=False`` an existing checkpoint file is discarded on open.
+    """
+
+    def __init__(self, path: str, key: Optional[KeySpec] = None, resume: bool = False, fsync_every: int = 50):
+        self.path = os.path.abspath(path)
+        if not resume and os.path.exists(self.path):
+            os.remove(self.path)
+        self._key = key
+        self._existing = 0 if key else sum(1 for _ in iter_jsonl(self.path))
+        self._writer = JsonlWriter(self.path, key=key, fsync_every=fsync_every)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._writer
+
+    def __len__(self) -> int:
+        """Records in the sink (distinct keys when keyed)."""
+        return len(self._writer.seen) if self._key else self._existing + self._writer.written
+
+    def add(self, record: Dict[str, Any], update: bool = False) -> bool:
+        return self._writer.write(record, update=update)
+
+    @timed("write.flush")
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All records in insertion order, last version per key."""
+        self.flush()
+        rows = list(iter_jsonl(self.path))
+        key = key_func(self._key)
+        if not key:
+            return rows
+        last = {key(rec): i for i, rec in enumerate(rows)}
+        return [rec for i, rec in enumerate(rows) if last[key(rec)] == i]
+
+    # --- Materialization ---
+    @timed("write.json")
+    def write_json(
+        self,
+        path: str,
+        indent: int = 2,
+        wrap: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+    ) -> int:
+        """
+        Write the records as a JSON array (streamed), or as ``wrap(records)``
+        for other layouts. Replaced atomically; returns the record count.
+        """
+        self.flush()
+        if wrap is None:
+            return compact_jsonl(self.path, path, indent=indent, key=self._key)
+        rows = self.records()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(wrap(rows), f, indent=indent, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+        return len(rows)
+
+    @timed("write.xlsx")
+    def write_xlsx(self, path: str, columns: Optional[Sequence[str]] = None) -> int:
+        rows = self.records()
+        pd.DataFrame(rows, columns=list(columns) if columns else None).to_excel(path, index=False)
+        return len(rows)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "CheckpointSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
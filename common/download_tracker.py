@@ -0,0 +1,197 @@
+"""
+Browser download completion tracking.
+
+Chrome reports every download over DevTools: ``downloadWillBegin`` carries a
+guid and the suggested filename, ``downloadProgress`` reports the guid as
+``completed`` or ``canceled``. With the download behavior set to
+``allowAndName`` the file is written as ``<download_dir>/<guid>``, so each
+click resolves to exactly its own file the moment it finishes, even with
+several downloads in flight. Completed files are renamed to their suggested
+name.
+
+The events are read from chromedriver's performance log, which must be
+enabled when the driver is created (``enable_download_events(options)``).
+Without it the tracker falls back to watching the directory for new,
+fully written files.
+
+Usage:
+    options = webdriver.ChromeOptions()
+    enable_download_events(options)
+    driver = webdriver.Chrome(options=options)
+    tracker = DownloadTracker(driver, download_dir)
+
+    mark = tracker.mark()
+    link.click()
+    files = tracker.wait_for(1, since=mark, timeout=60)
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from common.instrument import timed
+
+PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+POLL_INTERVAL = 0.1
+
+
+def enable_download_events(options) -> None:
+    """Turn on the performance log that carries the DevTools download events."""
+    prefs = dict(options.capabilities.get("goog:loggingPrefs") or {})
+    prefs["performance"] = "ALL"
+    options.set_capability("goog:loggingPrefs", prefs)
+
+
+def unique_name(directory: str, name: str) -> str:
+    """``name``, or ``name (1)``, ``name (2)`` ... if it already exists in ``directory``."""
+    base, ext = os.path.splitext(name)
+    candidate, k = name, 1
+    while os.path.exists(os.path.join(directory, candidate)):
+        candidate = f"{base} ({k}){ext}"
+        k += 1
+    return candidate
+
+
+@dataclass
+class BrowserDownload:
+    guid: str
+    url: str
+    suggested_name: str
+    state: str = "inProgress"
+    path: Optional[str] = None
+
+
+class DownloadTracker:
+    """
+    Resolves browser downloads to files. Call ``mark()`` before triggering
+    downloads and ``wait_for(n, since=mark)`` afterwards; not thread-safe
+    (one tracker per driver, used from the driver's thread).
+    """
+
+    def __init__(self, driver, download_dir: str):
+        self.driver = driver
+        self.download_dir = os.path.abspath(download_dir)
+        os.makedirs(self.download_dir, exist_ok=True)
+        self._downloads: List[BrowserDownload] = []
+        self._by_guid: Dict[str, BrowserDownload] = {}
+        self.event_driven = self._enable_events()
+        if not self.event_driven:
+            logging.info("Download events unavailable; watching the download folder instead.")
+
+    def _enable_events(self) -> bool:
+        try:
+            self.driver.get_log("performance")
+            self.driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+                "behavior": "allowAndName",
+                "downloadPath": self.download_dir,
+                "eventsEnabled": True,
+            })
+            return True
+        except Exception:
+            return False
+
+    # --- Event-driven mode ---
+    def _pump(self) -> None:
+        """Consume new DevTools events from the performance log."""
+        for entry in self.driver.get_log("performance"):
+            try:
+                msg = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = msg.get("method", "")
+            params = msg.get("params", {})
+            if method.endswith(".downloadWillBegin"):
+                guid = params.get("guid")
+                if guid and guid not in self._by_guid:
+                    dl = BrowserDownload(guid, params.get("url", ""), params.get("suggestedFilename") or guid)
+                    self._downloads.append(dl)
+                    self._by_guid[guid] = dl
+            elif method.endswith(".downloadProgress"):
+                dl = self._by_guid.get(params.get("guid"))
+                if dl and dl.state == "inProgress" and params.get("state") in ("completed", "canceled"):
+                    dl.state = params["state"]
+                    if dl.state == "completed":
+                        self._finish(dl)
+
+    def _finish(self, dl: BrowserDownload) -> None:
+        src = os.path.join(self.download_dir, dl.guid)
+        if not os.path.exists(src):
+            dl.state = "canceled"
+            return
+        dest = os.path.join(self.download_dir, unique_name(self.download_dir, dl.suggested_name))
+        os.replace(src, dest)
+        dl.path = dest
+
+    # --- Directory-watch fallback ---
+    def _listing(self) -> Dict[str, float]:
+        out = {}
+        for entry in os.scandir(self.download_dir):
+            if entry.is_file():
+                out[entry.name] = entry.stat().st_mtime
+        return out
+
+    # --- Public API ---
+    def mark(self):
+        """Opaque position; downloads started after it are returned by ``wait_for``."""
+        if self.event_driven:
+            self._pump()
+            return len(self._downloads)
+        return set(self._listing())
+
+    @timed("download.browser", ok=bool)
+    def wait_for(
+        self, count: Optional[int] = 1, since=None, timeout: float = 60, start_timeout: Optional[float] = None
+    ) -> List[str]:
+        """
+        Paths of the downloads started after ``since`` once ``count`` of them
+        have finished (canceled ones count as finished but return no path);
+        ``count=None`` waits until every started download has finished.
+        On timeout, whatever has finished so far is returned; with
+        ``start_timeout``, giving up early if nothing has started by then.
+        """
+        if since is None:
+            since = 0 if self.event_driven else set()
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            if self.event_driven:
+                self._pump()
+                started = self._downloads[since:]
+                finished = [d for d in started if d.state != "inProgress"]
+                done = [d.path for d in finished if d.path]
+                if count is None and started and len(finished) == len(started):
+                    return done
+                if count is not None and len(finished) >= count:
+                    return done
+            else:
+                listing = self._listing()
+                started = [n for n in listing if n not in since]
+                partial = [n for n in started if n.endswith(PARTIAL_SUFFIXES)]
+                complete = sorted((n for n in started if n not in partial), key=listing.get)
+                done = [os.path.join(self.download_dir, n) for n in complete]
+                if not partial and complete and len(complete) >= (count or 1):
+                    return done
+            now = time.monotonic()
+            if now >= deadline or (start_timeout is not None and not started and now - start >= start_timeout):
+                return done
+            time.sleep(POLL_INTERVAL)
+
+    @timed("download.idle", ok=bool)
+    def wait_idle(self, timeout: float = 60) -> bool:
+        """Wait until no download is in progress; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.event_driven:
+                self._pump()
+                busy = any(d.state == "inProgress" for d in self._downloads)
+            else:
+                busy = any(n.endswith(PARTIAL_SUFFIXES) for n in self._listing())
+            if not busy:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
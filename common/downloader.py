@@ -0,0 +1,281 @@
+"""
+Resumable, parallel file downloads.
+
+``download`` streams a URL into ``<dest>.part`` and renames it to ``dest`` once
+the body is complete (and matches ``expected_sha256`` when given). After a
+timeout or dropped connection it retries with ``Range: bytes=<n>-`` so a
+large bid package continues where it stopped instead of starting over; a
+``.part`` left by an interrupted run is resumed the same way. Resumes send
+``If-Range`` with the validator of the response that started the part file,
+and a 206 whose Content-Range does not start at the local offset restarts
+the file from zero rather than splicing in the wrong bytes.
+
+``Downloader`` runs downloads on a bounded thread pool with a per-host
+connection limit. Jobs over the limit wait in a per-host queue rather than in
+a pool worker, so a slow host never holds workers another host could use.
+Scrapers submit jobs and collect the futures later.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from common.http import create_session
+from common.instrument import timed
+
+CHUNK_SIZE = 256 * 1024
+DEFAULT_RETRIES = 5
+DEFAULT_TIMEOUT = (15, 60)      # (connect, read); read is per chunk, not per file
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 2
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+_UNSATISFIED_RANGE_RE = re.compile(r"bytes\s+\*/(\d+)")
+
+
+class ChecksumError(Exception):
+    """The completed file does not match the expected SHA-256."""
+
+
+class IncompleteDownload(Exception):
+    """The connection ended before Content-Length bytes arrived."""
+
+
+@dataclass
+class DownloadResult:
+    """Response-like summary: ``url`` and ``headers`` are those of the last response."""
+    url: str
+    path: str
+    size: int
+    sha256: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    resumed: bool = False
+
+
+def _read_validator(part: str) -> Optional[str]:
+    try:
+        with open(part + ".validator", "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _start_part(part: str, validator: Optional[str]) -> None:
+    """Truncate ``part`` and remember the validator it must be resumed against."""
+    open(part, "wb").close()
+    if validator:
+        with open(part + ".validator", "w", encoding="utf-8") as f:
+            f.write(validator)
+    elif os.path.exists(part + ".validator"):
+        os.remove(part + ".validator")
+
+
+def _discard_part(part: str) -> None:
+    for path in (part, part + ".validator"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _hash_prefix(path: str, digest) -> int:
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size
+
+
+@timed("download.http")
+def download(
+    session: requests.Session,
+    url: str,
+    dest: str,
+    expected_sha256: Optional[str] = None,
+    retries: int = DEFAULT_RETRIES,
+    timeout=DEFAULT_TIMEOUT,
+    backoff: float = 1.0,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs,
+) -> DownloadResult:
+    """
+    Download ``url`` to ``dest`` through ``dest + '.part'``, resuming with HTTP
+    Range and If-Range requests. A 200 instead of 206 (Range ignored, or the
+    file changed) or a Content-Range that does not start at the local offset
+    restarts the file from zero. Raises ``ChecksumError`` on a mismatch (the part file is
+    removed) and the last network error once ``retries`` are exhausted.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    part = dest + ".part"
+    digest = hashlib.sha256()
+    offset = _hash_prefix(part, digest) if os.path.exists(part) else 0
+    resumed = offset > 0
+    validator = _read_validator(part) if offset else None
+    last_headers: Dict[str, str] = CaseInsensitiveDict()
+    final_url = url
+    attempt = 0
+
+    while True:
+        req_headers = dict(headers or {})
+        if offset:
+            req_headers["Range"] = f"bytes={offset}-"
+            if validator:
+                req_headers["If-Range"] = validator
+        try:
+            with session.get(url, stream=True, headers=req_headers, timeout=timeout, **kwargs) as resp:
+                final_url = resp.url or url
+                last_headers = CaseInsensitiveDict(resp.headers)
+                if resp.status_code == 416 and offset:
+                    m = _UNSATISFIED_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+                    if m and int(m.group(1)) == offset:
+                        break       # the part file already holds the whole body
+                    _discard_part(part)
+                    digest, offset, validator = hashlib.sha256(), 0, None
+                    continue
+                resp.raise_for_status()
+
+                total = None
+                if resp.status_code == 206 and offset:
+                    content_range = resp.headers.get("Content-Range", "")
+                    m = _CONTENT_RANGE_RE.match(content_range)
+                    if not m or int(m.group(1)) != offset:
+                        logging.warning(f"{url}: Content-Range {content_range!r} does not start at byte {offset}, restarting download")
+                        _discard_part(part)
+                        digest, offset, validator = hashlib.sha256(), 0, None
+                        continue
+                    if m.group(3) != "*":
+                        total = int(m.group(3))
+                else:
+                    if offset:
+                        logging.info(f"{url}: server sent the full body instead of a range, restarting download")
+                    etag = resp.headers.get("ETag")
+                    # If-Range only accepts strong ETags; fall back to Last-Modified.
+                    validator = etag if etag and not etag.startswith("W/") else resp.headers.get("Last-Modified")
+                    _start_part(part, validator)
+                    digest, offset = hashlib.sha256(), 0
+                    length = resp.headers.get("Content-Length")
+                    total = int(length) if length and length.isdigit() and "Content-Encoding" not in resp.headers else None
+
+                with open(part, "ab") as f:
+                    for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            digest.update(chunk)
+                            offset += len(chunk)
+
+            if total is not None and offset < total:
+                raise IncompleteDownload(f"{url}: got {offset} of {total} bytes")
+            break
+
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, IncompleteDownload) as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if offset:
+                resumed = True
+                digest = hashlib.sha256()
+                _hash_prefix(part, digest)
+            logging.warning(f"{url}: {e}; retry {attempt}/{retries} from byte {offset}")
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+    sha = digest.hexdigest()
+    if expected_sha256 and sha != expected_sha256.lower():
+        _discard_part(part)
+        raise ChecksumError(f"{url}: sha256 {sha} != expected {expected_sha256}")
+    os.replace(part, dest)
+    if os.path.exists(part + ".validator"):
+        os.remove(part + ".validator")
+    return DownloadResult(final_url, dest, offset, sha, last_headers, resumed)
+
+
+# (future, fn, args, kwargs) of a submitted job.
+_Job = Tuple[Future, Callable, tuple, dict]
+
+
+class Downloader:
+    """
+    Bounded download pool. At most ``workers`` downloads run at once and at
+    most ``per_host`` of them against the same host. A host's jobs beyond
+    ``per_host`` are queued here and run, in submission order, by the workers
+    that finish that host's earlier jobs.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        per_host: int = DEFAULT_PER_HOST,
+        session: Optional[requests.Session] = None,
+    ):
+        self.per_host = max(1, per_host)
+        self.session = session or create_session(pool_size=workers)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._active: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[_Job]] = {}
+        self._hosts_lock = threading.Lock()
+
+    def _dispatch(self, url: str, fn: Callable, *args, **kwargs) -> Future:
+        """Start ``fn`` on the pool if its host has a free slot, else queue it for the host."""
+        host = urlparse(url).netloc
+        job: _Job = (Future(), fn, args, kwargs)
+        with self._hosts_lock:
+            if self._active.get(host, 0) >= self.per_host:
+                self._waiting.setdefault(host, deque()).append(job)
+                return job[0]
+            self._active[host] = self._active.get(host, 0) + 1
+        try:
+            self._pool.submit(self._drain, host, job)
+        except BaseException:
+            self._release(host)
+            raise
+        return job[0]
+
+    def _drain(self, host: str, job: Optional[_Job]) -> None:
+        """Run ``job``, then the host's queued jobs, until the host has none left."""
+        while job:
+            future, fn, args, kwargs = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            job = self._release(host)
+
+    def _release(self, host: str) -> Optional[_Job]:
+        """Hand the host's slot to its next queued job, or free it."""
+        with self._hosts_lock:
+            queue = self._waiting.get(host)
+            if queue:
+                return queue.popleft()
+            self._waiting.pop(host, None)
+            self._active[host] -= 1
+            if not self._active[host]:
+                del self._active[host]
+            return None
+
+    def submit(self, url: str, dest: str, session: Optional[requests.Session] = None, **kwargs) -> Future:
+        """Queue ``download(session, url, dest, **kwargs)``; the future yields a DownloadResult."""
+        return self._dispatch(url, download, session or self.session, url, dest, **kwargs)
+
+    def submit_to_store(self, store, url: str, session: Optional[requests.Session] = None, **kwargs) -> Future:
+        """Queue ``store.fetch(session, url, **kwargs)``; the future yields a StoredFile."""
+        return self._dispatch(url, store.fetch, session or self.session, url, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "Downloader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
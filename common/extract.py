@@ -0,0 +1,229 @@
+"""
+Bulk DOM extraction from declarative field specs.
+
+Reading a table cell by cell through Selenium costs one WebDriver round-trip
+per ``find_element``/``.text``/``get_attribute``; a 50-row page with six
+columns is several hundred HTTP calls to the driver. Here a scraper describes
+what it wants once:
+
+    AWARDS = RowSpec(
+        rows="div.esbd-awards-row",
+        cells="div.esbd-award-result-column",
+        fields={"contractor": Field("p", cell=0), "award_date": Field("p", cell=4)},
+    )
+
+and the whole page is serialized in a single ``execute_script`` call. The same
+spec can be run against saved HTML (``driver.page_source``, a requests
+response) with BeautifulSoup, using lxml when it is installed.
+
+Specs:
+    Field(css, attr, cell)     one value; ``css`` is relative to the row/item
+                               ("" = the element itself), ``attr`` is "text" or
+                               an attribute/property name, with "|" fallbacks
+                               ("aria-label|text"); ``cell`` indexes the row's
+                               cells first. Missing elements read as "".
+                               ``many=True`` returns the list of every match.
+    RowSpec(rows, fields)      a list of records, one per ``rows`` match.
+    PanelSpec(items, labels)   a label/value panel; each field takes the value
+                               of the first item whose label contains its
+                               needle.
+
+Usage:
+    data = extract(driver, {"contact": CONTACT, "awards": AWARDS})
+    rows = extract_rows(html, RESULTS, base_url=page_url)
+"""
+
+import importlib.util
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+URL_ATTRS = ("href", "src", "action")
+
+
+# --- Specs ---
+@dataclass(frozen=True)
+class Field:
+    css: str = ""
+    attr: str = "text"
+    cell: Optional[int] = None
+    many: bool = False
+
+
+@dataclass(frozen=True)
+class RowSpec:
+    rows: str
+    fields: Dict[str, Field]
+    root: str = ""                   # first match scopes ``rows`` (":scope > tbody > tr")
+    cells: str = ":scope > td"
+    min_cells: int = 0               # rows with fewer cells are skipped
+    kind: str = field(default="rows", init=False)
+
+
+@dataclass(frozen=True)
+class PanelSpec:
+    items: str
+    labels: Dict[str, str]           # field -> label needle (substring match)
+    label: str = ""                  # label element inside the item ("" = the item)
+    label_attr: str = "text"
+    value: Field = Field()
+    root: str = ""
+    kind: str = field(default="panel", init=False)
+
+
+Spec = Union[RowSpec, PanelSpec]
+
+
+# --- Browser backend: one execute_script per call ---
+_EXTRACT_JS = r"""
+const specs = arguments[0];
+const base = arguments[1] || document;
+const clean = s => (s == null ? "" : String(s)).replace(/\s+/g, " ").trim();
+function read(el, attr) {
+  for (const name of attr.split("|")) {
+    let v;
+    if (name === "text") v = el.innerText !== undefined ? el.innerText : el.textContent;
+    else if (name in el && typeof el[name] === "string") v = el[name];
+    else v = el.getAttribute(name);
+    v = clean(v);
+    if (v) return v;
+  }
+  return "";
+}
+function value(item, cells, f) {
+  let scope = item;
+  if (f.cell !== null) { scope = cells[f.cell]; if (!scope) return f.many ? [] : ""; }
+  if (f.many) return Array.from(scope.querySelectorAll(f.css)).map(el => read(el, f.attr));
+  const el = f.css ? scope.querySelector(f.css) : scope;
+  return el ? read(el, f.attr) : "";
+}
+function rows(root, spec) {
+  const out = [];
+  for (const row of root.querySelectorAll(spec.rows)) {
+    const cells = row.querySelectorAll(spec.cells);
+    if (cells.length < spec.min_cells) continue;
+    const rec = {};
+    for (const [name, f] of Object.entries(spec.fields)) rec[name] = value(row, cells, f);
+    out.push(rec);
+  }
+  return out;
+}
+function panel(root, spec) {
+  const items = Array.from(root.querySelectorAll(spec.items));
+  const out = {};
+  for (const [name, needle] of Object.entries(spec.labels)) {
+    out[name] = "";
+    for (const item of items) {
+      const label = spec.label ? item.querySelector(spec.label) : item;
+      if (label && read(label, spec.label_attr).includes(needle)) {
+        out[name] = value(item, [], spec.value);
+        break;
+      }
+    }
+  }
+  return out;
+}
+const result = {};
+for (const [key, spec] of Object.entries(specs)) {
+  const root = spec.root ? base.querySelector(spec.root) : base;
+  if (!root) { result[key] = spec.kind === "rows" ? [] : null; continue; }
+  result[key] = spec.kind === "rows" ? rows(root, spec) : panel(root, spec);
+}
+return result;
+"""
+
+
+# --- HTML backend ---
+def _clean(s: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", s or "").strip()
+
+
+def _read(el, attr: str, base_url: str) -> str:
+    for name in attr.split("|"):
+        if name == "text":
+            v = _clean(el.get_text(" "))
+        else:
+            raw = el.get(name)
+            v = _clean(" ".join(raw) if isinstance(raw, list) else raw)
+            if v and base_url and name in URL_ATTRS:
+                v = urljoin(base_url, v)
+        if v:
+            return v
+    return ""
+
+
+def _value(item, cells, f: Field, base_url: str):
+    scope = item
+    if f.cell is not None:
+        if f.cell >= len(cells):
+            return [] if f.many else ""
+        scope = cells[f.cell]
+    if f.many:
+        return [_read(el, f.attr, base_url) for el in scope.select(f.css)]
+    el = scope.select_one(f.css) if f.css else scope
+    return _read(el, f.attr, base_url) if el is not None else ""
+
+
+def _rows(root, spec: RowSpec, base_url: str) -> List[Dict[str, Any]]:
+    out = []
+    for row in root.select(spec.rows):
+        cells = row.select(spec.cells)
+        if len(cells) < spec.min_cells:
+            continue
+        out.append({name: _value(row, cells, f, base_url) for name, f in spec.fields.items()})
+    return out
+
+
+def _panel(root, spec: PanelSpec, base_url: str) -> Dict[str, str]:
+    items = root.select(spec.items)
+    out = {}
+    for name, needle in spec.labels.items():
+        out[name] = ""
+        for item in items:
+            label = item.select_one(spec.label) if spec.label else item
+            if label is not None and needle in _read(label, spec.label_attr, ""):
+                out[name] = _value(item, [], spec.value, base_url)
+                break
+    return out
+
+
+def _extract_html(soup, specs: Dict[str, Spec], base_url: str) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for key, spec in specs.items():
+        root = soup.select_one(spec.root) if spec.root else soup
+        if root is None:
+            result[key] = [] if spec.kind == "rows" else None
+        elif spec.kind == "rows":
+            result[key] = _rows(root, spec, base_url)
+        else:
+            result[key] = _panel(root, spec, base_url)
+    return result
+
+
+# --- Public API ---
+def extract(source, specs: Dict[str, Spec], base_url: str = "", scope=None) -> Dict[str, Any]:
+    """
+    Run several specs at once. ``source`` is a WebDriver (one
+    ``execute_script`` round-trip), an HTML string or a BeautifulSoup tree;
+    ``scope`` (a WebElement or soup element) replaces the document as the
+    search root. A spec whose ``root`` is missing yields ``[]`` (rows) or
+    ``None`` (panel).
+    """
+    # Attribute lookups on a soup search for a tag of that name, so rule soup out first.
+    if not isinstance(source, (str, bytes, Tag)) and hasattr(source, "execute_script"):
+        return source.execute_script(_EXTRACT_JS, {k: asdict(s) for k, s in specs.items()}, scope) or {}
+    if scope is None:
+        scope = source if isinstance(source, BeautifulSoup) else BeautifulSoup(source, PARSER)
+    return _extract_html(scope, specs, base_url)
+
+
+def extract_rows(source, spec: RowSpec, base_url: str = "", scope=None) -> List[Dict[str, Any]]:
+    return extract(source, {"rows": spec}, base_url, scope).get("rows") or []
+
+
+def extract_panel(source, spec: PanelSpec, base_url: str = "", scope=None) -> Dict[str, str]:
+    return extract(source, {"panel": spec}, base_url, scope).get("panel") or {name: "" for name in spec.labels}
@@ -0,0 +1,565 @@
+"""
+One dispatcher for the FOIA email senders under ``Foia Codes/``.
+
+Each state's ``*_foia.py`` keeps its own request wording (subject, body,
+purpose lines) and default recipient; ``TENANTS`` says which script holds a
+state's template and how its rows become emails. The dispatcher renders the
+rows of every requested state in one pass and sends them through one shared
+``SmtpTransport``:
+
+- one SMTP login for the whole batch, paced by the account budget
+  (``--per-minute``)
+- a per-agency budget on top (``--agency-per-minute``, or ``per_minute`` in
+  the registry): an agency is the recipient's mail domain unless the registry
+  names one, so two states that write to the same office share its budget
+- the queue always sends the next message whose agency may receive one, so a
+  slow agency never holds up the others
+- every attempt and outcome goes to the submission ledger in the results
+  database (``common.store``) as it happens, keyed by state, agency, notice id
+  and the hash of the request's wording: a request the ledger has as sent is
+  never sent again, whatever order the input rows are in, and one whose
+  outcome a crash left unknown is held back until it is checked
+- every result is also appended to ``<log>.jsonl`` (``--resume-log`` still
+  skips what an older log marked SENT) and the whole log is written to
+  ``<log>.xlsx`` at the end
+
+Usage (from the repository root):
+    python -m common.foia_mail --input maryland=emma_awarded.xlsx --input nevada=nv.csv
+    python -m common.foia_mail --input maryland=emma_awarded.xlsx --input nevada=nv.csv --send --per-minute 30
+    python -m common.foia_mail --list
+"""
+
+import argparse
+import heapq
+import importlib.util
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.message import EmailMessage
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from common.jsonl import JsonlWriter, iter_jsonl
+from common.mailer import DEFAULT_PER_MINUTE, SmtpTransport, build_message, load_smtp
+from common.store import RequestKey, ResultsStore, notice_id_of
+
+FOIA_DIR = Path(__file__).resolve().parents[1] / "Foia Codes"
+DEFAULT_AGENCY_PER_MINUTE = 6.0     # one email every 10 s to the same agency
+
+@dataclass(frozen=True)
+class FoiaState:
+    name: str
+    script: str                         # relative to Foia Codes/
+    render: str = "row"                 # key of RENDERERS
+    recipient: str = ""                 # default: the script's DEFAULT_RECIPIENT
+    agency: str = ""                    # rate-limit key; default: recipient's mail domain
+    per_minute: Optional[float] = None  # agency budget; default: --agency-per-minute
+    reply_to_requester: bool = False
+    normalize_recipient: bool = False   # clean the address with the script's normalize_email
+
+
+TENANTS: Dict[str, FoiaState] = {
+    "alaska": FoiaState("Alaska", "Alaska/alaska_foia.py", render="alaska"),
+    "hawaii": FoiaState("Hawaii", "Hawaii/hawaii_foia.py", render="hawaii", reply_to_requester=True),
+    "kentucky": FoiaState("Kentucky", "Kentucky/kentucky_foia.py", render="kentucky"),
+    "maryland": FoiaState("Maryland", "Maryland/maryland_foia.py"),
+    "michigan": FoiaState("Michigan", "Michigan/michigan_foia.py", render="michigan"),
+    "nevada": FoiaState("Nevada", "Nevada/nevada_foia.py"),
+    "new_hampshire": FoiaState("New Hampshire", "NewHampshire/new_hampshire_foia.py"),
+    "oklahoma": FoiaState("Oklahoma", "Oaklahoma/oklahoma_foia.py"),
+    "virginia": FoiaState("Virginia", "Virginia/virginia_foia.py", normalize_recipient=True),
+    "west_virginia": FoiaState("West Virginia", "West Virginia/west_virginia_foia.py", render="west_virginia"),
+    "delaware": FoiaState("Delaware", "delaware/delaware_foia.py", render="delaware"),
+    "florida": FoiaState("Florida", "florida/florida_foia.py", render="florida"),
+    "illinois": FoiaState("Illinois", "illinois/illinois_foia.py", render="illinois"),
+    "nebraska": FoiaState("Nebraska", "nebraska/nebraska_foia.py", normalize_recipient=True),
+    "wyoming": FoiaState("Wyoming", "wyoming/wyoming_foia.py", render="wyoming"),
+}
+
+
+@dataclass
+class Draft:
+    state: str
+    row_index: int
+    to: str
+    subject: str
+    body: str
+    agency: str = ""
+    cc: List[str] = field(default_factory=list)
+    reply_to: Optional[str] = None
+    attachments: Optional[List[Dict[str, Any]]] = None
+    notice_id: str = ""
+    key: Optional[RequestKey] = None    # identity in the submission ledger
+
+
+# --- Templates ---
+_modules: Dict[str, ModuleType] = {}
+
+
+def load_template(state: FoiaState) -> ModuleType:
+    """The state's script as a module (its ``main`` does not run)."""
+    if state.script not in _modules:
+        path = FOIA_DIR / state.script
+        spec = importlib.util.spec_from_file_location(f"foia_{path.stem}", path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _modules[state.script] = mod
+    return _modules[state.script]
+
+
+def _s(val: Any) -> str:
+    return "" if pd.isna(val) else str(val).strip()
+
+
+def _with_purpose(df: pd.DataFrame, build: Callable[[pd.Series], str]) -> pd.DataFrame:
+    df = df.copy()
+    df["Purpose"] = [build(row) for _, row in df.iterrows()]
+    return df
+
+
+# A renderer yields (row_index, subject, body, to) per row; to=None means the
+# state's recipient.
+Rendered = Iterator[Tuple[int, str, str, Optional[str]]]
+
+
+def _render_row(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.build_body(row), None
+
+
+def _render_alaska(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    missing = [c for c in mod.EXPECTED_COLS if c not in df.columns]
+    if missing:
+        raise RuntimeError(f"input is missing expected columns: {', '.join(missing)}")
+    df = _with_purpose(df, mod.build_purpose_text)
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.professional_body(row, to_addr, row["Purpose"]), None
+
+
+def _render_hawaii(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    df = _with_purpose(df.fillna(""), mod.build_purpose)
+    columns = list(df.columns)
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.build_body(row, row["Purpose"], columns), None
+
+
+def _render_kentucky(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    """Kentucky writes to the agency in each row's ``email`` column."""
+    email_col = {c.lower(): c for c in df.columns}.get("email")
+    sender = os.getenv("SENDER_NAME", "Your Name")
+    for i, row in df.iterrows():
+        to = to_addr
+        if not to and email_col:
+            cand = _s(row.get(email_col))
+            to = cand if "@" in cand and "." in cand else ""
+        yield i, mod.infer_subject(row), mod.build_body(row, sender), to
+
+
+def _render_michigan(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    df = _with_purpose(df, mod.build_purpose)
+    columns = list(df.columns)
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.build_body(row, row["Purpose"], columns), None
+
+
+def _render_west_virginia(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    df = _with_purpose(df, mod.make_purpose_text)
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.build_body(row, to_addr), None
+
+
+def _render_delaware(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    yield from _render_row(mod, mod.ensure_purpose(mod.norm_cols(df)), to_addr)
+
+
+def _render_florida(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    opps = mod.normalize_table(df, "Florida")
+    for (i, row), opp in zip(df.iterrows(), opps):
+        yield i, mod.infer_subject(opp), mod.build_body(row, opp, mod.purpose_two_liner(opp)), None
+
+
+def _render_illinois(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    df = _with_purpose(df, mod.build_purpose)
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.build_body(row, purpose_text=row["Purpose"], to_addr=to_addr), None
+
+
+def _render_wyoming(mod: ModuleType, df: pd.DataFrame, to_addr: str) -> Rendered:
+    df = _with_purpose(df, mod.build_purpose)
+    for i, row in df.iterrows():
+        yield i, mod.infer_subject(row), mod.build_body(row, row["Purpose"]), None
+
+
+RENDERERS: Dict[str, Callable[[ModuleType, pd.DataFrame, str], Rendered]] = {
+    "row": _render_row,
+    "alaska": _render_alaska,
+    "hawaii": _render_hawaii,
+    "kentucky": _render_kentucky,
+    "michigan": _render_michigan,
+    "west_virginia": _render_west_virginia,
+    "delaware": _render_delaware,
+    "florida": _render_florida,
+    "illinois": _render_illinois,
+    "wyoming": _render_wyoming,
+}
+
+
+def agency_of(state: FoiaState, to_addr: str) -> str:
+    if state.agency:
+        return state.agency
+    return to_addr.rpartition("@")[2].lower() or state.name
+
+
+def render_state(
+    key: str,
+    df: pd.DataFrame,
+    to_override: Optional[str] = None,
+    cc: Sequence[str] = (),
+    attach_row: bool = False,
+) -> List[Draft]:
+    """Drafts for every row of ``df`` with ``key``'s template; rows without a recipient are left out."""
+    state = TENANTS[key]
+    mod = load_template(state)
+    default_to = (to_override or state.recipient or getattr(mod, "DEFAULT_RECIPIENT", "")).strip()
+    requester = getattr(mod, "REQUESTER", {})
+    reply_to = f"{requester['name']} <{requester['email']}>" if state.reply_to_requester and requester else None
+    # Kentucky's recipients come from the rows unless overridden.
+    to_addr = (to_override or "").strip() if state.render == "kentucky" else default_to
+
+    df = df.reset_index(drop=True)
+    drafts: List[Draft] = []
+    for i, subject, body, to in RENDERERS[state.render](mod, df, to_addr):
+        to = to or to_addr
+        if not to:
+            logging.warning(f"[{state.name}] row {i}: no recipient, skipped")
+            continue
+        if state.normalize_recipient:
+            to = mod.normalize_email(to)
+        attachments = None
+        if attach_row and hasattr(mod, "row_as_csv_bytes"):
+            attachments = [{"data": mod.row_as_csv_bytes(df.iloc[i]), "filename": f"{key}_row_{i}.csv"}]
+        agency = agency_of(state, to)
+        notice_id = notice_id_of(df.iloc[i], subject)
+        drafts.append(Draft(
+            state.name, int(i), to, subject, body, agency=agency,
+            cc=list(cc), reply_to=reply_to, attachments=attachments, notice_id=notice_id,
+            key=RequestKey.of(state.name, to, notice_id, body, df.iloc[i]),
+        ))
+    return drafts
+
+
+# --- Queue ---
+class AgencyQueue:
+    """
+    Drafts grouped per agency, handed out in the order the agencies may next
+    receive one. ``next`` reserves the agency's slot and returns the draft with
+    the time it may be sent; None once every draft is handed out.
+    """
+
+    def __init__(self, drafts: Sequence[Draft], per_minute: Dict[str, float], default_per_minute: float):
+        self._pending: Dict[str, List[Draft]] = {}
+        for d in drafts:
+            self._pending.setdefault(d.agency, []).append(d)
+        for queue in self._pending.values():
+            queue.reverse()                     # pop() from the end keeps input order
+        self._gap = {
+            a: 60.0 / r if r and r > 0 else 0.0
+            for a, r in ((a, per_minute.get(a, default_per_minute)) for a in self._pending)
+        }
+        now = time.monotonic()
+        self._order = itertools.count()
+        self._heap: List[Tuple[float, int, str]] = [(now, next(self._order), a) for a in self._pending]
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._pending.values())
+
+    def next(self) -> Optional[Tuple[Draft, float]]:
+        with self._lock:
+            if not self._heap:
+                return None
+            ready_at, _, agency = heapq.heappop(self._heap)
+            queue = self._pending[agency]
+            draft = queue.pop()
+            if queue:
+                heapq.heappush(self._heap, (ready_at + self._gap[agency], next(self._order), agency))
+            return draft, ready_at
+
+
+# --- Sending ---
+def send_request(
+    transport: SmtpTransport,
+    build: Callable[[], EmailMessage],
+    ledger: Optional[ResultsStore] = None,
+    key: Optional[RequestKey] = None,
+    retry_pending: bool = False,
+) -> Tuple[str, str]:
+    """
+    Send the message ``build()`` returns, at most once per ledger ``key``:
+    ("SENT", ""), ("SKIPPED", why) when the ledger has it as sent or pending
+    (unless ``retry_pending``), or ("ERROR", error). The Message-ID is logged
+    as the confirmation; once the message is out, a ledger error is only
+    logged (the request stays pending and is held back, never sent twice).
+    """
+    tracked = ledger is not None and key is not None
+    if tracked and not ledger.begin_request(key, channel="email", retry_pending=retry_pending):
+        return "SKIPPED", f"{ledger.request_status(key)} in the submission ledger"
+    try:
+        msg = build()
+        transport.send(msg)
+    except Exception as e:
+        if tracked:
+            ledger.finish_request(key, "failed", detail=str(e), channel="email")
+        return "ERROR", str(e)
+    if tracked:
+        try:
+            ledger.finish_request(key, "sent", confirmation=msg["Message-ID"] or "", channel="email")
+        except Exception as e:
+            logging.error(f"{key.state} {key.notice_id}: sent, but the ledger could not record it: {e}")
+    return "SENT", ""
+
+
+def dispatch(
+    drafts: Sequence[Draft],
+    transport: SmtpTransport,
+    smtp_conf: Dict[str, Any],
+    on_result: Callable[[Draft, str, str], None],
+    agency_per_minute: float = DEFAULT_AGENCY_PER_MINUTE,
+    agency_limits: Optional[Dict[str, float]] = None,
+    workers: int = 1,
+    ledger: Optional[ResultsStore] = None,
+    retry_pending: bool = False,
+) -> None:
+    """
+    Send ``drafts`` over ``transport`` with ``workers`` threads and per-agency
+    pacing. With a ``ledger`` each send is logged there first, and a draft the
+    ledger has as sent or pending (unless ``retry_pending``) is reported
+    SKIPPED instead.
+    """
+    queue = AgencyQueue(drafts, agency_limits or {}, agency_per_minute)
+
+    def deliver(draft: Draft) -> Tuple[str, str]:
+        status, detail = send_request(
+            transport,
+            lambda: build_message(
+                smtp_conf, draft.to, draft.subject, draft.body,
+                attachments=draft.attachments, cc=draft.cc, reply_to=draft.reply_to,
+            ),
+            ledger, draft.key, retry_pending=retry_pending,
+        )
+        if status == "ERROR":
+            logging.error(f"[{draft.state}] row {draft.row_index} → {draft.to}: {detail}")
+        return status, detail
+
+    def work() -> None:
+        # One bad draft (ledger, template or log error) must not end this sender thread.
+        while True:
+            item = queue.next()
+            if item is None:
+                return
+            draft, ready_at = item
+            delay = ready_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                status, detail = deliver(draft)
+            except Exception as e:
+                logging.exception(f"[{draft.state}] row {draft.row_index}: {e}")
+                status, detail = "ERROR", str(e)
+            try:
+                on_result(draft, status, detail)
+            except Exception:
+                logging.exception(f"[{draft.state}] row {draft.row_index}: could not log the {status} result")
+
+    threads = [threading.Thread(target=work, name=f"foia-mail-{n}") for n in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+# --- Sender helpers (shared with the state scripts) ---
+def read_table(path: str) -> pd.DataFrame:
+    """An opportunities sheet (.csv, .xlsx/.xlsm, or legacy .xls through xlrd)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        try:
+            return pd.read_csv(path)
+        except UnicodeDecodeError:
+            return pd.read_csv(path, encoding="latin-1")
+    if ext in {".xlsx", ".xlsm"}:
+        return pd.read_excel(path, engine="openpyxl")
+    if ext == ".xls":
+        try:
+            return pd.read_excel(path, engine="xlrd")
+        except ImportError as e:
+            raise RuntimeError(
+                "This .xls file requires xlrd>=2.0.1.\n"
+                "Install and retry:\n"
+                "  pip uninstall -y xlrd && pip install xlrd==2.0.1\n"
+                "Or Save As .xlsx and rerun."
+            ) from e
+    raise ValueError(f"Unsupported file type: {ext}. Use .csv, .xlsx, .xlsm, or .xls")
+
+
+def load_sent_row_indices(resume_log_path: str) -> Set[int]:
+    """Row indices a state script's earlier .xlsx log marked SENT (empty when it cannot be read)."""
+    try:
+        log = pd.read_excel(resume_log_path)
+        sent = log.loc[log["status"].astype(str).str.upper() == "SENT", "row_index"]
+        return set(int(i) for i in sent.dropna().tolist())
+    except Exception:
+        return set()
+
+
+# --- Dispatcher logs ---
+def load_sent(resume_log: str) -> Set[Tuple[str, int]]:
+    """(state, row_index) pairs a previous dispatcher log (.jsonl or .xlsx) marked SENT."""
+    if resume_log.endswith(".jsonl"):
+        rows = list(iter_jsonl(resume_log))
+    else:
+        try:
+            rows = pd.read_excel(resume_log).to_dict("records")
+        except Exception as e:
+            logging.warning(f"could not read resume log {resume_log}: {e}")
+            return set()
+    return {(str(r["state"]), int(r["row_index"])) for r in rows if str(r.get("status", "")).upper() == "SENT"}
+
+
+def parse_inputs(values: Sequence[str]) -> List[Tuple[str, str]]:
+    """``--input state=path`` values as (tenant key, path)."""
+    out = []
+    for v in values:
+        key, sep, path = v.partition("=")
+        key = key.strip().lower().replace(" ", "_")
+        if not sep or key not in TENANTS:
+            raise ValueError(f"--input expects STATE=PATH with STATE one of {', '.join(sorted(TENANTS))}: {v!r}")
+        out.append((key, path.strip()))
+    return out
+
+
+def print_preview(d: Draft) -> None:
+    print("\n" + "=" * 80)
+    print(f"[PREVIEW] {d.state} row {d.row_index}  (agency: {d.agency})")
+    print(f"TO: {d.to}")
+    if d.cc:
+        print(f"CC: {', '.join(d.cc)}")
+    print(f"SUBJECT: {d.subject}")
+    print("-" * 80)
+    print(d.body)
+    print("=" * 80)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Send the FOIA request emails of several states in one batch")
+    ap.add_argument("--input", action="append", default=[], help="STATE=PATH of a .xlsx/.csv (repeatable)")
+    ap.add_argument("--list", action="store_true", help="Print the registry and exit")
+    ap.add_argument("--send", action="store_true", help="Actually send (omit for a dry run with previews)")
+    ap.add_argument("--limit", type=int, default=0, help="If >0, only this many rows per state")
+    ap.add_argument("--skip-blank-rows", action="store_true", help="Skip rows that are entirely blank")
+    ap.add_argument("--to-override", help="Send every email to this address instead (testing)")
+    ap.add_argument("--cc", help="Comma-separated CC addresses for every email")
+    ap.add_argument("--attach-row", action="store_true", help="Attach the row as CSV where the template supports it")
+    ap.add_argument("--per-minute", type=float, default=DEFAULT_PER_MINUTE, help="Account budget: emails per minute overall")
+    ap.add_argument("--agency-per-minute", type=float, default=DEFAULT_AGENCY_PER_MINUTE, help="Emails per minute to one agency")
+    ap.add_argument("--connections", type=int, default=1, help="SMTP connections (and sender threads)")
+    ap.add_argument("--resume-log", help="Previous dispatcher log (.jsonl/.xlsx); rows it marked SENT are skipped")
+    ap.add_argument("--ledger", help="Submission ledger database (default: $FOIA_RESULTS_DB or results.db)")
+    ap.add_argument("--retry-pending", action="store_true",
+                    help="Also send requests whose earlier attempt has no recorded outcome (check the mailbox first)")
+    ap.add_argument("--log-out", help="Log path without extension (default: foia_send_log_<timestamp>)")
+    ap.add_argument("--ssl", action="store_true", help="Use SMTPS (SSL) on 465 instead of STARTTLS on 587")
+    ap.add_argument("--smtp-host", help="Override SMTP host")
+    ap.add_argument("--smtp-port", type=int, help="Override SMTP port")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.list:
+        for key, st in TENANTS.items():
+            print(f"{key:15} {st.name:15} {st.script}")
+        return
+    try:
+        inputs = parse_inputs(args.input)
+    except ValueError as e:
+        ap.error(str(e))
+    if not inputs:
+        ap.error("pass at least one --input STATE=PATH")
+
+    load_dotenv(override=True)
+    cc = [a.strip() for a in (args.cc or "").split(",") if a.strip()]
+    sent = load_sent(args.resume_log) if args.resume_log else set()
+    ledger = ResultsStore(args.ledger)
+
+    drafts: List[Draft] = []
+    agency_limits: Dict[str, float] = {}
+    for key, path in inputs:
+        state = TENANTS[key]
+        try:
+            df = load_template(state).read_table(path)
+            if args.skip_blank_rows:
+                df = df.dropna(how="all")
+            if args.limit > 0:
+                df = df.head(args.limit)
+            rendered = render_state(key, df, args.to_override, cc, args.attach_row)
+        except Exception as e:
+            logging.error(f"[{state.name}] could not render {path}: {e}")
+            continue
+        if state.per_minute:
+            agency_limits.update((d.agency, state.per_minute) for d in rendered)
+        done = ledger.sent_requests(state.name)
+        todo = [d for d in rendered if d.key not in done and (d.state, d.row_index) not in sent]
+        logging.info(f"[{state.name}] {len(todo)} emails ({len(rendered) - len(todo)} already sent) from {path}")
+        drafts.extend(todo)
+
+    if not args.send:
+        for d in drafts:
+            print_preview(d)
+        agencies = sorted({d.agency for d in drafts})
+        logging.info(f"Dry run: {len(drafts)} emails to {len(agencies)} agencies ({', '.join(agencies)}); add --send")
+        return
+    if not drafts:
+        logging.info("Nothing to send.")
+        return
+
+    log_base = args.log_out or f"foia_send_log_{datetime.now():%Y%m%d_%H%M%S}"
+    log = JsonlWriter(f"{log_base}.jsonl", fsync_every=1)
+    results: List[Dict[str, Any]] = []
+
+    def on_result(d: Draft, status: str, error: str) -> None:
+        rec = {
+            "state": d.state, "row_index": d.row_index, "notice_id": d.notice_id, "agency": d.agency, "to": d.to,
+            "subject": d.subject, "status": status, "error": error,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        }
+        log.write(rec)
+        results.append(rec)
+        print(f"[{status}] {d.state} row {d.row_index} → {d.to}")
+
+    smtp_conf = load_smtp(args.smtp_host, args.smtp_port)
+    with SmtpTransport(smtp_conf, prefer_ssl=args.ssl, connections=args.connections,
+                       per_minute=args.per_minute) as transport:
+        try:
+            dispatch(drafts, transport, smtp_conf, on_result,
+                     agency_per_minute=args.agency_per_minute, agency_limits=agency_limits,
+                     workers=args.connections, ledger=ledger, retry_pending=args.retry_pending)
+        finally:
+            log.close()
+            ledger.close()
+            if results:
+                pd.DataFrame(results).to_excel(f"{log_base}.xlsx", index=False)
+    ok = sum(r["status"] == "SENT" for r in results)
+    logging.info(f"{ok}/{len(drafts)} sent; log → {log_base}.jsonl / .xlsx")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Submit plain-HTML records-request forms over HTTP instead of a browser.
+
+Several FOIA portals are ordinary server-rendered forms (Drupal webforms,
+Gravity Forms) that the scripts fill field by field in a browser. A form is
+recorded once:
+
+    python -m common.form_post record https://lla.la.gov/public-records-request --out la_form.json
+
+which saves the action URL, method, encoding and every field (name, element
+id, kind, default value, select options), lists the hidden token fields
+(``form_build_id``, ``form_token``, Gravity ``state_N`` ...) and says whether
+the form can be posted directly. It cannot when the page carries a CAPTCHA,
+sits behind a login, or is only submitted by JavaScript; those scripts keep
+their browser.
+
+Later submissions:
+
+    poster = FormPoster(load_spec("la_form.json"), refresh=create_driver)
+    poster.submit({"name1": FULL_NAME, "email": EMAIL, ...})   # by field name or element id
+
+Each submit GETs the form page on a pooled session for fresh hidden tokens
+(one small request, nothing rendered), fills in the values and POSTs. When the
+page no longer has the form, or the POST is refused (403/419, an outdated
+token), ``refresh`` -- a callable returning a WebDriver -- loads the page once
+in a browser, its cookies and user agent are copied into the session, and the
+submission is tried again.
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from common.extract import PARSER
+from common.http import create_session, host_rate_limiter
+from common.instrument import instrument_session, timed
+
+CAPTCHA_MARKERS: Tuple[Tuple[str, str], ...] = (
+    ("g-recaptcha", "reCAPTCHA"),
+    ("recaptcha/api.js", "reCAPTCHA"),
+    ("h-captcha", "hCaptcha"),
+    ("hcaptcha.com", "hCaptcha"),
+    ("cf-turnstile", "Turnstile"),
+    ("challenges.cloudflare.com/turnstile", "Turnstile"),
+    ("captcha", "CAPTCHA"),
+)
+CONFIRM_CSS = (".webform-confirmation, .webform-confirmation__message, .messages--status, "
+               ".gform_confirmation_message, .alert-success")
+ERROR_CSS = (".messages--error, .messages.error, .gform_validation_errors, .validation_message, "
+             ".form-error, .alert-danger")
+STALE_MARKERS = ("form has become outdated", "session has expired", "invalid csrf", "csrf token mismatch")
+REFRESH_STATUS = {403, 419}
+SKIP_KINDS = {"submit", "button", "image", "reset", "file"}
+
+
+class FormPostError(RuntimeError):
+    pass
+
+
+# --- Recorded forms ---
+@dataclass(frozen=True)
+class FormField:
+    name: str
+    id: str = ""
+    kind: str = "text"                  # input type, or "select" / "textarea"
+    value: str = ""
+    checked: bool = False
+    required: bool = False
+    options: Tuple[Tuple[str, str], ...] = ()   # select: (value, label)
+
+    def option_value(self, wanted: str) -> str:
+        """A select value given its value or visible label."""
+        for value, label in self.options:
+            if wanted in (value, label):
+                return value
+        return wanted
+
+
+@dataclass(frozen=True)
+class FormSpec:
+    url: str
+    action: str
+    method: str = "post"
+    enctype: str = "application/x-www-form-urlencoded"
+    selector: Optional[str] = None      # CSS selector of the form on its page
+    fields: Tuple[FormField, ...] = ()
+    submit: Optional[Tuple[str, str]] = None    # (name, value) of the submit button
+    blocker: Optional[str] = None       # why the form cannot be posted directly
+    success: Tuple[str, ...] = ()       # text expected in the confirmation page
+    recorded_at: str = ""
+
+    @property
+    def direct(self) -> bool:
+        return self.blocker is None
+
+    @property
+    def tokens(self) -> List[str]:
+        return [f.name for f in self.fields if f.kind == "hidden"]
+
+    def field(self, key: str) -> Optional[FormField]:
+        for f in self.fields:
+            if key in (f.id, f.name):
+                return f
+        return None
+
+
+def save_spec(spec: FormSpec, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(asdict(spec), f, indent=2)
+
+
+def load_spec(path: str) -> FormSpec:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    raw["fields"] = tuple(
+        FormField(**{**fd, "options": tuple(tuple(o) for o in fd.get("options", ()))}) for fd in raw.get("fields", ())
+    )
+    raw["submit"] = tuple(raw["submit"]) if raw.get("submit") else None
+    raw["success"] = tuple(raw.get("success", ()))
+    return FormSpec(**raw)
+
+
+# --- Parsing ---
+def _pick_form(soup: BeautifulSoup, selector: Optional[str]):
+    if selector:
+        return soup.select_one(selector)
+    forms = soup.find_all("form")
+    visible = lambda form: len(form.select("input:not([type=hidden]), textarea, select"))
+    return max(forms, key=visible, default=None)
+
+
+def _fields(form) -> Tuple[List[FormField], Optional[Tuple[str, str]]]:
+    fields: List[FormField] = []
+    submit: Optional[Tuple[str, str]] = None
+    for el in form.find_all(["input", "textarea", "select", "button"]):
+        name = el.get("name") or ""
+        kind = el.name if el.name in ("textarea", "select") else (el.get("type") or "text").lower()
+        if el.name == "button":
+            kind = (el.get("type") or "submit").lower()
+        if kind == "submit" and submit is None and name:
+            submit = (name, el.get("value") or el.get_text(strip=True))
+        if not name or kind in SKIP_KINDS:
+            continue
+        options: Tuple[Tuple[str, str], ...] = ()
+        if kind == "select":
+            opts = el.find_all("option")
+            options = tuple((o.get("value", o.get_text(strip=True)), o.get_text(strip=True)) for o in opts)
+            chosen = next((o for o in opts if o.has_attr("selected")), opts[0] if opts else None)
+            value = chosen.get("value", chosen.get_text(strip=True)) if chosen is not None else ""
+        elif kind == "textarea":
+            value = el.get_text()
+        else:
+            value = el.get("value", "on" if kind in ("checkbox", "radio") else "")
+        fields.append(FormField(
+            name=name, id=el.get("id") or "", kind=kind, value=value, checked=el.has_attr("checked"),
+            required=el.has_attr("required") or el.get("aria-required") == "true", options=options,
+        ))
+    return fields, submit
+
+
+def _blocker(html: str, form, page_url: str, url: str) -> Optional[str]:
+    lowered = html.lower()
+    for marker, name in CAPTCHA_MARKERS:
+        if marker in lowered:
+            return f"{name} on the page"
+    if "login" in urlparse(page_url).path.lower() and "login" not in urlparse(url).path.lower():
+        return "login required"
+    if not form.select("[type=submit], button:not([type])"):
+        return "no submit button (submitted by JavaScript)"
+    return None
+
+
+def parse_form(html: str, url: str, selector: Optional[str] = None, page_url: Optional[str] = None,
+               success: Sequence[str] = ()) -> FormSpec:
+    """The form of a page (``selector``, or the one with the most visible fields)."""
+    soup = BeautifulSoup(html, PARSER)
+    form = _pick_form(soup, selector)
+    if form is None:
+        raise FormPostError(f"no form in the HTML of {url} (rendered by JavaScript?)")
+    fields, submit = _fields(form)
+    if selector is None:
+        if form.get("id"):
+            selector = f"form#{form['id']}"
+        elif form.get("action"):
+            selector = f"form[action=\"{form['action']}\"]"
+    return FormSpec(
+        url=url,
+        action=urljoin(page_url or url, form.get("action") or (page_url or url)),
+        method=(form.get("method") or "get").lower(),
+        enctype=(form.get("enctype") or "application/x-www-form-urlencoded").lower(),
+        selector=selector,
+        fields=tuple(fields),
+        submit=submit,
+        blocker=_blocker(html, form, page_url or url, url),
+        success=tuple(success),
+        recorded_at=datetime.now().isoformat(timespec="seconds"),
+    )
+
+
+def record_form(url: str, selector: Optional[str] = None, session: Optional[requests.Session] = None,
+                driver=None, success: Sequence[str] = ()) -> FormSpec:
+    """Fetch ``url`` (or read ``driver``'s current page) and parse its form."""
+    if driver is not None:
+        return parse_form(driver.page_source, url, selector, driver.current_url, success)
+    resp = (session or create_session()).get(url, timeout=30)
+    resp.raise_for_status()
+    return parse_form(resp.text, url, selector, resp.url, success)
+
+
+# --- Submitting ---
+class FormPoster:
+    """
+    Post a recorded form with per-row values. Thread-safe; rows share one
+    pooled session. ``per_minute`` caps submissions to the form's host.
+    """
+
+    def __init__(
+        self,
+        spec: FormSpec,
+        session: Optional[requests.Session] = None,
+        refresh: Optional[Callable[[], Any]] = None,
+        per_minute: Optional[float] = None,
+        state: Optional[str] = None,
+    ):
+        if not spec.direct:
+            raise FormPostError(f"{spec.url} cannot be posted directly: {spec.blocker}")
+        self.spec = spec
+        self.session = instrument_session(session or create_session(), state)
+        self.refresh = refresh
+        self.state = state
+        self._budget = host_rate_limiter(spec.action, per_minute / 60.0, capacity=1) if per_minute else None
+        self._refresh_lock = threading.Lock()
+        self._warned = False
+
+    def refresh_session(self) -> None:
+        """Load the form in a browser and take over its cookies and user agent."""
+        if self.refresh is None:
+            raise FormPostError(f"{self.spec.url}: session refused and no browser to refresh it")
+        with self._refresh_lock, timed("form.refresh", self.state):
+            driver = self.refresh()
+            try:
+                driver.get(self.spec.url)
+                self.session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+                for c in driver.get_cookies():
+                    self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+            finally:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+        logging.info(f"[form] session refreshed from a browser for {self.spec.url}")
+
+    def _fresh_form(self) -> FormSpec:
+        resp = self.session.get(self.spec.url, timeout=30)
+        resp.raise_for_status()
+        fresh = parse_form(resp.text, self.spec.url, self.spec.selector, resp.url)
+        if not self._warned and {f.name for f in fresh.fields} != {f.name for f in self.spec.fields}:
+            self._warned = True
+            logging.warning(f"[form] fields of {self.spec.url} changed since {self.spec.recorded_at}; re-record it")
+        return fresh
+
+    @staticmethod
+    def payload(form: FormSpec, values: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Form data: the page's defaults and tokens, overridden by ``values``."""
+        data: Dict[str, List[str]] = {}
+        for f in form.fields:
+            if f.kind in ("checkbox", "radio"):
+                data.setdefault(f.name, [])
+                if f.checked:
+                    data[f.name].append(f.value)
+            else:
+                data[f.name] = [f.value]
+        for key, value in values.items():
+            f = form.field(key)
+            if f is None:
+                raise FormPostError(f"{key!r} is not a field of the form at {form.url}")
+            if f.kind == "radio":
+                data[f.name] = [str(value) if key == f.name else f.value] if value else []
+            elif f.kind == "checkbox":
+                chosen = data[f.name]
+                if value and f.value not in chosen:
+                    chosen.append(f.value)
+                elif not value and f.value in chosen:
+                    chosen.remove(f.value)
+            elif f.kind == "select":
+                data[f.name] = [f.option_value(str(value))]
+            else:
+                data[f.name] = ["" if value is None else str(value)]
+        pairs = [(name, v) for name, vs in data.items() for v in vs]
+        if form.submit:
+            pairs.append(form.submit)
+        return pairs
+
+    def _post(self, form: FormSpec, pairs: List[Tuple[str, str]]) -> requests.Response:
+        headers = {"Referer": self.spec.url, "Origin": "{0.scheme}://{0.netloc}".format(urlparse(self.spec.url))}
+        if form.method == "get":
+            return self.session.get(form.action, params=pairs, headers=headers, timeout=60)
+        if form.enctype.startswith("multipart"):
+            files = [(name, (None, value)) for name, value in pairs]
+            return self.session.post(form.action, files=files, headers=headers, timeout=60)
+        return self.session.post(form.action, data=pairs, headers=headers, timeout=60)
+
+    def _outcome(self, resp: requests.Response) -> str:
+        soup = BeautifulSoup(resp.text, PARSER)
+        errors = [e.get_text(" ", strip=True) for e in soup.select(ERROR_CSS)]
+        errors = [e for e in errors if e]
+        if errors:
+            raise FormPostError("Form Rejected: " + "; ".join(errors))
+        text = soup.get_text(" ", strip=True)
+        for needle in self.spec.success:
+            if needle.lower() in text.lower():
+                return needle
+        confirm = [e.get_text(" ", strip=True) for e in soup.select(CONFIRM_CSS)]
+        confirm = [c for c in confirm if c]
+        if confirm:
+            return confirm[0]
+        if self.spec.selector and soup.select_one(self.spec.selector) is not None:
+            raise FormPostError("the form came back without a confirmation")
+        return "Submitted (no confirmation message detected)"
+
+    def submit(self, values: Dict[str, Any]) -> str:
+        """Post one request; returns the confirmation text or raises ``FormPostError``."""
+        for attempt in (0, 1):
+            try:
+                form = self._fresh_form()
+            except (FormPostError, requests.HTTPError) as e:
+                if attempt or self.refresh is None:
+                    raise FormPostError(f"{self.spec.url}: form page unavailable: {e}") from e
+                self.refresh_session()
+                continue
+            pairs = self.payload(form, values)
+            if self._budget is not None:
+                self._budget.acquire()
+            with timed("form.post", self.state):
+                resp = self._post(form, pairs)
+            stale = any(m in resp.text.lower() for m in STALE_MARKERS)
+            if (resp.status_code in REFRESH_STATUS or stale) and not attempt and self.refresh is not None:
+                self.refresh_session()
+                continue
+            if resp.status_code >= 400:
+                raise FormPostError(f"{form.action}: HTTP {resp.status_code}")
+            return self._outcome(resp)
+        raise FormPostError(f"{self.spec.url}: session refused after a browser refresh")
+
+
+# --- CLI ---
+def _describe(spec: FormSpec) -> None:
+    print(f"{spec.method.upper()} {spec.action} ({spec.enctype})")
+    for f in spec.fields:
+        flags = "".join((" required" if f.required else "", " checked" if f.checked else ""))
+        value = re.sub(r"\s+", " ", f.value)[:40]
+        print(f"  {f.kind:<10} {f.name:<45} id={f.id or '-':<30} {value!r}{flags}")
+        for v, label in f.options[:10]:
+            print(f"  {'':<10} option {v!r}: {label}")
+    print(f"tokens: {', '.join(spec.tokens) or '-'}")
+    print(f"submit: {spec.submit or '-'}")
+    print("direct HTTP: " + ("yes" if spec.direct else f"no ({spec.blocker})"))
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Record records-request forms for direct HTTP submission.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="fetch a form page and save its form")
+    rec.add_argument("url")
+    rec.add_argument("--form", help="CSS selector of the form (default: the one with the most fields)")
+    rec.add_argument("--success", action="append", default=[], help="text of the confirmation page (repeatable)")
+    rec.add_argument("--out", help="JSON file for the recorded form")
+    show = sub.add_parser("show", help="print a recorded form")
+    show.add_argument("path")
+    args = parser.parse_args()
+
+    if args.cmd == "show":
+        _describe(load_spec(args.path))
+        return
+    spec = record_form(args.url, args.form, success=args.success)
+    _describe(spec)
+    if args.out:
+        save_spec(spec, args.out)
+        print(f"saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Concurrent submission of FOIA web forms.
+
+The web-form submitters (Alabama, Pennsylvania, Arizona, Georgia, Louisiana,
+North Dakota) filled one form at a time in one browser. ``FormRunner`` spreads
+the rows over the browsers of a ``BrowserPool`` (each with its own profile;
+cookies and storage are cleared between rows, so no row sees another row's
+session):
+
+- at most ``per_portal`` forms of one portal (the host of the form URL) are in
+  flight, shared by every runner in the process, and rows start at least
+  ``portal_gap`` seconds apart on one portal
+- each row's state is appended to ``state_path`` (JSONL) as it changes:
+  ``started`` once its browser is up and before its form is opened, then
+  ``done`` with the script's result, or ``failed`` (also when the browser
+  does not start). A restarted run returns the stored results of done
+  rows without opening a browser and tries failed rows again. A row left
+  ``started`` by a crash may or may not have reached the agency, so it is
+  reported and skipped unless ``retry_uncertain`` is set.
+- a row whose submit raises, or whose result ``retry`` flags, is tried again
+  on a fresh browser, up to ``retries`` times; if it still fails it is
+  recorded ``failed`` (a flagged result is still returned); so is a result
+  ``accepted`` rejects (a form the portal refused), without a retry
+- with ``browserless=True`` no browser is started and ``submit`` gets None
+  for the driver (rows posted over HTTP, see ``common.form_post``); state,
+  retries and portal limits work the same
+- with a ``ledger`` (``common.store.ResultsStore``) every attempt and outcome
+  is also logged to the shared submission ledger, keyed by (state, agency --
+  the portal host unless given --, the row key, hash of ``template(row)``).
+  A request the ledger knows goes by the ledger, not the state file: sent
+  requests are not submitted again, whatever state file or script sent them
+  (their stored result is returned), failed ones are tried again, and one
+  left pending is treated like a ``started`` row.
+- ``prompt`` serializes console questions ("solve the CAPTCHA, then press
+  Enter") across workers: one question at a time while the other browsers
+  keep filling their forms
+
+Usage:
+    runner = FormRunner("Arizona", submit_one_row, portal=FORM_URL,
+                        key=lambda row: row["Code"], state_path="az_form_state.jsonl",
+                        workers=3, launcher=lambda *_: start_driver())
+    results = runner.run([row for _, row in df.iterrows()])
+
+    # with the shared ledger, the request text identifies the request
+    runner = FormRunner(..., ledger=ResultsStore(), template=lambda row: build_summary(...))
+"""
+
+import dataclasses
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from common.browser_pool import BrowserPool
+from common.http import host_rate_limiter
+from common.instrument import timed
+from common.jsonl import JsonlWriter, iter_jsonl
+from common.store import RequestKey, ResultsStore, notice_id_of
+
+DEFAULT_WORKERS = 3
+DEFAULT_PER_PORTAL = 2
+
+_portal_slots: Dict[str, threading.BoundedSemaphore] = {}
+_portal_lock = threading.Lock()
+_prompt_lock = threading.Lock()
+
+
+def _host(url_or_host: str) -> str:
+    return (urlparse(url_or_host).hostname or url_or_host).lower()
+
+
+def portal_slots(url_or_host: str, limit: int) -> threading.BoundedSemaphore:
+    """Process-wide semaphore for one portal host (the first caller's ``limit`` wins)."""
+    host = _host(url_or_host)
+    with _portal_lock:
+        if host not in _portal_slots:
+            _portal_slots[host] = threading.BoundedSemaphore(max(1, limit))
+        return _portal_slots[host]
+
+
+def prompt(message: str, driver=None) -> str:
+    """``input(message)``, one worker at a time; raises ``driver``'s window first."""
+    with _prompt_lock:
+        if driver is not None:
+            try:
+                driver.maximize_window()
+            except Exception:
+                pass
+        return input(message)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _jsonable(result: Any) -> Any:
+    if dataclasses.is_dataclass(result) and not isinstance(result, type):
+        return dataclasses.asdict(result)
+    if hasattr(result, "to_dict"):         # a pandas Series
+        return result.to_dict()
+    return result
+
+
+def load_states(path: str) -> Dict[str, Dict[str, Any]]:
+    """Last recorded event per row key of a state file."""
+    last: Dict[str, Dict[str, Any]] = {}
+    for event in iter_jsonl(path):
+        if "key" in event:
+            last[str(event["key"])] = event
+    return last
+
+
+class FormRunner:
+    """
+    Submit rows with ``submit(driver, row, row_num)`` on up to ``workers``
+    browsers. ``key(row)`` identifies a row across runs; when it is empty the
+    row's notice id column is used, and a row with neither is skipped (its
+    result is None), since a position would name another request on the next
+    run. ``on_result(row, result)`` runs in the worker
+    thread after each finished row. Remaining keyword arguments go to
+    ``BrowserPool`` (``launcher``, ``browser``, ``block``, ...); browsers are
+    visible unless ``headless=True`` is passed.
+
+    ``accepted(result)`` tells whether the agency got the request; without it
+    every result that is not flagged for ``retry`` counts.
+    ``template(row)`` is the request text sent for a row (part of its ledger
+    key) and ``confirmation(result)`` the agency's confirmation to log for a
+    sent row; both only matter with a ``ledger``.
+    """
+
+    def __init__(
+        self,
+        state: str,
+        submit: Callable[[Any, Any, int], Any],
+        portal: str,
+        key: Callable[[Any], Any],
+        state_path: str,
+        workers: int = DEFAULT_WORKERS,
+        per_portal: int = DEFAULT_PER_PORTAL,
+        portal_gap: float = 0.0,
+        retries: int = 1,
+        retry: Optional[Callable[[Any], bool]] = None,
+        retry_uncertain: bool = False,
+        on_result: Optional[Callable[[Any, Any], None]] = None,
+        accepted: Optional[Callable[[Any], bool]] = None,
+        browserless: bool = False,
+        ledger: Optional[ResultsStore] = None,
+        agency: str = "",
+        template: Optional[Callable[[Any], str]] = None,
+        confirmation: Optional[Callable[[Any], Any]] = None,
+        **pool_kwargs: Any,
+    ):
+        self.state = state
+        self.submit = submit
+        self.portal = portal
+        self.key = key
+        self.state_path = state_path
+        self.workers = max(1, workers)
+        self.per_portal = max(1, per_portal)
+        self.portal_gap = portal_gap
+        self.retries = max(0, retries)
+        self.retry = retry
+        self.retry_uncertain = retry_uncertain
+        self.on_result = on_result
+        self.accepted = accepted
+        self.browserless = browserless
+        self.ledger = ledger
+        self.agency = agency or _host(portal)
+        self.template = template
+        self.confirmation = confirmation
+        self.channel = "http_form" if browserless else "web_form"
+        pool_kwargs.setdefault("headless", False)
+        self.pool_kwargs = pool_kwargs
+        self.stats = {"done": 0, "failed": 0, "resumed": 0, "uncertain": 0, "skipped": 0, "retries": 0}
+        self._lock = threading.Lock()
+
+    def _row_key(self, row: Any) -> str:
+        """``key(row)``, else the row's notice id; "" when it has neither."""
+        for k in (self.key(row), notice_id_of(row) if hasattr(row, "keys") else ""):
+            k = "" if k is None else str(k).strip()
+            if k and k.lower() != "nan":
+                return k
+        return ""
+
+    def _request_key(self, row: Any, k: str) -> Optional[RequestKey]:
+        if self.ledger is None:
+            return None
+        text = self.template(row) if self.template else ""
+        return RequestKey.of(self.state, self.agency, k, text, row)
+
+    def _ledger_event(self, rkey: Optional[RequestKey]) -> Optional[Dict[str, Any]]:
+        """The ledger's state of a request as a state-file event (None if it never saw it)."""
+        req = self.ledger.request(rkey) if rkey is not None else None
+        if req is None:
+            return None
+        phase = {"sent": "done", "pending": "started"}.get(req["status"], "failed")
+        try:
+            result = json.loads(req["detail"] or "null")
+        except ValueError:
+            result = req["detail"]
+        return {"phase": phase, "result": result if phase == "done" else None}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def run(self, rows: Sequence[Any]) -> List[Any]:
+        """Results in row order: the script's result, or None for failed and skipped rows."""
+        previous = load_states(self.state_path)
+        results: List[Any] = [None] * len(rows)
+        todo: List[Tuple[int, str, Any, Optional[RequestKey]]] = []
+        for n, row in enumerate(rows):
+            k = self._row_key(row)
+            if not k:
+                logging.warning(f"[{self.state}] row {n + 1}: no key or notice id, skipped")
+                self._count("skipped")
+                continue
+            rkey = self._request_key(row, k)
+            event = self._ledger_event(rkey) or previous.get(k, {})
+            if event.get("phase") == "done":
+                results[n] = event.get("result")
+                self._count("resumed")
+            elif event.get("phase") == "started" and not self.retry_uncertain:
+                logging.warning(f"[{self.state}] {k}: interrupted mid-submission in an earlier run; "
+                                f"check the portal, then rerun with retry_uncertain to resubmit")
+                self._count("uncertain")
+            else:
+                todo.append((n, k, row, rkey))
+        if self.stats["resumed"]:
+            where = "the ledger or " if self.ledger is not None else ""
+            logging.info(f"[{self.state}] {self.stats['resumed']} rows already done in {where}{self.state_path}")
+        if not todo:
+            return results
+
+        log = JsonlWriter(self.state_path, fsync_every=1)
+        size = min(self.workers, self.per_portal, len(todo))
+        pool = None if self.browserless else BrowserPool(size=size, **self.pool_kwargs)
+        try:
+            with ThreadPoolExecutor(max_workers=size, thread_name_prefix="form") as ex:
+                futures = {ex.submit(self._one, pool, log, n, k, row, rkey): n for n, k, row, rkey in todo}
+                for fut in as_completed(futures):
+                    n = futures[fut]
+                    try:
+                        results[n] = fut.result()
+                    except Exception:
+                        logging.exception(f"[{self.state}] row {n + 1}: not finished")
+                        self._count("failed")
+        finally:
+            log.close()
+            if pool is not None:
+                pool.close()
+        s = self.stats
+        logging.info(f"[{self.state}] {s['done']} done, {s['failed']} failed, {s['resumed']} resumed, "
+                     f"{s['uncertain']} uncertain, {s['skipped']} skipped, {s['retries']} retries")
+        return results
+
+    def _attempt(self, pool: Optional[BrowserPool], row: Any, n: int,
+                 begin: Callable[[], bool]) -> Optional[Tuple[Any, Optional[Exception], bool]]:
+        """
+        One submission: (result, error, failed), or None when ``begin()``
+        declines the row. ``begin`` runs once the browser is up, so a browser
+        that fails to launch leaves nothing ``started``.
+        """
+        if pool is None:
+            if not begin():
+                return None
+            try:
+                with timed("form.submit", self.state):
+                    result = self.submit(None, row, n + 1)
+            except Exception as e:
+                return None, e, True
+            return result, None, self.retry is not None and self.retry(result)
+        with pool.browser() as b:
+            if not begin():
+                return None
+            result, error = None, None
+            try:
+                with timed("form.submit", self.state):
+                    result = self.submit(b.driver, row, n + 1)
+            except Exception as e:
+                error = e
+            failed = error is not None or (self.retry is not None and self.retry(result))
+            if failed:
+                b.discard()
+        return result, error, failed
+
+    def _finish(self, rkey: Optional[RequestKey], failed: bool, result: Any, error: Optional[Exception]) -> None:
+        """Log an attempt's outcome to the ledger; the result is kept as the detail."""
+        if rkey is None:
+            return
+        detail = str(error) if error is not None else json.dumps(_jsonable(result), ensure_ascii=False, default=str)
+        confirmation = ""
+        if not failed and self.confirmation is not None:
+            confirmation = str(self.confirmation(result) or "")
+        self.ledger.finish_request(rkey, "failed" if failed else "sent", confirmation=confirmation,
+                                   detail=detail, channel=self.channel)
+
+    def _one(self, pool: Optional[BrowserPool], log: JsonlWriter, n: int, k: str, row: Any,
+             rkey: Optional[RequestKey] = None) -> Any:
+        slots = portal_slots(self.portal, self.per_portal)
+        attempt = 0
+        while True:
+            begun = False
+
+            def begin() -> bool:
+                nonlocal begun
+                if rkey is not None and not self.ledger.begin_request(
+                        rkey, self.channel, retry_pending=self.retry_uncertain or attempt > 0):
+                    return False
+                begun = True
+                log.write({"key": k, "row": n + 1, "phase": "started", "attempt": attempt, "at": _now()})
+                return True
+
+            with slots:
+                if self.portal_gap > 0:
+                    host_rate_limiter(self.portal, 1.0 / self.portal_gap, capacity=1).acquire()
+                try:
+                    outcome = self._attempt(pool, row, n, begin)
+                except Exception as e:      # the browser did not start (or close)
+                    outcome = None, e, True
+                if outcome is None:
+                    event = self._ledger_event(rkey)
+                    sent = event["phase"] == "done"
+                    logging.warning(f"[{self.state}] {k}: {'sent' if sent else 'pending'} in the ledger "
+                                    f"by another run; skipped")
+                    self._count("resumed" if sent else "uncertain")
+                    return event["result"]
+                result, error, failed = outcome
+                rejected = not failed and self.accepted is not None and not self.accepted(result)
+                if begun:
+                    self._finish(rkey, failed or rejected, result, error)
+            if failed and attempt < self.retries:
+                attempt += 1
+                self._count("retries")
+                logging.warning(f"[{self.state}] {k}: attempt {attempt} failed ({error or 'retryable result'}); retrying")
+                continue
+            if error is not None:
+                logging.error(f"[{self.state}] {k}: {error}")
+                log.write({"key": k, "row": n + 1, "phase": "failed", "attempt": attempt,
+                           "error": str(error), "at": _now()})
+                self._count("failed")
+                return None
+            result = _jsonable(result)
+            phase = "failed" if failed or rejected else "done"
+            log.write({"key": k, "row": n + 1, "phase": phase, "attempt": attempt, "result": result, "at": _now()})
+            self._count(phase)
+            if self.on_result:
+                try:
+                    self.on_result(row, result)
+                except Exception:
+                    logging.exception(f"[{self.state}] {k}: on_result failed")
+            return result
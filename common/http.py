@@ -0,0 +1,98 @@
+"""
+HTTP helpers shared by the request-based scrapers.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+)
+
+
+def create_session(
+    headers: Optional[Dict[str, str]] = None,
+    retries: int = 3,
+    backoff_factor: float = 1,
+    pool_size: int = 20,
+) -> requests.Session:
+    """
+    Create a requests session with retries and a connection pool large enough
+    to be shared by a thread pool of ``pool_size`` workers.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": DEFAULT_USER_AGENT})
+    if headers:
+        session.headers.update(headers)
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS"]),
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# --- Rate limiting ---
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``.
+    ``acquire`` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def limit(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Lower the rate (and burst) to at most ``rate`` (``capacity``); never raises them."""
+        with self._lock:
+            self.rate = min(self.rate, float(rate))
+            if capacity is not None:
+                self.capacity = min(self.capacity, float(capacity))
+                self._tokens = min(self._tokens, self.capacity)
+
+
+_HOST_BUCKETS: Dict[str, TokenBucket] = {}
+_HOST_BUCKETS_LOCK = threading.Lock()
+
+
+def host_rate_limiter(url_or_host: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """
+    Shared per-host bucket, so every client in the process that talks to the
+    same host draws from one budget. Each caller's ``rate`` is a ceiling: when
+    callers ask for different rates the bucket runs at the lowest of them.
+    """
+    host = urlparse(url_or_host).netloc or url_or_host
+    with _HOST_BUCKETS_LOCK:
+        if host not in _HOST_BUCKETS:
+            _HOST_BUCKETS[host] = TokenBucket(rate, capacity)
+        else:
+            _HOST_BUCKETS[host].limit(rate, capacity)
+        return _HOST_BUCKETS[host]
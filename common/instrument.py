@@ -0,0 +1,308 @@
+"""
+Hot-path timing for the scrapers: where does a run spend its time?
+
+Every timed operation is recorded under ``(state, op)``; the report gives per
+operation count, errors, total/mean/p50/p95/max seconds, sorted by total time,
+so "is Nevada slow because of paging, attachments or saving?" is one look:
+
+    page_load            ``driver.get`` (``instrument_driver``)
+    webdriver.<command>  every other WebDriver command (findElement, click, ...)
+    http.<host>          requests made through an ``instrument_session`` session
+    wait.<name>          the condition waits of ``common.waits``
+    download.browser     ``DownloadTracker.wait_for`` (click to file on disk)
+    download.http        ``common.downloader.download``
+    write.<kind>         CheckpointSink flush / write_json / write_xlsx
+    anything else        ``with timed("paginate"):`` / ``@timed("save_progress")``
+
+Recording is always on and costs a lock and a list append; nothing is written
+unless a report path is configured, either in code or through the environment
+(the runner sets these per job):
+
+    SCRAPER_METRICS            report path, written at exit (JSON)
+    SCRAPER_METRICS_STATE      state name for operations recorded outside
+                               ``state_scope``
+    SCRAPER_METRICS_SNAPSHOT   also rewrite the report every N seconds while
+                               the run is going (a killed run keeps its numbers)
+
+Usage:
+    configure("Nevada", "nevada_metrics.json", snapshot_every=60)
+    drv = instrument_driver(build_driver(...))
+    with timed("paginate"):
+        paginator_click_next_and_wait(drv, table, pager_root)
+    log_summary()
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+MAX_SAMPLES = 5000   # per (state, op); older samples are replaced at random past this
+DEFAULT_STATE = "-"
+
+_local = threading.local()
+
+
+# --- Recorder ---
+class _Op:
+    __slots__ = ("count", "errors", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, seconds: float, ok: bool) -> None:
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:                                   # reservoir sampling keeps the percentiles unbiased
+            i = random.randrange(self.count)
+            if i < MAX_SAMPLES:
+                self.samples[i] = seconds
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Recorder:
+    """Thread-safe timings per (state, operation)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[Tuple[str, str], _Op] = {}
+        self.started = time.time()
+        self.state = os.environ.get("SCRAPER_METRICS_STATE") or DEFAULT_STATE
+
+    def record(self, op: str, seconds: float, ok: bool = True, state: Optional[str] = None) -> None:
+        key = (state or current_state() or self.state, op)
+        with self._lock:
+            entry = self._ops.get(key)
+            if entry is None:
+                entry = self._ops[key] = _Op()
+            entry.add(seconds, ok)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """``{state: {op: {count, errors, total, mean, p50, p95, max}}}``, ops by total time."""
+        with self._lock:
+            items = [(k, op.count, op.errors, op.total, op.max, sorted(op.samples)) for k, op in self._ops.items()]
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (state, name), count, errors, total, peak, ordered in sorted(items, key=lambda i: -i[3]):
+            out.setdefault(state, {})[name] = {
+                "count": count, "errors": errors, "total": round(total, 3),
+                "mean": round(total / count, 4) if count else 0.0,
+                "p50": round(_percentile(ordered, 0.50), 4), "p95": round(_percentile(ordered, 0.95), 4),
+                "max": round(peak, 4),
+            }
+        return out
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "wall_seconds": round(time.time() - self.started, 1),
+            "pid": os.getpid(),
+            "states": self.summary(),
+        }
+
+    def write(self, path: str) -> str:
+        """Write the report atomically (snapshots never leave a half-written file)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp, path)
+        return path
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+        self.started = time.time()
+
+
+RECORDER = Recorder()
+
+
+def record(op: str, seconds: float, ok: bool = True, state: Optional[str] = None) -> None:
+    RECORDER.record(op, seconds, ok, state)
+
+
+# --- Scoping ---
+def current_state() -> Optional[str]:
+    return getattr(_local, "state", None)
+
+
+@contextmanager
+def state_scope(state: str):
+    """Attribute operations of this thread to ``state`` (for multi-tenant engines)."""
+    previous = current_state()
+    _local.state = state
+    try:
+        yield
+    finally:
+        _local.state = previous
+
+
+class timed:
+    """
+    Time a block (``with timed("op"):``) or every call of a function
+    (``@timed("op")``). An exception counts as an error and is re-raised;
+    with ``ok`` a return value can flag an error too (e.g. ``ok=bool`` for
+    functions that return False on timeout).
+    """
+
+    def __init__(self, op: str, state: Optional[str] = None, ok: Optional[Callable[[Any], bool]] = None):
+        self.op, self.state, self.ok = op, state, ok
+
+    def __enter__(self) -> "timed":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        record(self.op, time.perf_counter() - self._start, exc_type is None, self.state)
+
+    def __call__(self, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True if self.ok is None else bool(self.ok(result))
+                return result
+            finally:
+                record(self.op, time.perf_counter() - start, ok, self.state)
+        return wrapper
+
+
+# --- Selenium / requests ---
+def instrument_driver(driver, state: Optional[str] = None):
+    """
+    Time every WebDriver command of ``driver`` (``get`` as ``page_load``).
+    Wraps the instance's ``execute`` only; returns the driver.
+    """
+    if getattr(driver, "_instrumented", False):
+        return driver
+    original = driver.execute
+
+    def execute(driver_command, params=None):
+        op = "page_load" if driver_command == "get" else f"webdriver.{driver_command}"
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = original(driver_command, params)
+            ok = True
+            return result
+        finally:
+            record(op, time.perf_counter() - start, ok, state)
+
+    driver.execute = execute
+    driver._instrumented = True
+    return driver
+
+
+def instrument_session(session, state: Optional[str] = None):
+    """
+    Record every response of ``session`` as ``http.<host>`` (time to headers,
+    ``Response.elapsed``; 4xx/5xx count as errors). Returns the session.
+    """
+    if getattr(session, "_instrumented", False):
+        return session
+
+    def hook(resp, *args, **kwargs):
+        host = (urlparse(resp.url).hostname or "unknown").lower()
+        record(f"http.{host}", resp.elapsed.total_seconds(), resp.status_code < 400, state)
+
+    session.hooks.setdefault("response", []).append(hook)
+    session._instrumented = True
+    return session
+
+
+# --- Reporting ---
+_config: Dict[str, Any] = {"path": None, "snapshot": None}
+
+
+def configure(state: Optional[str] = None, report_path: Optional[str] = None,
+              snapshot_every: Optional[float] = None) -> None:
+    """
+    Default state for unscoped operations, and where to write the report: at
+    exit, and every ``snapshot_every`` seconds while running.
+    """
+    if state:
+        RECORDER.state = state
+    if report_path:
+        if _config["path"] is None:
+            atexit.register(_write_at_exit)
+        _config["path"] = report_path
+    if snapshot_every and _config["snapshot"] is None and _config["path"]:
+        stop = threading.Event()
+        t = threading.Thread(target=_snapshots, args=(snapshot_every, stop), name="metrics-snapshot", daemon=True)
+        t.start()
+        _config["snapshot"] = stop
+
+
+def _snapshots(every: float, stop: threading.Event) -> None:
+    while not stop.wait(every):
+        try:
+            RECORDER.write(_config["path"])
+        except OSError as e:
+            logging.debug(f"metrics snapshot failed: {e}")
+
+
+def _write_at_exit() -> None:
+    if _config["snapshot"] is not None:
+        _config["snapshot"].set()
+    if _config["path"]:
+        try:
+            RECORDER.write(_config["path"])
+        except OSError as e:
+            logging.warning(f"could not write metrics report {_config['path']}: {e}")
+
+
+def write_report(path: Optional[str] = None) -> Optional[str]:
+    """Write the report now (to ``path`` or the configured one)."""
+    path = path or _config["path"]
+    return RECORDER.write(path) if path else None
+
+
+def log_summary(emit: Callable[[str], None] = logging.info, top: int = 10, prefix: str = "") -> None:
+    """The ``top`` operations by total time, per state (only those starting with ``prefix``)."""
+    for state, ops in RECORDER.summary().items():
+        ops = {name: st for name, st in ops.items() if name.startswith(prefix)}
+        for name, st in list(ops.items())[:top]:
+            emit(
+                f"[time] {state} {name}: {st['count']}x, {st['total']:.1f}s total, "
+                f"p50 {st['p50']:.2f}s, p95 {st['p95']:.2f}s, max {st['max']:.2f}s, {st['errors']} errors"
+            )
+
+
+def _configure_from_env() -> None:
+    path = os.environ.get("SCRAPER_METRICS")
+    if path:
+        try:
+            every = float(os.environ.get("SCRAPER_METRICS_SNAPSHOT") or 0)
+        except ValueError:
+            every = 0.0
+        configure(None, path, every or None)
+
+
+_configure_from_env()
@@ -0,0 +1,642 @@
+"""
+Ivalua buyer portal engine (``page.aspx/en/rfp/request_browse_public``).
+
+OhioBuys, Arizona APP and Maryland eMMA all run the same Ivalua ASP.NET
+application: one ``body_x_grid_grd`` results grid, ``iv-button`` links to the
+solicitation pages and ``body_x_tabc_rfp_ext_...`` controls on the detail
+tabs. Instead of clicking the pager and sleeping after every postback, this
+engine:
+
+1. GETs the browse page and posts the search form back over a requests
+   session, with the tenant's filters resolved from the page's own controls.
+2. Pages the grid by posting the pager button back, carrying the
+   ``__VIEWSTATE`` of every response.
+3. Parses each grid page and each detail page in one pass with BeautifulSoup,
+   using the tenant's field maps, and fetches detail pages concurrently.
+
+If a page cannot be driven over HTTP (no ViewState, a pager without a
+postback name, or a postback that does not move the grid), the crawl
+continues from that page in a pooled headless browser. There, pages are
+switched with the grid's own ``GoToPageOfGrid`` call and each switch waits
+for the grid to change rather than for a fixed delay. The browser's cookies
+are copied back so detail pages and downloads stay on HTTP.
+
+Usage (from the repository root):
+    python -m common.ivalua --tenant ohio --details --attachments
+    python -m common.ivalua --all
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from common.blocking import BLOCK_ASSETS
+from common.bso import form_fields, header_index_map, normalize, timestamp
+from common.http import create_session
+from common.store import DEFAULT_PATH as DEFAULT_DB, ResultsStore
+
+BROWSE_PATH = "/page.aspx/en/rfp/request_browse_public"
+REQUEST_TIMEOUT = 60
+BROWSER_TIMEOUT = 60
+VIEW_STATE = "__VIEWSTATE"
+
+GRID_ID = "body_x_grid_grd"
+GRID_ROW_PREFIX = "body_x_grid_grd_tr_"
+NEXT_BUTTON_ID = "body_x_grid_PagerBtnNextPage"
+SEARCH_BUTTON_ID = "body_x_prxFilterBar_x_cmdSearchBtn"
+DETAIL_PREFIX = "body_x_tabc_rfp_ext_prxrfp_ext_x_"
+SUPPLIER_GRID_ID = DETAIL_PREFIX + "grdSupplierResponse_grd"
+DOWNLOAD_HREF = "/bare.aspx/en/fil/download_public/"
+
+
+# --- Tenant configuration ---
+@dataclass(frozen=True)
+class IvaluaTenant:
+    name: str
+    base_url: str
+    output_prefix: str
+    key_field: str                                       # output column identifying a solicitation
+    # (control id or field label, submitted value or option text)
+    filters: Tuple[Tuple[str, str], ...] = ()
+    # (output column, grid header); empty keeps every visible column under its header
+    grid_fields: Tuple[Tuple[str, str], ...] = ()
+    # (output column, control id) read from the solicitation page
+    detail_fields: Tuple[Tuple[str, str], ...] = ()
+    url_field: str = "Detail URL"
+    # (results-store column, output column) besides the key and URL
+    store_fields: Tuple[Tuple[str, str], ...] = ()
+    awarded_suppliers: bool = False
+    detail_workers: int = 4
+
+    @property
+    def browse_url(self) -> str:
+        return self.base_url.rstrip("/") + BROWSE_PATH
+
+
+OHIO_DETAIL_FIELDS = (
+    ("Solicitation ID", DETAIL_PREFIX + "lblProcessCode"),
+    ("Solicitation Name", DETAIL_PREFIX + "lblLabel"),
+    ("Begin Date", DETAIL_PREFIX + "lblBeginDate"),
+    ("End Date", DETAIL_PREFIX + "lblEndDate"),
+    ("Solicitation Status", DETAIL_PREFIX + "selStatusCode"),
+)
+
+TENANTS: Dict[str, IvaluaTenant] = {
+    "ohio": IvaluaTenant(
+        "Ohio", "https://ohiobuys.ohio.gov", "ohiobuys_awarded_solicitations", "Solicitation ID",
+        filters=(("body_x_cbRfpPubAward_search", "True"),),
+        detail_fields=OHIO_DETAIL_FIELDS,
+        store_fields=(("title", "Solicitation Name"), ("status", "Solicitation Status"), ("close_date", "End Date")),
+        awarded_suppliers=True,
+    ),
+    "arizona": IvaluaTenant(
+        "Arizona", "https://app.az.gov", "az_app_awarded_achieved", "Code",
+        filters=(("body_x_selStatusCode_1", "end"), ("body_x_txtRfpAwarded_1", "True")),
+        grid_fields=(
+            ("Code", "Code"), ("Label", "Label"), ("Commodity", "Commodity"), ("Agency", "Agency"),
+            ("Status", "Status"), ("RFx Awarded", "Awarded"), ("Begin (UTC-7)", "Begin"), ("End (UTC-7)", "End"),
+        ),
+        store_fields=(("title", "Label"), ("agency", "Agency"), ("status", "Status"), ("close_date", "End (UTC-7)")),
+    ),
+    "maryland": IvaluaTenant(
+        "Maryland", "https://emma.maryland.gov", "maryland_emma_closed_awarded", "id",
+        filters=(("Status", "Closed"), ("Award Status", "Awarded")),
+        grid_fields=(
+            ("id", "ID"), ("title", "Title"), ("status", "Status"), ("due_close_date", "Due"),
+            ("publish_date", "Publish"), ("main_category", "Main Category"),
+            ("solicitation_type", "Solicitation Type"), ("issuing_agency", "Issuing Agency"),
+        ),
+        url_field="detail_url",
+        store_fields=(
+            ("title", "title"), ("agency", "issuing_agency"), ("status", "status"), ("close_date", "due_close_date"),
+        ),
+    ),
+}
+
+
+class BrowserRequired(Exception):
+    """The grid cannot be driven over HTTP from ``page`` (0-based) onwards."""
+
+    def __init__(self, reason: str, page: int = 0):
+        super().__init__(reason)
+        self.page = page
+
+
+# --- HTML parsing ---
+def _classes(tag) -> str:
+    return " ".join(tag.get("class") or [])
+
+
+def _visible_cells(tr, cell: str = "td") -> List[Any]:
+    return [c for c in tr.find_all(cell, recursive=False) if "hidden" not in _classes(c)]
+
+
+def _cell_value(td) -> str:
+    box = td.find("input", attrs={"type": "checkbox"})
+    if box is not None and not normalize(td.get_text(" ")):
+        return "Yes" if box.has_attr("checked") else "No"
+    return normalize(td.get_text(" "))
+
+
+def _row_link(tr, base_url: str) -> str:
+    links = tr.select("a.iv-button[href]") or tr.find_all("a", href=True)
+    for a in links:
+        href = a["href"]
+        if href and href != "#" and not href.lower().startswith("javascript"):
+            return urljoin(base_url, href)
+    return ""
+
+
+@dataclass
+class GridPage:
+    rows: List[Dict[str, str]]
+    signature: str                      # first row id + text, to detect that a postback moved the grid
+    next_index: Optional[int] = None    # 0-based index of the next page, None on the last page
+    next_name: Optional[str] = None     # postback name of the next-page button, if it has one
+    total: Optional[int] = None
+
+
+def parse_grid(html: str, tenant: IvaluaTenant, base_url: str) -> GridPage:
+    """All rows of the current grid page plus the pager state."""
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find(id=GRID_ID)
+    headers: List[str] = []
+    if table is not None and table.find("thead") is not None:
+        head_row = table.find("thead").find("tr")
+        headers = [normalize(th.get_text(" ")) for th in _visible_cells(head_row, "th")] if head_row else []
+
+    idx = header_index_map(headers, tuple(h for _, h in tenant.grid_fields)) if tenant.grid_fields else {}
+    rows: List[Dict[str, str]] = []
+    signature = ""
+    for tr in soup.select(f"tr[id^='{GRID_ROW_PREFIX}']"):
+        values = [_cell_value(td) for td in _visible_cells(tr)]
+        if not signature:
+            signature = f"{tr.get('id')}|{'|'.join(values)}"
+        if tenant.grid_fields:
+            rec = {
+                out: (values[idx[h]] if idx.get(h) is not None and idx[h] < len(values) else "")
+                for out, h in tenant.grid_fields
+            }
+        else:
+            rec = {h: v for h, v in zip(headers, values) if h}
+        rec[tenant.url_field] = _row_link(tr, base_url)
+        rows.append(rec)
+
+    page = GridPage(rows, signature)
+    nxt = soup.find(id=NEXT_BUTTON_ID)
+    if nxt is not None and "disable" not in _classes(nxt).lower() and nxt.get("aria-disabled") != "true":
+        try:
+            page.next_index = int(nxt.get("data-page-index"))
+        except (TypeError, ValueError):
+            page.next_index = None
+        page.next_name = nxt.get("name")
+    count = soup.select_one("span[data-role='pager-count']")
+    if count is not None:
+        digits = re.sub(r"\D", "", count.get_text())
+        page.total = int(digits) if digits else None
+    return page
+
+
+def control_text(soup: BeautifulSoup, control_id: str) -> str:
+    """Display value of an Ivalua control: label text, input value or dropdown text."""
+    el = soup.find(id=control_id)
+    if el is not None:
+        if el.name in ("input", "textarea"):
+            return normalize(el.get("value") or el.get_text())
+        text = normalize(el.get_text(" "))
+        if text:
+            return text
+    dropdown = soup.find(attrs={"data-iv-control": control_id})
+    if dropdown is not None:
+        shown = dropdown.find("div", class_="text")
+        return normalize((shown or dropdown).get_text(" "))
+    return ""
+
+
+def parse_detail(html: str, tenant: IvaluaTenant, url: str) -> Dict[str, Any]:
+    """Detail fields, awarded suppliers and public documents of a solicitation page."""
+    soup = BeautifulSoup(html, "html.parser")
+    rec: Dict[str, Any] = {out: control_text(soup, cid) for out, cid in tenant.detail_fields}
+
+    if tenant.awarded_suppliers:
+        suppliers = []
+        table = soup.find(id=SUPPLIER_GRID_ID)
+        for tr in table.select("tbody > tr") if table is not None else []:
+            if tr.find("input", attrs={"type": "checkbox", "checked": True}) is None:
+                continue
+            cells = [normalize(td.get_text(" ")) for td in tr.find_all("td", attrs={"data-iv-role": "cell"})]
+            if len(cells) >= 3:
+                suppliers.append({"Supplier Name": cells[0], "Item": cells[1], "Submitted Unit Price": cells[2]})
+        rec["Awarded Suppliers"] = suppliers
+
+    documents = []
+    for table in soup.find_all("table", id=re.compile(r"_proxy_rfp_.*_grid_grd")):
+        for i, tr in enumerate(table.select("tbody > tr"), 1):
+            link = tr.select_one(f"a.iv-download-file[href*='{DOWNLOAD_HREF}']")
+            if link is None:
+                continue
+            first = tr.find("td", attrs={"data-iv-role": "cell"})
+            title = normalize(first.get_text(" ")) if first is not None else ""
+            documents.append({"Title": title or f"document_{i}", "URL": urljoin(url, link["href"])})
+    rec["Documents"] = documents
+    return rec
+
+
+def resolve_filter(soup: BeautifulSoup, control: str, wanted: str) -> Optional[Tuple[str, str]]:
+    """
+    ``(input name, value)`` to post for a search filter. ``control`` is a
+    control id or a field label; ``wanted`` is the submitted value or the
+    visible text of one of the control's options.
+    """
+    el = soup.find(id=control)
+    if el is None:
+        label = next((l for l in soup.find_all("label") if normalize(l.get_text(" ")).lower() == control.lower()), None)
+        if label is None:
+            return None
+        el = soup.find(id=label["for"]) if label.get("for") else None
+        if el is None:
+            el = label.find_parent(attrs={"data-iv-role": "field"})
+        if el is None:
+            return None
+    container = el.find_parent(attrs={"data-iv-role": "field"}) or el
+
+    target = el if el.name in ("input", "select") and el.get("name") else None
+    if target is None and el.get("data-selector"):
+        target = soup.find(id=el["data-selector"])
+    if target is None:
+        target = container.find(["input", "select"], attrs={"name": True})
+    if target is None or not target.get("name"):
+        return None
+
+    value = wanted
+    for opt in container.find_all(["option", "li"]):
+        if normalize(opt.get_text(" ")).lower() != wanted.lower():
+            continue
+        if opt.name == "option":
+            value = opt.get("value", wanted)
+        else:
+            value = opt.get("data-value") or (opt.get("id") or "").rsplit("_", 1)[-1] or wanted
+        break
+    return target["name"], value
+
+
+def _attachment_name(headers, title: str) -> str:
+    cd = headers.get("Content-Disposition", "")
+    m = re.search(r"filename\*?=(?:UTF-8'')?\"?([^\";]+)\"?", cd, re.I)
+    if m:
+        return os.path.basename(requests.utils.unquote(m.group(1)))
+    safe = re.sub(r'[\\/*?:"<>|]', "_", title).strip() or "document"
+    return safe if os.path.splitext(safe)[1] else safe + ".pdf"
+
+
+# --- browser fallback ---
+class LazyBrowserPool:
+    """
+    ``BrowserPool`` started on first use, so HTTP-only crawls never launch a
+    browser. The fallback only posts back and reads ``page_source``, so its
+    browsers load no images, fonts, stylesheets or trackers by default.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("block", BLOCK_ASSETS)
+        self._kwargs = kwargs
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def browser(self):
+        with self._lock:
+            if self._pool is None:
+                from common.browser_pool import BrowserPool
+                self._pool = BrowserPool(**self._kwargs)
+        return self._pool.browser()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+
+_GRID_SIGNATURE_JS = f"""
+    const row = document.querySelector("tr[id^='{GRID_ROW_PREFIX}']");
+    return row ? row.id + '|' + row.textContent.replace(/\\s+/g, ' ') : '';
+"""
+
+
+def _wait_for_grid_change(drv, old_grid, old_signature: str, timeout: float = BROWSER_TIMEOUT) -> None:
+    """Wait until a postback replaced the grid or changed its first row."""
+    from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def changed(d):
+        if old_grid is not None:
+            try:
+                old_grid.is_enabled()
+            except StaleElementReferenceException:
+                return d.execute_script("return document.readyState") == "complete"
+        return d.execute_script(_GRID_SIGNATURE_JS) != old_signature
+
+    try:
+        WebDriverWait(drv, timeout, poll_frequency=0.1).until(changed)
+    except TimeoutException:
+        logging.warning(f"Grid did not change within {timeout}s; parsing it as is.")
+
+
+# --- client ---
+class IvaluaClient:
+    def __init__(
+        self,
+        tenant: IvaluaTenant,
+        session: Optional[requests.Session] = None,
+        browsers: Optional[LazyBrowserPool] = None,
+    ):
+        self.tenant = tenant
+        self.session = session or create_session(pool_size=max(tenant.detail_workers, 4))
+        self.browsers = browsers
+
+    # --- HTTP transport ---
+    def _get(self, url: str) -> BeautifulSoup:
+        resp = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return BeautifulSoup(resp.text, "html.parser")
+
+    def _postback(self, soup: BeautifulSoup, submitter, overrides: Optional[Dict[str, str]] = None) -> BeautifulSoup:
+        """Post the page's form back as if ``submitter`` (a button tag) had been clicked."""
+        form = submitter.find_parent("form") or soup.find("form")
+        data = form_fields(form)
+        data.update(overrides or {})
+        data.setdefault("__EVENTTARGET", "")
+        data.setdefault("__EVENTARGUMENT", "")
+        data[submitter["name"]] = submitter.get("value", "")
+        resp = self.session.post(
+            urljoin(self.tenant.browse_url, form.get("action") or self.tenant.browse_url),
+            data=data,
+            headers={"Referer": self.tenant.browse_url},
+            timeout=REQUEST_TIMEOUT,
+        )
+        resp.raise_for_status()
+        return BeautifulSoup(resp.text, "html.parser")
+
+    def _filter_values(self, soup: BeautifulSoup) -> Dict[str, str]:
+        values = {}
+        for control, wanted in self.tenant.filters:
+            resolved = resolve_filter(soup, control, wanted)
+            if resolved is None:
+                raise BrowserRequired(f"filter control {control!r} not found in the page")
+            values[resolved[0]] = resolved[1]
+        return values
+
+    def _http_pages(self) -> Iterator[GridPage]:
+        t = self.tenant
+        soup = self._get(t.browse_url)
+        if soup.find("input", attrs={"name": VIEW_STATE}) is None:
+            raise BrowserRequired("browse page has no __VIEWSTATE")
+        search = soup.find(id=SEARCH_BUTTON_ID)
+        if search is None or not search.get("name"):
+            raise BrowserRequired("search button has no postback name")
+        soup = self._postback(soup, search, self._filter_values(soup))
+
+        index = 0
+        while True:
+            page = parse_grid(str(soup), t, t.browse_url)
+            yield page
+            if not page.rows or page.next_index is None:
+                return
+            index += 1
+            button = soup.find(id=NEXT_BUTTON_ID)
+            if not page.next_name:
+                raise BrowserRequired("pager button has no postback name", index)
+            soup = self._postback(soup, button)
+            if parse_grid(str(soup), t, t.browse_url).signature == page.signature:
+                raise BrowserRequired("pager postback did not move the grid", index)
+
+    def _browser_pages(self, start: int = 0) -> Iterator[GridPage]:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        t = self.tenant
+        if self.browsers is None:
+            raise RuntimeError(f"{t.name}: grid needs a browser and browser fallback is disabled")
+        with self.browsers.browser() as b:
+            drv = b.driver
+            drv.get(t.browse_url)
+            WebDriverWait(drv, BROWSER_TIMEOUT).until(EC.presence_of_element_located((By.ID, SEARCH_BUTTON_ID)))
+            for name, value in self._filter_values(BeautifulSoup(drv.page_source, "html.parser")).items():
+                drv.execute_script(
+                    "document.getElementsByName(arguments[0]).forEach(e => { e.value = arguments[1]; });", name, value
+                )
+
+            def postback(script: str, *args) -> None:
+                grid = next(iter(drv.find_elements(By.ID, GRID_ID)), None)
+                signature = drv.execute_script(_GRID_SIGNATURE_JS)
+                drv.execute_script(script, *args)
+                _wait_for_grid_change(drv, grid, signature)
+
+            postback("document.getElementById(arguments[0]).click();", SEARCH_BUTTON_ID)
+            # Detail pages and downloads go over HTTP with the browser's session.
+            for c in drv.get_cookies():
+                self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+
+            go_to_page = f"__ivCtrl['{GRID_ID}'].GoToPageOfGrid(0, arguments[0]);"
+            if start:
+                postback(go_to_page, start)
+            while True:
+                page = parse_grid(drv.page_source, t, drv.current_url)
+                yield page
+                if not page.rows or page.next_index is None:
+                    break
+                postback(go_to_page, page.next_index)
+
+    def grid_pages(self, max_pages: Optional[int] = None) -> Iterator[GridPage]:
+        """Grid pages in order, over HTTP while possible and in a browser from there on."""
+        t = self.tenant
+        count = 0
+        try:
+            for page in self._http_pages():
+                logging.info(f"[{t.name}] Grid page {count + 1}: {len(page.rows)} rows" + (f" of {page.total}" if page.total else ""))
+                yield page
+                count += 1
+                if max_pages and count >= max_pages:
+                    return
+            return
+        except BrowserRequired as e:
+            logging.info(f"[{t.name}] {e}; continuing from page {e.page + 1} in a browser")
+            start = e.page
+        for page in self._browser_pages(start):
+            logging.info(f"[{t.name}] Grid page {count + 1} (browser): {len(page.rows)} rows")
+            yield page
+            count += 1
+            if max_pages and count >= max_pages:
+                return
+
+    # --- detail pages ---
+    def fetch_detail(self, url: str) -> Dict[str, Any]:
+        resp = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return parse_detail(resp.text, self.tenant, resp.url or url)
+
+    def store_documents(self, rec: Dict[str, Any], store, zip_dir: Optional[str]) -> None:
+        """Fetch the public documents into ``store`` and export ``<id>_documents.zip``."""
+        notice = f"{self.tenant.name}:{rec.get(self.tenant.key_field)}"
+        attachments = []
+        for doc in rec.get("Documents", []):
+            try:
+                stored = store.fetch(
+                    self.session, doc["URL"], source_key=f"ivalua:{doc['URL']}",
+                    filename=lambda r, title=doc["Title"]: _attachment_name(r.headers, title),
+                )
+            except Exception as e:      # network, IncompleteDownload, ChecksumError, disk
+                logging.warning(f"[{self.tenant.name}] Document {doc['Title']} failed: {e}")
+                continue
+            attachments.append({"Title": doc["Title"], "File Name": store.link(notice, stored.filename, stored.sha256)})
+        rec["Attachments"] = attachments
+        if attachments and zip_dir:
+            safe = re.sub(r'[\\/*?:"<>|]', "_", str(rec.get(self.tenant.key_field) or "unknown"))
+            rec["Documents Zip"] = store.export_zip(notice, os.path.join(zip_dir, f"{safe}_documents.zip"))
+
+    def enrich(self, rec: Dict[str, Any], store=None, zip_dir: Optional[str] = None) -> Dict[str, Any]:
+        url = rec.get(self.tenant.url_field)
+        if not url:
+            return rec
+        try:
+            for k, v in self.fetch_detail(url).items():
+                if v not in ("", None) or k not in rec:
+                    rec[k] = v
+            if store is not None:
+                self.store_documents(rec, store, zip_dir)
+        except Exception as e:          # one bad record must not abort crawl()
+            logging.warning(f"[{self.tenant.name}] Detail failed for {rec.get(self.tenant.key_field) or url}: {e}")
+        return rec
+
+    def crawl(
+        self,
+        details: bool = False,
+        store=None,
+        zip_dir: Optional[str] = None,
+        row_filter: Optional[Callable[[dict], bool]] = None,
+        max_pages: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Full crawl: grid pages in order, detail pages through a thread pool."""
+        results: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=self.tenant.detail_workers) as pool:
+            futures = []
+            for page in self.grid_pages(max_pages):
+                for rec in page.rows:
+                    if row_filter and not row_filter(rec):
+                        continue
+                    if details:
+                        futures.append(pool.submit(self.enrich, rec, store, zip_dir))
+                    else:
+                        results.append(rec)
+            results.extend(fut.result() for fut in futures)     # listing order
+        logging.info(f"[{self.tenant.name}] Collected {len(results)} records.")
+        return results
+
+
+# --- output ---
+def store_results(tenant: IvaluaTenant, records: List[dict], store: ResultsStore) -> int:
+    """Upsert solicitations, awarded suppliers and public documents into the shared results store."""
+    fields = dict(tenant.store_fields, url=tenant.url_field)
+    n = store.upsert_opportunities(tenant.name, records, tenant.key_field, fields, source=tenant.base_url)
+    for rec in records:
+        notice_id = rec.get(tenant.key_field)
+        if not notice_id:
+            continue
+        if "Awarded Suppliers" in rec:
+            store.replace_awards(
+                tenant.name, notice_id, rec["Awarded Suppliers"], vendor="Supplier Name", amount="Submitted Unit Price"
+            )
+        files = {a["Title"]: a["File Name"] for a in rec.get("Attachments", [])}
+        docs = [{"name": d["Title"], "url": d["URL"], "path": files.get(d["Title"])} for d in rec.get("Documents", [])]
+        if docs:
+            store.upsert_attachments(tenant.name, notice_id, docs)
+    logging.info(f"[{tenant.name}] Stored {n} solicitations in {store.path}")
+    return n
+
+
+def save_results(
+    tenant: IvaluaTenant, records: List[dict], out_dir: str, store: Optional[ResultsStore] = None
+) -> Optional[str]:
+    if not records:
+        logging.warning(f"[{tenant.name}] No data scraped; nothing written.")
+        return None
+    if store is not None:
+        store_results(tenant, records, store)
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{tenant.output_prefix}_{timestamp()}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    df = pd.DataFrame(records).drop(columns=["Documents"], errors="ignore")
+    for col in ("Awarded Suppliers", "Attachments"):
+        if col in df.columns:
+            df[col] = df[col].apply(lambda v: json.dumps(v, ensure_ascii=False) if isinstance(v, list) else v)
+    df.to_excel(base + ".xlsx", index=False)
+    logging.info(f"[{tenant.name}] Wrote {len(records)} rows → {base}.xlsx")
+    return base + ".xlsx"
+
+
+def run_tenant(key: str, args, browsers: Optional[LazyBrowserPool]) -> Optional[str]:
+    tenant = TENANTS[key]
+    store = None
+    if args.attachments:
+        from common.blobstore import AttachmentStore
+        store = AttachmentStore(args.store_dir)
+    records = IvaluaClient(tenant, browsers=browsers).crawl(
+        details=args.details or args.attachments,
+        store=store,
+        zip_dir=os.path.join(args.out, f"{key}_documents") if store is not None else None,
+    )
+    if not args.db:
+        return save_results(tenant, records, args.out)
+    with ResultsStore(args.db) as results:
+        return save_results(tenant, records, args.out, results)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ivalua request_browse_public engine (Ohio, Arizona, Maryland)")
+    ap.add_argument("--tenant", action="append", choices=sorted(TENANTS), help="Tenant to crawl (repeatable)")
+    ap.add_argument("--all", action="store_true", help="Crawl every configured tenant")
+    ap.add_argument("--workers", type=int, default=3, help="Tenants crawled in parallel")
+    ap.add_argument("--out", default=".", help="Output folder")
+    ap.add_argument("--db", default=DEFAULT_DB, help="Results database to upsert into ('' to skip)")
+    ap.add_argument("--details", action="store_true", help="Also scrape each solicitation page")
+    ap.add_argument("--attachments", action="store_true", help="Download public documents (implies --details)")
+    ap.add_argument("--store-dir", default="ivalua_store", help="Attachment store folder")
+    ap.add_argument("--no-browser", action="store_true", help="Never start a browser (fail grids that need one)")
+    ap.add_argument("--show-browser", action="store_true", help="Run fallback browsers with a window")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    keys = sorted(TENANTS) if args.all else (args.tenant or [])
+    if not keys:
+        ap.error("pass --tenant NAME or --all")
+
+    browsers = None if args.no_browser else LazyBrowserPool(size=min(len(keys), args.workers), headless=not args.show_browser)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {pool.submit(run_tenant, k, args, browsers): k for k in keys}
+            for fut in as_completed(futures):
+                key = futures[fut]
+                try:
+                    fut.result()
+                except Exception as e:
+                    logging.error(f"[{TENANTS[key].name}] crawl failed: {e}", exc_info=True)
+    finally:
+        if browsers is not None:
+            browsers.close()
+
+
+if __name__ == "__main__":
+    main()
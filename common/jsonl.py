@@ -0,0 +1,156 @@
+"""
+Append-only JSON Lines output.
+
+One record per line, written as soon as it is produced and fsynced in
+batches, so a crash loses at most the last unsynced batch instead of the whole
+run. Reopening the same file reports which record keys are already on disk,
+which lets a restarted run skip them.
+"""
+
+import json
+import logging
+import os
+import textwrap
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+
+# A record key: a field name, or a function of the record (e.g. a tuple of fields).
+KeySpec = Union[str, Callable[[Dict[str, Any]], Any]]
+
+
+def key_func(key: Optional[KeySpec]) -> Optional[Callable[[Dict[str, Any]], Any]]:
+    if key is None or callable(key):
+        return key
+    return lambda rec: rec.get(key)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a JSONL file; a torn last line from a crash is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"{path}:{lineno}: skipping unreadable line")
+
+
+class JsonlWriter:
+    """
+    Thread-safe JSONL appender.
+
+    ``key`` names the field (or is a function) that identifies a record; keys
+    already present in the file are loaded on open and exposed as ``seen``.
+    """
+
+    def __init__(self, path: str, key: Optional[KeySpec] = None, fsync_every: int = 50):
+        self.path = path
+        self.key = key_func(key)
+        self.fsync_every = max(1, fsync_every)
+        self.seen: Set[Any] = set()
+        self.written = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        if self.key:
+            self.seen = {k for k in map(self.key, iter_jsonl(path)) if k is not None}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._trim_torn_tail()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def _trim_torn_tail(self) -> None:
+        """Terminate a half-written last line so the next append starts cleanly."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.seen
+
+    def write(self, record: Dict[str, Any], update: bool = False) -> bool:
+        """
+        Append ``record``; returns False if its key was already written.
+        ``update=True`` appends a newer version of a known key instead
+        (``compact_jsonl(..., key=...)`` keeps the last version).
+        """
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        with self._lock:
+            if self.key:
+                k = self.key(record)
+                if k is not None and k in self.seen and not update:
+                    return False
+                self.seen.add(k)
+            self._fh.write(line + "\n")
+            self.written += 1
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self._sync()
+        return True
+
+    def _sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._pending = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._sync()
+                self._fh.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def compact_jsonl(
+    jsonl_path: str,
+    json_path: str,
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    indent: int = 4,
+    key: Optional[KeySpec] = None,
+) -> int:
+    """
+    Materialize a JSONL file as a JSON array (the legacy output format),
+    streaming record by record. With ``key``, only the last version of each
+    key is kept. Written to a temp file and swapped in atomically.
+    """
+    key = key_func(key)
+    last: Dict[Any, int] = {}
+    if key:
+        for i, rec in enumerate(iter_jsonl(jsonl_path)):
+            last[key(rec)] = i
+
+    tmp = json_path + ".tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        out.write("[")
+        for i, rec in enumerate(iter_jsonl(jsonl_path)):
+            if key and last.get(key(rec)) != i:
+                continue
+            if transform:
+                rec = transform(rec)
+            out.write(",\n" if count else "\n")
+            out.write(textwrap.indent(json.dumps(rec, indent=indent, default=str, ensure_ascii=False), " " * indent))
+            count += 1
+        out.write("\n]" if count else "]")
+    os.replace(tmp, json_path)
+    return count
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    return list(iter_jsonl(path))
@@ -0,0 +1,328 @@
+"""
+Persistent SMTP transport for the FOIA email senders.
+
+The senders used to open a new TLS connection and log in for every message,
+then sleep a fixed ``--pause``. ``SmtpTransport`` keeps up to ``connections``
+authenticated connections open and reuses them:
+
+- an idle connection is checked with NOOP before reuse and reopened when the
+  server dropped it; a connection is also rotated after
+  ``max_per_connection`` messages (Gmail closes long sessions itself)
+- ``SMTPServerDisconnected`` on a reused connection reconnects and resends at
+  once; other transient failures (4xx, timeouts) are retried after 5, 15, 45,
+  90 and 180 s, switching STARTTLS/SSL (587/465) once if connecting keeps
+  failing
+- sends are paced by a messages-per-minute budget (``per_minute``) shared by
+  all connections instead of a sleep after each message
+
+smtplib has no command pipelining, so with ``connections`` > 1 messages are
+pipelined across connections: ``submit`` queues a message and returns a
+Future while the caller builds the next one.
+
+Usage:
+    conf = load_smtp(args.smtp_host, args.smtp_port, REQUESTER["name"], REQUESTER["email"])
+    with SmtpTransport(conf, prefer_ssl=args.ssl, per_minute=args.per_minute) as mail:
+        for row in rows:
+            mail.send(build_message(conf, to_addr, subject, body))
+"""
+
+import logging
+import os
+import queue
+import smtplib
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from common.http import TokenBucket
+from common.instrument import record, timed
+
+TRANSIENT_SMTP_CODES = {421, 450, 451, 452, 454}
+RETRY_DELAYS = (5, 15, 45, 90, 180)
+DEFAULT_PER_MINUTE = 30.0
+MAX_PER_CONNECTION = 90
+IDLE_CHECK = 30.0          # seconds idle after which a connection is NOOP-checked before reuse
+SWAP_PORTS = {465: 587, 587: 465}
+
+AUTH_HINT = (
+    "SMTP authentication failed. For Gmail, enable 2-Step Verification and use a "
+    "16-character App Password in SMTP_PASSWORD."
+)
+
+
+def load_smtp(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    sender_name: str = "",
+    sender_email: str = "",
+) -> Dict[str, Any]:
+    """
+    SMTP settings from .env (SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
+    SENDER_NAME, SENDER_EMAIL); ``host``/``port`` override it, ``sender_name``
+    and ``sender_email`` are the fallbacks for the sender.
+    """
+    load_dotenv()
+    username = os.getenv("SMTP_USERNAME")
+    password = os.getenv("SMTP_PASSWORD")
+    conf = {
+        "host": host or os.getenv("SMTP_HOST", "smtp.gmail.com"),
+        "port": int(port or os.getenv("SMTP_PORT", "587")),
+        "username": username,
+        "password": password,
+        "sender_name": os.getenv("SENDER_NAME") or sender_name or "Your Name",
+        "sender_email": os.getenv("SENDER_EMAIL") or sender_email or username or "",
+    }
+    missing = [k for k, v in (("SMTP_USERNAME", username), ("SMTP_PASSWORD", password),
+                              ("SENDER_EMAIL", conf["sender_email"])) if not v]
+    if missing:
+        raise RuntimeError(f"Missing in .env: {', '.join(missing)}")
+    return conf
+
+
+def build_message(
+    smtp_conf: Dict[str, Any],
+    to_addr: str,
+    subject: str,
+    body: str,
+    attachments: Optional[Sequence[Dict[str, Any]]] = None,
+    cc: Optional[Sequence[str]] = None,
+    reply_to: Optional[str] = None,
+) -> EmailMessage:
+    """Plain-text message from the configured sender; ``attachments`` as dicts with data/maintype/subtype/filename."""
+    msg = EmailMessage()
+    msg["From"] = f"{smtp_conf['sender_name']} <{smtp_conf['sender_email']}>"
+    msg["To"] = to_addr
+    if cc:
+        msg["Cc"] = ", ".join(cc)
+    if reply_to:
+        msg["Reply-To"] = reply_to
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid(domain=smtp_conf["sender_email"].rpartition("@")[2] or None)
+    msg["Subject"] = subject
+    msg.set_content(body)
+    for att in attachments or ():
+        msg.add_attachment(
+            att["data"], maintype=att.get("maintype", "text"), subtype=att.get("subtype", "csv"),
+            filename=att.get("filename", "row.csv"),
+        )
+    return msg
+
+
+class _Connection:
+    __slots__ = ("smtp", "sent", "last_used")
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SmtpTransport:
+    """
+    Thread-safe pool of authenticated SMTP connections. ``smtp_conf`` holds
+    host, port, username, password, sender_name and sender_email (the dict
+    the senders' ``load_smtp`` returns).
+    """
+
+    def __init__(
+        self,
+        smtp_conf: Dict[str, Any],
+        prefer_ssl: bool = False,
+        connections: int = 1,
+        per_minute: Optional[float] = DEFAULT_PER_MINUTE,
+        max_retries: int = 5,
+        max_per_connection: int = MAX_PER_CONNECTION,
+        timeout: float = 60,
+    ):
+        self.conf = dict(smtp_conf)
+        self.use_ssl = prefer_ssl
+        self.connections = max(1, connections)
+        self.max_retries = max_retries
+        self.max_per_connection = max(1, max_per_connection)
+        self.timeout = timeout
+        self.stats = {"sent": 0, "connects": 0, "reconnects": 0, "retries": 0}
+        self._budget = TokenBucket(per_minute / 60.0, capacity=1) if per_minute else None
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.connections)
+        self._lock = threading.Lock()
+        self._flipped = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # --- Connections ---
+    def _open(self) -> _Connection:
+        host, port = self.conf["host"], int(self.conf["port"])
+        with timed("smtp.connect"):
+            if self.use_ssl:
+                smtp = smtplib.SMTP_SSL(host, port, timeout=self.timeout, context=ssl.create_default_context())
+            else:
+                smtp = smtplib.SMTP(host, port, timeout=self.timeout)
+                smtp.ehlo()
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            try:
+                smtp.login(self.conf["username"], self.conf["password"])
+            except Exception:
+                self._quit(smtp)
+                raise
+        with self._lock:
+            self.stats["connects"] += 1
+        return _Connection(smtp)
+
+    @staticmethod
+    def _quit(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _take(self) -> Optional[_Connection]:
+        """An idle connection that still answers, or None."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - conn.last_used < IDLE_CHECK:
+                return conn
+            try:
+                if conn.smtp.noop()[0] == 250:
+                    return conn
+            except Exception:
+                pass
+            self._quit(conn.smtp)
+
+    def _give_back(self, conn: _Connection) -> None:
+        conn.last_used = time.monotonic()
+        if conn.sent >= self.max_per_connection:
+            self._quit(conn.smtp)
+        else:
+            self._idle.put(conn)
+
+    def _flip_mode(self) -> None:
+        """Switch STARTTLS <-> SSL (and 587 <-> 465) once, like the old per-script fallback."""
+        with self._lock:
+            if self._flipped:
+                return
+            self._flipped = True
+            self.use_ssl = not self.use_ssl
+            port = int(self.conf["port"])
+            self.conf["port"] = SWAP_PORTS.get(port, port)
+        logging.warning(f"SMTP: switching to {'SSL' if self.use_ssl else 'STARTTLS'} on port {self.conf['port']}")
+
+    # --- Sending ---
+    def send(self, msg: EmailMessage) -> None:
+        """Send one message (blocks for the rate budget); raises RuntimeError when retries run out."""
+        if self._budget is not None:
+            self._budget.acquire()
+        with self._slots:
+            start = time.perf_counter()
+            ok = False
+            try:
+                self._send(msg)
+                ok = True
+            finally:
+                record("smtp.send", time.perf_counter() - start, ok)
+
+    def _send(self, msg: EmailMessage) -> None:
+        attempt = 0
+        last_exc: Optional[Exception] = None
+        conn = self._take()
+        while True:
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn = self._open()
+                conn.smtp.send_message(msg)
+                conn.sent += 1
+                self._give_back(conn)
+                with self._lock:
+                    self.stats["sent"] += 1
+                return
+            except smtplib.SMTPServerDisconnected as e:
+                self._drop(conn)
+                conn, last_exc = None, e
+                if reused:                      # dropped while idle: reconnect without counting an attempt
+                    with self._lock:
+                        self.stats["reconnects"] += 1
+                    continue
+                if attempt in (1, 2):
+                    self._flip_mode()
+            except smtplib.SMTPAuthenticationError as e:
+                self._drop(conn)
+                raise RuntimeError(AUTH_HINT) from e
+            except smtplib.SMTPResponseException as e:
+                if not (400 <= e.smtp_code < 500 or e.smtp_code in TRANSIENT_SMTP_CODES):
+                    if conn is not None:
+                        self._give_back(conn)
+                    raise
+                if e.smtp_code == 421:          # server is closing this connection
+                    self._drop(conn)
+                    conn = None
+                last_exc = e
+            except smtplib.SMTPRecipientsRefused:
+                if conn is not None:
+                    self._give_back(conn)
+                raise
+            except (socket.timeout, socket.gaierror, ssl.SSLError, ConnectionError) as e:
+                self._drop(conn)
+                conn, last_exc = None, e
+                if attempt in (1, 2):
+                    self._flip_mode()
+
+            if attempt >= self.max_retries:
+                if conn is not None:
+                    self._give_back(conn)
+                raise RuntimeError(f"SMTP send failed after {attempt + 1} attempts: {last_exc}")
+            with self._lock:
+                self.stats["retries"] += 1
+            time.sleep(RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)])
+            attempt += 1
+
+    def _drop(self, conn: Optional[_Connection]) -> None:
+        if conn is not None:
+            self._quit(conn.smtp)
+
+    def submit(self, msg: EmailMessage) -> Future:
+        """Queue ``msg`` on a sender thread (one per connection)."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="smtp")
+        return self._executor.submit(self.send, msg)
+
+    def send_many(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        """Send all ``messages`` over the pool; per message None or the error."""
+        futures = [self.submit(m) for m in messages]
+        return [f.exception() for f in futures]
+
+    # --- Lifecycle ---
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                self._quit(self._idle.get_nowait().smtp)
+            except queue.Empty:
+                break
+        s = self.stats
+        if s["connects"]:
+            logging.info(
+                f"SMTP: {s['sent']} sent over {s['connects']} connections "
+                f"({s['reconnects']} reconnects, {s['retries']} retries)"
+            )
+
+    def __enter__(self) -> "SmtpTransport":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
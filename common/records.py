@@ -0,0 +1,268 @@
+"""
+Canonical opportunity records and per-state field mappings.
+
+Every scraper writes its own column names (Rhode Island ``notice_id`` /
+``closing_date`` / ``issuer``, Maine ``RFP #`` / ``Title``, Texas
+``solicitation_id`` / ``due_date``, Ohio ``Solicitation ID`` / ``End Date``),
+and the FOIA senders used to probe a list of candidate columns on every row.
+Here each state declares once which of its columns feed each canonical field,
+and whole batches are normalized with column-wise pandas operations:
+
+    frame = normalize_frame(df, "texas")       # canonical columns, parsed
+    opps = normalize_records(records, "maine") # List[Opportunity]
+
+A canonical field takes the first non-empty of its candidate columns (state
+columns first, then the generic snake_case names); column names match
+ignoring case and space/underscore differences. Dates become ``Timestamp`` (NaT when unparseable), money
+becomes float ("$1.2M" style suffixes are scaled, several " | "-separated
+amounts are summed), everything else is a stripped string ("" when missing).
+A date or amount that does not parse keeps its source text in
+``Opportunity.raw`` so it can still be shown. Columns not used by the mapping
+are kept per record in ``Opportunity.extra``.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from common.store import state_key
+
+FIELDS: Tuple[str, ...] = (
+    "state", "notice_id", "title", "agency", "status", "publish_date", "close_date",
+    "award_date", "vendor", "amount", "url", "attachments",
+)
+DATE_FIELDS = ("publish_date", "close_date", "award_date")
+MONEY_FIELDS = ("amount",)
+
+FieldMap = Dict[str, Tuple[str, ...]]
+
+# The sign may sit before or after the currency ("-$5", "$-5") or be accounting parentheses.
+_MONEY_RE = re.compile(
+    r"^(?P<paren>\()?\s*(?P<sign>-)?\s*(?:US\$|USD|\$)?\s*(?P<sign2>-)?\s*(?P<num>\d[\d,]*(?:\.\d+)?|\.\d+)\s*"
+    r"(?P<scale>k|thousand|mm?|mn|million|bn?|billion)?\.?\s*(?:USD)?\s*\)?$",
+    re.IGNORECASE,
+)
+_MONEY_SCALE = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "mn": 1e6, "million": 1e6,
+                "b": 1e9, "bn": 1e9, "billion": 1e9}
+
+# --- Mappings ---
+GENERIC_FIELDS: FieldMap = {
+    "notice_id": ("notice_id", "solicitation_number", "bid_id", "rfp_number", "solicitation_id",
+                  "reference_no", "reference_id"),
+    "title": ("title", "solicitation_title", "description", "project_title", "bid_title"),
+    "agency": ("agency", "department", "issuer", "issuing_office", "office", "buyer"),
+    "status": ("status", "bid_status", "award_status"),
+    "publish_date": ("publish_date", "posted_date", "posting_date", "posted_on"),
+    "close_date": ("close_date", "closing_date", "due_date", "end_date"),
+    "award_date": ("award_date", "awarded_on", "finalize_date", "award_posted_date", "award_post_date"),
+    "vendor": ("awarded_vendor", "vendor", "contractor", "supplier", "awardee"),
+    "amount": ("award_amount", "contract_value", "amount", "value", "total_award"),
+    "url": ("page_url", "detail_url", "url", "source_url"),
+    "attachments": ("attachments", "files", "links", "download_links"),
+}
+
+_WEBPROCURE: FieldMap = {
+    "notice_id": ("notice_id",), "title": ("title",), "agency": ("issuer",),
+    "publish_date": ("publish_date",), "close_date": ("closing_date",),
+    "url": ("page_url",), "attachments": ("download_links",),
+}
+
+_BSO: FieldMap = {
+    "notice_id": ("Bid Solicitation #",), "title": ("Description",), "agency": ("Organization Name",),
+    "status": ("Status",), "close_date": ("Bid Opening Date",), "vendor": ("Awarded Vendor(s)",),
+    "url": ("Row URL",), "attachments": ("Attachments",),
+}
+
+_ADVANTAGE: FieldMap = {
+    "notice_id": ("Solicitation Number",), "title": ("Description",), "agency": ("Department",),
+    "status": ("Status",), "close_date": ("Closing Date/Time",),
+}
+
+STATE_FIELDS: Dict[str, FieldMap] = {
+    "rhodeisland": _WEBPROCURE,
+    "connecticut": _WEBPROCURE,
+    "maine": {
+        "notice_id": ("RFP #",), "title": ("Title",), "agency": ("Issuing Department",),
+        "status": ("RFP Status",), "publish_date": ("Date Posted",), "close_date": ("Proposal Due Date",),
+        "vendor": ("Awarded Vendor(s) (JSON)",), "url": ("Title URL",),
+    },
+    "texas": {
+        "notice_id": ("solicitation_id",), "title": ("title",), "agency": ("agency",), "status": ("status",),
+        "publish_date": ("posting_date",), "close_date": ("due_date", "response_due_date"),
+        "vendor": ("contractor",), "amount": ("value_per_contractor",), "url": ("href",),
+    },
+    "ohio": {
+        "notice_id": ("Solicitation ID",), "title": ("Solicitation Name",), "status": ("Solicitation Status",),
+        "publish_date": ("Begin Date",), "close_date": ("End Date",), "vendor": ("Awarded Suppliers",),
+        "url": ("Detail URL",), "attachments": ("Attachments",),
+    },
+    "arizona": {
+        "notice_id": ("Code",), "title": ("Label",), "agency": ("Agency",), "status": ("Status",),
+        "publish_date": ("Begin (UTC-7)",), "close_date": ("End (UTC-7)",),
+    },
+    "maryland": {
+        "notice_id": ("id",), "title": ("title",), "agency": ("issuing_agency",), "status": ("status",),
+        "publish_date": ("publish_date",), "close_date": ("due_close_date",), "url": ("detail_url",),
+    },
+    "pennsylvania": {
+        "notice_id": ("Bid No",), "title": ("Title",), "agency": ("Agency",), "status": ("Status",),
+        "publish_date": ("Bid Start Date",), "close_date": ("Bid End Date",),
+    },
+    "newjersey": _BSO, "nevada": _BSO, "oregon": _BSO, "illinois": _BSO, "arkansas": _BSO, "massachusetts": _BSO,
+    "michigan": _ADVANTAGE, "colorado": _ADVANTAGE, "kentucky": _ADVANTAGE,
+    "westvirginia": _ADVANTAGE, "alaska": _ADVANTAGE,
+}
+
+
+def field_map(state: str) -> FieldMap:
+    """State columns first, generic names as the fallback for every field."""
+    own = STATE_FIELDS.get(state_key(state), {})
+    return {f: own.get(f, ()) + GENERIC_FIELDS.get(f, ()) for f in FIELDS if f != "state"}
+
+
+# --- Record model ---
+_DEFAULTS: Dict[str, Any] = {**{f: pd.NaT for f in DATE_FIELDS}, **{f: float("nan") for f in MONEY_FIELDS}}
+
+
+class Opportunity:
+    """
+    One normalized opportunity; ``extra`` holds the source columns no field
+    mapped and ``raw`` the source text of dates/amounts that did not parse.
+    """
+
+    __slots__ = FIELDS + ("extra", "raw")
+
+    def __init__(self, **values: Any):
+        for name in FIELDS:
+            setattr(self, name, values.get(name, _DEFAULTS.get(name, "")))
+        self.extra: Dict[str, Any] = values.get("extra") or {}
+        self.raw: Dict[str, str] = values.get("raw") or {}
+
+    def to_dict(self, extra: bool = False) -> Dict[str, Any]:
+        out = {name: getattr(self, name) for name in FIELDS}
+        if extra:
+            out.update((k, v) for k, v in self.extra.items() if k not in out)
+        return out
+
+    def __repr__(self) -> str:
+        return f"Opportunity({self.state!r}, {self.notice_id!r}, {self.title!r})"
+
+
+# --- Vectorized parsing ---
+def _flatten(v: Any) -> Any:
+    """Lists (of vendor/attachment dicts) become one "; "-joined string."""
+    if isinstance(v, dict):
+        return next((str(v[k]) for k in ("text", "name", "Supplier Name", "Title", "File Name") if v.get(k)), "")
+    if isinstance(v, (list, tuple)):
+        return "; ".join(s for s in (_flatten(x) for x in v) if s)
+    return v
+
+
+def text_column(col: pd.Series) -> pd.Series:
+    """Stripped strings with missing/blank values as NA."""
+    if col.dtype == object and col.map(lambda v: isinstance(v, (list, tuple, dict))).any():
+        col = col.map(_flatten)
+    out = col.astype("string").str.strip()
+    return out.mask(out == "")
+
+
+def parse_dates(col: pd.Series) -> pd.Series:
+    """Mixed date formats in one pass; timezone/abbreviation suffixes are dropped."""
+    cleaned = text_column(col).str.replace(r"\s*\b(?:[ECMP][SD]T|UTC[+-]?\d*|GMT)\b.*$", "", regex=True)
+    return pd.to_datetime(cleaned, errors="coerce", format="mixed")
+
+
+def parse_money(col: pd.Series) -> pd.Series:
+    """
+    "$1,250.00", "(300)", "$-5", "$1.2M" and "750000 | 750000" style amounts to float.
+    NaN when there is none or any part is not an amount ("TBD", "See bid tab").
+    """
+    parts = text_column(col).reset_index(drop=True).str.split("|").explode().str.strip()
+    found = parts.str.extract(_MONEY_RE)
+    negative = found["paren"].notna() | found["sign"].notna() | found["sign2"].notna()
+    values = pd.to_numeric(found["num"].str.replace(",", "", regex=False), errors="coerce")
+    values = values * found["scale"].str.lower().map(_MONEY_SCALE).fillna(1.0).astype(float)
+    values = values.where(~negative, -values)
+    unparsed = (parts.notna() & (parts != "") & values.isna()).groupby(level=0).any()
+    summed = values.groupby(level=0).sum(min_count=1).mask(unparsed).reindex(range(len(col)))
+    return pd.Series(summed.to_numpy(dtype=float), index=col.index)
+
+
+def _col_key(name: Any) -> str:
+    return re.sub(r"[\s_]+", "_", str(name).strip().lower())
+
+
+def _lookup(columns: Iterable[Any]) -> Dict[str, Any]:
+    lookup: Dict[str, Any] = {}
+    for c in columns:
+        lookup.setdefault(_col_key(c), c)
+    return lookup
+
+
+def _coalesce(df: pd.DataFrame, candidates: Sequence[str], lookup: Dict[str, Any]) -> pd.Series:
+    cols = list(dict.fromkeys(lookup[_col_key(c)] for c in candidates if _col_key(c) in lookup))
+    if not cols:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    out = text_column(df[cols[0]])
+    for c in cols[1:]:
+        out = out.fillna(text_column(df[c]))
+    return out
+
+
+def mapped_columns(columns: Iterable[str], fields: FieldMap) -> Set[str]:
+    """Source columns a mapping reads (any candidate, not only the one that won)."""
+    lookup = _lookup(columns)
+    return {lookup[_col_key(c)] for cands in fields.values() for c in cands if _col_key(c) in lookup}
+
+
+# --- Batch normalization ---
+def normalize_frame(
+    df: pd.DataFrame, state: str, fields: Optional[FieldMap] = None, keep_raw: bool = False
+) -> pd.DataFrame:
+    """
+    Canonical columns (``FIELDS``) for every row of ``df``, index preserved.
+    With ``keep_raw``, each date/money field also gets a ``<field>_raw`` column
+    holding the source text where it did not parse (NA elsewhere).
+    """
+    fields = fields or field_map(state)
+    lookup = _lookup(df.columns)
+    out = pd.DataFrame(index=df.index)
+    out["state"] = state
+    for name in FIELDS[1:]:
+        col = _coalesce(df, fields.get(name, ()), lookup)
+        if name in DATE_FIELDS or name in MONEY_FIELDS:
+            out[name] = parse_dates(col) if name in DATE_FIELDS else parse_money(col)
+            if keep_raw:
+                out[f"{name}_raw"] = col.where(out[name].isna())
+        else:
+            out[name] = col.fillna("")
+    return out
+
+
+def normalize_table(df: pd.DataFrame, state: str, fields: Optional[FieldMap] = None) -> List[Opportunity]:
+    fields = fields or field_map(state)
+    frame = normalize_frame(df, state, fields, keep_raw=True)
+    raw_cols = [f"{name}_raw" for name in DATE_FIELDS + MONEY_FIELDS]
+    raws = frame[raw_cols].to_dict("records")
+    frame = frame.drop(columns=raw_cols)
+    extra = df.drop(columns=list(mapped_columns(df.columns, fields)))
+    extras = extra.to_dict("records") if len(extra.columns) else [{}] * len(df)
+    return [
+        Opportunity(
+            **values,
+            extra={k: v for k, v in ex.items() if not _missing(v)},
+            raw={k[:-4]: v for k, v in raw.items() if not _missing(v)},
+        )
+        for values, ex, raw in zip(frame.to_dict("records"), extras, raws)
+    ]
+
+
+def normalize_records(records: Iterable[Dict[str, Any]], state: str, fields: Optional[FieldMap] = None) -> List[Opportunity]:
+    return normalize_table(pd.DataFrame(list(records)), state, fields)
+
+
+def _missing(v: Any) -> bool:
+    if isinstance(v, (list, tuple, dict)):
+        return not v
+    return pd.isna(v) or (isinstance(v, str) and not v.strip())
@@ -0,0 +1,410 @@
+"""
+Record and replay portal traffic so scrapers can be run and timed offline.
+
+A cassette is a JSONL file with one recorded exchange per line (method, URL,
+request-body hash, status, headers, base64 body). Three ways to use one:
+
+1. In process. ``install("record", path)`` / ``install("replay", path)``
+   patches ``requests.adapters.HTTPAdapter.send``, so every requests-based
+   scraper and engine (SAM.gov API, WebProcure ``search/sols``, BSO JSF
+   postbacks, Advantage4 grid calls, Ivalua grids) records or replays without
+   code changes. Replay adds ``latency`` (+/- ``jitter``) per response.
+
+2. Around a script. ``python -m common.replay run --replay cassettes/tx.jsonl
+   "Scrapper Codes/Texas/texas_New.py"`` installs the hook, counts HTTP
+   requests, bytes and WebDriver commands, and runs the script as __main__.
+
+3. As a server. ``python -m common.replay serve cassettes/*.jsonl`` answers
+   ``http://127.0.0.1:<port>/<host>/<path>`` from the cassettes and rewrites
+   absolute portal links in bodies to stay on the server, so a browser (or a
+   tenant whose ``base_url`` is pointed at the server) can be replayed too.
+   Browser traffic is added to cassettes with ``import-har`` from a DevTools
+   HAR export.
+
+Requests are matched on method, URL (query sorted, volatile and secret
+parameters such as ``_`` and ``api_key`` dropped) and body hash. Repeated
+identical requests get the recorded responses in order; a request that was
+never recorded falls back to the same URL with any body, else a 404 with an
+``X-Replay-Miss`` header.
+"""
+
+import argparse
+import atexit
+import base64
+import glob
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DROPPED_PARAMS = {"_", "api_key", "apikey", "token", "access_token", "cachebuster"}
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+
+
+# --- Keys ---
+def canonical_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in DROPPED_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def body_hash(body: Any) -> str:
+    if body is None or body == b"" or body == "":
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if not isinstance(body, (bytes, bytearray)):                 # streamed/file bodies are not matched on
+        return ""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha1(bytes(body)).hexdigest()
+
+
+# --- Cassettes ---
+class Cassette:
+    """Thread-safe JSONL cassette; lookups replay repeated requests in recorded order."""
+
+    def __init__(self, paths, mode: str = "replay"):
+        self.paths = [paths] if isinstance(paths, (str, Path)) else list(paths)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._loose: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._cursor: Counter = Counter()
+        self.misses: List[str] = []
+        for path in self.paths:
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            self._index(json.loads(line))
+        self._out = open(self.paths[0], "a", encoding="utf-8") if mode == "record" else None
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        url = canonical_url(entry["url"])
+        self._exact.setdefault((entry["method"], url, entry.get("body_hash", "")), []).append(entry)
+        self._loose.setdefault((entry["method"], url), []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._loose.values())
+
+    def add(self, method: str, url: str, req_body: Any, status: int, reason: str, headers: Dict[str, str], body: bytes) -> None:
+        entry = {
+            "method": method, "url": canonical_url(url), "body_hash": body_hash(req_body), "status": status, "reason": reason,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": base64.b64encode(body).decode("ascii"), "recorded_at": time.time(),
+        }
+        with self._lock:
+            self._index(entry)
+            self._out.write(json.dumps(entry) + "\n")
+            self._out.flush()
+
+    def match(self, method: str, url: str, req_body: Any) -> Optional[Dict[str, Any]]:
+        url = canonical_url(url)
+        key = (method, url, body_hash(req_body))
+        with self._lock:
+            entries = self._exact.get(key)
+            if not entries:
+                key = (method, url)
+                entries = self._loose.get(key)
+            if not entries:
+                self.misses.append(f"{method} {url}")
+                return None
+            i = self._cursor[key]
+            self._cursor[key] += 1
+            return entries[min(i, len(entries) - 1)]                 # the last response repeats
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+
+def import_har(har_path: str, cassette_path: str) -> int:
+    """Append the responses of a DevTools HAR export (with content) to a cassette."""
+    with open(har_path, encoding="utf-8") as f:
+        entries = json.load(f)["log"]["entries"]
+    cassette = Cassette(cassette_path, mode="record")
+    n = 0
+    try:
+        for e in entries:
+            req, resp = e["request"], e["response"]
+            content = resp.get("content", {})
+            text = content.get("text")
+            if text is None or resp.get("status", 0) <= 0:
+                continue
+            body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+            cassette.add(
+                req["method"], req["url"], (req.get("postData") or {}).get("text"),
+                resp["status"], resp.get("statusText", ""), {h["name"]: h["value"] for h in resp.get("headers", [])}, body,
+            )
+            n += 1
+    finally:
+        cassette.close()
+    return n
+
+
+# --- In-process hook ---
+class Metrics:
+    """Counts HTTP requests/bytes and WebDriver commands of the running process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.http_requests = 0
+        self.http_bytes = 0
+        self.webdriver: Counter = Counter()
+
+    def http(self, nbytes: int) -> None:
+        with self._lock:
+            self.http_requests += 1
+            self.http_bytes += nbytes
+
+    def command(self, name: str) -> None:
+        with self._lock:
+            self.webdriver[name] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "http_requests": self.http_requests, "http_bytes": self.http_bytes,
+                "webdriver_calls": sum(self.webdriver.values()), "webdriver_commands": dict(self.webdriver),
+            }
+
+
+METRICS = Metrics()
+_original_send = HTTPAdapter.send
+
+
+def _response(entry: Dict[str, Any], request, adapter) -> requests.Response:
+    body = base64.b64decode(entry["body"])
+    resp = requests.Response()
+    resp.status_code = entry["status"]
+    resp.reason = entry.get("reason", "")
+    resp.headers = CaseInsensitiveDict(entry.get("headers", {}))
+    resp.headers["Content-Length"] = str(len(body))
+    resp._content = body
+    resp._content_consumed = True
+    resp.raw = BytesIO(body)
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.url = request.url
+    resp.request = request
+    resp.connection = adapter
+    return resp
+
+
+def install(mode: Optional[str] = None, path: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0) -> Optional[Cassette]:
+    """
+    Route every requests call through a cassette (``mode`` "record" or
+    "replay"), or only count traffic when ``mode`` is None.
+    """
+    cassette = Cassette(path, mode) if mode else None
+
+    def send(adapter, request, *args, **kwargs):
+        if mode == "replay":
+            entry = cassette.match(request.method, request.url, request.body)
+            if entry is None:
+                entry = {"status": 404, "reason": "Not Recorded", "headers": {"X-Replay-Miss": "1"}, "body": ""}
+            if latency or jitter:
+                time.sleep(max(latency + random.uniform(-jitter, jitter), 0.0))
+            resp = _response(entry, request, adapter)
+        else:
+            resp = _original_send(adapter, request, *args, **kwargs)
+            if mode == "record":
+                cassette.add(request.method, request.url, request.body, resp.status_code, resp.reason or "",
+                             dict(resp.headers), resp.content)
+        consumed = resp._content_consumed and isinstance(resp._content, bytes)    # don't force a streamed body
+        METRICS.http(len(resp._content) if consumed else int(resp.headers.get("Content-Length") or 0))
+        return resp
+
+    HTTPAdapter.send = send
+    _count_webdriver()
+    if cassette is not None:
+        atexit.register(cassette.close)
+    return cassette
+
+
+def uninstall() -> None:
+    HTTPAdapter.send = _original_send
+
+
+def _count_webdriver() -> None:
+    try:
+        from selenium.webdriver.remote.webdriver import WebDriver
+    except ImportError:
+        return
+    if getattr(WebDriver.execute, "_counted", False):
+        return
+    original = WebDriver.execute
+
+    def execute(self, driver_command, params=None):
+        METRICS.command(driver_command)
+        return original(self, driver_command, params)
+    execute._counted = True
+    WebDriver.execute = execute
+
+
+# --- Replay server ---
+class ReplayServer:
+    """
+    Serves ``/<host>/<path>?query`` from a cassette over plain HTTP and
+    rewrites ``https://<host>/`` links in text bodies to ``<server>/<host>/``.
+    """
+
+    def __init__(self, cassette: Cassette, port: int = 0, latency: float = 0.0, jitter: float = 0.0):
+        self.cassette = cassette
+        self.latency, self.jitter = latency, jitter
+        self.bytes_served = 0
+        handler = self._handler()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def url_for(self, original: str) -> str:
+        parts = urlsplit(original)
+        return f"{self.url}/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+
+    def _rewrite(self, body: bytes, headers: Dict[str, str]) -> bytes:
+        if not re.search(r"text|json|javascript|xml", headers.get("Content-Type", headers.get("content-type", ""))):
+            return body
+        return re.sub(rb"https?://([A-Za-z0-9.-]+\.[A-Za-z]{2,})", lambda m: f"{self.url}/".encode() + m.group(1), body)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                host, _, rest = self.path.lstrip("/").partition("/")
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)) or None
+                entry = server.cassette.match(self.command, f"https://{host}/{rest}", body) or server.cassette.match(
+                    self.command, f"http://{host}/{rest}", body
+                )
+                if server.latency or server.jitter:
+                    time.sleep(max(server.latency + random.uniform(-server.jitter, server.jitter), 0.0))
+                if entry is None:
+                    self.send_response(404, "Not Recorded")
+                    self.send_header("X-Replay-Miss", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                headers = entry.get("headers", {})
+                payload = server._rewrite(base64.b64decode(entry["body"]), headers)
+                self.send_response(entry["status"], entry.get("reason") or None)
+                for k, v in headers.items():
+                    if k.lower() == "location":
+                        v = server._rewrite(v.encode(), {"Content-Type": "text"}).decode()
+                    if k.lower() not in ("set-cookie", "strict-transport-security"):
+                        self.send_header(k, v)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                server.bytes_served += len(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _serve
+
+            def log_message(self, fmt, *args):
+                logging.debug("replay: " + fmt % args)
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# --- CLI ---
+def _expand(patterns: List[str]) -> List[str]:
+    return [p for pat in patterns for p in (sorted(glob.glob(pat)) or [pat])]
+
+
+def run_script(script: str, argv: List[str], mode: Optional[str], cassette: Optional[str],
+               latency: float = 0.0, jitter: float = 0.0, metrics_out: Optional[str] = None) -> None:
+    """Run ``script`` as __main__ with the hook installed; metrics are written at exit."""
+    tape = install(mode, cassette, latency, jitter)
+    start = time.monotonic()
+
+    def dump():
+        data = dict(METRICS.as_dict(), seconds=round(time.monotonic() - start, 3))
+        if tape is not None:
+            data["replay_misses"] = len(tape.misses)
+        if metrics_out:
+            with open(metrics_out, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+    atexit.register(dump)
+
+    root = str(Path(__file__).resolve().parents[1])
+    sys.path[:0] = [str(Path(script).resolve().parent), root]
+    sys.argv = [script] + argv
+    runpy.run_path(script, run_name="__main__")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Record/replay portal traffic")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="Run a scraper script with the record/replay hook")
+    mode = run.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="CASSETTE", help="Record live traffic into this cassette")
+    mode.add_argument("--replay", metavar="CASSETTE", help="Serve requests from this cassette")
+    run.add_argument("--latency", type=float, default=0.0, help="Seconds added to every replayed response")
+    run.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    run.add_argument("--metrics-out", help="Write request/byte/WebDriver counts here (JSON)")
+    run.add_argument("script")
+    run.add_argument("args", nargs=argparse.REMAINDER)
+
+    serve = sub.add_parser("serve", help="Serve cassettes over HTTP at /<host>/<path>")
+    serve.add_argument("cassettes", nargs="+")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0)
+    serve.add_argument("--jitter", type=float, default=0.0)
+
+    har = sub.add_parser("import-har", help="Append a DevTools HAR export to a cassette")
+    har.add_argument("har")
+    har.add_argument("cassette")
+
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if args.cmd == "run":
+        mode_name = "record" if args.record else "replay" if args.replay else None
+        run_script(args.script, args.args, mode_name, args.record or args.replay,
+                   args.latency, args.jitter, args.metrics_out)
+    elif args.cmd == "serve":
+        cassette = Cassette(_expand(args.cassettes))
+        server = ReplayServer(cassette, args.port, args.latency, args.jitter)
+        logging.info(f"Serving {len(cassette)} recorded responses at {server.url}/<host>/<path>")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+    else:
+        n = import_har(args.har, args.cassette)
+        logging.info(f"Imported {n} responses into {args.cassette}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""
+Multi-state scraper runner.
+
+Discovers the state scrapers under ``Scrapper Codes/<State>/`` and runs each
+one as an isolated subprocess (its own interpreter, working directory and log
+file), many at a time, instead of launching them by hand one after another.
+
+Politeness: every job is tagged with the portal hosts it talks to, read from
+the URLs in its source and from the shared engine tenants it uses
+(``TENANTS["ohio"]``, ``scrape_awarded("46")``). At most ``--per-host`` jobs
+run against one host at a time, and job starts on the same host are spaced by
+``--host-gap`` seconds, so tenants sharing webprocure.proactiscloud.com or an
+Advantage4 instance are never crawled concurrently.
+
+A job that exits non-zero or times out is retried after an exponential
+backoff, up to ``--retries`` times. Every attempt's duration, exit code and
+record count goes into ``<out>/runs/<timestamp>/report.json``; the next run starts the slowest
+jobs of the previous one first. A script writes one dataset, often several
+times over (a JSONL checkpoint plus a JSON/XLSX copy, partial snapshots), so
+its record count is the rows of its largest .json/.jsonl/.csv/.xlsx output,
+not the sum over all of them. Scripts that use ``common.instrument`` also
+write their per-operation timings to ``<out>/metrics/`` (refreshed every
+``--metrics-every`` seconds), linked from the attempt's report entry.
+
+When a state directory has a ``*_New.py`` script only those are run (the
+older script is its predecessor); ``--all-scripts`` runs everything. Scripts
+listed in ``RUN_AFTER`` are not jobs of their own: they run after the script
+they follow, in the same job and working folder, and only if it succeeded.
+
+Usage (from the repository root):
+    python -m common.runner --list
+    python -m common.runner --all --workers 8 --out overnight
+    python -m common.runner --state Texas --state "Rhode Island" --retries 1
+    python -m common.runner --all --at 01:30
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRAPERS_DIR = REPO_ROOT / "Scrapper Codes"
+OUTPUT_SUFFIXES = (".json", ".jsonl", ".csv", ".xlsx")
+
+# Hosts that appear in sources but are not portals (schemas, CDNs, docs).
+IGNORED_HOSTS = ("w3.org", "googleapis.com", "gstatic.com", "github.com", "pypi.org", "python.org", "example.com")
+
+# engine module -> attribute of a tenant holding its URL
+ENGINE_URL_ATTRS = {"bso": "base_url", "advantage": "start_url", "ivalua": "base_url"}
+
+# "<State dir>/<script>" -> the script of the same directory it must run after
+RUN_AFTER = {
+    "NewHampshire/new_hampshire_attachments.py": "new_hampshire.py",
+}
+
+
+# --- Discovery ---
+@dataclass
+class Job:
+    state: str
+    script: Path
+    hosts: Tuple[str, ...]
+    then: Tuple[Path, ...] = ()      # follow-up scripts, run in order after ``script``
+    attempts: int = 0
+    not_before: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.state}/{self.script.stem}"
+
+    @property
+    def scripts(self) -> Tuple[Path, ...]:
+        return (self.script,) + self.then
+
+
+def _host(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _engine_hosts(source: str) -> Set[str]:
+    """Hosts of the shared-engine tenants a script uses."""
+    hosts: Set[str] = set()
+    engines = set(re.findall(r"from common\.(bso|advantage|ivalua|webprocure) import", source))
+    if "webprocure" in engines:
+        from common.webprocure import BASE_URL
+        hosts.add(_host(BASE_URL))
+    for engine in engines & set(ENGINE_URL_ATTRS):
+        tenants = importlib.import_module(f"common.{engine}").TENANTS
+        for key in re.findall(r"TENANTS\[[\"'](\w+)[\"']\]", source):
+            if key in tenants:
+                hosts.add(_host(getattr(tenants[key], ENGINE_URL_ATTRS[engine])))
+    return hosts
+
+
+def script_hosts(path: Path) -> Tuple[str, ...]:
+    source = path.read_text(encoding="utf-8", errors="replace")
+    hosts = {_host(u) for u in re.findall(r"https?://[^\s\"'<>)\\]+", source)} | _engine_hosts(source)
+    hosts = {h for h in hosts if re.fullmatch(r"[a-z0-9.-]+\.[a-z]{2,}", h)}           # drops "{host}" templates
+    return tuple(sorted(h for h in hosts if not any(h.endswith(i) for i in IGNORED_HOSTS)))
+
+
+def _follows(script: Path) -> Optional[str]:
+    return RUN_AFTER.get(f"{script.parent.name}/{script.name}")
+
+
+def discover(root: Path = SCRAPERS_DIR, all_scripts: bool = False) -> List[Job]:
+    jobs = []
+    for state_dir in sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith(("_", "."))):
+        scripts = sorted(state_dir.glob("*.py"))
+        newest = [s for s in scripts if re.search(r"[_-]new\.py$", s.name, re.I)]
+        selected = scripts if all_scripts or not newest else newest
+        names = {s.name for s in selected}
+        for script in selected:
+            if _follows(script) in names:
+                continue                      # runs inside its predecessor's job
+            then: List[Path] = []
+            while True:
+                last = (then or [script])[-1].name
+                nxt = next((s for s in selected if _follows(s) == last), None)
+                if nxt is None or nxt in then:
+                    break
+                then.append(nxt)
+            hosts = sorted(set().union(*(script_hosts(s) for s in [script] + then)))
+            jobs.append(Job(state_dir.name, script, tuple(hosts), tuple(then)))
+    return jobs
+
+
+# --- Outputs ---
+def count_records(path: Path) -> int:
+    """Rows in a scraper output file (0 when it cannot be read)."""
+    try:
+        if path.suffix == ".jsonl":
+            with open(path, encoding="utf-8") as f:
+                return sum(1 for line in f if line.strip())
+        if path.suffix == ".json":
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):      # {"results": [...]}; other dicts are state/progress files
+                data = next((v for v in data.values() if isinstance(v, list)), [])
+            return len(data) if isinstance(data, list) else 0
+        if path.suffix == ".csv":
+            with open(path, encoding="utf-8", errors="replace") as f:
+                return max(sum(1 for _ in f) - 1, 0)
+        if path.suffix == ".xlsx":
+            from openpyxl import load_workbook
+            wb = load_workbook(path, read_only=True)
+            try:
+                return sum(max((ws.max_row or 1) - 1, 0) for ws in wb.worksheets)
+            finally:
+                wb.close()
+    except Exception:
+        return 0
+    return 0
+
+
+def _snapshot(folder: Path) -> Dict[Path, float]:
+    return {p: p.stat().st_mtime for p in folder.rglob("*") if p.suffix in OUTPUT_SUFFIXES and p.is_file()}
+
+
+# --- Execution ---
+def _terminate(proc: subprocess.Popen) -> None:
+    """Kill the job and the browsers it started."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True)
+    except Exception:
+        proc.kill()
+
+
+def run_job(job: Job, out_dir: Path, timeout: Optional[float], metrics_every: float = 60.0) -> Dict:
+    """
+    One attempt of ``job`` in ``<out>/<state>/``; returns its report entry.
+    The job's scripts run one after another into one log, each with its own
+    ``timeout``, and a failing script stops the rest.
+    """
+    work = out_dir / job.state
+    work.mkdir(parents=True, exist_ok=True)
+    log_path = out_dir / "logs" / f"{job.state}__{job.script.stem}.{job.attempts}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    metrics_path = out_dir / "metrics" / f"{job.state}__{job.script.stem}.{job.attempts}.json"
+    before = _snapshot(work)
+    pythonpath = os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))
+    env = dict(
+        os.environ, PYTHONUNBUFFERED="1", PYTHONPATH=pythonpath, SCRAPER_METRICS=str(metrics_path),
+        SCRAPER_METRICS_STATE=job.state, SCRAPER_METRICS_SNAPSHOT=str(metrics_every or ""),
+    )
+
+    start = time.monotonic()
+    status, code = "ok", None
+    with open(log_path, "w", encoding="utf-8") as log:
+        for script in job.scripts:
+            if job.then:
+                log.write(f"=== {script.name}\n")
+                log.flush()
+            proc = subprocess.Popen(
+                [sys.executable, str(script)], cwd=work, env=env, stdin=subprocess.DEVNULL,
+                stdout=log, stderr=subprocess.STDOUT, start_new_session=os.name == "posix",
+            )
+            try:
+                code = proc.wait(timeout=timeout)
+                status = "ok" if code == 0 else "failed"
+            except subprocess.TimeoutExpired:
+                _terminate(proc)
+                proc.wait()
+                status = "timeout"
+            if status != "ok":
+                break
+    duration = time.monotonic() - start
+
+    outputs = {p: count_records(p) for p, m in _snapshot(work).items() if before.get(p) != m}
+    primary = max(outputs, key=outputs.get) if outputs else None
+    return {
+        "job": job.name, "state": job.state, "script": os.path.relpath(job.script, REPO_ROOT),
+        "then": [os.path.relpath(p, REPO_ROOT) for p in job.then],
+        "attempt": job.attempts, "status": status, "exit_code": code, "duration": round(duration, 1),
+        "records": outputs[primary] if primary else 0,
+        "primary_output": str(primary.relative_to(out_dir)) if primary else None,
+        "outputs": {str(p.relative_to(out_dir)): n for p, n in outputs.items()},
+        "log": str(log_path.relative_to(out_dir)),
+        "metrics": str(metrics_path.relative_to(out_dir)) if metrics_path.exists() else None,
+    }
+
+
+class Scheduler:
+    """
+    Runs jobs on ``workers`` threads (one subprocess each). A job starts only
+    when all of its hosts are below ``per_host`` running jobs and were last
+    started at least ``host_gap`` seconds ago.
+    """
+
+    def __init__(
+        self,
+        jobs: List[Job],
+        out_dir: Path,
+        workers: int = 4,
+        per_host: int = 1,
+        host_gap: float = 5.0,
+        retries: int = 2,
+        backoff: float = 60.0,
+        timeout: Optional[float] = None,
+        metrics_every: float = 60.0,
+    ):
+        self.pending = list(jobs)
+        self.out_dir = out_dir
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.host_gap = host_gap
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.metrics_every = metrics_every
+        self.results: List[Dict] = []
+        self._running: Dict[str, int] = {}
+        self._last_start: Dict[str, float] = {}
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def _ready(self, job: Job, now: float) -> bool:
+        if job.not_before > now:
+            return False
+        return all(
+            self._running.get(h, 0) < self.per_host and now - self._last_start.get(h, -1e9) >= self.host_gap
+            for h in job.hosts
+        )
+
+    def _next_job(self) -> Optional[Job]:
+        """Block until a job may start; None when nothing is left."""
+        with self._cond:
+            while True:
+                if not self.pending and not self._active:
+                    return None
+                now = time.monotonic()
+                if self._active < self.workers:
+                    job = next((j for j in self.pending if self._ready(j, now)), None)
+                    if job is not None:
+                        self.pending.remove(job)
+                        for h in job.hosts:
+                            self._running[h] = self._running.get(h, 0) + 1
+                            self._last_start[h] = now
+                        self._active += 1
+                        return job
+                self._cond.wait(timeout=1.0)
+
+    def _finish(self, job: Job, result: Dict) -> None:
+        with self._cond:
+            for h in job.hosts:
+                self._running[h] -= 1
+            self._active -= 1
+            self.results.append(result)
+            if result["status"] != "ok" and job.attempts <= self.retries:
+                delay = self.backoff * 2 ** (job.attempts - 1) * random.uniform(0.8, 1.2)
+                job.not_before = time.monotonic() + delay
+                self.pending.append(job)
+                logging.warning(f"[{job.name}] {result['status']}; retry {job.attempts}/{self.retries} in {delay:.0f}s")
+            self._cond.notify_all()
+
+    def _work(self, job: Job) -> None:
+        job.attempts += 1
+        logging.info(f"[{job.name}] start (attempt {job.attempts}, hosts: {', '.join(job.hosts) or '-'})")
+        try:
+            result = run_job(job, self.out_dir, self.timeout, self.metrics_every)
+        except Exception as e:
+            result = {"job": job.name, "state": job.state, "attempt": job.attempts, "status": "error",
+                      "error": str(e), "duration": 0.0, "records": 0}
+        logging.info(f"[{job.name}] {result['status']} in {result['duration']:.0f}s, {result['records']} records")
+        self._finish(job, result)
+
+    def run(self) -> List[Dict]:
+        threads = []
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            t = threading.Thread(target=self._work, args=(job,), name=job.name, daemon=True)
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        return self.results
+
+
+# --- Reporting ---
+def summarize(results: List[Dict]) -> Dict[str, Dict]:
+    """Per job: final status, attempts, total duration and records of the last attempt."""
+    jobs: Dict[str, Dict] = {}
+    for r in results:
+        s = jobs.setdefault(r["job"], {"state": r["state"], "attempts": 0, "duration": 0.0})
+        s["attempts"] += 1
+        s["duration"] = round(s["duration"] + r["duration"], 1)
+        s["status"], s["records"] = r["status"], r["records"]
+    return jobs
+
+
+def previous_durations(out_dir: Path) -> Dict[str, float]:
+    runs = sorted((out_dir / "runs").glob("*/report.json"))
+    if not runs:
+        return {}
+    try:
+        with open(runs[-1], encoding="utf-8") as f:
+            return {name: s["duration"] for name, s in json.load(f)["jobs"].items()}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def wait_until_clock(hhmm: str) -> None:
+    now = datetime.now()
+    at = datetime.combine(now.date(), datetime.strptime(hhmm, "%H:%M").time())
+    if at <= now:
+        at += timedelta(days=1)
+    logging.info(f"Waiting until {at:%Y-%m-%d %H:%M} to start")
+    time.sleep((at - now).total_seconds())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run state scrapers in parallel with per-host limits")
+    ap.add_argument("--state", action="append", help="State directory to run (repeatable)")
+    ap.add_argument("--all", action="store_true", help="Run every discovered state")
+    ap.add_argument("--skip", action="append", default=[], help="State directory to leave out (repeatable)")
+    ap.add_argument("--all-scripts", action="store_true", help="Also run scripts superseded by a *_New.py")
+    ap.add_argument("--list", action="store_true", help="Print the discovered jobs and their hosts, then exit")
+    ap.add_argument("--out", default="runner_output", help="Working/output folder (one subfolder per state)")
+    ap.add_argument("--workers", type=int, default=4, help="Jobs running at once")
+    ap.add_argument("--per-host", type=int, default=1, help="Jobs running at once against one host")
+    ap.add_argument("--host-gap", type=float, default=5.0, help="Seconds between job starts on one host")
+    ap.add_argument("--retries", type=int, default=2, help="Retries for a failed or timed-out job")
+    ap.add_argument("--backoff", type=float, default=60.0, help="First retry delay in seconds (doubles each time)")
+    ap.add_argument("--timeout", type=float, default=None, help="Kill a job after this many seconds")
+    ap.add_argument("--metrics-every", type=float, default=60.0, help="Seconds between timing snapshots (0: only at exit)")
+    ap.add_argument("--at", help="Start at HH:MM local time (e.g. 01:30 for an overnight run)")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    jobs = discover(all_scripts=args.all_scripts)
+    if args.list:
+        for job in jobs:
+            chain = "".join(f" -> {p.stem}" for p in job.then)
+            print(f"{job.name + chain:55} {', '.join(job.hosts) or '-'}")
+        return
+    wanted = {s.lower() for s in args.state or []}
+    skip = {s.lower() for s in args.skip}
+    jobs = [j for j in jobs if (args.all or j.state.lower() in wanted) and j.state.lower() not in skip]
+    if not jobs:
+        ap.error("pass --state NAME or --all (see --list)")
+
+    out_dir = Path(args.out).resolve()
+    last = previous_durations(out_dir)
+    jobs.sort(key=lambda j: -last.get(j.name, 0.0))          # slowest first keeps the pool busy
+    if args.at:
+        wait_until_clock(args.at)
+
+    started = datetime.now()
+    results = Scheduler(
+        jobs, out_dir, workers=args.workers, per_host=args.per_host, host_gap=args.host_gap,
+        retries=args.retries, backoff=args.backoff, timeout=args.timeout, metrics_every=args.metrics_every,
+    ).run()
+
+    summary = summarize(results)
+    run_dir = out_dir / "runs" / started.strftime("%Y%m%d_%H%M%S")
+    run_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "started": started.isoformat(timespec="seconds"),
+        "wall_seconds": round((datetime.now() - started).total_seconds(), 1),
+        "jobs": summary,
+        "attempts": results,
+    }
+    with open(run_dir / "report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    failed = [name for name, s in summary.items() if s["status"] != "ok"]
+    for name, s in sorted(summary.items()):
+        logging.info(f"{name:55} {s['status']:8} {s['duration']:8.0f}s {s['records']:7} records ({s['attempts']} attempts)")
+    logging.info(f"{len(summary) - len(failed)}/{len(summary)} jobs ok in {report['wall_seconds']:.0f}s → {run_dir / 'report.json'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
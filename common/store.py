@@ -0,0 +1,440 @@
+"""
+Local SQLite results store shared by the scrapers and the FOIA submitters.
+
+Scrapers used to hand their results to the FOIA scripts through Excel files
+at hard-coded paths; a multi-MB workbook is slow to write and re-read, and the
+two sides could not run at the same time. Both now go through one database in
+WAL mode (readers never block the writer):
+
+    opportunities     one row per (state, notice_id); the full scraped record
+                      is kept as JSON in ``data`` next to a few common columns
+    awards            vendors awarded on a notice
+    attachments       documents of a notice (name, URL, local path, sha256)
+    foia_submissions  every FOIA request sent for a notice, with its outcome
+    foia_ledger       append-only log of submission attempts and their outcomes
+    foia_requests     one row per request (state, agency, notice_id, template
+                      hash) with its current status; "already sent?" is a
+                      primary-key lookup
+
+A request's template hash covers its wording only: dates and the row values
+the text interpolates are masked before hashing, so re-sorting the input,
+re-scraping the notice or sending on another day is still the same request,
+while changing the wording makes a new one. A value is masked only where it
+stands as a whole on word boundaries, so cells the text does not use (or that
+merely occur inside its words) never change the hash.
+
+States are matched loosely ("New Jersey", "newjersey" and "NEW_JERSEY" are the
+same state), so engines can use tenant names and scripts the TENANTS keys.
+
+Usage:
+    store = ResultsStore()                      # $FOIA_RESULTS_DB or <repo>/results.db
+    store.upsert_opportunities("New Jersey", records, key="Bid Solicitation #",
+                               fields={"title": "Description", "status": "Status"})
+    df = store.opportunities_frame("New Jersey")
+    store.record_submission("New Jersey", "T1234", "Success", detail="Request #W0001")
+
+    key = RequestKey.of("Kentucky", to_addr, notice_id_of(row, subject), body, row)
+    if store.begin_request(key, channel="email"):     # False: sent, or outcome unknown
+        ...send...
+        store.finish_request(key, "sent", confirmation=message_id)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import pandas as pd
+
+DEFAULT_PATH = os.environ.get("FOIA_RESULTS_DB") or str(Path(__file__).resolve().parents[1] / "results.db")
+BUSY_TIMEOUT_MS = 30000
+
+# Common opportunity columns besides the key; ``fields`` maps them to record keys.
+OPPORTUNITY_COLUMNS = ("title", "agency", "status", "close_date", "url")
+
+# Columns that hold a notice's id in the scraped sheets, most specific first.
+NOTICE_COLUMNS = (
+    "notice_id", "Notice ID", "Notice / Solicitation #", "Solicitation Number", "Solicitation #",
+    "Solicitation ID", "Bid Solicitation #", "Bid Number", "Bid No", "Bid ID", "Event ID",
+    "Requisition Number", "Contract Number", "Code",
+)
+REQUEST_STATUSES = ("pending", "sent", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS opportunities (
+    state       TEXT NOT NULL,
+    notice_id   TEXT NOT NULL,
+    title       TEXT,
+    agency      TEXT,
+    status      TEXT,
+    close_date  TEXT,
+    url         TEXT,
+    source      TEXT,
+    data        TEXT NOT NULL,
+    first_seen  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (state, notice_id)
+);
+CREATE TABLE IF NOT EXISTS awards (
+    state       TEXT NOT NULL,
+    notice_id   TEXT NOT NULL,
+    vendor      TEXT NOT NULL,
+    amount      TEXT,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (state, notice_id, vendor)
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    state       TEXT NOT NULL,
+    notice_id   TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    url         TEXT,
+    path        TEXT,
+    sha256      TEXT,
+    PRIMARY KEY (state, notice_id, name)
+);
+CREATE TABLE IF NOT EXISTS foia_submissions (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    state        TEXT NOT NULL,
+    notice_id    TEXT NOT NULL,
+    channel      TEXT,
+    status       TEXT NOT NULL,
+    detail       TEXT,
+    submitted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS foia_submissions_notice ON foia_submissions (state, notice_id);
+CREATE TABLE IF NOT EXISTS foia_ledger (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    state        TEXT NOT NULL,
+    agency       TEXT NOT NULL,
+    notice_id    TEXT NOT NULL,
+    template     TEXT NOT NULL,
+    channel      TEXT,
+    event        TEXT NOT NULL,
+    confirmation TEXT,
+    detail       TEXT,
+    at           TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS foia_requests (
+    state        TEXT NOT NULL,
+    agency       TEXT NOT NULL,
+    notice_id    TEXT NOT NULL,
+    template     TEXT NOT NULL,
+    channel      TEXT,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL,
+    confirmation TEXT,
+    detail       TEXT,
+    first_at     TEXT NOT NULL,
+    updated_at   TEXT NOT NULL,
+    PRIMARY KEY (state, agency, notice_id, template)
+);
+"""
+
+
+def state_key(state: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (state or "").lower())
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _text(v: Any) -> Optional[str]:
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    s = str(v).strip()
+    return s or None
+
+
+def _json(rec: Dict[str, Any]) -> str:
+    return json.dumps(rec, ensure_ascii=False, default=str)
+
+
+# --- Request identity ---
+_DATES = re.compile(
+    r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b"
+    r"|\b\d{1,2}/\d{1,2}/\d{2,4}\b|\b\d{4}-\d{2}-\d{2}(?:[ T][\d:.]+)?\b",
+    re.IGNORECASE,
+)
+_PLAIN_WORD = re.compile(r"[a-z]+")
+
+
+def _interpolated(v: str) -> bool:
+    """Whether a cell value is worth masking: a lone lowercase word is taken for wording."""
+    return len(v) > 2 and not _PLAIN_WORD.fullmatch(v)
+
+
+def template_hash(text: str, values: Iterable[Any] = ()) -> str:
+    """
+    Hash of a request's wording with dates and ``values`` (the row's cells)
+    masked; a value is masked only where it stands on word boundaries.
+    """
+    masked = _DATES.sub("<date>", text or "")
+    cells = {v for v in (_text(v) for v in values) if v and _interpolated(v)}
+    for v in sorted(cells, key=len, reverse=True):
+        masked = re.sub(rf"(?<!\w){re.escape(v)}(?!\w)", "<v>", masked)
+    masked = re.sub(r"\s+", " ", masked).strip().lower()
+    return hashlib.sha256(masked.encode("utf-8")).hexdigest()[:16]
+
+
+def notice_id_of(record: Any, default: Any = "") -> str:
+    """A row's notice id from the first non-empty NOTICE_COLUMNS cell, else ``default``."""
+    by_key = {state_key(str(k)): k for k in record.keys()}
+    for col in NOTICE_COLUMNS:
+        k = by_key.get(state_key(col))
+        value = _text(record.get(k)) if k is not None else None
+        if value:
+            return value
+    return _text(default) or ""
+
+
+@dataclass(frozen=True)
+class RequestKey:
+    state: str
+    agency: str
+    notice_id: str
+    template: str
+
+    @classmethod
+    def of(cls, state: str, agency: str, notice_id: Any, text: str = "", row: Any = None) -> "RequestKey":
+        """
+        Key of the request with wording ``text`` (``row``'s cells masked) about
+        ``notice_id``. An email address as ``agency`` counts as its mail
+        domain, so the per-state senders and the dispatcher agree.
+        """
+        values = row.values() if hasattr(row, "values") and callable(row.values) else (row if row is not None else ())
+        agency = (agency or "").strip().lower().rpartition("@")[2].rstrip(">")
+        return cls(state_key(state), agency, _text(notice_id) or "", template_hash(text, values))
+
+
+class ResultsStore:
+    """
+    One SQLite connection per thread (sqlite3 connections are not shareable),
+    all on the same WAL database. Every write method commits its batch as a
+    single transaction.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.abspath(path or DEFAULT_PATH)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.conn.executescript(_SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    # --- Scraper side ---
+    def upsert_opportunities(
+        self,
+        state: str,
+        records: Iterable[Dict[str, Any]],
+        key: str,
+        fields: Optional[Dict[str, str]] = None,
+        source: str = "",
+    ) -> int:
+        """
+        Insert or update ``records`` keyed by ``record[key]``; ``fields`` maps
+        OPPORTUNITY_COLUMNS to record keys. Records without a key are skipped.
+        Returns the number written.
+        """
+        fields = fields or {}
+        st, now = state_key(state), _now()
+        rows = []
+        for rec in records:
+            notice_id = _text(rec.get(key))
+            if notice_id is None:
+                continue
+            cols = [_text(rec.get(fields[c])) if c in fields else None for c in OPPORTUNITY_COLUMNS]
+            rows.append((st, notice_id, *cols, source or state, _json(rec), now, now))
+        with self.conn:
+            self.conn.executemany(
+                f"""
+                INSERT INTO opportunities (state, notice_id, {", ".join(OPPORTUNITY_COLUMNS)},
+                                           source, data, first_seen, updated_at)
+                VALUES ({", ".join("?" * (len(OPPORTUNITY_COLUMNS) + 6))})
+                ON CONFLICT (state, notice_id) DO UPDATE SET
+                    {", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in OPPORTUNITY_COLUMNS)},
+                    source = excluded.source, data = excluded.data, updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def replace_awards(
+        self,
+        state: str,
+        notice_id: str,
+        awards: Sequence[Dict[str, Any]],
+        vendor: str = "vendor",
+        amount: Optional[str] = None,
+    ) -> int:
+        """Replace the awards of one notice (``vendor``/``amount`` name the record keys)."""
+        st = state_key(state)
+        rows = [
+            (st, str(notice_id), _text(a.get(vendor)), _text(a.get(amount)) if amount else None, _json(a))
+            for a in awards if _text(a.get(vendor))
+        ]
+        with self.conn:
+            self.conn.execute("DELETE FROM awards WHERE state = ? AND notice_id = ?", (st, str(notice_id)))
+            self.conn.executemany("INSERT OR REPLACE INTO awards VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def upsert_attachments(self, state: str, notice_id: str, attachments: Sequence[Dict[str, Any]]) -> int:
+        """``attachments`` are dicts with ``name`` and optional ``url``, ``path``, ``sha256``."""
+        st = state_key(state)
+        rows = [
+            (st, str(notice_id), a["name"], a.get("url"), a.get("path"), a.get("sha256"))
+            for a in attachments if a.get("name")
+        ]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO attachments VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # --- FOIA side ---
+    def opportunities(self, state: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Scraped records of a state, in first-seen order."""
+        sql = "SELECT data FROM opportunities WHERE state = ? ORDER BY first_seen, rowid"
+        params: List[Any] = [state_key(state)]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(r["data"]) for r in self.conn.execute(sql, params)]
+
+    def opportunities_frame(self, state: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """The same records as a DataFrame, columns as the scraper wrote them."""
+        return pd.DataFrame(self.opportunities(state, limit))
+
+    def has_opportunities(self, state: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM opportunities WHERE state = ? LIMIT 1", (state_key(state),)
+        ).fetchone() is not None
+
+    def record_submission(self, state: str, notice_id: str, status: str, channel: str = "", detail: str = "") -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO foia_submissions (state, notice_id, channel, status, detail, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (state_key(state), str(notice_id), channel, status, detail, _now()),
+            )
+
+    def submissions(self, state: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT * FROM foia_submissions WHERE state = ? ORDER BY id", (state_key(state),)
+        )
+        return [dict(r) for r in rows]
+
+    # --- Submission ledger ---
+    def request(self, key: RequestKey) -> Optional[Dict[str, Any]]:
+        """The request's row (status, attempts, confirmation, last detail, ...), or None if never tried."""
+        row = self.conn.execute(
+            "SELECT * FROM foia_requests WHERE state = ? AND agency = ? AND notice_id = ? AND template = ?",
+            (key.state, key.agency, key.notice_id, key.template),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def request_status(self, key: RequestKey) -> Optional[str]:
+        """"pending" (attempt started, outcome unknown), "sent", "failed", or None if never tried."""
+        row = self.request(key)
+        return row["status"] if row else None
+
+    def already_sent(self, key: RequestKey) -> bool:
+        return self.request_status(key) == "sent"
+
+    def sent_requests(self, state: str) -> Set[RequestKey]:
+        """Every sent request of a state, for set lookups over a whole run."""
+        rows = self.conn.execute(
+            "SELECT state, agency, notice_id, template FROM foia_requests WHERE state = ? AND status = 'sent'",
+            (state_key(state),),
+        )
+        return {RequestKey(*r) for r in rows}
+
+    def _event(self, key: RequestKey, channel: str, event: str, confirmation: str, detail: str, now: str) -> None:
+        self.conn.execute(
+            "INSERT INTO foia_ledger (state, agency, notice_id, template, channel, event, confirmation, detail, at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key.state, key.agency, key.notice_id, key.template, channel, event, confirmation or None,
+             detail or None, now),
+        )
+
+    def begin_request(self, key: RequestKey, channel: str = "", retry_pending: bool = False) -> bool:
+        """
+        Log an attempt before sending. False (nothing logged) when the request
+        was already sent, or an earlier attempt never recorded its outcome and
+        ``retry_pending`` is off -- it may have reached the agency. The check
+        and the write are one transaction, so two runs never both go ahead.
+        """
+        conn, now = self.conn, _now()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            status = self.request_status(key)
+            if status == "sent" or (status == "pending" and not retry_pending):
+                conn.rollback()
+                return False
+            self._event(key, channel, "attempt", "", "", now)
+            conn.execute(
+                """
+                INSERT INTO foia_requests (state, agency, notice_id, template, channel, status, attempts,
+                                           first_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'pending', 1, ?, ?)
+                ON CONFLICT (state, agency, notice_id, template) DO UPDATE SET
+                    channel = excluded.channel, status = 'pending', attempts = attempts + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (key.state, key.agency, key.notice_id, key.template, channel, now, now),
+            )
+            conn.commit()
+            return True
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def finish_request(self, key: RequestKey, status: str, confirmation: str = "", detail: str = "",
+                       channel: str = "") -> None:
+        """Log the outcome of the attempt ``begin_request`` started ("sent" or "failed")."""
+        if status not in REQUEST_STATUSES[1:]:
+            raise ValueError(f"status must be 'sent' or 'failed', not {status!r}")
+        now = _now()
+        with self.conn:
+            self._event(key, channel, status, confirmation, detail, now)
+            self.conn.execute(
+                "UPDATE foia_requests SET status = ?, confirmation = COALESCE(?, confirmation), detail = ?, "
+                "updated_at = ? WHERE state = ? AND agency = ? AND notice_id = ? AND template = ?",
+                (status, confirmation or None, detail or None, now, key.state, key.agency, key.notice_id, key.template),
+            )
+
+    def ledger(self, state: str) -> List[Dict[str, Any]]:
+        """Every logged attempt and outcome of a state, oldest first."""
+        rows = self.conn.execute("SELECT * FROM foia_ledger WHERE state = ? ORDER BY id", (state_key(state),))
+        return [dict(r) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+        self._local = threading.local()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,177 @@
+"""
+Condition-based waits to replace fixed ``time.sleep`` pacing.
+
+Every wait polls a concrete signal and returns as soon as it holds, so a fast
+page costs milliseconds instead of the worst-case sleep:
+
+    wait_network_idle   no fetch/XHR in flight and no new resource loaded for
+                        ``idle`` seconds. ``install_network_hooks`` registers
+                        the counter over CDP so it sees requests made while the
+                        page loads; otherwise it is injected on first use.
+    wait_dom_quiet      no DOM mutation under a node for ``quiet`` seconds.
+    wait_for_change     a grid's row signature (``row_signature``) differs from
+                        the one taken before a click.
+    wait_overlay_gone   no visible loading spinner/overlay.
+    settle              document ready + network idle + overlays gone; the
+                        drop-in for ``time.sleep(3)`` after ``driver.get``.
+
+Waits return True when the signal was seen and False on timeout (they never
+raise), matching the "sleep and carry on" code they replace. Each one records
+how long it actually took in ``common.instrument`` as ``wait.<name>`` (a
+timeout counts as an error); ``instrument.log_summary(prefix="wait.")``
+prints a per-wait summary at the end of a run.
+
+Usage:
+    sig = row_signature(driver, "table.results tbody tr")
+    next_button.click()
+    wait_for_change(driver, "table.results tbody tr", sig)
+"""
+
+import time
+from typing import Callable, Optional
+
+from common import instrument
+
+POLL_INTERVAL = 0.1
+LONG_REQUEST = 10.0   # seconds after which an open request no longer blocks "idle"
+DEFAULT_OVERLAYS = ".blockUI, .loading-overlay, .spinner, [aria-busy='true']"  # modals are dismissed, not waited on
+
+_NETWORK_HOOK_JS = r"""
+(function () {
+  if (window.__waitNet) return;
+  const s = window.__waitNet = {pending: new Map(), seq: 0, last: performance.now()};
+  const begin = () => { const id = ++s.seq; s.pending.set(id, performance.now()); s.last = performance.now(); return id; };
+  const end = id => { s.pending.delete(id); s.last = performance.now(); };
+  if (window.fetch) {
+    const origFetch = window.fetch;
+    window.fetch = function () {
+      const id = begin();
+      return origFetch.apply(this, arguments).finally(() => end(id));
+    };
+  }
+  const origSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    const id = begin();
+    this.addEventListener("loadend", () => end(id));
+    return origSend.apply(this, arguments);
+  };
+  try { new PerformanceObserver(() => { s.last = performance.now(); }).observe({type: "resource"}); } catch (e) {}
+})();
+"""
+
+# Requests open longer than arguments[0] seconds (long-polling, beacons) are
+# not counted as in flight.
+_NETWORK_STATE_JS = _NETWORK_HOOK_JS + r"""
+const s = window.__waitNet, now = performance.now();
+let inflight = 0;
+for (const started of s.pending.values()) if (now - started < arguments[0] * 1000) inflight++;
+return [document.readyState, inflight, (now - s.last) / 1000];
+"""
+
+_DOM_QUIET_JS = r"""
+const target = arguments[0] ? document.querySelector(arguments[0]) : document.documentElement;
+if (!target) return -1;
+if (!target.__waitMut) {
+  target.__waitMut = {last: performance.now()};
+  new MutationObserver(() => { target.__waitMut.last = performance.now(); })
+    .observe(target, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return (performance.now() - target.__waitMut.last) / 1000;
+"""
+
+_ROW_SIGNATURE_JS = r"""
+const rows = document.querySelectorAll(arguments[0]);
+if (!rows.length) return "";
+const text = el => (el.innerText || el.textContent || "").replace(/\s+/g, " ").trim();
+return rows.length + "|" + text(rows[0]) + "|" + text(rows[rows.length - 1]);
+"""
+
+_OVERLAY_VISIBLE_JS = r"""
+for (const el of document.querySelectorAll(arguments[0])) {
+  const st = getComputedStyle(el);
+  if (st.display !== "none" && st.visibility !== "hidden" && st.opacity !== "0"
+      && (el.offsetWidth || el.offsetHeight || el.getClientRects().length)) return true;
+}
+return false;
+"""
+
+
+# --- Polling ---
+def wait_until(condition: Callable[[], bool], timeout: float = 10, name: str = "until") -> bool:
+    """Poll ``condition`` (exceptions count as False) until it holds or ``timeout`` passes."""
+    start = time.monotonic()
+    deadline = start + timeout
+    while True:
+        try:
+            ok = bool(condition())
+        except Exception:
+            ok = False
+        if ok or time.monotonic() >= deadline:
+            instrument.record(f"wait.{name}", time.monotonic() - start, ok)
+            return ok
+        time.sleep(POLL_INTERVAL)
+
+
+# --- Signals ---
+def install_network_hooks(driver) -> bool:
+    """Register the fetch/XHR counter for every new document (Chrome/CDP only)."""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _NETWORK_HOOK_JS})
+        return True
+    except Exception:
+        return False
+
+
+def wait_document_ready(driver, timeout: float = 30) -> bool:
+    return wait_until(
+        lambda: driver.execute_script("return document.readyState") == "complete", timeout, "document_ready"
+    )
+
+
+# The quiet windows below are counted from the later of the last activity and
+# the start of the wait, so a click that is about to navigate or post back
+# gets ``idle`` seconds to start doing so.
+def wait_network_idle(driver, idle: float = 0.5, timeout: float = 30) -> bool:
+    """Document complete, nothing in flight and no new resource for ``idle`` seconds."""
+    start = time.monotonic()
+
+    def quiet():
+        ready, inflight, since = driver.execute_script(_NETWORK_STATE_JS, LONG_REQUEST)
+        return ready == "complete" and inflight == 0 and min(since, time.monotonic() - start) >= idle
+    return wait_until(quiet, timeout, "network_idle")
+
+
+def wait_dom_quiet(driver, css: Optional[str] = None, quiet: float = 0.3, timeout: float = 10) -> bool:
+    """No mutation under ``css`` (default: the whole document) for ``quiet`` seconds."""
+    start = time.monotonic()
+
+    def still():
+        return min(driver.execute_script(_DOM_QUIET_JS, css), time.monotonic() - start) >= quiet
+    return wait_until(still, timeout, "dom_quiet")
+
+
+def row_signature(driver, rows_css: str) -> str:
+    """Row count plus first/last row text; "" when there are no rows."""
+    try:
+        return driver.execute_script(_ROW_SIGNATURE_JS, rows_css) or ""
+    except Exception:
+        return ""
+
+
+def wait_for_change(driver, rows_css: str, old_signature: str, timeout: float = 20) -> bool:
+    """Wait for a non-empty row signature different from ``old_signature``."""
+    def changed():
+        sig = row_signature(driver, rows_css)
+        return bool(sig) and sig != old_signature
+    return wait_until(changed, timeout, "grid_change")
+
+
+def wait_overlay_gone(driver, css: str = DEFAULT_OVERLAYS, timeout: float = 15) -> bool:
+    return wait_until(lambda: not driver.execute_script(_OVERLAY_VISIBLE_JS, css), timeout, "overlay_gone")
+
+
+def settle(driver, timeout: float = 15, overlay: str = DEFAULT_OVERLAYS, idle: float = 0.5) -> bool:
+    """Page ready to read: network idle, then no overlay, within ``timeout`` overall."""
+    deadline = time.monotonic() + timeout
+    ok = wait_network_idle(driver, idle=idle, timeout=timeout)
+    return wait_overlay_gone(driver, overlay, timeout=max(deadline - time.monotonic(), 0)) and ok
@@ -0,0 +1,346 @@
+"""
+WebProcure (Proactis) bid board client, parameterized by customer id.
+
+Rhode Island (46) and Connecticut (51) publish their awarded solicitations on
+the same ``webprocure.proactiscloud.com`` full-text-search API. Listing pages
+are fetched in order while the detail requests for the records already seen
+run through a bounded worker pool; every request draws from one per-host
+token bucket so adding tenants or workers never exceeds the host budget.
+
+Usage (from the repository root):
+    python -m common.webprocure --customer-id 46 --customer-id 51 --workers 8 --rate 4
+"""
+
+import argparse
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+import requests
+
+from common.http import TokenBucket, create_session, host_rate_limiter
+from common.store import DEFAULT_PATH as DEFAULT_DB, ResultsStore
+
+BASE_URL = "https://webprocure.proactiscloud.com"
+LIST_URL = f"{BASE_URL}/wp-full-text-search/search/sols"
+DETAIL_URL_TMPL = f"{BASE_URL}/wp-full-text-search/soldetail/{{bidid}}"
+DOWNLOAD_BASE_URL = f"{BASE_URL}/main/sol/viewdoc.do"
+REQUEST_TIMEOUT = 60
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 4.0      # requests per second against the shared host
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/plain, */*",
+    "Referer": f"{BASE_URL}/wp-web-public/en/",
+    "Origin": BASE_URL,
+}
+
+@dataclass(frozen=True)
+class WebProcureTenant:
+    customer_id: str
+    source_name: str
+    output_prefix: str
+    page_url_tmpl: str = f"{BASE_URL}/wp-web-public/en/#/bidboard/bid/{{bid_id}}?customerid={{customer_id}}"
+
+
+TENANTS: Dict[str, WebProcureTenant] = {
+    "46": WebProcureTenant("46", "Rhode Island", "rhode_island_awarded_bids"),
+    "51": WebProcureTenant(
+        "51", "Connecticut", "connecticut_awarded_bids",
+        page_url_tmpl=f"{BASE_URL}/wp-web-public/en/#/solicitation/{{bid_id}}",
+    ),
+}
+
+
+# results-store column -> record field
+STORE_FIELDS: Dict[str, str] = {"title": "title", "agency": "issuer", "close_date": "closing_date", "url": "page_url"}
+
+
+def tenant_for(customer_id: str) -> WebProcureTenant:
+    """Known tenant, or a generic one so new customer ids work without code changes."""
+    return TENANTS.get(
+        str(customer_id),
+        WebProcureTenant(str(customer_id), f"WebProcure {customer_id}", f"webprocure_{customer_id}_awarded_bids"),
+    )
+
+
+def classify_opportunity(title: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Classifies an opportunity based on its title.
+    Returns (industry, sub_sector).
+    """
+    if not title:
+        return ("Miscellaneous", "General")
+
+    title_lower = title.lower()
+    keywords = {
+        "Construction": ["construction", "building", "renovation", "roofing", "hvac"],
+        "Technology": ["software", "hardware", "it services", "cybersecurity", "network"],
+        "Consulting": ["consulting", "consultant", "professional services", "study"],
+        "Transportation": ["vehicles", "fleet", "automotive", "trucks", "transportation"],
+        "Medical": ["medical", "health", "pharmaceutical", "ppe", "hospital"],
+    }
+
+    for industry, terms in keywords.items():
+        if any(term in title_lower for term in terms):
+            return (industry, "General")
+
+    return ("Miscellaneous", "General")
+
+
+def parse_date_from_api(api_date: Optional[int]) -> Optional[str]:
+    """
+    Parses a Unix timestamp (in milliseconds) from the API into a date string (YYYY-MM-DD).
+    """
+    if not api_date:
+        return None
+    try:
+        return datetime.fromtimestamp(api_date / 1000).date().isoformat()
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Could not parse date from API data: '{api_date}'. Error: {e}")
+        return None
+
+
+def build_record(tenant: WebProcureTenant, record: Dict[str, Any], drec: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge a listing record and its detail record into the exported row."""
+    bid_id = record.get("bidid")
+    cid = tenant.customer_id
+
+    download_links = []
+    for doc in drec.get("bidDocs", []):
+        doc_details = doc.get("docAssoc", {}).get("docDoc", {})
+        file_id = doc_details.get("docid")
+        file_name = doc_details.get("name")
+        mime_type = doc_details.get("mimeType")
+        if all([file_id, file_name, mime_type]):
+            encoded_file_name = quote(file_name)
+            final_url = (
+                f"{DOWNLOAD_BASE_URL}?docid={file_id}&eboid={cid}"
+                f"&mimeType={mime_type}&docName={encoded_file_name}"
+                f"&docUniqueName={encoded_file_name}&bidid={bid_id}"
+            )
+            download_links.append(f"{file_name}: {final_url}")
+
+    issuer, email = None, None
+    contacts = drec.get("bidContacts", [])
+    if contacts:
+        cdetail = contacts[0].get("bidContactDetail", {})
+        contact_string = cdetail.get("contactinfo", "")
+        parts = [p.strip() for p in contact_string.split("\r\n") if p.strip()]
+        if parts:
+            issuer = parts[0]
+            email = next((p for p in parts if "@" in p), None)
+
+    bid_title = drec.get("title", record.get("title"))
+    industry, sub_sector = classify_opportunity(bid_title)
+
+    rfp_data = {
+        "notice_id": record.get("bidNumber"),
+        "title": bid_title,
+        "source": tenant.source_name,
+        "publish_date": parse_date_from_api(drec.get("cdate")),
+        "closing_date": parse_date_from_api(record.get("openDate")),
+        "issuer": issuer,
+        "email": email,
+        "page_url": tenant.page_url_tmpl.format(bid_id=bid_id, customer_id=cid),
+        "industry": industry,
+        "type": sub_sector,
+        "description": drec.get("description", record.get("description")),
+        "download_links": "\n".join(download_links) if download_links else None,
+    }
+    return {k: v for k, v in rfp_data.items() if v is not None}
+
+
+class WebProcureClient:
+    def __init__(
+        self,
+        tenant: WebProcureTenant,
+        session: Optional[requests.Session] = None,
+        limiter: Optional[TokenBucket] = None,
+        workers: int = DEFAULT_WORKERS,
+    ):
+        self.tenant = tenant
+        self.workers = max(1, workers)
+        self.session = session or create_session(HEADERS, pool_size=self.workers + 2)
+        self.limiter = limiter or host_rate_limiter(BASE_URL, DEFAULT_RATE)
+
+    def _get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.limiter.acquire()
+        resp = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _detail(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        notice_id = record.get("bidNumber")
+        try:
+            dwrapper = self._get_json(
+                DETAIL_URL_TMPL.format(bidid=record.get("bidid")),
+                {"customerid": self.tenant.customer_id},
+            )
+        except requests.RequestException as e:
+            logging.error(f"[{self.tenant.source_name}] Detail fetch failed for {notice_id}: {e}")
+            return None
+        except json.JSONDecodeError as e:
+            logging.error(f"[{self.tenant.source_name}] Detail JSON decode failed for {notice_id}: {e}")
+            return None
+        if not dwrapper.get("records"):
+            logging.warning(f"[{self.tenant.source_name}] No detail found for {notice_id}")
+            return None
+        return build_record(self.tenant, record, dwrapper["records"][0])
+
+    def scrape_awarded(self, into: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        All awarded solicitations of the tenant, in listing order, appended to
+        ``into`` (a new list by default). If the crawl fails, ``into`` still
+        holds every record whose detail came back, so callers can save it.
+        """
+        name = self.tenant.source_name
+        list_params = {
+            "customerid": self.tenant.customer_id,
+            "q": "*",
+            "sort": "r",
+            "f": "ps=Awarded",
+            "oids": "",
+        }
+        futures: List[Future] = []
+        results = [] if into is None else into
+        consumed = 0
+        current_offset = 0
+        total_hits = None
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while True:
+                    logging.info(f"[{name}] Fetching awarded results at offset {current_offset} ...")
+                    list_params["from"] = current_offset
+                    try:
+                        data = self._get_json(LIST_URL, list_params)
+                    except requests.RequestException as e:
+                        logging.error(f"[{name}] Failed to fetch page at offset {current_offset}: {e}. Stopping.")
+                        break
+                    except json.JSONDecodeError as e:
+                        logging.error(f"[{name}] Failed to parse listing JSON at offset {current_offset}: {e}. Stopping.")
+                        break
+
+                    if total_hits is None:
+                        total_hits = data.get("hits", 0)
+                        if total_hits == 0:
+                            logging.info(f"[{name}] No awarded solicitations found.")
+                            break
+                        logging.info(f"[{name}] Found {total_hits} awarded solicitations. Starting scrape ...")
+
+                    records = data.get("records", [])
+                    if not records:
+                        break
+
+                    # Details for this page start while the next listing page is fetched.
+                    for record in records:
+                        if not record.get("bidNumber") or not record.get("bidid"):
+                            logging.warning(f"[{name}] Skipping record due to missing ID: {record}")
+                            continue
+                        futures.append(pool.submit(self._detail, record))
+
+                    current_offset += len(records)
+                    if current_offset >= total_hits:
+                        break
+
+                for fut in futures:
+                    rec = fut.result()
+                    consumed += 1
+                    if rec:
+                        results.append(rec)
+        finally:
+            # the pool has drained; keep details that finished after the error
+            for fut in futures[consumed:]:
+                if fut.done() and not fut.cancelled() and fut.exception() is None and fut.result():
+                    results.append(fut.result())
+
+        logging.info(f"[{name}] Staged {len(results)} awarded bids.")
+        return results
+
+
+def scrape_awarded(
+    customer_id: str,
+    workers: int = DEFAULT_WORKERS,
+    rate: float = DEFAULT_RATE,
+    into: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    limiter = host_rate_limiter(BASE_URL, rate)
+    return WebProcureClient(tenant_for(customer_id), limiter=limiter, workers=workers).scrape_awarded(into)
+
+
+def store_results(records: List[Dict[str, Any]], store: ResultsStore) -> int:
+    """Upsert awarded bids into the shared results store under their ``source`` state."""
+    by_source: Dict[str, List[Dict[str, Any]]] = {}
+    for rec in records:
+        by_source.setdefault(rec.get("source") or "", []).append(rec)
+    n = 0
+    for source, recs in by_source.items():
+        n += store.upsert_opportunities(source, recs, "notice_id", STORE_FIELDS, source=BASE_URL)
+    logging.info(f"Stored {n} awarded bids in {store.path}")
+    return n
+
+
+def save_excel(records: List[Dict[str, Any]], output_filename: str, current_year_only: bool = False) -> Optional[str]:
+    """Write records to Excel; optionally keep only this year's publications, newest closing first."""
+    if not records:
+        logging.warning("No data scraped; no Excel file created.")
+        return None
+    df = pd.DataFrame(records)
+    if current_year_only:
+        df["publish_date"] = pd.to_datetime(df["publish_date"], errors="coerce")
+        df["closing_date"] = pd.to_datetime(df["closing_date"], errors="coerce")
+        current_year = datetime.now().year
+        df = df[df["publish_date"].dt.year == current_year]
+        if df.empty:
+            logging.warning(f"No awarded bids found for {current_year}.")
+            return None
+        df = df.sort_values(by="closing_date", ascending=False, na_position="last")
+    logging.info(f"Saving {len(df)} awarded bids to {output_filename} ...")
+    df.to_excel(output_filename, index=False, engine="openpyxl")
+    logging.info(f"Saved to {output_filename}")
+    return output_filename
+
+
+def main():
+    ap = argparse.ArgumentParser(description="WebProcure awarded bids for one or more customer ids")
+    ap.add_argument("--customer-id", action="append", required=True, help="WebProcure customer id (repeatable)")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent detail requests")
+    ap.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max requests/second to the WebProcure host")
+    ap.add_argument("--current-year", action="store_true", help="Keep only bids published this year")
+    ap.add_argument("--db", default=DEFAULT_DB, help="Results database to upsert into ('' to skip)")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    limiter = host_rate_limiter(BASE_URL, args.rate)
+    scraped: Dict[str, List[Dict[str, Any]]] = {cid: [] for cid in args.customer_id}
+    with ThreadPoolExecutor(max_workers=len(args.customer_id)) as pool:
+        futures = {
+            cid: pool.submit(
+                WebProcureClient(tenant_for(cid), limiter=limiter, workers=args.workers).scrape_awarded, scraped[cid]
+            )
+            for cid in args.customer_id
+        }
+        for cid, fut in futures.items():
+            tenant = tenant_for(cid)
+            if fut.exception() is not None:
+                logging.error(f"[{tenant.source_name}] Crawl failed; saving the {len(scraped[cid])} bids scraped so far: "
+                              f"{fut.exception()}")
+            if args.db:
+                with ResultsStore(args.db) as store:
+                    store_results(scraped[cid], store)
+            suffix = f"_{datetime.now().year}" if args.current_year else ""
+            save_excel(scraped[cid], f"{tenant.output_prefix}{suffix}.xlsx", current_year_only=args.current_year)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts put the repository root on sys.path the same way.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.store import ResultsStore  # noqa: E402
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    yield store
+    store.close()
@@ -0,0 +1,80 @@
+"""Advantage4 VSS engine: paging keys, totals and row normalization."""
+
+import copy
+
+from common.advantage import TENANTS, GridCall, VSSClient, find_rows, normalize_row, paging_scope
+
+ROWS = [{"data": {"DOC_REF": f"RFP-{n}", "DOC_DSCR": f"Item {n}", "DEPT_NM": "DTMB",
+                  "DOC_CD_CONCAT": "null - RFP", "SO_STA": "A"}} for n in range(7)]
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Serves ROWS by ``paging.first``/``paging.rows``; ``stuck_after`` ignores larger offsets."""
+
+    def __init__(self, stuck_after=None, page_cap=3):
+        self.headers, self.cookies = {}, _Cookies()
+        self.stuck_after, self.page_cap, self.bodies = stuck_after, page_cap, []
+
+    def request(self, method, url, json, timeout):
+        self.bodies.append(copy.deepcopy(json))
+        start, size = json["paging"]["first"], min(json["paging"]["rows"], self.page_cap)
+        if self.stuck_after is not None:
+            start = min(start, self.stuck_after)
+        # "total" elsewhere in the payload outranks "count" but is not the grid's
+        return FakeResponse({"meta": {"total": 1, "version": 4},
+                             "grid": {"count": len(ROWS), "rows": ROWS[start:start + size]}})
+
+
+class _Cookies:
+    def set(self, *args, **kwargs):
+        pass
+
+
+def client(session, body=None):
+    body = body or {"criteria": {"startRow": 9, "pageSize": 2, "DOC_CD": "RFP"}, "paging": {"first": 0, "rows": 25}}
+    call = GridCall("https://vss.example.gov/grid", "POST", {}, body, [])
+    return VSSClient(TENANTS["michigan"], call, session=session)
+
+
+def test_paging_scope_skips_unrelated_int_fields():
+    assert paging_scope({"criteria": {"startRow": 9}, "paging": {"first": 0, "rows": 25}}) == ("paging",)
+    assert paging_scope({"startRow": 0, "rows": 50, "filter": {"start": 5}}) == ()
+    assert paging_scope({"query": {"status": 1}}) is None
+
+
+def test_pages_walk_the_paging_object_to_the_reported_total():
+    session = FakeSession()
+    pages = list(client(session).pages(page_size=100))
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert [b["paging"]["first"] for b in session.bodies] == [0, 3, 6]
+    assert all(b["paging"]["rows"] == 100 for b in session.bodies)
+    assert session.bodies[0]["criteria"] == {"startRow": 9, "pageSize": 2, "DOC_CD": "RFP"}
+
+
+def test_pages_stop_when_the_server_repeats_a_page():
+    pages = list(client(FakeSession(stuck_after=3)).pages(page_size=3))
+    assert [[r["data"]["DOC_REF"] for r in p] for p in pages] == [["RFP-0", "RFP-1", "RFP-2"], ["RFP-3", "RFP-4", "RFP-5"]]
+
+
+def test_crawl_normalizes_field_codes():
+    records = client(FakeSession()).crawl()
+    assert records[0] == {"Source": "Michigan", "Solicitation Number": "RFP-0", "Description": "Item 0",
+                          "Department": "DTMB", "Type": "RFP", "Status": "A"}
+    assert len(records) == len(ROWS)
+
+
+def test_find_rows_prefers_the_list_with_field_codes():
+    payload = {"tabs": [{"id": 1, "label": "x"}, {"id": 2, "label": "y"}], "grid": {"rows": ROWS[:1]}}
+    assert find_rows(payload) == ROWS[:1]
+    assert normalize_row({"a": {"doc_ref": "X"}, "DOC_REF": "Y"}, TENANTS["alaska"])["Solicitation Number"] == "X"
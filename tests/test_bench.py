@@ -0,0 +1,27 @@
+"""Offline benchmark runs: scratch folder isolation and record counting."""
+
+import json
+import subprocess
+from pathlib import Path
+
+from common import bench
+from common.runner import Job
+
+
+def test_run_once_isolates_the_results_store_and_counts_the_largest_output(monkeypatch, tmp_path):
+    seen = {}
+
+    def fake_run(cmd, cwd, env, **kwargs):
+        seen.update(cwd=Path(cwd), env=env)
+        Path(cwd, "out.jsonl").write_text('{"a": 1}\n{"a": 2}\n{"a": 3}\n', encoding="utf-8")
+        Path(cwd, "out.json").write_text(json.dumps([{"a": 1}]), encoding="utf-8")
+        Path(cwd, "_metrics.json").write_text(json.dumps({"http_requests": 4}), encoding="utf-8")
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(bench.subprocess, "run", fake_run)
+    job = Job("Texas", Path("Scrapper Codes/Texas/texas.py"), ())
+    result = bench.run_once(job, "replay", tmp_path / "Texas__texas.jsonl")
+
+    assert Path(seen["env"]["FOIA_RESULTS_DB"]).parent == seen["cwd"]
+    assert result["exit_code"] == 0 and result["records"] == 3 and result["http_requests"] == 4
+    assert not seen["cwd"].exists()
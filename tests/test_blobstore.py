@@ -0,0 +1,63 @@
+"""Content-addressed attachment store: dedup, per-notice links and ZIP export."""
+
+import os
+import threading
+import zipfile
+
+from common.blobstore import AttachmentStore
+
+
+def test_same_content_is_stored_once(tmp_path):
+    with AttachmentStore(str(tmp_path / "store")) as store:
+        a = store.put_stream([b"hello ", b"world"])
+        b = store.put_stream([b"hello world"])
+        assert a == b
+        assert store.stats()["blobs"] == 1
+
+
+def test_export_zip_rebuilds_only_when_the_attachment_list_changes(tmp_path):
+    zip_path = str(tmp_path / "zips" / "N-1.zip")
+    with AttachmentStore(str(tmp_path / "store")) as store:
+        sha, _ = store.put_stream([b"one"])
+        store.link("N-1", "one.txt", sha)
+        assert store.export_zip("N-1", zip_path) == zip_path
+        built = os.stat(zip_path).st_mtime_ns
+
+        assert store.export_zip("N-1", zip_path) == zip_path
+        assert os.stat(zip_path).st_mtime_ns == built
+
+        sha2, _ = store.put_stream([b"two"])
+        store.link("N-1", "two.txt", sha2)
+        store.export_zip("N-1", zip_path)
+        with zipfile.ZipFile(zip_path) as zf:
+            assert sorted(zf.namelist()) == ["one.txt", "two.txt"]
+
+        assert store.export_zip("unknown", str(tmp_path / "zips" / "none.zip")) is None
+
+
+def test_concurrent_exports_of_one_path_leave_a_valid_zip(tmp_path):
+    zip_dir = tmp_path / "zips"
+    zip_path = str(zip_dir / "shared.zip")
+    with AttachmentStore(str(tmp_path / "store")) as store:
+        for n in range(8):
+            sha, _ = store.put_stream([os.urandom(64 * 1024)])
+            store.link(f"N-{n}", "file.bin", sha)
+
+        errors = []
+
+        def export(n):
+            try:
+                store.export_zip(f"N-{n}", zip_path)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=export, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        with zipfile.ZipFile(zip_path) as zf:
+            assert zf.testzip() is None
+        assert os.listdir(zip_dir) == ["shared.zip"]
@@ -0,0 +1,131 @@
+"""Periscope BSO engine: JSF partial responses, grid paging and per-record failures."""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+from bs4 import BeautifulSoup
+
+from common.bso import BSOClient, TENANTS, cell_text, form_fields, header_index_map, parse_partial_response
+
+SEARCH_PAGE = """<html><body>
+<form id="advSearch" action="/bso/view/search/external/advancedSearchBid.xhtml">
+  <input type="hidden" name="javax.faces.ViewState" value="vs-0">
+  <input type="text" name="advSearch:keyword" value="">
+  <input type="checkbox" name="advSearch:openOnly">
+  <select name="advSearch:status"><option value="">Any</option><option value="2BPO">Closed</option></select>
+  <button id="advSearch:btnBidSearch" type="submit">Search</button>
+</form></body></html>"""
+
+HEAD = ("<thead><tr><th><span>Bid Solicitation #</span></th><th>Organization Name</th>"
+        "<th>Description</th><th>Bid Opening Date</th></tr></thead>")
+
+
+def row(n):
+    return (f'<tr><td><span class="ui-column-title">Bid Solicitation #</span>'
+            f'<a href="/bso/external/bidDetail.sdo?docId=B-{n}">B-{n}</a></td>'
+            f"<td>Agency {n}</td><td>Item {n}</td><td>01/0{n}/2025 10:00:00</td></tr>")
+
+
+def partial(updates):
+    body = "".join(f'<update id="{uid}"><![CDATA[{html}]]></update>' for uid, html in updates.items())
+    return f'<?xml version="1.0" encoding="UTF-8"?><partial-response><changes>{body}</changes></partial-response>'
+
+
+def results_page(rows, total):
+    return (f'<form id="res" action="/bso/view/search/external/advancedSearchBid.xhtml">'
+            f'<span class="ui-paginator-current">(1 of 2) 1 - {len(rows)} of {total}</span>'
+            f'<table>{HEAD}<tbody id="res:bidResult_data">{"".join(rows)}</tbody></table></form>')
+
+
+class FakeResponse:
+    def __init__(self, text, ctype="text/html"):
+        self.text, self.headers = text, {"Content-Type": ctype}
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """The search page, then results pages of two rows out of ``total``."""
+
+    def __init__(self, total=3, repeat=False):
+        self.total, self.repeat, self.posts = total, repeat, []
+
+    def get(self, url, timeout):
+        if "bidDetail" in url:
+            if url.endswith("B-2"):
+                raise ET.ParseError("truncated response")
+            return FakeResponse(f"<table><tr><td>Issue Date:</td><td>Issued {url[-3:]}</td></tr></table>")
+        return FakeResponse(SEARCH_PAGE)
+
+    def post(self, url, data, headers, timeout):
+        self.posts.append(data)
+        vs = {"j_id1:javax.faces.ViewState:0": f"vs-{len(self.posts)}"}
+        if "res:bidResult_first" not in data:
+            return FakeResponse(partial(dict(vs, results=results_page([row(1), row(2)], self.total))), "text/xml")
+        first = int(data["res:bidResult_first"])
+        rows = [row(1), row(2)] if self.repeat else [row(n + 1) for n in range(first, min(first + 2, self.total))]
+        return FakeResponse(partial(dict(vs, **{"res:bidResult": "".join(rows)})), "text/xml")
+
+
+# --- Protocol helpers ---
+def test_parse_partial_response_updates_and_errors():
+    updates, redirect = parse_partial_response(partial({"a": "<b>x</b>"}))
+    assert updates == {"a": "<b>x</b>"} and redirect is None
+    assert parse_partial_response('<partial-response><redirect url="/next"/></partial-response>') == ({}, "/next")
+    with pytest.raises(RuntimeError, match="ViewExpired"):
+        parse_partial_response("<partial-response><error><error-name>x</error-name>"
+                               "<error-message>ViewExpired</error-message></error></partial-response>")
+
+
+def test_form_fields_submits_like_a_browser():
+    form = BeautifulSoup(SEARCH_PAGE, "html.parser").find("form")
+    assert form_fields(form) == {"javax.faces.ViewState": "vs-0", "advSearch:keyword": "", "advSearch:status": ""}
+
+
+def test_header_map_and_cell_labels():
+    labels = ["Bid Solicitation #", "Organization  Name", "Awarded Vendor(s) / Contract"]
+    assert header_index_map(labels, ("Bid Solicitation #", "Organization Name", "Awarded Vendor(s)", "Buyer")) == {
+        "Bid Solicitation #": 0, "Organization Name": 1, "Awarded Vendor(s)": 2, "Buyer": None}
+    td = BeautifulSoup('<td><span class="ui-column-title">Status</span> Closed</td>', "html.parser").td
+    assert cell_text(td) == "Closed"
+
+
+# --- Grid and crawl ---
+def client(session):
+    return BSOClient(TENANTS["nevada"], session=session)
+
+
+def test_search_pages_carries_view_state_and_pages_to_the_total():
+    session = FakeSession(total=3)
+    pages = list(client(session).search_pages())
+    assert [[r["Bid Solicitation #"] for r in p] for p in pages] == [["B-1", "B-2"], ["B-3"]]
+    assert pages[0][0]["Row URL"] == "https://nevadaepro.com/bso/external/bidDetail.sdo?docId=B-1"
+    search, page2 = session.posts
+    assert search["advSearch:status"] == "2BPO" and search["javax.faces.ViewState"] == "vs-0"
+    assert page2["res:bidResult_first"] == "2" and page2["javax.faces.ViewState"] == "vs-1"
+
+
+def test_search_pages_stops_on_a_repeated_page():
+    assert len(list(client(FakeSession(total=10, repeat=True)).search_pages())) == 1
+
+
+def test_crawl_keeps_records_whose_detail_fails():
+    records = client(FakeSession(total=3)).crawl()
+    by_id = {r["Bid Solicitation #"]: r for r in records}
+    assert sorted(by_id) == ["B-1", "B-2", "B-3"]
+    assert by_id["B-1"]["Issue Date"] == "Issued B-1"
+    assert "Issue Date" not in by_id["B-2"]
+
+
+def test_crawl_survives_an_enrich_crash(monkeypatch):
+    c = client(FakeSession(total=3))
+
+    def enrich(rec, attachments_dir):
+        if rec["Bid Solicitation #"] == "B-3":
+            raise OSError("disk full")
+        rec["Buyer"] = "x"
+        return rec
+
+    monkeypatch.setattr(c, "enrich", enrich)
+    assert sorted(r["Bid Solicitation #"] for r in c.crawl()) == ["B-1", "B-2", "B-3"]
@@ -0,0 +1,60 @@
+"""Checkpoint sink: append, resume and materialize once."""
+
+import json
+
+import pytest
+
+from common.checkpoint import CheckpointSink
+
+
+def test_keyed_sink_dedups_and_keeps_the_last_version(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with CheckpointSink(path, key="bid") as sink:
+        assert sink.add({"bid": "B-1", "status": "open"})
+        assert not sink.add({"bid": "B-1", "status": "dup"})
+        assert sink.add({"bid": "B-2", "status": "open"})
+        assert sink.add({"bid": "B-1", "status": "closed"}, update=True)
+        assert "B-1" in sink and len(sink) == 2
+        assert sink.records() == [{"bid": "B-2", "status": "open"}, {"bid": "B-1", "status": "closed"}]
+
+
+def test_resume_keeps_the_checkpoint_and_a_fresh_run_discards_it(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with CheckpointSink(path) as sink:
+        sink.add({"n": 1})
+        sink.add({"n": 2})
+
+    with CheckpointSink(path, resume=True) as sink:
+        assert len(sink) == 2
+        sink.add({"n": 3})
+        assert len(sink) == 3
+
+    with CheckpointSink(path, key="n", resume=True) as sink:
+        assert 3 in sink and len(sink) == 3
+
+    with CheckpointSink(path) as sink:
+        assert len(sink) == 0 and sink.records() == []
+
+
+def test_write_json_streams_the_array_or_wraps_it(tmp_path):
+    with CheckpointSink(str(tmp_path / "out.jsonl"), key="bid") as sink:
+        sink.add({"bid": "B-1"})
+        sink.add({"bid": "B-2"})
+
+        assert sink.write_json(str(tmp_path / "out.json")) == 2
+        assert json.loads((tmp_path / "out.json").read_text(encoding="utf-8")) == [{"bid": "B-1"}, {"bid": "B-2"}]
+
+        assert sink.write_json(str(tmp_path / "wrapped.json"), wrap=lambda rows: {"count": len(rows), "rows": rows}) == 2
+        assert json.loads((tmp_path / "wrapped.json").read_text(encoding="utf-8"))["count"] == 2
+        assert not (tmp_path / "wrapped.json.tmp").exists()
+
+
+def test_write_xlsx_uses_the_requested_columns(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("openpyxl")
+    with CheckpointSink(str(tmp_path / "out.jsonl")) as sink:
+        sink.add({"bid": "B-1", "title": "Paving", "extra": 1})
+        assert sink.write_xlsx(str(tmp_path / "out.xlsx"), columns=["title", "bid"]) == 1
+    frame = pd.read_excel(tmp_path / "out.xlsx")
+    assert list(frame.columns) == ["title", "bid"]
+    assert frame.iloc[0].tolist() == ["Paving", "B-1"]
@@ -0,0 +1,187 @@
+"""Resuming downloads: Range/If-Range requests, the restart paths and the per-host pool."""
+
+import hashlib
+import threading
+
+import pytest
+import requests
+
+from common.downloader import ChecksumError, Downloader, download
+
+BODY = bytes(range(256)) * 40
+
+
+class FakeResponse:
+    def __init__(self, status, body, headers, fail_after=None):
+        self.status_code, self.body, self.headers, self.url = status, body, headers, "http://files.example/f"
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def iter_content(self, chunk_size):
+        if self.fail_after is not None:
+            yield self.body[:self.fail_after]
+            raise requests.exceptions.ChunkedEncodingError("connection dropped")
+        yield self.body
+
+
+class FakeSession:
+    """Serves BODY with ETag ``etag``; ``ranges`` picks how Range requests are answered."""
+
+    def __init__(self, ranges="ok", etag='"v1"', drop_first_at=None):
+        self.ranges, self.etag, self.drop_first_at = ranges, etag, drop_first_at
+        self.requests = []
+
+    def get(self, url, stream, headers, timeout):
+        self.requests.append(dict(headers))
+        full = {"ETag": self.etag, "Content-Length": str(len(BODY))}
+        if "Range" not in headers:
+            drop, self.drop_first_at = self.drop_first_at, None
+            return FakeResponse(200, BODY, full, fail_after=drop)
+        start = int(headers["Range"][len("bytes="):-1])
+        if self.ranges == "ignored" or headers.get("If-Range") not in (None, self.etag):
+            return FakeResponse(200, BODY, full)
+        if self.ranges == "misaligned":
+            start -= 10
+        return FakeResponse(206, BODY[start:], {"Content-Range": f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"})
+
+
+@pytest.fixture
+def dest(tmp_path):
+    return str(tmp_path / "bid.pdf")
+
+
+def leave_part(dest, size=100, validator='"v1"'):
+    with open(dest + ".part", "wb") as f:
+        f.write(BODY[:size])
+    if validator:
+        with open(dest + ".part.validator", "w") as f:
+            f.write(validator)
+
+
+def assert_complete(dest, result):
+    with open(dest, "rb") as f:
+        assert f.read() == BODY
+    assert result.sha256 == hashlib.sha256(BODY).hexdigest()
+    assert result.size == len(BODY)
+
+
+def test_fresh_download_leaves_no_part_files(dest, tmp_path):
+    result = download(FakeSession(), "http://files.example/f", dest)
+    assert_complete(dest, result)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bid.pdf"]
+    assert not result.resumed
+
+
+def test_part_file_is_resumed_with_if_range(dest, tmp_path):
+    leave_part(dest)
+    session = FakeSession()
+    result = download(session, "http://files.example/f", dest)
+    assert_complete(dest, result)
+    assert session.requests == [{"Range": "bytes=100-", "If-Range": '"v1"'}]
+    assert result.resumed
+    assert not (tmp_path / "bid.pdf.part.validator").exists()
+
+
+def test_dropped_connection_resumes_from_the_part_file(dest):
+    session = FakeSession(drop_first_at=1000)
+    result = download(session, "http://files.example/f", dest, backoff=0)
+    assert_complete(dest, result)
+    assert session.requests == [{}, {"Range": "bytes=1000-", "If-Range": '"v1"'}]
+    assert result.resumed
+
+
+def test_misaligned_content_range_restarts_from_zero(dest):
+    leave_part(dest)
+    session = FakeSession(ranges="misaligned")
+    result = download(session, "http://files.example/f", dest)
+    assert_complete(dest, result)
+    assert session.requests == [{"Range": "bytes=100-", "If-Range": '"v1"'}, {}]
+
+
+def test_changed_file_restarts_with_the_new_validator(dest, tmp_path):
+    leave_part(dest, validator='"v0"')
+    session = FakeSession(etag='"v2"')
+    result = download(session, "http://files.example/f", dest)
+    assert_complete(dest, result)
+    assert session.requests == [{"Range": "bytes=100-", "If-Range": '"v0"'}]
+    assert not (tmp_path / "bid.pdf.part.validator").exists()
+
+
+def test_ignored_range_restarts_without_splicing(dest):
+    leave_part(dest, size=300, validator=None)
+    session = FakeSession(ranges="ignored")
+    result = download(session, "http://files.example/f", dest)
+    assert_complete(dest, result)
+    assert session.requests == [{"Range": "bytes=300-"}]
+
+
+def test_weak_etag_is_not_used_for_if_range(dest):
+    session = FakeSession(etag='W/"v1"', drop_first_at=1000)
+    download(session, "http://files.example/f", dest, backoff=0)
+    assert session.requests[1] == {"Range": "bytes=1000-"}
+
+
+def test_checksum_mismatch_discards_the_part(dest, tmp_path):
+    with pytest.raises(ChecksumError):
+        download(FakeSession(), "http://files.example/f", dest, expected_sha256="0" * 64)
+    assert list(tmp_path.iterdir()) == []
+
+
+class GateStore:
+    """``fetch`` blocks on ``gate`` for urls on the slow host and records concurrency per host."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.lock = threading.Lock()
+        self.running, self.peak, self.order = {}, {}, []
+
+    def fetch(self, session, url):
+        host = url.split("/")[2]
+        with self.lock:
+            self.running[host] = self.running.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+            self.order.append(url)
+        if host == "slow.example":
+            assert self.gate.wait(5)
+        with self.lock:
+            self.running[host] -= 1
+        return url
+
+
+def test_queued_jobs_do_not_hold_workers_another_host_could_use():
+    store = GateStore()
+    with Downloader(workers=3, per_host=1, session=object()) as pool:
+        slow = [pool.submit_to_store(store, f"http://slow.example/{n}") for n in range(3)]
+        fast = pool.submit_to_store(store, "http://fast.example/1")
+
+        assert fast.result(timeout=5) == "http://fast.example/1"
+        assert not any(f.done() for f in slow)
+        store.gate.set()
+        assert [f.result(timeout=5) for f in slow] == [f"http://slow.example/{n}" for n in range(3)]
+
+    assert store.peak == {"slow.example": 1, "fast.example": 1}
+    assert [u for u in store.order if "slow" in u] == [f"http://slow.example/{n}" for n in range(3)]
+
+
+def test_failed_job_releases_its_host_slot():
+    class FailingStore:
+        def fetch(self, session, url):
+            if url.endswith("/bad"):
+                raise requests.ConnectionError("refused")
+            return url
+
+    with Downloader(workers=2, per_host=1, session=object()) as pool:
+        bad = pool.submit_to_store(FailingStore(), "http://h.example/bad")
+        good = pool.submit_to_store(FailingStore(), "http://h.example/good")
+        with pytest.raises(requests.ConnectionError):
+            bad.result(timeout=5)
+        assert good.result(timeout=5) == "http://h.example/good"
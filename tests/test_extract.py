@@ -0,0 +1,93 @@
+"""Declarative DOM extraction: the BeautifulSoup backend and the WebDriver hand-off."""
+
+from bs4 import BeautifulSoup
+
+from common.extract import Field, PanelSpec, RowSpec, extract, extract_panel, extract_rows
+
+PAGE = """<html><body>
+<table id="results"><tbody>
+  <tr><th>Bid</th><th>Agency</th><th>Docs</th></tr>
+  <tr><td><a href="/bid/1">  B-1 </a></td><td>Parks
+      Dept</td><td><a href="a.pdf">A</a><a href="b.pdf">B</a></td></tr>
+  <tr><td><a href="/bid/2" aria-label="Bid two">B-2</a></td><td></td></tr>
+  <tr><td>short row</td></tr>
+</tbody></table>
+<dl class="contact">
+  <div class="item"><dt>Buyer Name:</dt><dd>Pat Lee</dd></div>
+  <div class="item"><dt>Buyer Email:</dt><dd><a href="mailto:pat@example.gov">pat@example.gov</a></dd></div>
+</dl>
+</body></html>"""
+
+RESULTS = RowSpec(
+    root="#results",
+    rows=":scope > tbody > tr",
+    min_cells=2,
+    fields={
+        "bid": Field("a", cell=0),
+        "url": Field("a", attr="href", cell=0),
+        "label": Field("a", attr="aria-label|text", cell=0),
+        "agency": Field(cell=1),
+        "docs": Field("a", attr="href", cell=2, many=True),
+    },
+)
+
+CONTACT = PanelSpec(
+    items="dl.contact .item",
+    label="dt",
+    labels={"name": "Buyer Name", "email": "Email", "phone": "Phone"},
+    value=Field("dd"),
+)
+
+
+def test_rows_read_cells_with_fallbacks_and_absolute_urls():
+    rows = extract_rows(PAGE, RESULTS, base_url="https://bids.example/search/")
+
+    assert rows == [
+        {
+            "bid": "B-1",
+            "url": "https://bids.example/bid/1",
+            "label": "B-1",
+            "agency": "Parks Dept",
+            "docs": ["https://bids.example/search/a.pdf", "https://bids.example/search/b.pdf"],
+        },
+        {"bid": "B-2", "url": "https://bids.example/bid/2", "label": "Bid two", "agency": "", "docs": []},
+    ]
+
+
+def test_panel_takes_the_first_item_whose_label_matches():
+    assert extract_panel(PAGE, CONTACT) == {"name": "Pat Lee", "email": "pat@example.gov", "phone": ""}
+
+
+def test_missing_root_yields_empty_results():
+    specs = {
+        "rows": RowSpec(root="#missing", rows="tr", fields={"a": Field()}),
+        "panel": PanelSpec(root="#missing", items="div", labels={"x": "X"}),
+    }
+    assert extract(PAGE, specs) == {"rows": [], "panel": None}
+    assert extract_panel(PAGE, specs["panel"]) == {"x": ""}
+
+
+def test_scope_and_soup_sources_match_the_string_source():
+    soup = BeautifulSoup(PAGE, "html.parser")
+    assert extract_rows(soup, RESULTS) == extract_rows(PAGE, RESULTS)
+
+    second_row = soup.select("#results tr")[2]
+    spec = RowSpec(rows="a", fields={"bid": Field()})
+    assert extract_rows(soup, spec, scope=second_row) == [{"bid": "B-2"}]
+
+
+def test_driver_sources_run_one_script_with_the_specs():
+    class FakeDriver:
+        def __init__(self):
+            self.calls = []
+
+        def execute_script(self, script, specs, scope):
+            self.calls.append((specs, scope))
+            return {"rows": [{"bid": "B-9"}]}
+
+    driver = FakeDriver()
+    assert extract_rows(driver, RESULTS) == [{"bid": "B-9"}]
+    (specs, scope), = driver.calls
+    assert specs["rows"]["kind"] == "rows"
+    assert specs["rows"]["fields"]["docs"] == {"css": "a", "attr": "href", "cell": 2, "many": True}
+    assert scope is None
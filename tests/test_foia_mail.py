@@ -0,0 +1,152 @@
+"""FOIA email dispatch: templates, per-agency pacing, per-draft failures and the ledger."""
+
+from email.message import EmailMessage
+
+import pandas as pd
+
+from common.foia_mail import AgencyQueue, Draft, dispatch, render_state, send_request
+from common.store import RequestKey
+
+SMTP = {"sender_name": "Requester", "sender_email": "requester@example.org"}
+
+
+class FakeTransport:
+    def __init__(self, refuse=()):
+        self.sent, self.refuse = [], set(refuse)
+
+    def send(self, msg):
+        if msg["To"] in self.refuse:
+            raise RuntimeError("550 mailbox unavailable")
+        self.sent.append(msg)
+
+
+ROWS = pd.DataFrame([
+    {"notice_id": "N-1", "title": "Road salt", "agency": "DOT", "award_date": "2025-01-01",
+     "awarded_vendor": "Acme", "award_amount": "100", "page_url": "http://x/1"},
+    {"notice_id": "N-2", "title": "Sand", "agency": "DOT", "award_date": "2025-02-01",
+     "awarded_vendor": "Zeta", "award_amount": "200", "page_url": "http://x/2"},
+])
+
+
+def run(drafts, transport, **kwargs):
+    results = []
+    dispatch(drafts, transport, SMTP, lambda d, status, detail: results.append((d.notice_id, status)),
+             agency_per_minute=60000, **kwargs)
+    return sorted(results)
+
+
+def draft(agency, n, to="foia@example.gov"):
+    return Draft("Maryland", n, to, f"Request {n}", "Body", agency=agency, notice_id=f"{agency}-{n}")
+
+
+def test_render_state_fills_the_template_per_row():
+    drafts = render_state("maryland", ROWS)
+    assert [d.notice_id for d in drafts] == ["N-1", "N-2"]
+    assert {d.to for d in drafts} == {"dgs.piarequest@maryland.gov"}
+    assert "Road salt (Notice N-1)" in drafts[0].subject and "Sand (Notice N-2)" in drafts[1].subject
+    assert drafts[0].key != drafts[1].key
+
+
+def test_dispatch_sends_every_draft_once_across_workers():
+    transport = FakeTransport()
+    drafts = [draft("DOT", n) for n in range(5)] + [draft("DNR", n) for n in range(5)]
+    results = run(drafts, transport, workers=3)
+    assert [status for _, status in results] == ["SENT"] * 10
+    assert sorted(m["Subject"] for m in transport.sent) == sorted(d.subject for d in drafts)
+
+
+def test_agency_queue_paces_each_agency_and_keeps_input_order():
+    drafts = [draft("DOT", 1), draft("DOT", 2), draft("DNR", 1)]
+    queue = AgencyQueue(drafts, {"DNR": 0}, default_per_minute=6)
+    handed = []
+    while (item := queue.next()) is not None:
+        handed.append(item)
+    start = min(at for _, at in handed)
+    offsets = {d.notice_id: round(at - start, 3) for d, at in handed}
+    assert offsets == {"DOT-1": 0.0, "DOT-2": 10.0, "DNR-1": 0.0}
+    assert [d.notice_id for d, _ in handed if d.agency == "DOT"] == ["DOT-1", "DOT-2"]
+
+
+def test_dispatch_survives_refused_recipients_and_failing_result_logs():
+    transport = FakeTransport(refuse={"bad@example.gov"})
+    drafts = [draft("DOT", 1), draft("DOT", 2, to="bad@example.gov"), draft("DOT", 3)]
+    statuses = []
+
+    def on_result(d, status, detail):
+        statuses.append((d.notice_id, status))
+        raise ValueError("log file is open in Excel")
+
+    dispatch(drafts, transport, SMTP, on_result, agency_per_minute=60000)
+    assert sorted(statuses) == [("DOT-1", "SENT"), ("DOT-2", "ERROR"), ("DOT-3", "SENT")]
+    assert len(transport.sent) == 2
+
+
+# --- Ledger: each request goes out at most once ---
+def message(to="foia@dot.md.gov"):
+    msg = EmailMessage()
+    msg["To"], msg["Message-ID"] = to, "<1@example.org>"
+    return msg
+
+
+def key(notice_id="N-1"):
+    return RequestKey.of("Maryland", "foia@dot.md.gov", notice_id, "Please send the award.", {})
+
+
+def test_sent_once_with_the_message_id(ledger):
+    transport = FakeTransport()
+    assert send_request(transport, message, ledger, key()) == ("SENT", "")
+    assert ledger.request(key())["confirmation"] == "<1@example.org>"
+    status, detail = send_request(transport, message, ledger, key())
+    assert status == "SKIPPED" and detail.startswith("sent")
+    assert len(transport.sent) == 1
+
+
+def test_failed_send_is_recorded_and_retried(ledger):
+    status, detail = send_request(FakeTransport(refuse={"foia@dot.md.gov"}), message, ledger, key())
+    assert (status, detail) == ("ERROR", "550 mailbox unavailable")
+    assert ledger.request_status(key()) == "failed"
+    assert send_request(FakeTransport(), message, ledger, key())[0] == "SENT"
+
+
+def test_build_error_is_recorded_as_failed(ledger):
+    def build():
+        raise KeyError("Title")
+
+    assert send_request(FakeTransport(), build, ledger, key())[0] == "ERROR"
+    assert ledger.request_status(key()) == "failed"
+
+
+def test_ledger_error_after_sending_keeps_the_request_pending(ledger, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(ledger, "finish_request", broken)
+    transport = FakeTransport()
+    assert send_request(transport, message, ledger, key()) == ("SENT", "")
+    monkeypatch.undo()
+    assert ledger.request_status(key()) == "pending"
+    assert send_request(transport, message, ledger, key())[0] == "SKIPPED"
+    assert len(transport.sent) == 1
+
+
+def test_without_a_ledger_every_call_sends():
+    transport = FakeTransport()
+    send_request(transport, message)
+    send_request(transport, message)
+    assert len(transport.sent) == 2
+
+
+def test_dispatch_skips_what_the_ledger_has_sent_in_any_row_order(ledger):
+    transport = FakeTransport()
+    assert run(render_state("maryland", ROWS), transport, ledger=ledger) == [("N-1", "SENT"), ("N-2", "SENT")]
+    again = render_state("maryland", ROWS.iloc[::-1])
+    assert run(again, transport, ledger=ledger) == [("N-1", "SKIPPED"), ("N-2", "SKIPPED")]
+    assert len(transport.sent) == 2
+
+
+def test_dispatch_reports_ledger_errors_per_draft(ledger, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(ledger, "begin_request", broken)
+    assert run(render_state("maryland", ROWS), FakeTransport(), ledger=ledger) == [("N-1", "ERROR"), ("N-2", "ERROR")]
@@ -0,0 +1,97 @@
+"""FormRunner: state file, ledger and retries (browserless, plus a browser that never starts)."""
+
+import json
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from common.form_runner import FormRunner  # noqa: E402
+
+
+def runner(tmp_path, submit, ledger=None, **kwargs):
+    return FormRunner("Testland", submit, portal="https://forms.example.gov/request", key=lambda row: row["id"],
+                      state_path=str(tmp_path / "state.jsonl"), ledger=ledger,
+                      template=lambda row: f"Please send the proposals for {row['id']}.", **kwargs)
+
+
+def phases(tmp_path):
+    with open(tmp_path / "state.jsonl") as f:
+        return [(e["key"], e["phase"]) for e in map(json.loads, f)]
+
+
+def test_rows_the_ledger_has_sent_are_not_submitted_again(tmp_path, ledger):
+    calls = []
+
+    def submit(driver, row, n):
+        calls.append(row["id"])
+        return {"id": row["id"], "ok": row["id"] != "bad"}
+
+    rows = [{"id": "a"}, {"id": "b"}, {"id": "bad"}]
+    first = runner(tmp_path, submit, ledger, browserless=True, accepted=lambda r: r["ok"])
+    assert first.run(rows) == [{"id": "a", "ok": True}, {"id": "b", "ok": True}, {"id": "bad", "ok": False}]
+    assert first.stats["failed"] == 1
+
+    # A fresh state file: only the ledger remembers what went out.
+    (tmp_path / "state.jsonl").unlink()
+    second = runner(tmp_path, submit, ledger, browserless=True, accepted=lambda r: r["ok"])
+    assert second.run(rows)[:2] == [{"id": "a", "ok": True}, {"id": "b", "ok": True}]
+    assert sorted(calls) == ["a", "b", "bad", "bad"]          # rows run on several workers
+    assert second.stats["resumed"] == 2
+
+
+def test_a_row_error_does_not_stop_the_batch(tmp_path, ledger):
+    def submit(driver, row, n):
+        if row["id"] == "boom":
+            raise RuntimeError("portal returned 500")
+        return row["id"]
+
+    def on_result(row, result):
+        raise OSError("log file is open in Excel")
+
+    r = runner(tmp_path, submit, ledger, browserless=True, retries=0, on_result=on_result)
+    assert r.run([{"id": "a"}, {"id": "boom"}, {"id": "c"}]) == ["a", None, "c"]
+    assert r.stats["done"] == 2 and r.stats["failed"] == 1
+
+
+def test_a_browser_that_never_starts_leaves_nothing_pending(tmp_path, ledger):
+    def launcher(profile_dir, download_dir):
+        raise RuntimeError("no browser binary")
+
+    def submit(driver, row, n):
+        raise AssertionError("submitted without a browser")
+
+    r = runner(tmp_path, submit, ledger, retries=1, launcher=launcher)
+    assert r.run([{"id": "a"}]) == [None]
+    assert r.stats["failed"] == 1
+    assert phases(tmp_path) == [("a", "failed")]
+    assert ledger.ledger("Testland") == []
+
+
+def test_rows_without_a_key_use_their_notice_id_or_are_skipped(tmp_path):
+    seen = []
+
+    def submit(driver, row, n):
+        seen.append(n)
+        return "ok"
+
+    rows = [{"id": "a"}, {"id": float("nan"), "Notice ID": "N-7"}, {"id": " ", "Title": "no id"}]
+    r = runner(tmp_path, submit, browserless=True)
+    assert r.run(rows) == ["ok", "ok", None]
+    assert sorted(seen) == [1, 2]          # submit gets 1-based row numbers
+    assert r.stats["skipped"] == 1
+    assert sorted(phases(tmp_path)) == [("N-7", "done"), ("N-7", "started"), ("a", "done"), ("a", "started")]
+
+
+def test_a_result_accepted_rejects_is_recorded_failed_without_a_retry(tmp_path, ledger):
+    calls = []
+
+    def submit(driver, row, n):
+        calls.append(row["id"])
+        return "Form Rejected: Email is required" if row["id"] == "bad" else "Form Submitted Successfully"
+
+    r = runner(tmp_path, submit, ledger, browserless=True, retries=2,
+               accepted=lambda msg: msg == "Form Submitted Successfully")
+    assert r.run([{"id": "good"}, {"id": "bad"}]) == ["Form Submitted Successfully", "Form Rejected: Email is required"]
+    assert calls.count("bad") == 1
+    assert dict(phases(tmp_path)) == {"good": "done", "bad": "failed"}
@@ -0,0 +1,68 @@
+"""Append-only JSONL output: resume keys, torn tails and compaction to a JSON array."""
+
+import json
+
+from common.jsonl import JsonlWriter, compact_jsonl, iter_jsonl, read_jsonl
+
+
+def test_writer_skips_known_keys_and_reloads_them(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with JsonlWriter(path, key="id") as w:
+        assert w.write({"id": 1, "v": "a"})
+        assert not w.write({"id": 1, "v": "b"})
+        assert w.write({"id": 2, "v": "c"})
+        assert w.written == 2
+
+    with JsonlWriter(path, key="id") as w:
+        assert 1 in w and 2 in w and 3 not in w
+        assert not w.write({"id": 2, "v": "d"})
+        assert w.write({"id": 2, "v": "e"}, update=True)
+
+    assert [r["v"] for r in read_jsonl(path)] == ["a", "c", "e"]
+
+
+def test_writer_accepts_a_key_function(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with JsonlWriter(path, key=lambda r: (r["state"], r["no"])) as w:
+        assert w.write({"state": "TX", "no": 1})
+        assert w.write({"state": "IA", "no": 1})
+        assert not w.write({"state": "TX", "no": 1})
+
+
+def test_torn_last_line_is_skipped_and_terminated(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"id": 1}\n{"id": 2, "v":', encoding="utf-8")
+
+    assert list(iter_jsonl(str(path))) == [{"id": 1}]
+    with JsonlWriter(str(path), key="id") as w:
+        assert w.seen == {1}
+        w.write({"id": 2})
+
+    assert list(iter_jsonl(str(path))) == [{"id": 1}, {"id": 2}]
+
+
+def test_iter_jsonl_of_missing_file_is_empty(tmp_path):
+    assert read_jsonl(str(tmp_path / "missing.jsonl")) == []
+
+
+def test_compact_keeps_last_version_in_first_seen_order(tmp_path):
+    src, dest = str(tmp_path / "out.jsonl"), str(tmp_path / "out.json")
+    with JsonlWriter(src, key="id") as w:
+        w.write({"id": "a", "v": 1})
+        w.write({"id": "b", "v": 1})
+        w.write({"id": "a", "v": 2}, update=True)
+
+    count = compact_jsonl(src, dest, key="id", transform=lambda r: {**r, "seen": True})
+
+    assert count == 2
+    assert json.loads(open(dest, encoding="utf-8").read()) == [
+        {"id": "b", "v": 1, "seen": True},
+        {"id": "a", "v": 2, "seen": True},
+    ]
+    assert not (tmp_path / "out.json.tmp").exists()
+
+
+def test_compact_of_empty_input_writes_an_empty_array(tmp_path):
+    dest = tmp_path / "out.json"
+    assert compact_jsonl(str(tmp_path / "missing.jsonl"), str(dest)) == 0
+    assert json.loads(dest.read_text(encoding="utf-8")) == []
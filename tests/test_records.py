@@ -0,0 +1,73 @@
+"""Canonical records: vectorized date/money parsing and per-state normalization."""
+
+import math
+
+import pandas as pd
+import pytest
+
+from common.records import Opportunity, normalize_records, normalize_table, parse_dates, parse_money
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$1,250.00", 1250.0),
+    ("(300)", -300.0),
+    ("-$5", -5.0),
+    ("$-5", -5.0),
+    ("USD 10 USD", 10.0),
+    ("$1.2M", 1_200_000.0),
+    ("$.5k", 500.0),
+    ("2 billion", 2e9),
+    ("750000 | 750000", 1_500_000.0),
+])
+def test_parse_money_amounts(text, expected):
+    assert parse_money(pd.Series([text])).tolist() == [expected]
+
+
+@pytest.mark.parametrize("text", ["TBD", "See bid tab", "5 | TBD", "", None])
+def test_parse_money_non_amounts_are_nan(text):
+    assert math.isnan(parse_money(pd.Series([text]))[0])
+
+
+def test_parse_money_keeps_the_index():
+    col = pd.Series(["$1", "$2"], index=[10, 20])
+    assert parse_money(col).to_dict() == {10: 1.0, 20: 2.0}
+
+
+def test_parse_dates_mixed_formats_and_timezone_suffixes():
+    col = pd.Series(["01/05/2025 10:00:00 AM EST", "2025-02-03", "March 4, 2025", "TBD", None])
+    parsed = parse_dates(col)
+    assert parsed[:3].tolist() == [
+        pd.Timestamp("2025-01-05 10:00"), pd.Timestamp("2025-02-03"), pd.Timestamp("2025-03-04"),
+    ]
+    assert parsed[3:].isna().all()
+
+
+def test_normalize_table_maps_state_columns_and_keeps_the_rest():
+    df = pd.DataFrame([
+        {"solicitation_id": " 123-A ", "Title": "Paving", "due_date": "2025-01-05",
+         "value_per_contractor": "$-5", "Contractor": "", "vendor": "Acme", "page_note": "x"},
+        {"solicitation_id": "124", "Title": "Mowing", "due_date": "soon",
+         "value_per_contractor": "TBD", "Contractor": None, "vendor": None, "page_note": None},
+    ])
+    first, second = normalize_table(df, "Texas")
+
+    assert isinstance(first, Opportunity)
+    assert (first.state, first.notice_id, first.title) == ("Texas", "123-A", "Paving")
+    assert first.close_date == pd.Timestamp("2025-01-05")
+    assert first.amount == -5.0
+    # An empty state column falls through to the generic candidate.
+    assert first.vendor == "Acme"
+    assert first.extra == {"page_note": "x"} and first.raw == {}
+
+    assert second.vendor == ""
+    assert pd.isna(second.close_date) and math.isnan(second.amount)
+    assert second.raw == {"close_date": "soon", "amount": "TBD"}
+    assert second.extra == {}
+
+
+def test_normalize_records_flattens_list_values():
+    opp, = normalize_records(
+        [{"Bid Solicitation #": "B-1", "Awarded Vendor(s)": [{"name": "Acme"}, {"name": "Zeta"}]}], "nevada",
+    )
+    assert opp.notice_id == "B-1" and opp.vendor == "Acme; Zeta"
+    assert opp.to_dict()["attachments"] == ""
@@ -0,0 +1,99 @@
+"""Record/replay of portal traffic: request keys, cassettes, the requests hook and the server."""
+
+import base64
+import json
+
+import pytest
+import requests
+
+from common import replay
+from common.replay import Cassette, ReplayServer, body_hash, canonical_url
+
+
+def entry(method, url, text, req_body=None, status=200, headers=None):
+    return {
+        "method": method, "url": url, "body_hash": body_hash(req_body), "status": status, "reason": "OK",
+        "headers": headers or {"Content-Type": "application/json"},
+        "body": base64.b64encode(text.encode()).decode("ascii"),
+    }
+
+
+def body(e):
+    return json.loads(base64.b64decode(e["body"]))
+
+
+@pytest.fixture
+def cassette_file(tmp_path):
+    path = tmp_path / "portal.jsonl"
+    entries = [
+        entry("GET", "https://bids.example.gov/list?page=1", '{"page": 1}'),
+        entry("GET", "https://bids.example.gov/list?page=1", '{"page": "1 again"}'),
+        entry("POST", "https://bids.example.gov/search", '{"hits": "open"}', req_body='{"status": "open", "n": 1}'),
+        entry("POST", "https://bids.example.gov/search", '{"hits": "closed"}', req_body='{"status": "closed"}'),
+        entry("GET", "https://bids.example.gov/bid/1", '<a href="https://bids.example.gov/doc/1">doc</a>',
+              headers={"Content-Type": "text/html"}),
+    ]
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def hook():
+    yield replay.install
+    replay.uninstall()
+
+
+def test_canonical_url_sorts_the_query_and_drops_volatile_params():
+    assert canonical_url("HTTPS://Bids.Example.gov?b=2&_=123&a=1&api_key=secret") == "https://bids.example.gov/?a=1&b=2"
+
+
+def test_body_hash_ignores_json_key_order():
+    assert body_hash('{"a": 1, "b": 2}') == body_hash(b'{"b":2,"a":1}')
+    assert body_hash("a=1") != body_hash("a=2")
+    assert body_hash(None) == body_hash("") == ""
+
+
+def test_cassette_replays_repeats_in_order_and_falls_back_to_the_url(cassette_file):
+    cassette = Cassette(str(cassette_file))
+
+    url = "https://bids.example.gov/list?_=1&page=1"
+    assert [body(cassette.match("GET", url, None)) for _ in range(3)] == [
+        {"page": 1}, {"page": "1 again"}, {"page": "1 again"},
+    ]
+    search = "https://bids.example.gov/search"
+    assert body(cassette.match("POST", search, '{"status": "closed"}')) == {"hits": "closed"}
+    assert body(cassette.match("POST", search, '{"status": "awarded"}')) == {"hits": "open"}
+    assert cassette.match("GET", "https://bids.example.gov/missing", None) is None
+    assert cassette.misses == ["GET https://bids.example.gov/missing"]
+
+
+def test_replay_hook_serves_requests_without_the_network(cassette_file, hook):
+    hook("replay", str(cassette_file))
+    session = requests.Session()
+
+    resp = session.post("https://bids.example.gov/search", json={"n": 1, "status": "open"})
+    assert resp.status_code == 200 and resp.json() == {"hits": "open"}
+
+    miss = session.get("https://bids.example.gov/missing")
+    assert miss.status_code == 404 and miss.headers["X-Replay-Miss"] == "1"
+
+
+def test_server_rewrites_links_and_the_hook_records_through_it(cassette_file, tmp_path, hook):
+    server = ReplayServer(Cassette(str(cassette_file))).start()
+    try:
+        page = requests.get(server.url_for("https://bids.example.gov/bid/1"), timeout=10)
+        assert page.status_code == 200
+        assert f'href="{server.url}/bids.example.gov/doc/1"' in page.text
+
+        recorded = tmp_path / "recorded.jsonl"
+        cassette = hook("record", str(recorded))
+        resp = requests.get(server.url_for("https://bids.example.gov/list?page=1"), timeout=10)
+        cassette.close()
+    finally:
+        server.stop()
+
+    assert resp.json() == {"page": 1}
+    (saved,) = [json.loads(line) for line in recorded.read_text(encoding="utf-8").splitlines()]
+    assert saved["url"] == canonical_url(server.url_for("https://bids.example.gov/list?page=1"))
+    assert body(saved) == {"page": 1}
+    assert replay.METRICS.http_requests >= 1
@@ -0,0 +1,70 @@
+"""Multi-state runner: discovery, follow-up scripts and record counting."""
+
+import json
+from pathlib import Path
+
+from common import runner
+from common.runner import count_records, discover, run_job
+
+
+def write(path: Path, text: str = "") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_discover_prefers_new_scripts_and_chains_followers(tmp_path, monkeypatch):
+    monkeypatch.setitem(runner.RUN_AFTER, "Hampshire/nh_files.py", "nh.py")
+    write(tmp_path / "Hampshire" / "nh.py", 'URL = "https://apps.nh.example.gov/bids"')
+    write(tmp_path / "Hampshire" / "nh_files.py", 'URL = "https://files.nh.example.gov/x"')
+    write(tmp_path / "Texas" / "texas.py")
+    write(tmp_path / "Texas" / "texas_New.py", 'URL = "https://www.txsmartbuy.gov/esbd"')
+    write(tmp_path / "_shared" / "helpers.py")
+
+    jobs = {job.name: job for job in discover(tmp_path)}
+
+    assert sorted(jobs) == ["Hampshire/nh", "Texas/texas_New"]
+    nh = jobs["Hampshire/nh"]
+    assert [p.name for p in nh.scripts] == ["nh.py", "nh_files.py"]
+    assert nh.hosts == ("apps.nh.example.gov", "files.nh.example.gov")
+    assert jobs["Texas/texas_New"].hosts == ("txsmartbuy.gov",) and jobs["Texas/texas_New"].then == ()
+
+    assert len(discover(tmp_path, all_scripts=True)) == 3
+
+
+def chain_job(tmp_path, first: str, second: str) -> runner.Job:
+    scripts = tmp_path / "scripts"
+    a = write(scripts / "a.py", first)
+    b = write(scripts / "b.py", second)
+    return runner.Job("State", a, (), (b,), attempts=1)
+
+
+def test_run_job_runs_followers_in_the_same_folder(tmp_path):
+    job = chain_job(
+        tmp_path,
+        "import json; json.dump([1, 2], open('rows.json', 'w'))",
+        "import json; rows = json.load(open('rows.json')); json.dump(rows + [3], open('more.json', 'w'))",
+    )
+    result = run_job(job, tmp_path / "out", timeout=60)
+
+    assert result["status"] == "ok" and result["records"] == 3
+    assert result["primary_output"] == str(Path("State") / "more.json")
+    assert result["then"] and result["then"][0].endswith("b.py")
+    log = (tmp_path / "out" / result["log"]).read_text(encoding="utf-8")
+    assert "=== a.py" in log and "=== b.py" in log
+
+
+def test_run_job_stops_the_chain_at_a_failing_script(tmp_path):
+    job = chain_job(tmp_path, "import sys; sys.exit(3)", "open('ran.txt', 'w')")
+    result = run_job(job, tmp_path / "out", timeout=60)
+
+    assert result["status"] == "failed" and result["exit_code"] == 3
+    assert not (tmp_path / "out" / "State" / "ran.txt").exists()
+
+
+def test_count_records_reads_each_output_format(tmp_path):
+    assert count_records(write(tmp_path / "a.jsonl", '{"a": 1}\n\n{"a": 2}\n')) == 2
+    assert count_records(write(tmp_path / "b.json", json.dumps({"results": [1, 2, 3]}))) == 3
+    assert count_records(write(tmp_path / "c.json", json.dumps({"page": 4}))) == 0
+    assert count_records(write(tmp_path / "d.csv", "h\n1\n2\n")) == 2
+    assert count_records(write(tmp_path / "e.json", "{torn")) == 0
@@ -0,0 +1,85 @@
+"""SAM.gov inactive set-aside sync: splitting the modified-date range under the 10k cap."""
+
+import importlib.util
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "Scrapper Codes" / "SAM_GOV" / "sam_gov_setaside_inactive.py"
+
+
+@pytest.fixture
+def sam(monkeypatch):
+    spec = importlib.util.spec_from_file_location("sam_gov_setaside_inactive", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "MAX_RESULTS_PER_QUERY", 100)
+    return module
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Answers list queries with the sum of ``per_day`` over the requested window."""
+
+    def __init__(self, per_day):
+        self.per_day = per_day
+        self.windows = []
+
+    def get(self, url, params=None, timeout=None):
+        day_from = date.fromisoformat(params["modified_date.from"][:10])
+        day_to = date.fromisoformat(params["modified_date.to"][:10])
+        self.windows.append((day_from, day_to))
+        total, day = 0, day_from
+        while day <= day_to:
+            total += self.per_day.get(day, 0)
+            day += timedelta(days=1)
+        return FakeResponse({"page": {"totalElements": total}})
+
+
+def test_format_window_covers_whole_days(sam):
+    assert sam.format_window(date(2005, 1, 1), date(2005, 12, 31)) == (
+        "2005-01-01+05:30", "2005-12-31T23:59:59+05:30",
+    )
+
+
+def test_small_window_is_kept_whole(sam):
+    session = FakeSession({date(2024, 1, 5): 10, date(2024, 1, 20): 5})
+    window = (date(2024, 1, 1), date(2024, 1, 31))
+    assert sam.plan_windows(session, "SBA", window) == [(window, 15)]
+    assert session.windows == [window]
+
+
+def test_empty_window_is_dropped(sam):
+    assert sam.plan_windows(FakeSession({}), "SBA", (date(2024, 1, 1), date(2024, 1, 31))) == []
+
+
+def test_full_window_splits_until_every_piece_is_under_the_cap(sam):
+    per_day = {date(2024, 1, 1) + timedelta(days=n): 30 for n in range(10)}
+    plan = sam.plan_windows(FakeSession(per_day), "SBA", (date(2024, 1, 1), date(2024, 1, 10)))
+
+    assert all(total < 100 for _, total in plan)
+    assert sum(total for _, total in plan) == 300
+    # The pieces tile the original range in order, without gaps or overlaps.
+    assert plan[0][0][0] == date(2024, 1, 1) and plan[-1][0][1] == date(2024, 1, 10)
+    for (prev, _), (cur, _) in zip(plan, plan[1:]):
+        assert cur[0] == prev[1] + timedelta(days=1)
+
+
+def test_single_over_full_day_is_returned_with_its_total(sam, caplog):
+    per_day = {date(2024, 3, 2): 250, date(2024, 3, 3): 5}
+    plan = sam.plan_windows(FakeSession(per_day), "SBA", (date(2024, 3, 1), date(2024, 3, 4)))
+
+    assert ((date(2024, 3, 2), date(2024, 3, 2)), 250) in plan
+    assert sum(total for _, total in plan) == 255
+    assert "only the first 100 are reachable" in caplog.text
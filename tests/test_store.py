@@ -0,0 +1,107 @@
+"""Submission ledger: request identity and status transitions."""
+
+import threading
+
+import pytest
+
+from common.store import RequestKey, ResultsStore, template_hash
+
+BODY = ("I request the winning proposal for Road Salt (N-1), awarded 2025-01-01 "
+        "to Acme Corp in the amount of $100.")
+ROW = {"Notice ID": "N-1", "Title": "Road Salt", "Vendor": "Acme Corp", "Award Date": "2025-01-01", "Amount": "$100"}
+
+
+def key(notice_id="N-1", text=BODY, row=ROW):
+    return RequestKey.of("Maryland", "Records <foia@dot.md.gov>", notice_id, text, row)
+
+
+# --- Request identity ---
+def test_key_normalizes_state_and_agency():
+    k = key()
+    assert k == RequestKey.of("MARYLAND", "FOIA@dot.md.gov", "N-1", BODY, ROW)
+    assert k.agency == "dot.md.gov"
+
+
+@pytest.mark.parametrize("cell", ["the", "in", "ward", "2025", "Road", "Salt", "Corp Inc", "10", "winning"])
+def test_template_hash_ignores_unrelated_cells(cell):
+    assert template_hash(BODY, list(ROW.values()) + [cell]) == template_hash(BODY, ROW.values())
+
+
+def test_template_hash_masks_interpolated_values_and_dates():
+    other = BODY.replace("Road Salt", "Sand").replace("N-1", "N-2").replace("2025-01-01", "March 3, 2024")
+    row = dict(ROW, **{"Notice ID": "N-2", "Title": "Sand", "Award Date": "March 3, 2024"})
+    assert template_hash(other, row.values()) == template_hash(BODY, ROW.values())
+
+
+def test_template_hash_changes_with_the_wording():
+    assert template_hash(BODY.replace("winning", "awarded"), ROW.values()) != template_hash(BODY, ROW.values())
+
+
+def test_template_hash_masks_whole_values_only():
+    # "Acme" must not be cut out of "Acmeville", which is wording here.
+    text = "Sent to Acme from Acmeville."
+    assert template_hash(text, ["Acme"]) != template_hash("Sent to Zeta from Zetaville.", ["Zeta"])
+    assert template_hash(text, ["Acme"]) == template_hash("Sent to Zeta from Acmeville.", ["Zeta"])
+
+
+# --- Ledger ---
+def test_begin_then_sent_is_never_sent_again(ledger):
+    k = key()
+    assert ledger.request_status(k) is None
+    assert ledger.begin_request(k, channel="email")
+    assert ledger.request_status(k) == "pending"
+    ledger.finish_request(k, "sent", confirmation="<id@x>", channel="email")
+    assert ledger.request_status(k) == "sent"
+    assert not ledger.begin_request(k, channel="email")
+    assert not ledger.begin_request(k, channel="email", retry_pending=True)
+    assert ledger.sent_requests("maryland") == {k}
+    assert ledger.request(k)["confirmation"] == "<id@x>"
+    assert [e["event"] for e in ledger.ledger("Maryland")] == ["attempt", "sent"]
+
+
+def test_pending_is_held_back_unless_retried(ledger):
+    k = key()
+    assert ledger.begin_request(k)
+    assert not ledger.begin_request(k)
+    assert ledger.begin_request(k, retry_pending=True)
+    assert [e["event"] for e in ledger.ledger("Maryland")] == ["attempt", "attempt"]
+
+
+def test_failed_is_tried_again(ledger):
+    k = key()
+    assert ledger.begin_request(k)
+    ledger.finish_request(k, "failed", detail="550 mailbox unavailable")
+    assert ledger.request_status(k) == "failed"
+    assert ledger.begin_request(k)
+    assert ledger.request_status(k) == "pending"
+
+
+def test_finish_rejects_unknown_status(ledger):
+    with pytest.raises(ValueError):
+        ledger.finish_request(key(), "pending")
+
+
+def test_same_request_from_reordered_rows(ledger):
+    assert ledger.begin_request(key())
+    ledger.finish_request(key(), "sent")
+    reordered = dict(reversed(list(ROW.items())), Status="Closed")
+    assert not ledger.begin_request(key(row=reordered))
+
+
+def test_only_one_of_two_stores_begins_a_request(tmp_path):
+    path = str(tmp_path / "results.db")
+    stores = [ResultsStore(path) for _ in range(2)]
+    barrier, began = threading.Barrier(2), []
+
+    def run(store):
+        barrier.wait()
+        began.append(store.begin_request(key()))
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for s in stores:
+        s.close()
+    assert sorted(began) == [False, True]
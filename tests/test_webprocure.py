@@ -0,0 +1,81 @@
+"""WebProcure client: record building and listing/detail crawling."""
+
+import requests
+
+from common.webprocure import TENANTS, WebProcureClient, build_record, tenant_for
+
+LISTING = [{"bidNumber": f"RI-{n}", "bidid": 100 + n, "title": f"Bid {n}", "openDate": 1735732800000}
+           for n in range(5)]
+
+
+def detail(bidid):
+    return {"records": [{
+        "title": f"Network cabling {bidid}",
+        "cdate": 1704110400000,
+        "bidContacts": [{"bidContactDetail": {"contactinfo": "Division of Purchases\r\nJane Doe\r\njane@purchasing.ri.gov"}}],
+        "bidDocs": [{"docAssoc": {"docDoc": {"docid": 7, "name": "Award Notice.pdf", "mimeType": "application/pdf"}}}],
+    }]}
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Listing pages of two records; the detail of ``broken`` fails."""
+
+    def __init__(self, broken=()):
+        self.broken, self.offsets = set(broken), []
+
+    def get(self, url, params, timeout):
+        if url.endswith("/sols"):
+            self.offsets.append(params["from"])
+            return FakeResponse({"hits": len(LISTING), "records": LISTING[params["from"]:params["from"] + 2]})
+        bidid = int(url.rsplit("/", 1)[1])
+        if bidid in self.broken:
+            raise requests.ConnectionError("reset by peer")
+        return FakeResponse(detail(bidid))
+
+
+class NoLimit:
+    def acquire(self):
+        pass
+
+
+def test_build_record_merges_listing_and_detail():
+    rec = build_record(TENANTS["46"], LISTING[0], detail(100)["records"][0])
+    assert rec["notice_id"] == "RI-0"
+    assert rec["title"] == "Network cabling 100"
+    assert rec["industry"] == "Technology"
+    assert (rec["issuer"], rec["email"]) == ("Division of Purchases", "jane@purchasing.ri.gov")
+    assert rec["page_url"].endswith("/bidboard/bid/100?customerid=46")
+    assert rec["download_links"].startswith("Award Notice.pdf: ")
+    assert "docName=Award%20Notice.pdf" in rec["download_links"] and "eboid=46" in rec["download_links"]
+    assert "description" not in rec        # missing values are left out
+
+
+def test_unknown_customer_ids_get_a_generic_tenant():
+    assert tenant_for("51").source_name == "Connecticut"
+    assert tenant_for(77).output_prefix == "webprocure_77_awarded_bids"
+
+
+def test_scrape_keeps_listing_order_and_skips_failed_details():
+    session = FakeSession(broken={102})
+    client = WebProcureClient(TENANTS["46"], session=session, limiter=NoLimit(), workers=3)
+    records = client.scrape_awarded()
+    assert [r["notice_id"] for r in records] == ["RI-0", "RI-1", "RI-3", "RI-4"]
+    assert session.offsets == [0, 2, 4]
+
+
+def test_scrape_appends_to_the_callers_list():
+    into = [{"notice_id": "earlier"}]
+    client = WebProcureClient(TENANTS["46"], session=FakeSession(), limiter=NoLimit(), workers=2)
+    assert client.scrape_awarded(into) is into
+    assert len(into) == 1 + len(LISTING)